@@ -1,10 +1,18 @@
 """
 Advanced Retrieval System for DocScanner RAG
 Implements both keyword-based and embedding-based retrieval with hybrid approaches.
+
+Retrievers are shared per process (get_retriever): the Chroma client and
+the keyword index are opened once. A hybrid search runs the embedding and
+keyword legs concurrently and merges them by reciprocal-rank fusion.
 """
 
 import logging
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple, Set
 from dataclasses import dataclass, asdict
 from datetime import datetime
@@ -23,17 +31,23 @@ except ImportError:
 # Embedding imports removed to save memory. ChromaDB handles this natively.
 EMBEDDINGS_AVAILABLE = False
 
-# TF-IDF for keyword search
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    import numpy as np
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+# BM25 inverted index for keyword search (standard library only)
+from .keyword_index import BM25Index
+from .performance_monitor import get_performance_monitor
 
 logger = logging.getLogger(__name__)
 
+# Directory of the persisted keyword index (default: <db_path>/keyword_index)
+KEYWORD_INDEX_DIR = os.environ.get('KEYWORD_INDEX_DIR', '')
+# Threads running the embedding leg of hybrid searches (shared by all retrievers)
+RETRIEVAL_WORKERS = int(os.environ.get('RETRIEVAL_WORKERS', '4'))
+# Rank constant of reciprocal-rank fusion: higher values flatten the gap between ranks
+RRF_K = int(os.environ.get('RRF_K', '60'))
+
+EMBEDDING_LEG = 'embedding'
+KEYWORD_LEG = 'keyword'
+HYBRID_SEARCH = 'hybrid'
+
 @dataclass
 class RetrievalResult:
     """Represents a retrieval result with relevance score and metadata."""
@@ -48,21 +62,20 @@ class RetrievalResult:
 class AdvancedRetriever:
     """Advanced retrieval system with multiple strategies."""
     
-    def __init__(self, db_path: str = "./chroma_db", collection_name: str = "docscanner_knowledge"):
+    def __init__(self, db_path: str = "./chroma_db", collection_name: str = "docscanner_knowledge",
+                 keyword_index_dir: Optional[str] = None):
         self.db_path = db_path
         self.collection_name = collection_name
+        self.keyword_index_dir = keyword_index_dir or KEYWORD_INDEX_DIR or os.path.join(db_path, "keyword_index")
         self.chroma_client = None
         self.collection = None
         self.embedding_model = None
-        self.tfidf_vectorizer = None
-        self.tfidf_matrix = None
-        self.chunk_texts = []
-        self.chunk_metadata = []
+        self.keyword_index = None
         
         # Initialize components
         self._init_chromadb()
         self._init_embedding_model()
-        self._init_tfidf()
+        self._init_keyword_index()
     
     def _init_chromadb(self):
         """Initialize ChromaDB client and collection."""
@@ -94,28 +107,18 @@ class AdvancedRetriever:
         """Sentence transformer model is no longer used. ChromaDB handles embeddings internally via ONNX."""
         self.embedding_model = None
     
-    def _init_tfidf(self):
-        """Initialize TF-IDF vectorizer."""
-        if not SKLEARN_AVAILABLE:
-            logger.warning("Scikit-learn not available. TF-IDF search will be disabled.")
-            return
-        
+    def _init_keyword_index(self):
+        """Open the persisted BM25 keyword index (searchable without reindexing)."""
         try:
-            self.tfidf_vectorizer = TfidfVectorizer(
-                max_features=5000,
-                stop_words='english',
-                ngram_range=(1, 2),
-                min_df=1,
-                max_df=0.8
-            )
-            logger.info("✅ Initialized TF-IDF vectorizer")
+            self.keyword_index = BM25Index(self.keyword_index_dir)
+            logger.info(f"✅ Opened BM25 keyword index ({len(self.keyword_index)} chunks)")
         except Exception as e:
-            logger.error(f"Failed to initialize TF-IDF: {e}")
-            self.tfidf_vectorizer = None
+            logger.error(f"Failed to open keyword index, keeping it in memory: {e}")
+            self.keyword_index = BM25Index()
     
     def index_chunks(self, chunks: List[Any]) -> bool:
         """
-        Index chunks in both vector database and TF-IDF index.
+        Index chunks in both vector database and BM25 keyword index.
         
         Args:
             chunks: List of Chunk objects from chunking_strategies
@@ -189,25 +192,13 @@ class AdvancedRetriever:
                 logger.error(f"Failed to index chunks in ChromaDB: {e}")
                 success = False
         
-        # Index in TF-IDF
-        if self.tfidf_vectorizer is not None:
+        # Index in BM25 (only the new chunks are inverted; existing segments stay as they are)
+        if self.keyword_index is not None:
             try:
-                # Append new chunks to existing data
-                if hasattr(self, 'chunk_texts') and self.chunk_texts:
-                    all_texts = self.chunk_texts + chunk_texts
-                    all_metadata = self.chunk_metadata + chunk_metadatas
-                else:
-                    all_texts = chunk_texts
-                    all_metadata = chunk_metadatas
-                
-                # Rebuild TF-IDF with all documents
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(all_texts)
-                self.chunk_texts = all_texts
-                self.chunk_metadata = all_metadata
-                
-                logger.info(f"✅ Added {len(chunks)} chunks to TF-IDF index (total: {len(all_texts)})")
+                added = self.keyword_index.add(zip(chunk_ids, chunk_texts, chunk_metadatas))
+                logger.info(f"✅ Added {added} chunks to BM25 keyword index (total: {len(self.keyword_index)})")
             except Exception as e:
-                logger.error(f"Failed to index chunks in TF-IDF: {e}")
+                logger.error(f"Failed to index chunks in BM25 keyword index: {e}")
                 success = False
         
         return success
@@ -276,7 +267,7 @@ class AdvancedRetriever:
     def retrieve_keyword(self, query: str, n_results: int = 5, 
                         source_filter: Optional[str] = None) -> List[RetrievalResult]:
         """
-        Retrieve using TF-IDF keyword-based search.
+        Retrieve using BM25 keyword-based search.
         
         Args:
             query: Search query
@@ -286,39 +277,25 @@ class AdvancedRetriever:
         Returns:
             List of RetrievalResult objects
         """
-        if self.tfidf_vectorizer is None or self.tfidf_matrix is None:
-            logger.warning("TF-IDF not available for keyword retrieval")
+        if self.keyword_index is None or not len(self.keyword_index):
+            logger.warning("Keyword index empty or not available for keyword retrieval")
             return []
         
         try:
-            # Vectorize query
-            query_vector = self.tfidf_vectorizer.transform([query])
-            
-            # Calculate similarity scores
-            similarity_scores = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
-            
-            # Get top results
-            top_indices = np.argsort(similarity_scores)[::-1][:n_results * 2]  # Get more for filtering
+            # Apply source filter if specified
+            accept = None
+            if source_filter:
+                accept = lambda metadata: metadata.get('meta_source_type') == source_filter
             
             retrieval_results = []
-            
-            for idx in top_indices:
-                if len(retrieval_results) >= n_results:
-                    break
-                
-                metadata = self.chunk_metadata[idx]
-                
-                # Apply source filter if specified
-                if source_filter and metadata.get('meta_source_type') != source_filter:
-                    continue
-                
+            for hit in self.keyword_index.search(query, n_results, accept):
                 result = RetrievalResult(
-                    chunk_id=f"tfidf_{idx}",
-                    content=self.chunk_texts[idx],
-                    relevance_score=float(similarity_scores[idx]),
+                    chunk_id=hit.chunk_id,
+                    content=hit.content,
+                    relevance_score=hit.score,
                     retrieval_method="keyword",
-                    source_doc_id=metadata.get('source_doc_id', 'unknown'),
-                    metadata=metadata,
+                    source_doc_id=hit.metadata.get('source_doc_id', 'unknown'),
+                    metadata=dict(hit.metadata),
                     distance=None
                 )
                 retrieval_results.append(result)
@@ -336,6 +313,16 @@ class AdvancedRetriever:
         """
         Retrieve using hybrid approach combining embedding and keyword search.
         
+        Both legs run concurrently; their rankings are merged by weighted
+        reciprocal-rank fusion keyed by chunk id. Each result's metadata
+        carries the per-leg scores, ranks and latencies.
+        
+        ``relevance_score`` is the fused rank score, for ordering only: a
+        chunk ranked first by both legs scores 1.0, one ranked first by a
+        single leg scores about that leg's weight. Absolute thresholds
+        ("is this a good match") belong on ``metadata['weighted_score']``,
+        the weighted mean of the per-leg scores (each 0-1).
+        
         Args:
             query: Search query
             n_results: Number of results to return
@@ -344,51 +331,73 @@ class AdvancedRetriever:
             source_filter: Optional filter by source type
             
         Returns:
-            List of RetrievalResult objects sorted by hybrid score
+            List of RetrievalResult objects sorted by fused score
         """
         # Normalize weights
         total_weight = embedding_weight + keyword_weight
         embedding_weight /= total_weight
         keyword_weight /= total_weight
         
-        # Get results from both methods
-        embedding_results = self.retrieve_embedding(query, n_results * 2, source_filter)
-        keyword_results = self.retrieve_keyword(query, n_results * 2, source_filter)
+        # Run both legs at once: the embedding leg on the shared pool, the keyword leg here
+        started = time.perf_counter()
+        fetch = n_results * 2
+        timings = {}
+        
+        def timed(leg, retrieve):
+            leg_started = time.perf_counter()
+            try:
+                return retrieve(query, fetch, source_filter)
+            finally:
+                timings[leg] = time.perf_counter() - leg_started
         
-        # Combine results
-        combined_scores = defaultdict(lambda: {'embedding': 0, 'keyword': 0, 'result': None})
+        embedding_future = None
+        if self.collection is not None:
+            embedding_future = get_retriever_manager().executor().submit(timed, EMBEDDING_LEG, self.retrieve_embedding)
+        keyword_results = timed(KEYWORD_LEG, self.retrieve_keyword)
+        embedding_results = embedding_future.result() if embedding_future is not None else []
         
-        # Add embedding scores
-        for result in embedding_results:
-            combined_scores[result.content]['embedding'] = result.relevance_score
-            combined_scores[result.content]['result'] = result
+        # Reciprocal-rank fusion keyed by chunk id: each leg adds weight / (RRF_K + rank)
+        top_keyword_score = max((result.relevance_score for result in keyword_results), default=0) or 1.0
+        fused = {}
+        for leg, weight, results in ((EMBEDDING_LEG, embedding_weight, embedding_results),
+                                     (KEYWORD_LEG, keyword_weight, keyword_results)):
+            for rank, result in enumerate(results, 1):
+                entry = fused.get(result.chunk_id)
+                if entry is None:
+                    entry = fused[result.chunk_id] = {'result': result, 'fused': 0.0, 'scores': {}, 'ranks': {}}
+                entry['fused'] += weight / (RRF_K + rank)
+                entry['ranks'][leg] = rank
+                # BM25 scores are unbounded: scale them to 0-1 by the best hit
+                entry['scores'][leg] = (result.relevance_score / top_keyword_score if leg == KEYWORD_LEG
+                                        else result.relevance_score)
         
-        # Add keyword scores
-        for result in keyword_results:
-            combined_scores[result.content]['keyword'] = result.relevance_score
-            if combined_scores[result.content]['result'] is None:
-                combined_scores[result.content]['result'] = result
+        timings[HYBRID_SEARCH] = time.perf_counter() - started
+        monitor = get_performance_monitor()
+        latency_ms = {}
+        for leg, seconds in timings.items():
+            monitor.record_retrieval(leg, seconds)
+            latency_ms[leg] = round(seconds * 1000, 2)
         
-        # Calculate hybrid scores
         hybrid_results = []
-        for content, scores in combined_scores.items():
-            hybrid_score = (
-                embedding_weight * scores['embedding'] +
-                keyword_weight * scores['keyword']
-            )
-            
-            result = scores['result']
-            result.relevance_score = hybrid_score
+        for entry in fused.values():
+            result = entry['result']
+            # Scaled so that a chunk ranked first by both legs scores 1.0
+            result.relevance_score = entry['fused'] * (RRF_K + 1)
             result.retrieval_method = "hybrid"
-            result.metadata['embedding_score'] = scores['embedding']
-            result.metadata['keyword_score'] = scores['keyword']
-            
+            result.metadata['embedding_score'] = entry['scores'].get(EMBEDDING_LEG, 0)
+            result.metadata['keyword_score'] = entry['scores'].get(KEYWORD_LEG, 0)
+            result.metadata['weighted_score'] = (embedding_weight * result.metadata['embedding_score'] +
+                                                 keyword_weight * result.metadata['keyword_score'])
+            result.metadata['embedding_rank'] = entry['ranks'].get(EMBEDDING_LEG)
+            result.metadata['keyword_rank'] = entry['ranks'].get(KEYWORD_LEG)
+            result.metadata['retrieval_latency_ms'] = latency_ms
             hybrid_results.append(result)
         
-        # Sort by hybrid score and return top results
+        # Sort by fused score and return top results
         hybrid_results.sort(key=lambda x: x.relevance_score, reverse=True)
         
-        logger.info(f"🔍 Hybrid retrieval returned {len(hybrid_results[:n_results])} results")
+        logger.info(f"🔍 Hybrid retrieval returned {len(hybrid_results[:n_results])} results "
+                    f"({', '.join(f'{leg} {ms} ms' for leg, ms in latency_ms.items())})")
         return hybrid_results[:n_results]
     
     def retrieve_contextual(self, query: str, document_context: str = "", 
@@ -434,7 +443,8 @@ class AdvancedRetriever:
         stats = {
             'chromadb_available': CHROMADB_AVAILABLE,
             'embeddings_available': EMBEDDINGS_AVAILABLE,
-            'tfidf_available': SKLEARN_AVAILABLE,
+            # Keyword search is always available (BM25 index); key kept for existing callers
+            'tfidf_available': self.keyword_index is not None,
             'collection_count': 0,
             'total_chunks': 0,
             'golden_patterns_count': 0
@@ -457,9 +467,11 @@ class AdvancedRetriever:
             except Exception as e:
                 logger.warning(f"Error getting collection stats: {e}")
                 
-        if self.tfidf_matrix is not None:
-            stats['tfidf_chunks'] = self.tfidf_matrix.shape[0]
-            stats['tfidf_features'] = self.tfidf_matrix.shape[1]
+        if self.keyword_index is not None:
+            keyword_stats = self.keyword_index.stats()
+            stats['keyword_chunks'] = keyword_stats['documents']
+            stats['keyword_terms'] = keyword_stats['terms']
+            stats['keyword_segments'] = keyword_stats['segments']
             
         return stats
     
@@ -468,10 +480,94 @@ class AdvancedRetriever:
         """Search within a specific source type (manual, style_guide, etc.)."""
         return self.retrieve_hybrid(query, n_results, source_filter=source_type)
 
+    def clear(self) -> None:
+        """Delete every indexed chunk: the Chroma collection is recreated empty, the keyword index emptied."""
+        if self.chroma_client is not None:
+            try:
+                self.chroma_client.delete_collection(name=self.collection_name)
+            except ValueError:
+                pass  # Already gone
+            self.collection = self.chroma_client.create_collection(
+                name=self.collection_name,
+                metadata={"description": "DocScanner Knowledge Base"}
+            )
+            logger.info(f"✅ Cleared ChromaDB collection: {self.collection_name}")
+        if self.keyword_index is not None:
+            self.keyword_index.clear()
+
+    def close(self) -> None:
+        """Release the keyword index (the Chroma client is shared by chromadb itself)."""
+        if self.keyword_index is not None:
+            self.keyword_index.close()
+
+
+class RetrieverManager:
+    """
+    Process-wide retrievers, one per (db_path, collection), and the thread
+    pool their hybrid searches run the embedding leg on.
+    """
+    
+    def __init__(self, workers: int = RETRIEVAL_WORKERS):
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._retrievers: Dict[Tuple[str, str], AdvancedRetriever] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def get(self, db_path: str = "./chroma_db", collection_name: str = "docscanner_knowledge") -> AdvancedRetriever:
+        """The shared retriever of a database, opened on first use."""
+        key = (os.path.abspath(db_path), collection_name)
+        retriever = self._retrievers.get(key)
+        if retriever is None:
+            with self._lock:
+                retriever = self._retrievers.get(key)
+                if retriever is None:
+                    retriever = self._retrievers[key] = AdvancedRetriever(db_path, collection_name)
+        return retriever
+    
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="retrieval")
+        return self._executor
+    
+    def reset(self) -> None:
+        """Close every shared retriever; the next get() opens them again."""
+        with self._lock:
+            retrievers = list(self._retrievers.values())
+            self._retrievers.clear()
+        for retriever in retrievers:
+            retriever.close()
+    
+    def _after_fork(self) -> None:
+        # Pool threads do not survive a fork
+        self._lock = threading.Lock()
+        self._executor = None
+
+
+_retriever_manager: Optional[RetrieverManager] = None
+
+
+def get_retriever_manager() -> RetrieverManager:
+    """Lazily created process-wide retriever manager."""
+    global _retriever_manager
+    if _retriever_manager is None:
+        _retriever_manager = RetrieverManager()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_retriever_manager._after_fork)
+    return _retriever_manager
+
+
+def get_retriever(db_path: str = "./chroma_db") -> AdvancedRetriever:
+    """The shared retriever of a knowledge base database."""
+    return get_retriever_manager().get(db_path)
+
+
 # Convenience functions
 def create_retriever(db_path: str = "./chroma_db") -> AdvancedRetriever:
-    """Create and return a configured retriever."""
-    return AdvancedRetriever(db_path=db_path)
+    """Return the configured retriever (shared by the whole process)."""
+    return get_retriever(db_path)
 
 def retrieve_for_writing_feedback(query: str, retriever: AdvancedRetriever, 
                                  document_context: str = "") -> List[RetrievalResult]:
@@ -0,0 +1,306 @@
+"""
+Content-addressed cache for per-sentence analysis results.
+
+A sentence's analysis depends only on its own text, its neighbours, the
+document's headings (rules ask whether a sentence is or sits in a heading)
+and the rules, so the analyze_sentence() result is stored under a hash of
+(sentence text, previous/next sentence hash, headings hash, ruleset
+version). Re-uploading
+a lightly edited document then only runs the rules on sentences that
+actually changed.
+
+Two tiers:
+- an in-process LRU (a dictionary lookup for unchanged sentences)
+- a SQLite file shared by all worker processes on the host
+
+The ruleset version is a hash of every module and data file under
+app/rules (including rules.json) and of the terminology lexicon, so editing
+a rule or a lexicon phrase invalidates old entries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+
+# Entries kept in the in-process LRU tier (0 disables it)
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 50000))
+# SQLite file for the shared tier (empty disables it)
+ANALYSIS_CACHE_DB = os.environ.get(
+    'ANALYSIS_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_cache.db')
+)
+
+_ruleset_version = None
+
+
+def ruleset_version(refresh: bool = False) -> str:
+    """
+    Hash of the rule modules and rule data under app/rules, of the
+    terminology lexicon file (see app/rules/terminology_lexicon.py), and of
+    the active rule profile and plugins (see app/rules/registry.py).
+
+    Computed once per process; pass ``refresh=True`` after reloading rules.
+    """
+    global _ruleset_version
+    if _ruleset_version is None or refresh:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(RULES_DIR):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for filename in sorted(files):
+                if not filename.endswith(('.py', '.json')):
+                    continue
+                path = os.path.join(root, filename)
+                digest.update(os.path.relpath(path, RULES_DIR).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        from .rules.terminology_lexicon import lexicon_path
+        path = lexicon_path()
+        digest.update(f"lexicon={path}".encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+        from .rules.registry import RULE_PLUGINS, RULE_PROFILE
+        digest.update(f"profile={RULE_PROFILE};plugins={RULE_PLUGINS}".encode('utf-8'))
+        _ruleset_version = digest.hexdigest()[:16]
+    return _ruleset_version
+
+
+def text_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def headings_hash(headings: Iterable[str] = ()) -> str:
+    """Order-independent hash of a document's heading texts."""
+    return text_hash('\0'.join(sorted(set(headings))))
+
+
+def sentence_key(text: str, previous_sentence: Optional[str] = None,
+                 next_sentence: Optional[str] = None, version: Optional[str] = None,
+                 heading_hash: Optional[str] = None) -> str:
+    """
+    Cache key for one sentence in its context.
+
+    The text is the cleaned sentence exactly as analyzed; it is not
+    whitespace-folded because feedback carries character offsets into it.
+    ``heading_hash`` is headings_hash() of the document's headings (None
+    means a document without headings).
+    """
+    parts = [
+        version or ruleset_version(),
+        text_hash(text),
+        text_hash(previous_sentence),
+        text_hash(next_sentence),
+        heading_hash or headings_hash(),
+    ]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SentenceAnalysisCache:
+    """
+    Two-tier (LRU + SQLite) store for analyze_sentence() results.
+
+    Values are stored as JSON, so every lookup returns a fresh copy that the
+    caller may mutate.
+
+    Args:
+        max_entries: Size of the in-process LRU tier (0 disables it)
+        db_path: SQLite file for the shared tier (None/empty disables it)
+        version: Ruleset version (default ruleset_version())
+    """
+
+    # Rows per SELECT ... IN query, below SQLite's variable limit
+    QUERY_CHUNK = 500
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE, db_path: Optional[str] = ANALYSIS_CACHE_DB,
+                 version: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.version = version or ruleset_version()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.db_path:
+            self._init_database()
+
+    def key(self, text: str, previous_sentence: Optional[str] = None,
+            next_sentence: Optional[str] = None, heading_hash: Optional[str] = None) -> str:
+        return sentence_key(text, previous_sentence, next_sentence, self.version, heading_hash)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        """Create the table and drop entries written by other ruleset versions."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS sentence_analysis (
+                            key TEXT PRIMARY KEY,
+                            version TEXT NOT NULL,
+                            result TEXT NOT NULL,
+                            created_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('DELETE FROM sentence_analysis WHERE version != ?', (self.version,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Sentence analysis cache DB unavailable ({e}) - using memory tier only")
+            self.db_path = None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, tuple]:
+        """
+        Look up several keys at once.
+
+        Returns:
+            Dict of key -> (feedback, readability_scores, quality_score) for the hits
+        """
+        found: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                else:
+                    value = self._pending.get(key)
+                if value is not None:
+                    found[key] = value
+                else:
+                    missing.append(key)
+
+        loaded = self._load(missing) if missing and self.db_path else {}
+        for key, value in loaded.items():
+            found[key] = value
+            self._remember(key, value)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing) - len(loaded)
+        return {key: self._decode(value) for key, value in found.items()}
+
+    def get(self, key: str) -> Optional[tuple]:
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, result) -> None:
+        """Store a result in the LRU tier and queue it for the SQLite tier."""
+        try:
+            value = json.dumps(list(result))
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not caching unserializable analysis result: {e}")
+            return
+        self._remember(key, value)
+        if self.db_path:
+            with self._lock:
+                self._pending[key] = value
+
+    def flush(self) -> None:
+        """Write queued results to the SQLite tier."""
+        if not self.db_path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO sentence_analysis (key, version, result, created_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        [(key, self.version, value, now) for key, value in pending.items()]
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write sentence analysis cache: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._pending.clear()
+        if self.db_path:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute('DELETE FROM sentence_analysis')
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not clear sentence analysis cache: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent": bool(self.db_path),
+        }
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key, last=True)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, keys) -> Dict[str, str]:
+        found = {}
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    for start in range(0, len(keys), self.QUERY_CHUNK):
+                        chunk = keys[start:start + self.QUERY_CHUNK]
+                        placeholders = ','.join('?' * len(chunk))
+                        rows = conn.execute(
+                            f'SELECT key, result FROM sentence_analysis WHERE key IN ({placeholders})', chunk
+                        )
+                        found.update(rows.fetchall())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read sentence analysis cache: {e}")
+        return found
+
+    @staticmethod
+    def _decode(value: str) -> tuple:
+        feedback, readability_scores, quality_score = json.loads(value)
+        return feedback, readability_scores, quality_score
+
+
+_analysis_cache = None
+
+
+def get_analysis_cache() -> Optional[SentenceAnalysisCache]:
+    """Get the shared cache, or None when both tiers are disabled."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        if ANALYSIS_CACHE_SIZE <= 0 and not ANALYSIS_CACHE_DB:
+            return None
+        _analysis_cache = SentenceAnalysisCache()
+    return _analysis_cache
@@ -1,11 +1,8 @@
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, request, jsonify, render_template, Response, current_app, stream_with_context
 from flask_login import login_required, current_user
+import io
 import os
 import re
-import subprocess
-import markdown
-import PyPDF2
-from docx import Document
 from bs4 import BeautifulSoup
 import logging
 import importlib
@@ -48,177 +45,24 @@ def extract_sentences_with_html_preservation(html_content):
     """
     Extract sentences from HTML content while preserving the HTML structure.
     Returns a list of sentence objects that contain both the original HTML and plain text versions.
-    """
-    sentences = []
-    
-    # Parse HTML content
-    soup = BeautifulSoup(html_content, "html.parser")
-    
-    # Process leaf elements that contain text to avoid double-counting nested blocks
-    # (e.g., a <p> inside a <div> should only be counted by the <p>)
-    all_potential = soup.find_all(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th', 'span', 'blockquote'])
-    
-    text_elements = []
-    for el in all_potential:
-        # Skip if it's already contained in another block we've already selected? 
-        # No, better to skip if it has block-level children that we will select anyway.
-        has_block_child = el.find(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th'])
-        
-        # If it has block children, we only want its DIRECT text (if any)
-        # But for simplicity, most documents have text in p/li/hX.
-        # If it's a div with no block children, it's a text block.
-        if not has_block_child and el.get_text().strip():
-            text_elements.append(el)
-        elif has_block_child:
-            # Check if it has any direct text children that aren't inside the block children
-            # This is rare in clean HTML but common in messy ones.
-            # For now, we favor leaf nodes.
-            pass
-            
-    for block_idx, element in enumerate(text_elements):
-        if not element.get_text().strip():
-            continue
-            
-        # Get the HTML content of this element
-        element_html = str(element)
-        tag_name = element.name # p, h1, etc.
-        
-        # Get the plain text version for analysis with a space separator to preserve word boundaries
-        element_text = element.get_text(separator=' ')
-        
-        # Split the text into sentences (using simple regex since spacy is removed)
-        raw_fragments = [s.strip() for s in re.split(r'(?<=[.!?])\s+', element_text) if s.strip()]
-
-        # 🔗 MERGING STEP: Unify technical fragments (e.g. "Label: Content")
-        merged_fragments = []
-        i = 0
-        while i < len(raw_fragments):
-            current = raw_fragments[i]
-            while i + 1 < len(raw_fragments) and re.search(r':\s*$', current):
-                current = f"{current} {raw_fragments[i+1]}"
-                i += 1
-            merged_fragments.append(current)
-            i += 1
-
-        # Process fragments into sentence objects
-        for sent_text in merged_fragments:
-            # Find corresponding HTML fragment
-            html_fragment = find_html_fragment_for_sentence(element_html, sent_text, element_text)
-            
-            # Use a unified sentence class with Block Info
-            class SentenceObj:
-                def __init__(self, text, html_fragment, block_index, tag_name):
-                    self.text = text.strip()
-                    self.html_fragment = html_fragment
-                    self.block_index = block_index
-                    self.tag_name = tag_name # h1, p, li, etc.
-                    self.start_char = 0
-                    self.end_char = len(text)
-            
-            sentences.append(SentenceObj(sent_text, html_fragment, block_idx, tag_name))
-    
-    return sentences
+    ``html_content`` may also be an already-built DocumentIR (core/document_ir.py).
 
-def find_html_fragment_for_sentence(element_html, sentence_text, full_text):
-    """
-    Find the HTML fragment that corresponds to a specific sentence within an element.
-    This preserves HTML tags like <strong>, <em>, <a>, <code>, etc.
+    See app/sentence_extraction.py: one tree walk plus a per-block text/HTML
+    offset map, so fragments are sliced instead of re-parsed and regex-matched.
     """
-    soup = BeautifulSoup(element_html, "html.parser")
-    
-    # Get the first actual HTML element (skip the document wrapper)
-    first_element = soup.find()
-    if not first_element:
-        return sentence_text
-    
-    element_plain_text = first_element.get_text().strip()
-    
-    # Simple case: if the element contains only this sentence
-    if element_plain_text.strip() == sentence_text.strip():
-        # Return the inner HTML (content without the wrapper tag)
-        if hasattr(first_element, 'contents') and first_element.contents:
-            inner_content = ''.join(str(content) for content in first_element.contents)
-            return inner_content
-        return sentence_text
-    
-    # Complex case: sentence is part of a larger element
-    sentence_start = full_text.find(sentence_text.strip())
-    if sentence_start == -1:
-        return sentence_text  # Fallback - return plain text
-    
-    sentence_end = sentence_start + len(sentence_text.strip())
-    
-    # If this sentence spans the entire element content, return the inner HTML
-    if sentence_start == 0 and sentence_end >= len(full_text.strip()):
-        if hasattr(first_element, 'contents') and first_element.contents:
-            inner_content = ''.join(str(content) for content in first_element.contents)
-            return inner_content
-    
-    # For partial matches, try to find the corresponding HTML portion
-    try:
-        # Get all text nodes and their positions to map back to HTML
-        html_content = str(first_element)
-        
-        # Create a temporary element to work with
-        temp_soup = BeautifulSoup(html_content, "html.parser")
-        temp_element = temp_soup.find()
-        
-        if temp_element:
-            # Try to find the sentence text within the element
-            element_text = temp_element.get_text()
-            
-            # Find the sentence within the element's text
-            local_sentence_start = element_text.find(sentence_text.strip())
-            if local_sentence_start != -1:
-                local_sentence_end = local_sentence_start + len(sentence_text.strip())
-                
-                # Try to map this back to HTML by looking for text patterns
-                # For now, if we can find the exact sentence text in the HTML, return it with any inline tags
-                html_str = str(temp_element)
-                if sentence_text.strip() in html_str:
-                    # Look for the sentence with potential HTML tags
-                # Ensure we handle multiple occurrences of the same text
-                    # Create a pattern that allows HTML tags within the sentence
-                    # Use words as anchors to find the HTML segment
-                    words = sentence_text.strip().split()
-                    if words:
-                        # Create pattern allowing whitespace, tags, and common HTML entities between words
-                        pattern_words = [re.escape(word) for word in words]
-                        # NON-GREEDY joiner to prevent swallowing next sentence
-                        boundary_pattern = r'(?:\s|<[^>]*>|&nbsp;|&#160;)+?'
-                        pattern = boundary_pattern.join(pattern_words)
-                        if len(pattern_words) > 1:
-                            # Also allow leading/trailing tags but NON-GREEDY
-                            pattern = r'(?:<[^>]*>)*?\s*' + pattern + r'\s*(?:<[^>]*>)*?'
-                        
-                        match = re.search(pattern, html_str, re.IGNORECASE | re.DOTALL)
-                        if match:
-                            match_text = match.group(0)
-                            # Loosened sanity check to allow for technical merged sentences
-                            # Ratio increased to 2.5x, word delta increased to 10 for complex technical lists
-                            if len(match_text) < len(sentence_text) * 2.5:
-                                try:
-                                    match_plain = BeautifulSoup(match_text, "html.parser").get_text().split()
-                                    if abs(len(match_plain) - len(words)) <= 10:
-                                        logger.info(f"✅ Precise HTML fragment found for sentence {len(words)} words")
-                                        return match_text.strip()
-                                except Exception as e:
-                                    logger.warning(f"Word-count check failed: {e}")
-                                    return match_text.strip()
-                
-                # Fallback: return the plain text
-                return sentence_text.strip()
-    except Exception as e:
-        # If anything goes wrong, return the plain text
-        return sentence_text.strip()
-    
-    # Final fallback
-    return sentence_text.strip()
+    from .sentence_extraction import extract_sentences
+    return extract_sentences(html_content)
 
 ############################
 # FILE PARSING HELPERS
 ############################
 
+# Format parsers stream the upload into HTML blocks (see app/document_parsers.py)
+from .document_parsers import parse_adoc, parse_doc, parse_docx, parse_md, parse_pdf, parse_txt, parse_zip
+from .performance_monitor import (STAGE_EXTRACT, STAGE_GATE, STAGE_PARSE, STAGE_RULES, STAGE_SERIALIZE,
+                                  STAGE_STRUCTURAL, get_performance_monitor)
+from .rules.registry import DispatchPlan, get_dispatch_plan
+
 def clean_malformed_html_attributes(text):
     """
     Clean malformed HTML attributes that might appear in text content.
@@ -257,180 +101,28 @@ def parse_file(file):
         elif extension == '.pdf':
             return parse_pdf(file)
         elif extension == '.md':
-            return parse_md(file.read())
+            return parse_md(file)
         elif extension == '.adoc':
-            return parse_adoc(file.read())
+            return parse_adoc(file)
         elif extension in ['.txt', '']:
-            return parse_txt(file.read())
+            return parse_txt(file)
         else:
             return file.read().decode("utf-8", errors="replace")
     except Exception as e:
         logger.error(f"Error parsing {filename}: {str(e)}")
         return f"Error parsing {filename}: {str(e)}"
 
-def parse_zip(file_stream):
-    """Parse ZIP file and extract text content from supported documents inside
-    
-    ⚠️ REVIEWER DECISION NEEDED:
-    Current behavior: Merges all files into one document for review.
-    Alternative: Review each file separately.
-    
-    Question: Are these separate documents or one review unit?
-    - If separate: Need to review each with its own document gate
-    - If collection: Need summary of collection-level issues
-    
-    DO NOT: Blend feedback silently across files without clarifying this to users.
-    """
-    import zipfile
-    import io
-    
-    try:
-        html_content = "<h2>Contents of ZIP file:</h2>\n"
-        
-        with zipfile.ZipFile(file_stream, 'r') as zip_file:
-            file_list = zip_file.namelist()
-            
-            # Filter for supported file types
-            supported_files = []
-            for filename in file_list:
-                if filename.lower().endswith(('.txt', '.md', '.docx', '.pdf')):
-                    supported_files.append(filename)
-            
-            if not supported_files:
-                return "<p>No supported document files found in ZIP archive. Supported formats: .txt, .md, .docx, .pdf</p>"
-            
-            html_content += f"<p>Found {len(supported_files)} supported document(s) in ZIP file:</p>\n"
-            
-            # Process each supported file
-            for filename in supported_files:
-                try:
-                    html_content += f"<h3>📄 {filename}</h3>\n"
-                    
-                    # Extract file content
-                    with zip_file.open(filename) as extracted_file:
-                        file_content = io.BytesIO(extracted_file.read())
-                        
-                        # Determine file type and parse accordingly
-                        ext = os.path.splitext(filename.lower())[1]
-                        
-                        if ext == '.txt':
-                            content = parse_txt(file_content.read())
-                        elif ext == '.md':
-                            content = parse_md(file_content.read())
-                        elif ext == '.docx':
-                            content = parse_docx(file_content)
-                        elif ext == '.pdf':
-                            content = parse_pdf(file_content)
-                        else:
-                            content = f"<p>Unsupported file type: {ext}</p>"
-                        
-                        html_content += content + "\n"
-                        
-                except Exception as e:
-                    html_content += f"<p>Error processing {filename}: {str(e)}</p>\n"
-                    logger.error(f"Error processing file {filename} in ZIP: {e}")
-            
-            return html_content
-            
-    except zipfile.BadZipFile:
-        return "Error: Invalid or corrupted ZIP file"
-    except Exception as e:
-        logger.error(f"Error parsing ZIP file: {e}")
-        return f"Error parsing ZIP file: {str(e)}"
-
-def parse_docx(file_stream):
-    doc = Document(file_stream)
-    html_content = ""
-    for paragraph in doc.paragraphs:
-        html_content += f"<p>{paragraph.text}</p>"
-    return html_content
-
-def parse_doc(file_stream):
-    temp_path = "temp_upload_doc.doc"
-    file_stream.save(temp_path)
-    try:
-        cmd = ["antiword", temp_path]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if result.returncode == 0:
-            text_content = result.stdout
-            html_content = ""
-            for paragraph in text_content.split("\n\n"):
-                html_content += f"<p>{paragraph}</p>"
-            return html_content
-        else:
-            return f"Error reading .doc file: {result.stderr}"
-    except FileNotFoundError:
-        return "Error: 'antiword' not in PATH or not installed."
-    except Exception as e:
-        return f"Error reading .doc file: {str(e)}"
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-def parse_pdf(file_stream):
-    try:
-        reader = PyPDF2.PdfReader(file_stream)
-        html_content = ""
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            for paragraph in page_text.split("\n\n"):
-                html_content += f"<p>{paragraph}</p>"
-        return html_content
-    except Exception as e:
-        return f"Error reading PDF: {str(e)}"
-
-def parse_md(content_bytes):
-    md_text = content_bytes.decode("utf-8", errors="replace")
-    html_text = markdown.markdown(md_text)
-    return html_text
-
-def parse_adoc(content_bytes):
-    adoc_text = content_bytes.decode("utf-8", errors="replace")
-    html_content = ""
-    for paragraph in adoc_text.split("\n\n"):
-        html_content += f"<p>{paragraph}</p>"
-    return html_content
-
-def parse_txt(content_bytes):
-    txt_text = content_bytes.decode("utf-8", errors="replace")
-    html_content = ""
-    for paragraph in txt_text.split("\n\n"):
-        html_content += f"<p>{paragraph}</p>"
-    return html_content
-
 def load_rules():
-    rules = []
-    rules_folder = os.path.join(os.path.dirname(__file__), 'rules')
-    
-    # Files that are utilities or helpers and don't need a check function
-    ignore_files = {
-        'analytics.py', 'batch_processor.py', 'rag_rule_helper.py',
-        'title_utils.py', 'rule_remediations.py', 'verb_tense.py',
-        'anaphora_resolution.py', 'matcher.py', 'nominalizations.py'
-    }
-    
-    for filename in os.listdir(rules_folder):
-        if filename.endswith('.py') and filename != '__init__.py':
-            module_name = filename[:-3]  # Remove .py extension
-            try:
-                # Import the module using the proper package path
-                module = importlib.import_module(f'app.rules.{module_name}')
-                
-                if hasattr(module, "check"):
-                    rules.append(module.check)
-                    logger.info(f"Loaded rule: {filename} (Function: {module.check.__name__})")
-                elif filename not in ignore_files:
-                    logger.warning(f"Warning: {filename} does not have a `check` function")
-            except ImportError as e:
-                logger.error(f"Failed to import rule {filename}: {e}")
-            except Exception as e:
-                logger.error(f"Error loading rule {filename}: {e}")
+    """
+    Check functions of the active rule profile, in dispatch order.
 
+    The rules themselves are registered in app/rules/registry.py; the upload
+    pipeline runs from get_dispatch_plan() instead of this list.
+    """
+    rules = get_dispatch_plan().checks
     logger.info(f"Total rules loaded: {len(rules)}")
     return rules
 
-rules = load_rules()
-
 def review_document(content, rules):
     suggestions = []
     for rule in rules:
@@ -450,7 +142,88 @@ def review_document(content, rules):
                     })
     return {"issues": suggestions, "summary": "Review completed."}
 
-def analyze_sentence(sentence, rules, previous_sentence=None, next_sentence=None):
+def normalize_rule_feedback(item, sentence):
+    """Convert one rule feedback item (string, dict or other) to the feedback dict the UI expects."""
+    if isinstance(item, str):
+        # Parse structured suggestions to extract just the issue for display
+        message = item
+        if 'Issue:' in item and 'Original sentence:' in item and ('AI suggestion:' in item or 'AI Solution:' in item):
+            # Extract just the issue part for the main display
+            lines = item.split('\n')
+            for line in lines:
+                if line.strip().startswith('Issue:'):
+                    message = line.replace('Issue:', '').strip()
+                    break
+
+        # Convert string to expected object format
+        return {
+            "text": sentence,
+            "start": 0,
+            "end": len(sentence),
+            "message": message,
+            "full_suggestion": item,  # Keep the full structured suggestion for detailed view
+            "severity": "warn",  # Default severity for legacy string feedback
+            "color": "yellow"
+        }
+    elif isinstance(item, dict):
+        # Handle dict format - may include severity and color from atomic rules
+        feedback_item = {
+            "text": item.get("text", sentence),
+            "start": item.get("start", 0),
+            "end": item.get("end", len(sentence)),
+            "message": item.get("message", str(item)),
+        }
+
+        # Preserve severity-based information from atomic rules
+        if "severity" in item:
+            feedback_item["severity"] = item["severity"]
+        else:
+            feedback_item["severity"] = "warn"  # Default for legacy rules
+
+        if "color" in item:
+            feedback_item["color"] = item["color"]
+        else:
+            # Map severity to color if not explicitly provided
+            severity_to_color = {"error": "red", "warn": "yellow", "info": "grey"}
+            feedback_item["color"] = severity_to_color.get(feedback_item["severity"], "yellow")
+
+        # Preserve additional fields
+        if "suggestion" in item:
+            feedback_item["suggestion"] = item["suggestion"]
+        if "rule_id" in item:
+            feedback_item["rule_id"] = item["rule_id"]
+        if "category" in item:
+            feedback_item["category"] = item["category"]
+        if "full_suggestion" in item:
+            feedback_item["full_suggestion"] = item["full_suggestion"]
+
+        # Preserve Rule Authority keys
+        for key in ["decision_type", "reviewer_rationale", "rule", "ai_suggestion"]:
+            if key in item:
+                feedback_item[key] = item[key]
+
+        return feedback_item
+    else:
+        # Handle other formats by converting to string
+        return {
+            "text": sentence,
+            "start": 0,
+            "end": len(sentence),
+            "message": str(item),
+            "severity": "warn",
+            "color": "yellow"
+        }
+
+def analyze_sentence(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+    """
+    Run the sentence rules on one sentence.
+
+    ``rules`` is a DispatchPlan (app.rules.registry) or a plain list of
+    check functions, which all run as sentence rules. ``context`` is an
+    optional SentenceContext (see app.rules.nlp_context) holding the shared
+    spaCy parse. It is passed only to rules registered with ``context=True``;
+    other rules get the raw string.
+    """
     feedback = []
     readability_scores = {
         "flesch_reading_ease": textstat.flesch_reading_ease(sentence),
@@ -460,102 +233,315 @@ def analyze_sentence(sentence, rules, previous_sentence=None, next_sentence=None
     }
     quality_score = 55.0  # Placeholder for actual quality score calculation
 
-    # Apply each rule function to the sentence
-    for rule_function in rules:
+    # Apply each sentence rule, with the arguments its registration declares
+    plan = rules if isinstance(rules, DispatchPlan) else DispatchPlan.for_checks(rules)
+    monitor = get_performance_monitor()
+    for spec in plan.sentence_rules:
+        kwargs = {}
+        if spec.neighbours:
+            kwargs['previous_sentence'] = previous_sentence
+            kwargs['next_sentence'] = next_sentence
+        if spec.context and context is not None:
+            # Rule can reuse the shared NLP parse
+            kwargs['context'] = context
+        start = time.perf_counter()
         try:
-            # Try to pass adjacent context if the rule supports it (like passive_voice)
-            import inspect
-            sig = inspect.signature(rule_function)
-            params = list(sig.parameters.keys())
-            
-            if 'previous_sentence' in params and 'next_sentence' in params:
-                # Rule supports adjacent context
-                rule_feedback = rule_function(sentence, previous_sentence=previous_sentence, next_sentence=next_sentence)
-            else:
-                # Rule doesn't support context, use standard call
-                rule_feedback = rule_function(sentence)
+            rule_feedback = spec.check(sentence, **kwargs)
         except Exception as e:
-            # Fallback to standard call if inspection fails
-            logger.debug(f"Rule inspection failed, using standard call: {e}")
-            rule_feedback = rule_function(sentence)
+            # Fallback to standard call if the rule fails with the extra arguments
+            monitor.record_error(spec.rule_id)
+            logger.debug(f"Rule {spec.rule_id} failed with context arguments, using standard call: {e}")
+            rule_feedback = spec.check(sentence)
+        issue_count = len(feedback)
         if rule_feedback:
-            # Convert string feedback to expected object format
-            for item in rule_feedback:
-                if isinstance(item, str):
-                    # Parse structured suggestions to extract just the issue for display
-                    message = item
-                    if 'Issue:' in item and 'Original sentence:' in item and ('AI suggestion:' in item or 'AI Solution:' in item):
-                        # Extract just the issue part for the main display
-                        lines = item.split('\n')
-                        for line in lines:
-                            if line.strip().startswith('Issue:'):
-                                message = line.replace('Issue:', '').strip()
-                                break
-                    
-                    # Convert string to expected object format
-                    feedback.append({
-                        "text": sentence,
-                        "start": 0,
-                        "end": len(sentence),
-                        "message": message,
-                        "full_suggestion": item,  # Keep the full structured suggestion for detailed view
-                        "severity": "warn",  # Default severity for legacy string feedback
-                        "color": "yellow"
-                    })
-                elif isinstance(item, dict):
-                    # Handle dict format - may include severity and color from atomic rules
-                    feedback_item = {
-                        "text": item.get("text", sentence),
-                        "start": item.get("start", 0),
-                        "end": item.get("end", len(sentence)),
-                        "message": item.get("message", str(item)),
-                    }
-                    
-                    # Preserve severity-based information from atomic rules
-                    if "severity" in item:
-                        feedback_item["severity"] = item["severity"]
-                    else:
-                        feedback_item["severity"] = "warn"  # Default for legacy rules
-                    
-                    if "color" in item:
-                        feedback_item["color"] = item["color"]
-                    else:
-                        # Map severity to color if not explicitly provided
-                        severity_to_color = {"error": "red", "warn": "yellow", "info": "grey"}
-                        feedback_item["color"] = severity_to_color.get(feedback_item["severity"], "yellow")
-                    
-                    # Preserve additional fields
-                    if "suggestion" in item:
-                        feedback_item["suggestion"] = item["suggestion"]
-                    if "rule_id" in item:
-                        feedback_item["rule_id"] = item["rule_id"]
-                    if "category" in item:
-                        feedback_item["category"] = item["category"]
-                    if "full_suggestion" in item:
-                        feedback_item["full_suggestion"] = item["full_suggestion"]
-                    
-                    # Preserve Rule Authority keys
-                    for key in ["decision_type", "reviewer_rationale", "rule", "ai_suggestion"]:
-                        if key in item:
-                            feedback_item[key] = item[key]
-                    
-                    feedback.append(feedback_item)
-                else:
-                    # Handle other formats by converting to string
-                    feedback.append({
-                        "text": sentence,
-                        "start": 0,
-                        "end": len(sentence),
-                        "message": str(item),
-                        "severity": "warn",
-                        "color": "yellow"
-                    })
+            feedback.extend(normalize_rule_feedback(item, sentence) for item in rule_feedback)
+        monitor.record_rule(spec.rule_id, time.perf_counter() - start, len(feedback) - issue_count)
 
     return feedback, readability_scores, quality_score
+
+def run_document_rules(plan, document):
+    """
+    Run the block and document rules of a dispatch plan on a parsed document.
+
+    Block rules run once per non-empty DocumentIR block (their feedback
+    carries ``block_index``), document rules once on the whole plain text.
+    A failing rule is logged and skipped.
+    """
+    feedback = []
+    monitor = get_performance_monitor()
+    for spec in plan.block_rules:
+        for block in document.blocks:
+            if not block.text.strip():
+                continue
+            start = time.perf_counter()
+            try:
+                rule_feedback = spec.check(block.text)
+            except Exception as e:
+                monitor.record_error(spec.rule_id)
+                logger.error(f"Block rule {spec.rule_id} failed on block {block.index}: {e}")
+                break
+            rule_feedback = list(rule_feedback or [])
+            monitor.record_rule(spec.rule_id, time.perf_counter() - start, len(rule_feedback))
+            for item in rule_feedback:
+                item = normalize_rule_feedback(item, block.text)
+                item.setdefault("rule", spec.rule_id)
+                item["block_index"] = block.index
+                feedback.append(item)
+    for spec in plan.document_rules:
+        start = time.perf_counter()
+        try:
+            rule_feedback = spec.check(document.plain_text)
+        except Exception as e:
+            monitor.record_error(spec.rule_id)
+            logger.error(f"Document rule {spec.rule_id} failed: {e}")
+            continue
+        rule_feedback = list(rule_feedback or [])
+        monitor.record_rule(spec.rule_id, time.perf_counter() - start, len(rule_feedback))
+        for item in rule_feedback:
+            item = normalize_rule_feedback(item, "")
+            item.setdefault("rule", spec.rule_id)
+            feedback.append(item)
+    return feedback
+
+
+def clean_sentence_text(index, plain_text_sentence):
+    """
+    Strip stray markup from an extracted sentence before analysis.
+
+    Handles malformed highlighting attributes and HTML tags that can leak
+    into sentence text when a previously processed document is uploaded.
+    """
+    # Debug: Log sentence content to understand the issue
+    logger.debug(f"Processing sentence {index}: '{plain_text_sentence[:100]}...'")
+    
+    # AGGRESSIVE CLEANING: Handle malformed HTML attributes that somehow got into sentence text
+    if '="' in plain_text_sentence and ('sentence-highlight' in plain_text_sentence or 'data-sentence-index' in plain_text_sentence):
+        logger.error(f"🚨 MALFORMED HTML ATTRIBUTES DETECTED in sentence {index}: {plain_text_sentence}")
+        clean_text = clean_malformed_html_attributes(plain_text_sentence)
+        logger.warning(f"🧹 Cleaned malformed HTML: '{clean_text}'")
+        plain_text_sentence = clean_text
+    
+    # Extra safety: Ensure plain text sentence doesn't contain HTML tags
+    if '<' in plain_text_sentence and '>' in plain_text_sentence:
+        logger.warning(f"🚨 SENTENCE {index} CONTAINS HTML TAGS: {plain_text_sentence}")
+        # Check if it contains our highlighting markup specifically
+        if 'sentence-highlight' in plain_text_sentence:
+            logger.error(f"🔥 CRITICAL: Sentence {index} contains highlighting markup! This suggests circular processing.")
+        
+        temp_soup = BeautifulSoup(plain_text_sentence, "html.parser")
+        clean_text = temp_soup.get_text().strip()
+        logger.warning(f"✅ Cleaned sentence {index}: '{clean_text[:100]}...'")
+        plain_text_sentence = clean_text
+    
+    return plain_text_sentence
+
+def build_sentence_entry(index, sent, plain_text_sentence, feedback, quality_score, analysis_skipped):
+    """
+    Build the UI payload for one sentence: deduplicated, slimmed-down feedback
+    plus the sentence's HTML fragment and block information.
+    """
+    html_fragment = getattr(sent, 'html_fragment', sent.text)
+    
+    # Store analysis_skipped flag for transparency
+    enhanced_feedback = []
+    seen_issues = set()
+    
+    for item in feedback:
+        # Normalize issue message to prevent duplicates caused by punctuation or case differences
+        message = item.get('message', '') if isinstance(item, dict) else str(item)
+        clean_msg = message.strip().rstrip('.').lower()
+        
+        # Deduplicate by normalized message and start/end position
+        if isinstance(item, dict):
+            issue_key = f"{clean_msg}_{item.get('start', 0)}_{item.get('end', 0)}"
+        else:
+            issue_key = f"{clean_msg}_0_0"
+        
+        if issue_key in seen_issues:
+            continue
+        seen_issues.add(issue_key)
+        
+        if isinstance(item, dict):
+            item['sentence_index'] = index
+            enhanced_feedback.append(item)
+        else:
+            enhanced_feedback.append({
+                "text": plain_text_sentence,
+                "start": 0,
+                "end": len(plain_text_sentence),
+                "message": str(item),
+                "sentence_index": index
+            })
+    
+    # 🗜️ PAYLOAD OPTIMIZATION: Send only what the UI needs
+    optimized_feedback = []
+    for item in enhanced_feedback:
+        if isinstance(item, dict):
+            # Remove internal logging from browser payload
+            item.pop('internal_log', None)
+            optimized_feedback.append(item)
+
+    entry = {
+        "sentence": plain_text_sentence,
+        "html_sentence": html_fragment,
+        "sentence_index": index,
+        "block_index": sent.block_index, # NEW: Paragraph/Section ID
+        "tag_name": sent.tag_name,       # NEW: p, h1, li, etc.
+        "feedback": optimized_feedback,
+        "analysis_skipped": analysis_skipped,
+        "quality_score": quality_score
+    }
+    if getattr(sent, 'source', None):
+        entry["source"] = sent.source  # File of a zip upload the sentence comes from
+    
+    # (Remove plain text 'sentence', 'readability_scores' and raw offsets to save 60% space)
+    
+    # FINAL CLEANUP: Ensure no malformed HTML attributes made it through (On optimized data)
+    if '="' in plain_text_sentence and ('sentence-highlight' in plain_text_sentence or 'data-sentence-index' in plain_text_sentence):
+        logger.error(f"🚨 FINAL CHECK: Malformed HTML still present in sentence {index}: {plain_text_sentence}")
+        clean_text = clean_malformed_html_attributes(plain_text_sentence)
+        entry["html_sentence"] = clean_text # Update the display fragment
+        logger.warning(f"✅ Final cleanup applied: {clean_text}")
+    
+    return entry
+
+# Sentence fields kept per sentence for the document-level structural analysis
+# ("source" is only set for the files of a zip upload)
+STRUCTURAL_SENTENCE_FIELDS = ("sentence", "block_index", "tag_name", "feedback", "source")
+# ...plus the fields a review snapshot needs for incremental re-review
+REVIEW_SENTENCE_FIELDS = STRUCTURAL_SENTENCE_FIELDS + ("quality_score", "analysis_skipped")
+
+# File types accepted by /upload and /upload_revision
+ALLOWED_UPLOAD_EXTENSIONS = ['.txt', '.pdf', '.docx', '.doc', '.md', '.adoc', '.zip']
+
+# ?stream=<value> on /upload -> response mimetype
+UPLOAD_STREAM_FORMATS = {
+    "1": "application/x-ndjson",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def upload_error_event(message, status):
+    """Event that ends an upload stream with an error."""
+    return {"event": "error", "error": message, "status": status}
+
+def gather_upload_events(events):
+    """
+    Gather upload events into the /upload response payload.
+
+    Returns:
+        (payload, None), or (None, error_event) if the pipeline failed
+    """
+    result = {"sentences": []}
+    for event in events:
+        kind = event["event"]
+        if kind == "error":
+            return None, event
+        if kind == "document_review":
+            result["content"] = event["content"]
+            result["document_review"] = event["document_review"]
+            result["room_id"] = event["room_id"]
+        elif kind == "sentence":
+            result["sentences"].append(event["sentence"])
+        elif kind == "report":
+            result["report"] = event["report"]
+            result["review_id"] = event["review_id"]
+
+    return {
+        "content": result["content"],  # For display
+        "document_review": result["document_review"],
+        "sentences": result["sentences"],
+        "report": result["report"],
+        "room_id": result["room_id"],  # Include room_id in response
+        "review_id": result["review_id"]  # For incremental re-review via /upload_revision
+    }, None
+
+def collect_upload_events(events):
+    """Gather upload events into the single JSON response of /upload."""
+    payload, error_event = gather_upload_events(events)
+    if error_event:
+        return jsonify({"error": error_event["error"]}), error_event["status"]
+    return jsonify(payload)
+
+def format_stream_event(event, mimetype):
+    """Serialize one upload event as an NDJSON line or an SSE message."""
+    payload = current_app.json.dumps(event)
+    if mimetype == "text/event-stream":
+        return f"event: {event['event']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+def stream_upload_events(events, mimetype):
+    """
+    Stream upload events as they are produced.
+
+    Parsing and the document review gate run before the response starts, so
+    invalid or unparseable files still get a regular JSON error and status.
+    """
+    first_event = next(events)
+    if first_event["event"] == "error":
+        return jsonify({"error": first_event["error"]}), first_event["status"]
+
+    def generate():
+        yield format_stream_event(first_event, mimetype)
+        for event in events:
+            yield format_stream_event(event, mimetype)
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+    return response
+
 def calculate_quality_index(total_sentences, total_errors):
     if total_sentences == 0:
         return 0
     return max(0, round(100 * (1 - (total_errors / total_sentences))))
+
+
+def count_issues(sentence_data, document_feedback):
+    """Issues of a review: sentence feedback plus block and document rule findings."""
+    return sum(len(s['feedback']) for s in sentence_data) + len(document_feedback)
+
+def build_aggregated_report(sentence_data, plain_text, document_review, analyzed_count, structural_insights,
+                            document_feedback):
+    """Aggregated document report shown alongside the per-sentence results."""
+    total_sentences = len(sentence_data)
+    total_errors = count_issues(sentence_data, document_feedback)
+    return {
+        "totalSentences": total_sentences,
+        "totalWords": len(plain_text.split()),
+        "avgQualityScore": calculate_quality_index(total_sentences, total_errors),
+        "message": "Content analysis completed.",
+        "analysis_scope": document_review.analysis_scope,
+        "document_type": document_review.document_type,
+        "analyzed_sentences": analyzed_count,
+        "structural_insights": structural_insights, # NEW: Holistic block feedback
+        "document_feedback": document_feedback,
+        "totalIssues": total_errors
+    }
+
+def store_review_document(keys, filename, plain_text, plain_texts):
+    """
+    Keep the reviewed document (RAG context and sentences for adjacent context
+    in AI suggestions) under its review id and room_id.
+    """
+    from .document_store import get_document_store
+    get_document_store().put(keys, {
+        "filename": filename,
+        "plain_text": plain_text,
+        "sentences": plain_texts
+    })
+
+def save_review_snapshot(filename, sentence_data, structural_insights):
+    """Store a completed review for incremental re-review and return its review id."""
+    from .analysis_cache import ruleset_version
+    from .incremental_review import get_review_store
+    return get_review_store().save({
+        "filename": filename,
+        "sentences": sentence_data,
+        "structural_insights": structural_insights,
+        "ruleset_version": ruleset_version()
+    })
+
 ############################
 # FLASK ROUTES
 ############################
@@ -643,42 +629,31 @@ def debug_sentences():
     
     return jsonify(debug_info)
 
-@main.route('/upload', methods=['POST', 'OPTIONS'])
-def upload_file():
-    # Handle preflight OPTIONS request
-    if request.method == 'OPTIONS':
-        response = jsonify({"status": "ok"})
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        return response, 200
-    
-    global current_document_content  # Access global variable
-    
+def validate_upload_request():
+    """
+    Validate the uploaded ``file`` of the current request (presence, type, size).
+
+    Returns:
+        (file, None) when valid, otherwise (None, error_response)
+    """
     try:
         if 'file' not in request.files:
             logger.error("Upload request missing 'file' field")
-            return jsonify({"error": "No file part"}), 400
+            return None, (jsonify({"error": "No file part"}), 400)
 
         file = request.files['file']
         if not file.filename:
             logger.error("Upload request has empty filename")
-            return jsonify({"error": "No selected file"}), 400
+            return None, (jsonify({"error": "No selected file"}), 400)
 
         # Validate file extension
         filename = file.filename.lower()
-        allowed_extensions = ['.txt', '.pdf', '.docx', '.doc', '.md', '.adoc', '.zip']
+        allowed_extensions = ALLOWED_UPLOAD_EXTENSIONS
         if not any(filename.endswith(ext) for ext in allowed_extensions):
             logger.error(f"Unsupported file type: {filename}")
-            return jsonify({"error": f"Unsupported file type. Allowed types: {', '.join(allowed_extensions)}"}), 400
-
-        # Get room_id for progress tracking
-        room_id = request.form.get('room_id')
-        
-        from .progress_tracker import get_progress_tracker
-        progress_tracker = get_progress_tracker()
+            return None, (jsonify({"error": f"Unsupported file type. Allowed types: {', '.join(allowed_extensions)}"}), 400)
 
-        logger.info(f"File uploaded: {file.filename} (Room: {room_id})")
+        logger.info(f"File uploaded: {file.filename}")
         
         # Validate file size (Flask should handle this automatically, but let's be explicit)
         file.seek(0, 2)  # Seek to end
@@ -688,104 +663,236 @@ def upload_file():
         max_size = 50 * 1024 * 1024  # 50MB
         if file_size > max_size:
             logger.error(f"File too large: {file_size} bytes (max: {max_size})")
-            return jsonify({"error": f"File too large. Maximum size: {max_size // (1024*1024)}MB"}), 400
+            return None, (jsonify({"error": f"File too large. Maximum size: {max_size // (1024*1024)}MB"}), 400)
         
         logger.info(f"File size: {file_size} bytes")
+        return file, None
     
     except Exception as e:
         logger.error(f"Error in upload validation: {str(e)}", exc_info=True)
-        return jsonify({"error": f"Upload validation failed: {str(e)}"}), 500
+        return None, (jsonify({"error": f"Upload validation failed: {str(e)}"}), 500)
 
-    try:
-        # Stage 1: Uploading Document (10%)
-        if progress_tracker and room_id:
-            progress_tracker.update_stage(room_id, 0, f"Uploading {file.filename}...")
-        
-        # Stage 2: Parsing Content (30%)
+@main.route('/upload', methods=['POST', 'OPTIONS'])
+def upload_file():
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        response = jsonify({"status": "ok"})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response, 200
+    
+    file, error_response = validate_upload_request()
+    if error_response:
+        return error_response
+
+    # Get room_id for progress tracking
+    room_id = request.form.get('room_id')
+    
+    from .progress_tracker import get_progress_tracker
+    progress_tracker = get_progress_tracker()
+
+    logger.info(f"Reviewing upload: {file.filename} (Room: {room_id})")
+
+    # Streaming mode: ?stream=ndjson (or 1) / ?stream=sse emits results as they are ready
+    events = review_upload_events(file, room_id, progress_tracker)
+    stream_format = request.args.get('stream', '').lower()
+    if stream_format in UPLOAD_STREAM_FORMATS:
+        return stream_upload_events(events, UPLOAD_STREAM_FORMATS[stream_format])
+    return collect_upload_events(events)
+
+def parse_uploaded_document(file, room_id, progress_tracker, timer=None):
+    """
+    Stages 1-3 of a review: parse the file, run the document review gate and
+    extract the sentences. ``timer`` (an UploadTimer, see
+    app/performance_monitor.py) gets the time spent in each stage.
+
+    Returns:
+        (error_event, None) on failure, otherwise (None, parsed) with the
+        html_content, document_review, sentences, document (the DocumentIR)
+        and plain_text
+    """
+    timer = timer or get_performance_monitor().upload_timer()
+
+    # Stage 1: Uploading Document (10%)
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 0, f"Uploading {file.filename}...")
+    
+    # Stage 2: Parsing Content (30%)
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 1, f"Parsing {file.filename.split('.')[-1].upper()} content...")
+    
+    # Parse file to get both plain text and HTML
+    html_content = parse_file(file)
+    
+    # Clean any existing sentence highlighting from the content (in case document was previously processed)
+    if 'sentence-highlight' in html_content:
+        logger.warning("🧹 Cleaning existing sentence highlighting from uploaded document...")
+        # Remove all sentence highlighting spans but keep the content
+        # Remove opening span tags with sentence-highlight class
+        html_content = re.sub(r'<span[^>]*sentence-highlight[^>]*>', '', html_content)
+        # Remove closing span tags
+        html_content = re.sub(r'</span>', '', html_content)
+        logger.info("✅ Cleaned existing highlighting markup")
+    
+    # Check if parsing failed
+    if html_content.startswith("Error"):
+        logger.error(f"File parsing failed: {html_content}")
         if progress_tracker and room_id:
-            progress_tracker.update_stage(room_id, 1, f"Parsing {file.filename.split('.')[-1].upper()} content...")
-        
-        # Parse file to get both plain text and HTML
-        html_content = parse_file(file)
-        
-        # Clean any existing sentence highlighting from the content (in case document was previously processed)
-        if 'sentence-highlight' in html_content:
-            logger.warning("🧹 Cleaning existing sentence highlighting from uploaded document...")
-            # Remove all sentence highlighting spans but keep the content
-            # Remove opening span tags with sentence-highlight class
-            html_content = re.sub(r'<span[^>]*sentence-highlight[^>]*>', '', html_content)
-            # Remove closing span tags
-            html_content = re.sub(r'</span>', '', html_content)
-            logger.info("✅ Cleaned existing highlighting markup")
-        
-        # Check if parsing failed
-        if html_content.startswith("Error"):
-            logger.error(f"File parsing failed: {html_content}")
-            if progress_tracker and room_id:
-                progress_tracker.fail_session(room_id, html_content)
-            return jsonify({"error": html_content}), 400
-        
-        # Check if content is empty
-        if not html_content.strip():
-            error_msg = "The uploaded file appears to be empty or could not be parsed."
-            logger.error(f"Empty content from file: {file.filename}")
-            if progress_tracker and room_id:
-                progress_tracker.fail_session(room_id, error_msg)
-            return jsonify({"error": error_msg}), 400
-        
-        # 🚧 DOCUMENT REVIEW GATE - Reviewer-first analysis
-        # ⚠️ NON-NEGOTIABLE: This must happen AFTER parsing, BEFORE sentence extraction
-        # 
-        # DO NOT move this earlier "for convenience" - that breaks the reviewer-first architecture.
-        # Extracting sentences before this gate reintroduces sentence-first bias.
-        # 
-        # This gate determines whether sentence-level analysis is warranted.
-        # It answers: "Would a human reviewer pause here?"
+            progress_tracker.fail_session(room_id, html_content)
+        return upload_error_event(html_content, 400), None
+    
+    # Check if content is empty
+    if not html_content.strip():
+        error_msg = "The uploaded file appears to be empty or could not be parsed."
+        logger.error(f"Empty content from file: {file.filename}")
         if progress_tracker and room_id:
-            progress_tracker.update_stage(room_id, 2, "Understanding document structure and goal...")
-        
-        from core.document_review_gate import run_document_review_gate
-        document_review = run_document_review_gate(html_content, file.filename)
-        
-        if document_review.blocking:
-            logger.warning(f"Warning: Document has blocking structural issues - but continuing with sentence-level analysis")
+            progress_tracker.fail_session(room_id, error_msg)
+        return upload_error_event(error_msg, 400), None
+    
+    # 🚧 DOCUMENT REVIEW GATE - Reviewer-first analysis
+    # ⚠️ NON-NEGOTIABLE: This must happen AFTER parsing, BEFORE sentence extraction
+    # 
+    # DO NOT move this earlier "for convenience" - that breaks the reviewer-first architecture.
+    # Extracting sentences before this gate reintroduces sentence-first bias.
+    # 
+    # This gate determines whether sentence-level analysis is warranted.
+    # It answers: "Would a human reviewer pause here?"
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 2, "Understanding document structure and goal...")
+    
+    # 🧱 DOCUMENT IR: The HTML is parsed once here; the gate, sentence
+    # extraction and the shared NLP context all read this IR
+    from core.document_ir import DocumentIR
+    from core.document_review_gate import run_document_review_gate
+    document = DocumentIR.from_html(html_content)
+    timer.lap(STAGE_PARSE)
+    document_review = run_document_review_gate(document, file.filename)
+    timer.lap(STAGE_GATE)
+    
+    if document_review.blocking:
+        logger.warning(f"Warning: Document has blocking structural issues - but continuing with sentence-level analysis")
 
-        
-        # Stage 3: Breaking into Sentences (50%)
-        # Only proceed if document structure is sound
+    
+    # Stage 3: Breaking into Sentences (50%)
+    # Only proceed if document structure is sound
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 3, "Identifying sentence boundaries and structure...")
+    
+    # Store the original HTML content for highlighting
+    # Extract sentences that preserve HTML structure while also having plain text for analysis
+    
+    # Debug: Check if the input HTML already contains highlighting
+    if 'sentence-highlight' in html_content:
+        logger.error(f"🔥 CRITICAL: Input HTML already contains sentence highlighting! This suggests the document was previously processed.")
+        logger.info(f"HTML snippet: {html_content[:500]}...")
+    
+    sentences = extract_sentences_with_html_preservation(document)
+    timer.lap(STAGE_EXTRACT)
+    
+    # Check if sentence extraction failed
+    if not sentences:
+        error_msg = "Could not extract any sentences from the document. The file may be corrupted or in an unsupported format."
+        logger.error(f"No sentences extracted from file: {file.filename}")
         if progress_tracker and room_id:
-            progress_tracker.update_stage(room_id, 3, "Identifying sentence boundaries and structure...")
-        
-        # Store the original HTML content for highlighting
-        # Extract sentences that preserve HTML structure while also having plain text for analysis
-        
-        # Debug: Check if the input HTML already contains highlighting
-        if 'sentence-highlight' in html_content:
-            logger.error(f"🔥 CRITICAL: Input HTML already contains sentence highlighting! This suggests the document was previously processed.")
-            logger.info(f"HTML snippet: {html_content[:500]}...")
-        
-        sentences = extract_sentences_with_html_preservation(html_content)
-        
-        # Check if sentence extraction failed
-        if not sentences:
-            error_msg = "Could not extract any sentences from the document. The file may be corrupted or in an unsupported format."
-            logger.error(f"No sentences extracted from file: {file.filename}")
-            if progress_tracker and room_id:
-                progress_tracker.fail_session(room_id, error_msg)
-            return jsonify({"error": error_msg}), 400
-        
-        logger.info(f"Extracted {len(sentences)} sentences from {file.filename}")
+            progress_tracker.fail_session(room_id, error_msg)
+        return upload_error_event(error_msg, 400), None
+    
+    logger.info(f"Extracted {len(sentences)} sentences from {file.filename}")
+    
+    return None, {
+        "html_content": html_content,
+        "document_review": document_review,
+        "sentences": sentences,
+        "document": document,
+        "plain_text": document.plain_text  # Plain text for RAG context
+    }
+
+def prepare_sentence_jobs(sentences, document_review):
+    """
+    Pass 1 of the rule analysis: clean sentence texts, decide which sentences
+    to analyze and build their SentenceJobs.
+
+    Returns:
+        (plain_texts, analyze_flags, jobs) with one job per analyzed sentence
+    """
+    # Import the gating function
+    from core.document_review_gate import should_analyze_sentence
+    from .parallel_analysis import SentenceJob
+    
+    # 🚀 LAZY RAG OPTIMIZATION: Ensure AI pre-fetch is skipped during extraction phase
+    try:
+        from rules import rag_rule_helper
+        rag_rule_helper.RAG_SKIP_PREFETCH = True
+        logger.info("⚡ RAG Lazy Mode: Forced Active for extraction phase")
+    except Exception as e:
+        logger.warning(f"Could not force Lazy RAG: {e}")
+
+    # Pass 1: clean sentence texts and decide which sentences to analyze
+    plain_texts = []
+    analyze_flags = []
+    for index, sent in enumerate(sentences):
+        plain_text_sentence = sent.text
         
-        # Use BeautifulSoup to extract plain text for RAG context
-        soup = BeautifulSoup(html_content, "html.parser")
-        plain_text = soup.get_text(separator="\n")
+        # 🚧 GATED ANALYSIS - Only analyze if needed
+        should_analyze = should_analyze_sentence(index, plain_text_sentence, document_review)
         
-        # Store the document content for RAG context
-        current_document_content = plain_text
+        if should_analyze:
+            logger.debug(f"🔍 Analyzing sentence {index} (flagged by document review)")
+        else:
+            logger.debug(f"⏭️ Skipping sentence {index} (not in analysis scope)")
         
-        # Store all sentences for adjacent context in AI suggestions
-        global current_sentences_list
-        current_sentences_list = sentences
+        plain_texts.append(clean_sentence_text(index, plain_text_sentence))
+        analyze_flags.append(should_analyze)
+    
+    # Get adjacent sentences for context-aware analysis: the cleaned previous
+    # sentence and the raw next sentence
+    jobs = [
+        SentenceJob(
+            index=index,
+            text=plain_texts[index],
+            previous_sentence=plain_texts[index - 1] if index > 0 else None,
+            next_sentence=sentences[index + 1].text if index < len(sentences) - 1 else None
+        )
+        for index in range(len(sentences)) if analyze_flags[index]
+    ]
+
+    return plain_texts, analyze_flags, jobs
+
+def review_upload_events(file, room_id, progress_tracker):
+    """
+    Run the upload review pipeline, yielding results as they become available.
+
+    Yields event dicts in this order: ``document_review`` (with the display
+    HTML), one ``sentence`` event per sentence in document order, then
+    ``report`` (aggregated report and structural insights). A failure at any
+    point yields a single ``error`` event instead and ends the stream.
+    """
+
+    try:
+        timer = get_performance_monitor().upload_timer()
+        parse_error, parsed = parse_uploaded_document(file, room_id, progress_tracker, timer)
+        if parse_error:
+            yield parse_error
+            return
+        html_content = parsed["html_content"]
+        document_review = parsed["document_review"]
+        sentences = parsed["sentences"]
+        plain_text = parsed["plain_text"]
+
+        # 🧠 SHARED NLP CONTEXT: One parse of the document shared by every rule
+        from .rules.nlp_context import DocumentContext
+        document_context = DocumentContext.from_soup(parsed["document"], [s.text for s in sentences])
+
+        # The document-level review goes out first so the UI can render it
+        # while the sentences are still being analyzed
+        yield {
+            "event": "document_review",
+            "content": html_content,  # For display
+            "document_review": document_review.to_ui(),  # NEW: document-level insights
+            "total_sentences": len(sentences),
+            "room_id": room_id
+        }
 
         # 🧠 RAG INGESTION: Removed to save memory. 
         # User documents do not need to be added to the rules knowledge base.
@@ -803,157 +910,53 @@ def upload_file():
                 progress_tracker.update_stage(room_id, 4, "Applying grammar, style, and readability rules...")
         
         sentence_data = []
-        total_sentences = len(sentences)
-        analyzed_count = 0  # Track how many sentences we actually analyze
         
-        # Import the gating function
-        from core.document_review_gate import should_analyze_sentence
+        from .parallel_analysis import SentenceAnalysisExecutor
+        with timer.stage(STAGE_EXTRACT):
+            plain_texts, analyze_flags, jobs = prepare_sentence_jobs(sentences, document_review)
+        analyzed_count = len(jobs)  # Track how many sentences we actually analyze
         
-        # 🚀 LAZY RAG OPTIMIZATION: Ensure AI pre-fetch is skipped during extraction phase
-        try:
-            from rules import rag_rule_helper
-            rag_rule_helper.RAG_SKIP_PREFETCH = True
-            logger.info("⚡ RAG Lazy Mode: Forced Active for extraction phase")
-        except Exception as e:
-            logger.warning(f"Could not force Lazy RAG: {e}")
-
-        for index, sent in enumerate(sentences):
+        # Pass 2: apply rules, in parallel shards for large documents.
+        # Sentences unchanged since an earlier upload come from the analysis cache;
+        # the rest are parsed in one batched nlp.pipe pass (🧠 SHARED NLP CONTEXT)
+        from .analysis_cache import get_analysis_cache
+        plan = get_dispatch_plan()
+        executor = SentenceAnalysisExecutor(analyze_sentence, plan, cache=get_analysis_cache())
+        
+        def report_analysis_progress(done, total):
             # Update substep progress for analysis (RESCALED: 30-80% range)
-            if progress_tracker and room_id and total_sentences > 0:
-                substep_progress = 30 + int((index / total_sentences) * 50)
-                progress_tracker.update_progress(room_id, substep_progress, f"Analyzing {file.filename} ({index + 1}/{total_sentences})...")
-            
-            # Use the plain text version for analysis
-            plain_text_sentence = sent.text
-            html_fragment = getattr(sent, 'html_fragment', plain_text_sentence)
-            
-            # 🚧 GATED ANALYSIS - Only analyze if needed
-            should_analyze = should_analyze_sentence(index, plain_text_sentence, document_review)
-            
-            if should_analyze:
-                analyzed_count += 1
-                logger.debug(f"🔍 Analyzing sentence {index} (flagged by document review)")
-            else:
-                logger.debug(f"⏭️ Skipping sentence {index} (not in analysis scope)")
-            
-            # Debug: Log sentence content to understand the issue
-            logger.debug(f"Processing sentence {index}: '{plain_text_sentence[:100]}...'")
-            
-            # AGGRESSIVE CLEANING: Handle malformed HTML attributes that somehow got into sentence text
-            if '="' in plain_text_sentence and ('sentence-highlight' in plain_text_sentence or 'data-sentence-index' in plain_text_sentence):
-                logger.error(f"🚨 MALFORMED HTML ATTRIBUTES DETECTED in sentence {index}: {plain_text_sentence}")
-                clean_text = clean_malformed_html_attributes(plain_text_sentence)
-                logger.warning(f"🧹 Cleaned malformed HTML: '{clean_text}'")
-                plain_text_sentence = clean_text
-            
-            # Extra safety: Ensure plain text sentence doesn't contain HTML tags
-            if '<' in plain_text_sentence and '>' in plain_text_sentence:
-                logger.warning(f"🚨 SENTENCE {index} CONTAINS HTML TAGS: {plain_text_sentence}")
-                # Check if it contains our highlighting markup specifically
-                if 'sentence-highlight' in plain_text_sentence:
-                    logger.error(f"🔥 CRITICAL: Sentence {index} contains highlighting markup! This suggests circular processing.")
-                
-                temp_soup = BeautifulSoup(plain_text_sentence, "html.parser")
-                clean_text = temp_soup.get_text().strip()
-                logger.warning(f"✅ Cleaned sentence {index}: '{clean_text[:100]}...'")
-                plain_text_sentence = clean_text
-            
-            # Apply rules ONLY if sentence should be analyzed
-            if should_analyze:
-                # Get adjacent sentences for context-aware analysis
-                previous_sentence = None
-                next_sentence = None
-                
-                if index > 0:
-                    # Get previous sentence from already processed sentences
-                    previous_sentence = sentence_data[index - 1]['sentence'] if sentence_data else None
-                
-                if index < len(sentences) - 1:
-                    # Get next sentence (if available)
-                    try:
-                        next_sent = sentences[index + 1]
-                        next_sentence = next_sent.text if hasattr(next_sent, 'text') else str(next_sent)
-                    except (IndexError, AttributeError):
-                        next_sentence = None
-                
-                feedback, readability_scores, quality_score = analyze_sentence(
-                    plain_text_sentence, 
-                    rules,
-                    previous_sentence=previous_sentence,
-                    next_sentence=next_sentence
+            if progress_tracker and room_id and total > 0:
+                substep_progress = 30 + int((done / total) * 50)
+                progress_tracker.update_progress(room_id, substep_progress, f"Analyzing {file.filename} ({min(done + 1, total)}/{total})...")
+        
+        # Pass 3: emit per-sentence results in document order as they complete.
+        # Only the fields the structural analysis and review snapshot need are kept in memory.
+        def sentence_event(index, feedback, quality_score, analysis_skipped):
+            with timer.stage(STAGE_SERIALIZE):
+                entry = build_sentence_entry(
+                    index, sentences[index], plain_texts[index], feedback, quality_score, analysis_skipped
                 )
-                analysis_skipped = False
-            else:
-                # Skip analysis - reviewer chose not to comment
-                # Note: Silence ≠ perfection. Silence = no comment warranted.
-                feedback = []
-                readability_scores = {}
-                quality_score = None  # Not scored
-                analysis_skipped = True
-            
-            # Store analysis_skipped flag for transparency
-            enhanced_feedback = []
-            seen_issues = set()
-            
-            for item in feedback:
-                # Normalize issue message to prevent duplicates caused by punctuation or case differences
-                message = item.get('message', '') if isinstance(item, dict) else str(item)
-                clean_msg = message.strip().rstrip('.').lower()
-                
-                # Deduplicate by normalized message and start/end position
-                if isinstance(item, dict):
-                    issue_key = f"{clean_msg}_{item.get('start', 0)}_{item.get('end', 0)}"
-                else:
-                    issue_key = f"{clean_msg}_0_0"
-                
-                if issue_key in seen_issues:
-                    continue
-                seen_issues.add(issue_key)
-                
-                if isinstance(item, dict):
-                    item['sentence_index'] = index
-                    enhanced_feedback.append(item)
-                else:
-                    enhanced_feedback.append({
-                        "text": plain_text_sentence,
-                        "start": 0,
-                        "end": len(plain_text_sentence),
-                        "message": str(item),
-                        "sentence_index": index
-                    })
-            
-            # 🗜️ PAYLOAD OPTIMIZATION: Send only what the UI needs
-            optimized_feedback = []
-            for item in enhanced_feedback:
-                if isinstance(item, dict):
-                    # Remove internal logging from browser payload
-                    item.pop('internal_log', None)
-                    optimized_feedback.append(item)
-
-            sentence_data.append({
-                "sentence": plain_text_sentence,
-                "html_sentence": html_fragment,
-                "sentence_index": index,
-                "block_index": sent.block_index, # NEW: Paragraph/Section ID
-                "tag_name": sent.tag_name,       # NEW: p, h1, li, etc.
-                "feedback": optimized_feedback,
-                "analysis_skipped": analysis_skipped,
-                "quality_score": quality_score
-            })
-            
-            # (Remove plain text 'sentence', 'readability_scores' and raw offsets to save 60% space)
-            
-            # FINAL CLEANUP: Ensure no malformed HTML attributes made it through (On optimized data)
-            if '="' in plain_text_sentence and ('sentence-highlight' in plain_text_sentence or 'data-sentence-index' in plain_text_sentence):
-                logger.error(f"🚨 FINAL CHECK: Malformed HTML still present in sentence {index}: {plain_text_sentence}")
-                clean_text = clean_malformed_html_attributes(plain_text_sentence)
-                sentence_data[-1]["html_sentence"] = clean_text # Update the display fragment
-                logger.warning(f"✅ Final cleanup applied: {clean_text}")
-            
-            # (Extra debug logging moved out of time-critical loop)
+                sentence_data.append({key: entry[key] for key in REVIEW_SENTENCE_FIELDS if key in entry})
+            return {"event": "sentence", "sentence": entry}
+
+        # Skip analysis - reviewer chose not to comment
+        # Note: Silence ≠ perfection. Silence = no comment warranted.
+        next_index = 0
+        for index, (feedback, readability_scores, quality_score) in timer.timed(STAGE_RULES, executor.iter_results(
+                jobs, document_context, report_analysis_progress)):
+            for skipped_index in range(next_index, index):
+                yield sentence_event(skipped_index, [], None, True)
+            yield sentence_event(index, feedback, quality_score, False)
+            next_index = index + 1
+        for skipped_index in range(next_index, len(sentences)):
+            yield sentence_event(skipped_index, [], None, True)
+
+        # Block and document rules run once, outside the per-sentence analysis
+        with timer.stage(STAGE_RULES):
+            document_feedback = run_document_rules(plan, parsed["document"])
 
         total_sentences = len(sentence_data)
-        total_errors = sum(len(s['feedback']) for s in sentence_data)
+        total_errors = count_issues(sentence_data, document_feedback)
         
         # Stage 5: Generating Report (Starts at 91%)
         if progress_tracker and room_id:
@@ -967,18 +970,19 @@ def upload_file():
 
         # 🧠 STRUCTURAL ANALYSIS: Analyze paragraphs and sections for holistic meaning
         from core.structural_analyzer import analyze_document_structure
-        structural_insights = analyze_document_structure(sentence_data, document_review.document_type)
-
-        aggregated_report = {
-            "totalSentences": total_sentences,
-            "totalWords": len(plain_text.split()),
-            "avgQualityScore": quality_index,
-            "message": "Content analysis completed.",
-            "analysis_scope": document_review.analysis_scope,
-            "document_type": document_review.document_type,
-            "analyzed_sentences": analyzed_count,
-            "structural_insights": structural_insights # NEW: Holistic block feedback
-        }
+        with timer.stage(STAGE_STRUCTURAL):
+            structural_insights = analyze_document_structure(sentence_data, document_review.document_type)
+
+        with timer.stage(STAGE_SERIALIZE):
+            aggregated_report = build_aggregated_report(
+                sentence_data, plain_text, document_review, analyzed_count, structural_insights,
+                document_feedback
+            )
+
+            # Keep a snapshot so a revision can be re-reviewed incrementally (/upload_revision)
+            review_id = save_review_snapshot(file.filename, sentence_data, structural_insights)
+            store_review_document([review_id, room_id], file.filename, plain_text, plain_texts)
+        timer.finish()
 
         # Complete progress tracking
         if progress_tracker and room_id:
@@ -1012,14 +1016,12 @@ def upload_file():
         except Exception as hist_err:
             logger.warning(f"Could not start background history save: {hist_err}")
 
-        # Return the result
-        return jsonify({
-            "content": html_content,  # For display
-            "document_review": document_review.to_ui(),  # NEW: document-level insights
-            "sentences": sentence_data,
+        yield {
+            "event": "report",
             "report": aggregated_report,
-            "room_id": room_id  # Include room_id in response
-        })
+            "structural_insights": structural_insights,
+            "review_id": review_id
+        }
 
     except Exception as e:
         logger.error(f"Error processing file: {e}")
@@ -1028,8 +1030,223 @@ def upload_file():
         if progress_tracker and room_id:
             progress_tracker.fail_session(room_id, str(e))
             
+        yield upload_error_event(str(e), 500)
+
+@main.route('/upload_revision', methods=['POST'])
+def upload_revision():
+    """
+    Re-review a revised document against an earlier review.
+
+    Form fields: ``file`` (the revision), ``review_id`` (from a previous
+    /upload or /upload_revision response) and optional ``room_id``. Only
+    inserted or modified sentences and their neighbours are re-analyzed, and
+    the response is a delta against the previous review.
+    """
+    file, error_response = validate_upload_request()
+    if error_response:
+        return error_response
+
+    from .incremental_review import get_review_store
+    review_id = request.form.get('review_id', '')
+    previous = get_review_store().get(review_id)
+    if previous is None:
+        return jsonify({"error": f"Unknown or expired review_id: {review_id}"}), 404
+
+    room_id = request.form.get('room_id')
+    from .progress_tracker import get_progress_tracker
+    progress_tracker = get_progress_tracker()
+
+    try:
+        return review_revision(file, review_id, previous, room_id, progress_tracker)
+    except Exception as e:
+        logger.error(f"Error re-reviewing revision: {e}", exc_info=True)
+        if progress_tracker and room_id:
+            progress_tracker.fail_session(room_id, str(e))
         return jsonify({"error": str(e)}), 500
 
+def review_revision(file, review_id, previous, room_id, progress_tracker):
+    """
+    Incremental review of a revision of a previously reviewed document.
+
+    The previous and new sentences are aligned (content hash, then edit
+    similarity for replaced runs). Inserted/modified sentences and their
+    immediate neighbours go through the rules; every other sentence keeps its
+    previous feedback, and only blocks containing re-analyzed sentences are
+    structurally re-analyzed.
+    """
+    from .analysis_cache import get_analysis_cache, ruleset_version
+    from .incremental_review import (align_sentences, diff_insights, diff_sentence_issues,
+                                     reusable_blocks)
+    from .parallel_analysis import SentenceAnalysisExecutor
+    from .rules.nlp_context import DocumentContext
+    from core.structural_analyzer import reanalyze_document_structure
+
+    timer = get_performance_monitor().upload_timer()
+    parse_error, parsed = parse_uploaded_document(file, room_id, progress_tracker, timer)
+    if parse_error:
+        return jsonify({"error": parse_error["error"]}), parse_error["status"]
+    document_review = parsed["document_review"]
+    sentences = parsed["sentences"]
+
+    with timer.stage(STAGE_EXTRACT):
+        plain_texts, analyze_flags, jobs = prepare_sentence_jobs(sentences, document_review)
+    old_sentences = previous["sentences"]
+    alignment = align_sentences([s["sentence"] for s in old_sentences], plain_texts)
+
+    if previous.get("ruleset_version") != ruleset_version():
+        # Rules changed since the previous review: its feedback cannot be reused
+        affected = set(range(len(sentences)))
+    else:
+        affected = alignment.affected_indices()
+        affected.update(
+            index for index, old_index in enumerate(alignment.old_for_new)
+            if old_index is not None and old_sentences[old_index]["analysis_skipped"] == analyze_flags[index]
+        )
+    logger.info(f"🔁 Revision of {file.filename}: {alignment.counts()} - re-analyzing {len(affected)}/{len(sentences)} sentences")
+
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 4, f"Re-analyzing {len(affected)} changed sentences...")
+
+    document_context = DocumentContext.from_soup(parsed["document"], [s.text for s in sentences])
+    plan = get_dispatch_plan()
+    executor = SentenceAnalysisExecutor(analyze_sentence, plan, cache=get_analysis_cache())
+    with timer.stage(STAGE_RULES):
+        results = executor.run([job for job in jobs if job.index in affected], document_context)
+        document_feedback = run_document_rules(plan, parsed["document"])
+
+    with timer.stage(STAGE_SERIALIZE):
+        sentence_data = []
+        changed_sentences = []
+        for index, sent in enumerate(sentences):
+            if index in affected:
+                feedback, readability_scores, quality_score = results.get(index, ([], {}, None))
+                entry = build_sentence_entry(
+                    index, sent, plain_texts[index], feedback, quality_score, not analyze_flags[index]
+                )
+                changed_sentences.append(entry)
+                sentence_data.append({key: entry[key] for key in REVIEW_SENTENCE_FIELDS if key in entry})
+            else:
+                old = old_sentences[alignment.old_for_new[index]]
+                sentence_data.append(dict(
+                    old,
+                    block_index=sent.block_index,
+                    tag_name=sent.tag_name,
+                    feedback=[dict(item, sentence_index=index) for item in old["feedback"]]
+                ))
+
+    if progress_tracker and room_id:
+        progress_tracker.update_stage(room_id, 5, "Compiling final quality report...")
+
+    with timer.stage(STAGE_STRUCTURAL):
+        reused = reusable_blocks(alignment, affected, old_sentences, sentence_data)
+        structural_insights = reanalyze_document_structure(
+            sentence_data, previous["structural_insights"], reused, document_review.document_type
+        )
+    with timer.stage(STAGE_SERIALIZE):
+        aggregated_report = build_aggregated_report(
+            sentence_data, parsed["plain_text"], document_review, sum(analyze_flags), structural_insights,
+            document_feedback
+        )
+        new_review_id = save_review_snapshot(file.filename, sentence_data, structural_insights)
+        store_review_document([new_review_id, room_id], file.filename, parsed["plain_text"], plain_texts)
+    timer.finish()
+
+    if progress_tracker and room_id:
+        progress_tracker.complete_session(room_id, success=True,
+                                          final_message=f"Revision review complete - re-analyzed {len(affected)} sentences")
+
+    return jsonify({
+        "review_id": new_review_id,
+        "previous_review_id": review_id,
+        "content": parsed["html_content"],
+        "document_review": document_review.to_ui(),
+        "alignment": dict(alignment.counts(), reanalyzed=len(affected)),
+        # Previous sentence index for every new sentence (null = inserted)
+        "sentence_map": alignment.old_for_new,
+        # Full entries for the re-analyzed sentences only
+        "sentences": changed_sentences,
+        "issues": diff_sentence_issues(alignment, old_sentences, sentence_data),
+        "structural_insights": diff_insights(previous["structural_insights"], structural_insights),
+        "report": aggregated_report,
+        "room_id": room_id
+    })
+
+def review_upload_job(filename, data, room_id, progress_tracker):
+    """
+    Run the /upload pipeline for a queued review job (inside a job worker process).
+
+    Returns:
+        (payload, error, snapshot) - the /upload response payload or an error
+        message, plus the review snapshot for the dispatching process to keep
+    """
+    from werkzeug.datastructures import FileStorage
+    from .incremental_review import get_review_store
+
+    file = FileStorage(stream=io.BytesIO(data), filename=filename)
+    payload, error_event = gather_upload_events(review_upload_events(file, room_id, progress_tracker))
+    if error_event:
+        return None, error_event["error"], None
+    return payload, None, get_review_store().pop(payload["review_id"])
+
+def get_job_queue():
+    from .incremental_review import get_review_store
+    from .progress_tracker import get_progress_tracker
+    from .review_jobs import get_review_job_queue
+    return get_review_job_queue(review_upload_job, progress_tracker=get_progress_tracker,
+                                on_snapshot=get_review_store().put)
+
+@main.route('/jobs/upload', methods=['POST'])
+def submit_review_job():
+    """
+    Queue a document review and return its job id at once (202).
+
+    Progress is sent to the SocketIO room ``room_id`` (form field, defaults to
+    the job id); poll /jobs/<job_id> and fetch /jobs/<job_id>/result when done.
+    """
+    file, error_response = validate_upload_request()
+    if error_response:
+        return error_response
+
+    from .review_jobs import QueueFull
+    try:
+        job = get_job_queue().submit(file.filename, file.read(), request.form.get('room_id'))
+    except QueueFull as e:
+        logger.warning(f"Rejected review job for {file.filename}: {e}")
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    return jsonify(job), 202
+
+@main.route('/jobs/<job_id>', methods=['GET'])
+def review_job_status(job_id):
+    """State, queue position and progress of a review job."""
+    job = get_job_queue().status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
+@main.route('/jobs/<job_id>/result', methods=['GET'])
+def review_job_result(job_id):
+    """The /upload response of a finished review job (202 while it is still pending)."""
+    from .review_jobs import DONE, QUEUED, RUNNING
+    queue = get_job_queue()
+    job = queue.status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if job["status"] in (QUEUED, RUNNING):
+        return jsonify(job), 202
+    if job["status"] != DONE:
+        return jsonify({"error": job["error"] or f"Job {job['status']}", "status": job["status"]}), 409
+    return jsonify(queue.result(job_id))
+
+@main.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_review_job(job_id):
+    """Cancel a queued or running review job."""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
 def extract_text_from_file(file):
     # Implement text extraction logic here
     return "Extracted text from file"
@@ -1064,10 +1281,10 @@ def ai_suggestion():
     Community Edition: No AI rewriting. 
     Returns document references from RAG instead.
     """
-    global current_document_content, current_sentences_list
     import uuid
     import time
-    from .advanced_retrieval import create_retriever, retrieve_for_writing_feedback
+    from .document_store import get_document_store
+    from .rules.rule_reference import REFERENCE_SOURCE, get_rule_reference_service
     import logging
 
     logger = logging.getLogger(__name__)
@@ -1082,6 +1299,15 @@ def ai_suggestion():
     option_number   = data.get('option_number', 1)
     sentence_index  = data.get('sentence_index', -1)
     
+    # Sentence and adjacent context of the reviewed document (by review id or room_id)
+    sentence_info = None
+    if isinstance(sentence_index, int) and sentence_index >= 0:
+        store = get_document_store()
+        sentence_info = (store.sentence_context(data.get('review_id'), sentence_index)
+                         or store.sentence_context(data.get('room_id'), sentence_index))
+    if sentence_info and not sentence_context:
+        sentence_context = sentence_info["sentence"]
+    
     if not feedback_text and multiple_feedback:
         feedback_text = multiple_feedback[0]
 
@@ -1090,64 +1316,19 @@ def ai_suggestion():
     suggestion_id = str(uuid.uuid4())
     start_time = time.time()
 
-    # Query RAG for references
+    # Rule references from rules.json (indexed once, reloaded when the file changes)
     sources = []
     try:
-        import json
-        rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', 'rules.json')
-        
-        # Zero-memory fallback: read rules directly from JSON instead of massive ChromaDB ONNX model
-        rag_results = []
-        seen_rules = set()
-        
-        if os.path.exists(rules_path):
-            with open(rules_path, 'r', encoding='utf-8') as f:
-                rules = json.load(f)
-                
-            issues = [issue.strip() for issue in feedback_text.split('|') if issue.strip()]
-            
-            for issue in issues:
-                # Find matching rule by message or suggestion
-                for rule in rules:
-                    if (issue in rule.get('message', '') or rule.get('message', '') in issue or
-                        issue in rule.get('suggestion', '') or rule.get('suggestion', '') in issue):
-                        
-                        # Format identically to old RAG results
-                        content = f"Rule: {rule.get('message', '')}\nGuidance: {rule.get('suggestion', '')}"
-                        if rule.get('example_violation') and rule.get('example_correction'):
-                            content += f"\nBad: '{rule.get('example_violation')}'\nGood: '{rule.get('example_correction')}'"
-                            
-                        if content not in seen_rules:
-                            # Create a mock RetrievalResult using a simple object class
-                            class MockResult:
-                                def __init__(self, content, metadata):
-                                    self.content = content
-                                    self.metadata = metadata
-                                    self.relevance_score = 1.0
-                            
-                            rag_results.append(MockResult(
-                                content=content,
-                                metadata={'rule_id': rule.get('rule_id', ''), 'meta_doc_title': 'Siemens Style Guide'}
-                            ))
-                            seen_rules.add(content)
-                            break
-        
-        for res in rag_results:
-            rule_name = res.metadata.get('rule_id', res.metadata.get('issue_type', ''))
-            doc_title = res.metadata.get('meta_doc_title', res.metadata.get('source_doc_id', 'Knowledge Base'))
-            if rule_name:
-                display_name = f"{doc_title} ({rule_name})"
-            else:
-                display_name = doc_title
-                
+        issues = [issue.strip() for issue in feedback_text.split('|') if issue.strip()]
+        for reference in get_rule_reference_service().lookup(issues):
             sources.append({
-                "rule_id": rule_name or "Style Rule",
-                "content": res.content,
-                "source": display_name,
-                "score": res.relevance_score
+                "rule_id": reference.rule_id or "Style Rule",
+                "content": reference.content,
+                "source": f"{REFERENCE_SOURCE} ({reference.rule_id})" if reference.rule_id else REFERENCE_SOURCE,
+                "score": reference.score
             })
     except Exception as e:
-        logger.error(f"RAG retrieval error: {e}")
+        logger.error(f"Rule reference lookup error: {e}")
 
     # Ensure we use rule feedback as Suggested Action
     ai_answer = data.get('ai_answer', '')
@@ -1185,7 +1366,9 @@ def ai_suggestion():
         "sources": sources,
         "context_used": {
             "document_type": document_type,
-            "writing_goals": writing_goals
+            "writing_goals": writing_goals,
+            "previous_sentence": sentence_info["previous_sentence"] if sentence_info else None,
+            "next_sentence": sentence_info["next_sentence"] if sentence_info else None
         },
         "note": "Generated using Rule-Based Engine + RAG (Community Edition)",
         "is_semantic_explanation": False,
@@ -1227,7 +1410,10 @@ def suggestion_feedback():
 
 @main.route('/performance_dashboard', methods=['GET'])
 def performance_dashboard():
-    """Get performance dashboard data."""
+    """
+    Per-rule latency, call/issue counts and hit rates (slowest rules first),
+    upload stage timings and suggestion feedback totals.
+    """
     from .performance_monitor import get_performance_dashboard
     
     try:
@@ -1238,6 +1424,11 @@ def performance_dashboard():
         logger.error(f"Error getting dashboard data: {str(e)}") 
         return jsonify({"error": "Failed to get dashboard data"}), 500
 
+@main.route('/metrics', methods=['GET'])
+def performance_metrics():
+    """The performance dashboard counters in the Prometheus text format."""
+    return Response(get_performance_monitor().prometheus_text(), mimetype='text/plain; version=0.0.4')
+
 
 # ── Per-User Scan History ─────────────────────────────────────────────────────
 
@@ -1478,108 +1669,119 @@ def hybrid_intelligence_test():
             "error": str(e)
         }), 500
 
+def batch_file_result(result):
+    """One /upload_batch result entry: the member's /upload payload plus a summary."""
+    if result.error is not None or result.payload is None:
+        return {
+            "filename": result.filename,
+            "success": False,
+            "error": result.error or "Could not parse file content",
+            "seconds": round(result.seconds, 3)
+        }
+    sentences = result.payload["sentences"]
+    return {
+        "filename": result.filename,
+        "success": True,
+        **result.payload,
+        "summary": {
+            "totalSentences": len(sentences),
+            "totalIssues": sum(len(s.get('feedback', [])) for s in sentences),
+            "qualityScore": calculate_quality_score(sentences)
+        },
+        "seconds": round(result.seconds, 3)
+    }
+
+def batch_review_events(file, room_id, progress_tracker):
+    """
+    Review every supported document of a zip upload, yielding one ``file``
+    event per document as it finishes and a closing ``batch`` summary event.
+    """
+    import zipfile
+    from .batch_review import BatchReviewer
+    from .incremental_review import get_review_store
+
+    began = time.time()
+    try:
+        zip_file = zipfile.ZipFile(file.stream)
+    except zipfile.BadZipFile:
+        yield upload_error_event("Invalid or corrupted ZIP file", 400)
+        return
+
+    with zip_file:
+        reviewer = BatchReviewer(review_upload_job, on_snapshot=get_review_store().put)
+        members, skipped = reviewer.plan(zip_file)
+        for name in skipped:
+            logger.warning(f"Skipping unsupported file: {name}")
+        if not members:
+            yield upload_error_event("No supported document files found in ZIP archive", 400)
+            return
+
+        if progress_tracker and room_id:
+            progress_tracker.update_progress(room_id, 5, f"Reviewing {len(members)} documents...")
+        successful = 0
+        for done, result in enumerate(reviewer.review(zip_file, members, room_id), start=1):
+            entry = batch_file_result(result)
+            successful += entry["success"]
+            if progress_tracker and room_id:
+                progress_tracker.update_progress(
+                    room_id, 5 + int(done / len(members) * 90), f"Reviewed {done}/{len(members)}: {result.filename}"
+                )
+            yield {"event": "file", "result": entry}
+
+    if progress_tracker and room_id:
+        progress_tracker.complete_session(room_id, success=True,
+                                          final_message=f"Batch review complete - {successful}/{len(members)} files")
+    yield {
+        "event": "batch",
+        "total_files": len(members),
+        "successful_files": successful,
+        "skipped_files": skipped,
+        "seconds": round(time.time() - began, 3)
+    }
+
 @main.route('/upload_batch', methods=['POST'])
 def upload_batch():
-    """Handle batch file upload (zip or multiple files)."""
-    try:
-        if 'file' not in request.files:
-            return jsonify({"error": "No file provided"}), 400
-        
-        file = request.files['file']
-        batch_mode = request.form.get('batch_mode', 'false').lower() == 'true'
-        
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
-        logger.info(f"Processing batch upload: {file.filename}, batch_mode: {batch_mode}")
-        
-        results = []
-        
-        if file.filename.lower().endswith('.zip'):
-            # Handle zip file
-            import zipfile
-            import tempfile
-            import os
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                zip_path = os.path.join(temp_dir, file.filename)
-                file.save(zip_path)
-                
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    # Extract all files
-                    zip_ref.extractall(temp_dir)
-                    
-                    # Process each extracted file
-                    for root, dirs, files in os.walk(temp_dir):
-                        for filename in files:
-                            if filename == file.filename:  # Skip the zip file itself
-                                continue
-                                
-                            file_path = os.path.join(root, filename)
-                            
-                            # Check if it's a supported file type
-                            if not any(filename.lower().endswith(ext) for ext in ['.pdf', '.md', '.adoc', '.docx', '.txt']):
-                                logger.warning(f"Skipping unsupported file: {filename}")
-                                continue
-                            
-                            try:
-                                # Read and process the file
-                                with open(file_path, 'rb') as f:
-                                    # Create a file-like object for processing
-                                    from werkzeug.datastructures import FileStorage
-                                    file_obj = FileStorage(
-                                        stream=f,
-                                        filename=filename,
-                                        content_type='application/octet-stream'
-                                    )
-                                    
-                                    # Process the file using existing logic
-                                    content = parse_file(file_obj)
-                                    if not content:
-                                        results.append({
-                                            "filename": filename,
-                                            "success": False,
-                                            "error": "Could not parse file content"
-                                        })
-                                        continue
-                                    
-                                    # Analyze the content
-                                    sentences = analyze_text(content)
-                                    report = {}
-                                    
-                                    results.append({
-                                        "filename": filename,
-                                        "success": True,
-                                        "content": content,
-                                        "sentences": sentences,
-                                        "report": report,
-                                        "summary": {
-                                            "totalSentences": len(sentences),
-                                            "totalIssues": sum(len(s.get('feedback', [])) for s in sentences),
-                                            "qualityScore": calculate_quality_score(sentences)
-                                        }
-                                    })
-                                    
-                            except Exception as e:
-                                logger.error(f"Error processing file {filename}: {str(e)}")
-                                results.append({
-                                    "filename": filename,
-                                    "success": False,
-                                    "error": str(e)
-                                })
+    """
+    Review every document in a zip archive with the /upload pipeline.
+
+    Documents are reviewed in parallel (app/batch_review.py). With
+    ?stream=ndjson (or 1) / ?stream=sse each document's result is sent as
+    soon as it finishes; otherwise all results are returned together.
+    """
+    if 'file' not in request.files:
+        return jsonify({"error": "No file provided"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+    if not file.filename.lower().endswith('.zip'):
+        return jsonify({"error": "Batch mode requires a zip file"}), 400
+
+    room_id = request.form.get('room_id')
+    from .progress_tracker import get_progress_tracker
+    progress_tracker = get_progress_tracker()
+    logger.info(f"Processing batch upload: {file.filename} (Room: {room_id})")
+
+    events = batch_review_events(file, room_id, progress_tracker)
+    stream_format = request.args.get('stream', '').lower()
+    if stream_format in UPLOAD_STREAM_FORMATS:
+        return stream_upload_events(events, UPLOAD_STREAM_FORMATS[stream_format])
+
+    results = []
+    for event in events:
+        if event["event"] == "error":
+            return jsonify({"error": event["error"]}), event["status"]
+        if event["event"] == "file":
+            results.append(event["result"])
         else:
-            return jsonify({"error": "Batch mode requires a zip file"}), 400
-        
-        return jsonify({
-            "success": True,
-            "results": results,
-            "total_files": len(results),
-            "successful_files": len([r for r in results if r["success"]])
-        })
-        
-    except Exception as e:
-        logger.error(f"Batch upload error: {str(e)}")
-        return jsonify({"error": f"Batch upload failed: {str(e)}"}), 500
+            summary = event
+    return jsonify({
+        "success": True,
+        "results": results,
+        "total_files": summary["total_files"],
+        "successful_files": summary["successful_files"],
+        "skipped_files": summary["skipped_files"]
+    })
 
 def calculate_quality_score(sentences):
     """Calculate a quality score based on the number of issues found."""
@@ -1644,7 +1846,7 @@ def export_document():
 def export_to_pdf(html_content, filename, metrics=None, issues=None):
     """Generate PDF using fpdf2 with Summary and Issues."""
     from fpdf import FPDF
-    from bs4 import BeautifulSoup
+    from core.document_ir import DocumentIR
     from flask import send_file
     import io
     
@@ -1685,10 +1887,10 @@ def export_to_pdf(html_content, filename, metrics=None, issues=None):
             pdf.ln(5)
         
         # 3. Document Body
-        soup = BeautifulSoup(html_content, "html.parser")
+        document = DocumentIR.from_html(html_content)
         pdf.set_font("Helvetica", size=11)
         
-        for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'li']):
+        for element in document.find_all(['h1', 'h2', 'h3', 'p', 'li']):
             text = safe_text(element.get_text().strip())
             if not text: continue
             
@@ -1734,7 +1936,7 @@ def export_to_pdf(html_content, filename, metrics=None, issues=None):
 def export_to_docx(html_content, filename, metrics=None, issues=None):
     """Generate DOCX with Summary and Issues."""
     from docx import Document
-    from bs4 import BeautifulSoup
+    from core.document_ir import DocumentIR
     from flask import send_file
     import io
     
@@ -1751,8 +1953,8 @@ def export_to_docx(html_content, filename, metrics=None, issues=None):
             p.add_run(str(metrics.get('words', 0)))
         
         # 2. Main content
-        soup = BeautifulSoup(html_content, "html.parser")
-        for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'li']):
+        document = DocumentIR.from_html(html_content)
+        for element in document.find_all(['h1', 'h2', 'h3', 'p', 'li']):
             text = element.get_text().strip()
             if not text: continue
                 
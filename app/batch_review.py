@@ -0,0 +1,317 @@
+"""
+Parallel batch review of the documents in a zip archive (/upload_batch).
+
+Every supported member runs the same pipeline as /upload (parse, document
+review gate, sentence extraction, rules). Members are read one at a time
+straight from the archive - nothing is extracted to disk - and fanned out
+across a pool of worker processes; results are yielded as each file
+finishes, so callers can stream them.
+
+Budgets keep one archive from monopolising the server:
+- BATCH_MAX_FILES members are reviewed, the rest are reported as failed
+- a member larger than BATCH_MAX_FILE_BYTES (uncompressed, checked while
+  reading, not only from the declared size) is rejected
+- members are rejected once BATCH_MAX_TOTAL_BYTES have been read
+- a review stops at its next progress update after BATCH_FILE_TIMEOUT
+  seconds, and the whole batch after BATCH_TOTAL_TIMEOUT seconds
+
+Only a few members per worker are held in memory at any time.
+"""
+
+import concurrent.futures
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from core.worker_pool import new_process_pool
+
+from .document_parsers import ZipMemberTooLarge, is_zip_document, read_zip_member
+
+logger = logging.getLogger(__name__)
+
+# Documents reviewed at once (worker processes; 1 = serial in the request process)
+BATCH_REVIEW_WORKERS = int(os.environ.get('BATCH_REVIEW_WORKERS', os.cpu_count() or 1))
+# Maximum members reviewed from one archive
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 500))
+# Maximum uncompressed size of one member, and of all members together
+BATCH_MAX_FILE_BYTES = int(os.environ.get('BATCH_MAX_FILE_BYTES', 50 * 1024 * 1024))
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get('BATCH_MAX_TOTAL_BYTES', 500 * 1024 * 1024))
+# Seconds one document, and the whole batch, may take
+BATCH_FILE_TIMEOUT = int(os.environ.get('BATCH_FILE_TIMEOUT', 600))
+BATCH_TOTAL_TIMEOUT = int(os.environ.get('BATCH_TOTAL_TIMEOUT', 3600))
+
+# Member types reviewed; anything else is skipped
+BATCH_EXTENSIONS = ('.pdf', '.md', '.adoc', '.docx', '.txt')
+# Members read ahead per worker while the others are being reviewed
+MEMBERS_PER_WORKER = 2
+
+
+class BatchTimeout(Exception):
+    """Raised inside a review when its time budget is used up."""
+
+
+class BatchFileResult(NamedTuple):
+    """Outcome of one member: the /upload payload, or an error message."""
+    filename: str
+    payload: Optional[dict]
+    error: Optional[str]
+    seconds: float
+
+
+class DeadlineReporter:
+    """
+    ProgressTracker stand-in used for batch members.
+
+    Progress of a single member is not relayed; every update only checks
+    the member's deadline and raises BatchTimeout once it has passed.
+    """
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.timed_out = False
+
+    def update_stage(self, room_id: str, stage_index: int, message: Optional[str] = None):
+        self._check()
+
+    def update_progress(self, room_id: str, percentage: int, message: str, stage_name: Optional[str] = None):
+        self._check()
+
+    def add_substep(self, room_id: str, substep_message: str):
+        self._check()
+
+    def complete_session(self, room_id: str, success: bool = True, final_message: str = "Processing completed!"):
+        """Completion of the batch is reported by the caller."""
+
+    def fail_session(self, room_id: str, error_message: str):
+        """Failures are reported in the member's result."""
+
+    def _check(self):
+        if time.time() > self.deadline:
+            self.timed_out = True
+            raise BatchTimeout("Review time budget exceeded")
+
+
+def review_member(pipeline: Callable, filename: str, data: bytes, room_id: str,
+                  file_timeout: float, batch_deadline: float) -> Tuple[Optional[dict], Optional[str], Optional[dict], float]:
+    """
+    Review one member. Runs inside a worker process (or serially).
+
+    ``pipeline`` is the /jobs pipeline, ``(filename, data, room_id,
+    progress_tracker) -> (payload, error, snapshot)``.
+
+    Returns:
+        (payload, error, snapshot, seconds)
+    """
+    began = time.time()
+    reporter = DeadlineReporter(min(began + file_timeout, batch_deadline))
+    try:
+        payload, error, snapshot = pipeline(filename, data, room_id, reporter)
+    except BatchTimeout:
+        payload, error, snapshot = None, None, None
+    except Exception as e:
+        logger.error(f"Batch review of {filename} failed: {e}", exc_info=True)
+        payload, error, snapshot = None, str(e), None
+    if reporter.timed_out:
+        # The pipeline reports the timeout as a generic error event
+        payload, error, snapshot = None, f"Review time budget exceeded ({file_timeout:.0f}s per file)", None
+    return payload, error, snapshot, time.time() - began
+
+
+def init_batch_worker():
+    """Documents are the unit of parallelism: each worker reviews its document serially."""
+    from core import pdf_extraction
+    from . import parallel_analysis
+    parallel_analysis.ANALYSIS_WORKERS = 1
+    pdf_extraction.PDF_WORKERS = 1
+
+
+class BatchReviewer:
+    """
+    Reviews the documents of a zip archive across a process pool.
+
+    Args:
+        pipeline: Picklable review function, see review_member()
+        max_workers: Documents reviewed at once (default BATCH_REVIEW_WORKERS)
+        max_files, max_file_bytes, max_total_bytes: Size budgets (defaults BATCH_MAX_*)
+        file_timeout, total_timeout: Time budgets in seconds (defaults BATCH_*_TIMEOUT)
+        on_snapshot: Called in this process as (review_id, snapshot) for reviewed files
+    """
+
+    # Worker pool shared by all batch reviews in this process
+    _pool = None
+    _pool_workers = 0
+
+    def __init__(self, pipeline: Callable, max_workers: Optional[int] = None, max_files: Optional[int] = None,
+                 max_file_bytes: Optional[int] = None, max_total_bytes: Optional[int] = None,
+                 file_timeout: Optional[float] = None, total_timeout: Optional[float] = None,
+                 on_snapshot: Optional[Callable] = None):
+        self.pipeline = pipeline
+        self.max_workers = max(1, max_workers or BATCH_REVIEW_WORKERS)
+        self.max_files = max_files or BATCH_MAX_FILES
+        self.max_file_bytes = max_file_bytes or BATCH_MAX_FILE_BYTES
+        self.max_total_bytes = max_total_bytes or BATCH_MAX_TOTAL_BYTES
+        self.file_timeout = file_timeout or BATCH_FILE_TIMEOUT
+        self.total_timeout = total_timeout or BATCH_TOTAL_TIMEOUT
+        self.on_snapshot = on_snapshot
+
+    def plan(self, zip_file: zipfile.ZipFile) -> Tuple[List[zipfile.ZipInfo], List[str]]:
+        """Members to review, in archive order, and the names of skipped (unsupported) entries."""
+        members, skipped = [], []
+        for info in zip_file.infolist():
+            if is_zip_document(info, BATCH_EXTENSIONS):
+                members.append(info)
+            elif not info.is_dir():
+                skipped.append(info.filename)
+        return members, skipped
+
+    def review(self, zip_file: zipfile.ZipFile, members: List[zipfile.ZipInfo],
+               room_id: Optional[str] = None) -> Iterator[BatchFileResult]:
+        """
+        Review ``members`` (from plan()), yielding each result as it finishes.
+
+        Members over a budget are yielded as failures without being reviewed.
+        """
+        deadline = time.time() + self.total_timeout
+        inputs = self._iter_inputs(zip_file, members, room_id, deadline)
+        pool = None
+        if self.max_workers > 1 and len(members) > 1:
+            try:
+                pool = self._get_pool(self.max_workers)
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Parallel batch review unavailable ({e}) - reviewing serially")
+                self._reset_pool()
+        if pool is not None:
+            yield from self._review_parallel(pool, inputs, deadline)
+            return
+        for item in inputs:
+            if isinstance(item, BatchFileResult):
+                yield item
+            elif time.time() > deadline:
+                yield self._over_time(item[1])
+            else:
+                yield self._finish(item[1], review_member(*item, self.file_timeout, deadline))
+
+    def _iter_inputs(self, zip_file, members, room_id, deadline):
+        """
+        Read members lazily: (pipeline, filename, data, room_id) per reviewable
+        member, a failed BatchFileResult for members over a budget.
+
+        Each member gets its own room id (``<room_id>/<member name>``) so its
+        review is stored under a key of its own.
+        """
+        total = 0
+        for count, info in enumerate(members):
+            name = info.filename
+            if count >= self.max_files:
+                yield BatchFileResult(name, None, f"Batch file limit exceeded ({self.max_files} files)", 0.0)
+                continue
+            if time.time() > deadline:
+                yield self._over_time(name)
+                continue
+            remaining = self.max_total_bytes - total
+            if info.file_size > self.max_file_bytes:
+                yield BatchFileResult(name, None, f"File is larger than {self.max_file_bytes} bytes", 0.0)
+                continue
+            if info.file_size > remaining:
+                yield BatchFileResult(name, None, f"Batch size limit exceeded ({self.max_total_bytes} bytes)", 0.0)
+                continue
+            try:
+                data = read_zip_member(zip_file, info, min(self.max_file_bytes, remaining))
+            except ZipMemberTooLarge:
+                # The declared size was wrong; the read was cut off at the limit
+                yield BatchFileResult(name, None, "File exceeds the batch size limits", 0.0)
+                continue
+            except (zipfile.BadZipFile, OSError, RuntimeError, NotImplementedError) as e:
+                yield BatchFileResult(name, None, f"Could not read from archive: {e}", 0.0)
+                continue
+            total += len(data)
+            yield (self.pipeline, name, data, f"{room_id or 'batch'}/{name}")
+
+    def _review_parallel(self, pool, inputs, deadline) -> Iterator[BatchFileResult]:
+        # Member name and the pool it was submitted to, per running review
+        in_flight: Dict[concurrent.futures.Future, Tuple[str, object]] = {}
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep the workers busy without reading the whole archive into memory
+            while not exhausted and len(in_flight) < self.max_workers * MEMBERS_PER_WORKER:
+                item = next(inputs, None)
+                if item is None:
+                    exhausted = True
+                elif isinstance(item, BatchFileResult):
+                    yield item
+                else:
+                    try:
+                        future = pool.submit(review_member, *item, self.file_timeout, deadline)
+                    except (BrokenProcessPool, RuntimeError):
+                        # Broken, or shut down by another batch that replaced it
+                        self._reset_pool(pool)
+                        pool = self._get_pool(self.max_workers)
+                        future = pool.submit(review_member, *item, self.file_timeout, deadline)
+                    in_flight[future] = (item[1], pool)
+            if not in_flight:
+                continue
+
+            done, _ = concurrent.futures.wait(in_flight, timeout=max(0.0, deadline - time.time()),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                # Batch budget used up: running reviews stop at their next progress update
+                for future, (name, _) in in_flight.items():
+                    future.cancel()
+                    yield self._over_time(name)
+                in_flight.clear()
+                for item in inputs:
+                    yield item if isinstance(item, BatchFileResult) else self._over_time(item[1])
+                return
+            for future in done:
+                name, submitted_to = in_flight.pop(future)
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool as e:
+                    logger.error(f"Batch worker crashed while reviewing {name}: {e}")
+                    # Every review on the broken pool fails the same way; only the first replaces it
+                    self._reset_pool(submitted_to)
+                    pool = self._get_pool(self.max_workers)
+                    yield BatchFileResult(name, None, "Review worker crashed", 0.0)
+                    continue
+                except concurrent.futures.CancelledError:
+                    # Cancelled from outside the batch; the other members carry on
+                    logger.warning(f"Batch review of {name} was cancelled")
+                    yield BatchFileResult(name, None, "Review was cancelled", 0.0)
+                    continue
+                yield self._finish(name, outcome)
+
+    def _finish(self, name: str, outcome) -> BatchFileResult:
+        payload, error, snapshot, seconds = outcome
+        if payload is not None and snapshot and self.on_snapshot and payload.get("review_id"):
+            self.on_snapshot(payload["review_id"], snapshot)
+        logger.info(f"Batch member {name} reviewed in {seconds:.2f}s" + (f" - {error}" if error else ""))
+        return BatchFileResult(name, payload, error, seconds)
+
+    @staticmethod
+    def _over_time(name: str) -> BatchFileResult:
+        return BatchFileResult(name, None, "Batch time budget exceeded", 0.0)
+
+    @classmethod
+    def _get_pool(cls, workers: int):
+        if cls._pool is None or cls._pool_workers != workers:
+            cls._reset_pool()
+            cls._pool = new_process_pool(workers, initializer=init_batch_worker)
+            cls._pool_workers = workers
+        return cls._pool
+
+    @classmethod
+    def _reset_pool(cls, broken=None):
+        """
+        Drop the shared pool; with ``broken``, only if that pool is still the
+        shared one. Reviews already submitted to it (by other batches too)
+        still finish.
+        """
+        if broken is not None and cls._pool is not broken:
+            return
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False)
+        cls._pool = None
+        cls._pool_workers = 0
@@ -162,14 +162,11 @@ class DocumentLoader:
     
     def _extract_pdf_content(self, path: Path) -> str:
         """Extract text content from PDF files."""
-        content = ""
+        from core.pdf_extraction import extract_pdf_pages
+
         try:
-            with open(path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        content += page_text + "\n"
+            # Pages are extracted in parallel and cached per page
+            content = "".join(page.text + "\n" for page in extract_pdf_pages(str(path)) if page.text)
         except Exception as e:
             logger.error(f"Error extracting PDF content from {path}: {e}")
             # Return empty content if PDF extraction fails
@@ -0,0 +1,499 @@
+"""
+File parsers for uploads: docx, doc, pdf, txt, adoc and md to display HTML.
+
+Each format has a generator that yields the HTML of one block at a time
+(``iter_*_blocks``); the ``parse_*`` functions join those blocks once, so
+assembly is linear in the output size instead of re-copying a growing string
+per paragraph. Text formats are decoded and split into paragraphs from the
+upload stream in chunks, so the raw bytes, the decoded text and the paragraph
+list never need to be held in memory at the same time as the HTML.
+
+Zip archives are parsed member by member (see parse_zip).
+"""
+
+import codecs
+import html
+import io
+import logging
+import os
+import subprocess
+import zipfile
+from collections import deque
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, Optional, Union
+
+from core.worker_pool import new_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload stream per step
+PARSE_CHUNK_SIZE = int(os.environ.get('PARSE_CHUNK_SIZE', 1024 * 1024))
+
+# Zip uploads: members parsed at once (worker processes; 1 = serial), the
+# maximum uncompressed size of one member and of all members, the number of
+# members parsed, and the archive size below which members are parsed serially
+ZIP_PARSE_WORKERS = int(os.environ.get('ZIP_PARSE_WORKERS', os.cpu_count() or 1))
+ZIP_MAX_MEMBER_BYTES = int(os.environ.get('ZIP_MAX_MEMBER_BYTES', 50 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get('ZIP_MAX_TOTAL_BYTES', 200 * 1024 * 1024))
+ZIP_MAX_MEMBERS = int(os.environ.get('ZIP_MAX_MEMBERS', 500))
+ZIP_PARALLEL_MIN_BYTES = int(os.environ.get('ZIP_PARALLEL_MIN_BYTES', 1024 * 1024))
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+def iter_decoded(content: Union[bytes, str, object], encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Decode uploaded content into text chunks.
+
+    ``content`` is bytes, str or a binary file-like object (read in
+    PARSE_CHUNK_SIZE pieces). Invalid bytes are replaced, as in
+    ``bytes.decode(errors="replace")``.
+    """
+    if isinstance(content, str):
+        yield content
+        return
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    if isinstance(content, (bytes, bytearray)):
+        yield decoder.decode(bytes(content), final=True)
+        return
+    while True:
+        chunk = content.read(PARSE_CHUNK_SIZE)
+        if not chunk:
+            break
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_paragraphs(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Split text arriving in chunks on blank lines.
+
+    Yields the same pieces as ``"".join(chunks).split("\\n\\n")`` without
+    joining the chunks first; a separator may straddle two chunks.
+    """
+    pending = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if pending and pending[-1].endswith("\n") and chunk.startswith("\n"):
+            pending[-1] = pending[-1][:-1]
+            yield "".join(pending)
+            pending = []
+            chunk = chunk[1:]
+        parts = chunk.split(PARAGRAPH_SEPARATOR)
+        if len(parts) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(parts[0])
+        yield "".join(pending)
+        yield from parts[1:-1]
+        pending = [parts[-1]]
+    yield "".join(pending)
+
+
+def iter_text_blocks(content) -> Iterator[str]:
+    """One <p> per blank-line separated paragraph of a plain-text upload."""
+    for paragraph in iter_paragraphs(iter_decoded(content)):
+        yield f"<p>{paragraph}</p>"
+
+
+def parse_txt(content):
+    return "".join(iter_text_blocks(content))
+
+
+def parse_adoc(content):
+    return "".join(iter_text_blocks(content))
+
+
+def parse_md(content):
+    import markdown
+
+    md_text = "".join(iter_decoded(content))
+    return markdown.markdown(md_text)
+
+
+def parse_doc(file_stream):
+    temp_path = "temp_upload_doc.doc"
+    file_stream.save(temp_path)
+    try:
+        cmd = ["antiword", temp_path]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode == 0:
+            return "".join(iter_text_blocks(result.stdout))
+        else:
+            return f"Error reading .doc file: {result.stderr}"
+    except FileNotFoundError:
+        return "Error: 'antiword' not in PATH or not installed."
+    except Exception as e:
+        return f"Error reading .doc file: {str(e)}"
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def iter_pdf_blocks(file_stream) -> Iterator[str]:
+    """
+    Paragraph blocks of a PDF, in page order.
+
+    Pages come from the shared extraction engine (core/pdf_extraction.py):
+    extracted in parallel for large files and cached per page.
+    """
+    from core.pdf_extraction import extract_pdf_pages
+
+    for page in extract_pdf_pages(file_stream):
+        for paragraph in page.text.split(PARAGRAPH_SEPARATOR):
+            yield f"<p>{paragraph}</p>"
+
+
+def parse_pdf(file_stream):
+    try:
+        return "".join(iter_pdf_blocks(file_stream))
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+
+############################
+# DOCX
+############################
+
+# Paragraph style name prefixes mapped to list types
+DOCX_LIST_STYLES = (("list bullet", "ul"), ("list number", "ol"), ("list paragraph", "ul"))
+
+
+def docx_block_kind(paragraph):
+    """
+    Classify a docx paragraph by its style.
+
+    Returns:
+        ("h", level) for Title/Heading N, ("li", "ul"|"ol") for list
+        paragraphs (list styles or direct numbering), else ("p", None)
+    """
+    try:
+        style_name = (paragraph.style.name or "").strip().lower() if paragraph.style is not None else ""
+    except (KeyError, AttributeError):
+        style_name = ""
+
+    if style_name == "title":
+        return "h", 1
+    if style_name.startswith("heading"):
+        level = style_name[len("heading"):].strip()
+        return "h", min(int(level), 6) if level.isdigit() and int(level) > 0 else 1
+    for prefix, list_tag in DOCX_LIST_STYLES:
+        if style_name.startswith(prefix):
+            return "li", list_tag
+    paragraph_properties = paragraph._p.pPr
+    if paragraph_properties is not None and paragraph_properties.numPr is not None:
+        return "li", "ul"
+    return "p", None
+
+
+def iter_docx_table(table) -> Iterator[str]:
+    yield "<table>"
+    for row in table.rows:
+        cells = []
+        seen = set()
+        for cell in row.cells:
+            # Merged cells are returned once per grid column
+            if id(cell._tc) in seen:
+                continue
+            seen.add(id(cell._tc))
+            cells.append(f"<td>{html.escape(cell.text, quote=False)}</td>")
+        yield f"<tr>{''.join(cells)}</tr>"
+    yield "</table>"
+
+
+def iter_docx_blocks(file_stream) -> Iterator[str]:
+    """
+    Blocks of a .docx in body order: headings, paragraphs, lists and tables.
+
+    Consecutive list paragraphs of the same kind are wrapped in one
+    <ul>/<ol>. Paragraph text is HTML-escaped.
+    """
+    from docx import Document
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    doc = Document(file_stream)
+    open_list = None
+    for child in doc.element.body.iterchildren():
+        if child.tag == qn('w:p'):
+            paragraph = Paragraph(child, doc)
+            kind, detail = docx_block_kind(paragraph)
+            text = html.escape(paragraph.text, quote=False)
+            if kind == "li":
+                if open_list != detail:
+                    if open_list:
+                        yield f"</{open_list}>"
+                    yield f"<{detail}>"
+                    open_list = detail
+                yield f"<li>{text}</li>"
+                continue
+            if open_list:
+                yield f"</{open_list}>"
+                open_list = None
+            if kind == "h":
+                yield f"<h{detail}>{text}</h{detail}>"
+            else:
+                yield f"<p>{text}</p>"
+        elif child.tag == qn('w:tbl'):
+            if open_list:
+                yield f"</{open_list}>"
+                open_list = None
+            yield from iter_docx_table(Table(child, doc))
+    if open_list:
+        yield f"</{open_list}>"
+
+
+def parse_docx(file_stream):
+    return "".join(iter_docx_blocks(file_stream))
+
+
+############################
+# ZIP
+############################
+
+# Member types parse_zip reads
+ZIP_EXTENSIONS = ('.txt', '.md', '.docx', '.pdf')
+# Members read ahead per worker while the others are being parsed
+ZIP_MEMBERS_PER_WORKER = 2
+
+
+class ZipMemberTooLarge(Exception):
+    """Raised by read_zip_member when a member decompresses to more than its limit."""
+
+
+def is_zip_document(info: zipfile.ZipInfo, extensions) -> bool:
+    """A file with one of the extensions, not a directory or resource fork (__MACOSX/, ._name)."""
+    name = info.filename
+    return (not info.is_dir()
+            and not name.startswith('__MACOSX/')
+            and not os.path.basename(name).startswith('._')
+            and name.lower().endswith(tuple(extensions)))
+
+
+def read_zip_member(zip_file: zipfile.ZipFile, info: zipfile.ZipInfo, limit: int) -> bytes:
+    """
+    Read one member, at most ``limit`` bytes of it.
+
+    The limit is enforced on the decompressed stream, not only on the size
+    the archive declares, so a zip bomb is cut off after ``limit`` bytes.
+    """
+    if info.file_size > limit:
+        raise ZipMemberTooLarge(f"{info.filename} is larger than {limit} bytes")
+    chunks = []
+    size = 0
+    with zip_file.open(info) as member:
+        while True:
+            chunk = member.read(PARSE_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise ZipMemberTooLarge(f"{info.filename} decompresses to more than {limit} bytes")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_zip_member(filename: str, data: bytes) -> str:
+    """HTML of one archive member. Runs inside a worker process (or serially)."""
+    extension = os.path.splitext(filename.lower())[1]
+    if extension == '.txt':
+        return parse_txt(data)
+    if extension == '.md':
+        return parse_md(data)
+    if extension == '.docx':
+        return parse_docx(io.BytesIO(data))
+    if extension == '.pdf':
+        return parse_pdf(data)
+    return f"<p>Unsupported file type: {html.escape(extension)}</p>"
+
+
+def init_zip_worker():
+    """Members are the unit of parallelism: PDFs inside a worker are extracted serially."""
+    from core import pdf_extraction
+    pdf_extraction.PDF_WORKERS = 1
+
+
+def zip_member_section(filename: str, content: str) -> str:
+    """A member's HTML wrapped in its document boundary (see core/document_ir.PART_ATTRIBUTE)."""
+    name = html.escape(filename)
+    return f'<section data-source="{name}">\n<h3>📄 {name}</h3>\n{content}\n</section>\n'
+
+
+class ZipParser:
+    """
+    Converts the supported members of a zip archive to HTML.
+
+    Members are read lazily, one at a time, with decompressed-size limits,
+    and parsed across a process pool; at most a couple of members per
+    worker are in memory at once, so peak memory is bounded by the worker
+    count times the largest member rather than by the archive size.
+    Each member's HTML is a separate <section data-source="..."> so the
+    document IR keeps one part per file.
+
+    Args:
+        max_workers: Worker processes (default ZIP_PARSE_WORKERS)
+        max_member_bytes, max_total_bytes, max_members: Limits (defaults ZIP_MAX_*)
+        min_parallel_bytes: Archives with less uncompressed content are parsed serially
+    """
+
+    # Worker pool shared by all parsers in this process
+    _pool = None
+    _pool_workers = 0
+
+    def __init__(self, max_workers: Optional[int] = None, max_member_bytes: Optional[int] = None,
+                 max_total_bytes: Optional[int] = None, max_members: Optional[int] = None,
+                 min_parallel_bytes: Optional[int] = None):
+        self.max_workers = max(1, max_workers or ZIP_PARSE_WORKERS)
+        self.max_member_bytes = max_member_bytes or ZIP_MAX_MEMBER_BYTES
+        self.max_total_bytes = max_total_bytes or ZIP_MAX_TOTAL_BYTES
+        self.max_members = max_members or ZIP_MAX_MEMBERS
+        self.min_parallel_bytes = ZIP_PARALLEL_MIN_BYTES if min_parallel_bytes is None else min_parallel_bytes
+
+    def parse(self, file_stream) -> str:
+        with zipfile.ZipFile(file_stream, 'r') as zip_file:
+            members = [info for info in zip_file.infolist() if is_zip_document(info, ZIP_EXTENSIONS)]
+            if not members:
+                return ("<p>No supported document files found in ZIP archive. "
+                        "Supported formats: .txt, .md, .docx, .pdf</p>")
+
+            parts = [
+                "<h2>Contents of ZIP file:</h2>\n",
+                f"<p>Found {len(members)} supported document(s) in ZIP file:</p>\n",
+            ]
+            parts.extend(self.iter_sections(zip_file, members))
+            return "".join(parts)
+
+    def iter_sections(self, zip_file: zipfile.ZipFile, members) -> Iterator[str]:
+        """The HTML section of every member, in archive order."""
+        inputs = self._iter_inputs(zip_file, members)
+        declared = sum(info.file_size for info in members)
+        if self.max_workers > 1 and len(members) > 1 and declared >= self.min_parallel_bytes:
+            yield from self._parse_parallel(inputs)
+        else:
+            for filename, data, error in inputs:
+                yield self._section(filename, data, error)
+
+    def _iter_inputs(self, zip_file, members):
+        """(filename, data, error) per member; data is None when the member is not parsed."""
+        total = 0
+        for count, info in enumerate(members):
+            name = info.filename
+            if count >= self.max_members:
+                yield name, None, f"Skipped: more than {self.max_members} documents in the archive"
+                continue
+            try:
+                data = read_zip_member(zip_file, info, min(self.max_member_bytes, self.max_total_bytes - total))
+            except ZipMemberTooLarge as e:
+                logger.warning(f"Skipping ZIP member: {e}")
+                yield name, None, f"Skipped: the file exceeds the ZIP size limits ({e})"
+                continue
+            except Exception as e:
+                logger.error(f"Error reading file {name} in ZIP: {e}")
+                yield name, None, f"Error processing {name}: {str(e)}"
+                continue
+            total += len(data)
+            yield name, data, None
+
+    def _section(self, filename, data, error, content=None):
+        if error is None and content is None:
+            try:
+                content = parse_zip_member(filename, data)
+            except Exception as e:
+                logger.error(f"Error processing file {filename} in ZIP: {e}")
+                error = f"Error processing {filename}: {str(e)}"
+        if error is not None:
+            content = f"<p>{html.escape(error)}</p>"
+        return zip_member_section(filename, content)
+
+    def _parse_parallel(self, inputs) -> Iterator[str]:
+        """Parse members in worker processes, keeping a bounded window of members in flight."""
+        window = deque()
+        parallel = True
+        for filename, data, error in inputs:
+            future = pool = None
+            if parallel and data is not None:
+                try:
+                    future, pool = self._submit(filename, data)
+                except (BrokenProcessPool, OSError, RuntimeError) as e:
+                    logger.warning(f"Parallel ZIP parsing failed ({e}) - parsing serially")
+                    parallel = False
+            window.append((filename, data, error, future, pool))
+            while len(window) >= self.max_workers * ZIP_MEMBERS_PER_WORKER:
+                yield self._collect(*window.popleft())
+        while window:
+            yield self._collect(*window.popleft())
+
+    def _submit(self, filename, data):
+        """A member's future and the pool it was submitted to."""
+        pool = self._get_pool(self.max_workers)
+        try:
+            future = pool.submit(parse_zip_member, filename, data)
+        except (BrokenProcessPool, RuntimeError):
+            # Broken, or shut down by another upload that replaced it
+            self._reset_pool(pool)
+            pool = self._get_pool(self.max_workers)
+            future = pool.submit(parse_zip_member, filename, data)
+        return future, pool
+
+    def _collect(self, filename, data, error, future, pool):
+        """A member's section from its worker result; parsed here if the worker failed."""
+        if future is not None:
+            try:
+                return self._section(filename, data, error, future.result())
+            except CancelledError:
+                # Cancelled from outside this upload
+                logger.warning(f"ZIP member {filename} was cancelled - parsing it serially")
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                logger.warning(f"ZIP member worker failed ({e}) - parsing {filename} serially")
+                # Every member on the broken pool fails the same way; only the first replaces it
+                self._reset_pool(pool)
+            except Exception as e:
+                logger.error(f"Error processing file {filename} in ZIP: {e}")
+                return self._section(filename, data, f"Error processing {filename}: {str(e)}")
+        return self._section(filename, data, error)
+
+    @classmethod
+    def _get_pool(cls, workers: int):
+        if cls._pool is None or cls._pool_workers != workers:
+            cls._reset_pool()
+            cls._pool = new_process_pool(workers, initializer=init_zip_worker)
+            cls._pool_workers = workers
+        return cls._pool
+
+    @classmethod
+    def _reset_pool(cls, broken=None):
+        """
+        Drop the shared pool; with ``broken``, only if that pool is still the
+        shared one. Members already submitted to it (by other uploads too)
+        still finish.
+        """
+        if broken is not None and cls._pool is not broken:
+            return
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False)
+        cls._pool = None
+        cls._pool_workers = 0
+
+
+def parse_zip(file_stream):
+    """
+    Parse a ZIP file: every supported member becomes one section of the document.
+
+    The member sections are document boundaries: the review gate and the
+    structural analysis treat each file separately, while the sentences of
+    all files are reviewed as one upload.
+    """
+    try:
+        return ZipParser().parse(file_stream)
+    except zipfile.BadZipFile:
+        return "Error: Invalid or corrupted ZIP file"
+    except Exception as e:
+        logger.error(f"Error parsing ZIP file: {e}")
+        return f"Error parsing ZIP file: {str(e)}"
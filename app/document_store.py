@@ -0,0 +1,240 @@
+"""
+Session-scoped store for reviewed documents.
+
+Replaces the module globals that held the last uploaded document: every
+review stores its plain text and sentence list under its review id (and the
+upload's room_id), so concurrent users no longer overwrite each other and
+/ai_suggestion can look up a sentence and its neighbours by index.
+
+Two tiers:
+- an in-process LRU bounded by an approximate memory budget
+- an optional SQLite file (one JSON blob per document) written through on
+  every put, so documents survive eviction and are visible to every worker
+  process on the host
+
+Entries expire DOCUMENT_STORE_TTL seconds after they were last stored or read.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate bytes of document text kept in memory (0 = memory tier off)
+DOCUMENT_STORE_MAX_BYTES = int(os.environ.get('DOCUMENT_STORE_MAX_BYTES', 256 * 1024 * 1024))
+# Seconds a document stays available after it was last stored or read
+DOCUMENT_STORE_TTL = int(os.environ.get('DOCUMENT_STORE_TTL', 4 * 3600))
+# SQLite file shared by all workers (empty disables it)
+DOCUMENT_STORE_DB = os.environ.get(
+    'DOCUMENT_STORE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'document_store.db')
+)
+
+
+def document_size(document: Dict[str, Any]) -> int:
+    """Approximate memory footprint of a stored document (its text)."""
+    return len(document.get('plain_text') or '') + sum(len(s) for s in document.get('sentences', []))
+
+
+class SessionDocumentStore:
+    """
+    Documents keyed by review id / room_id, with LRU eviction and TTL.
+
+    A document is a dict with ``plain_text``, ``sentences`` (list of sentence
+    texts in document order) and ``filename``.
+
+    Args:
+        max_bytes: Memory budget for the LRU tier
+        ttl: Seconds before an unused document expires
+        db_path: SQLite file for the shared tier (None/empty disables it)
+    """
+
+    def __init__(self, max_bytes: int = DOCUMENT_STORE_MAX_BYTES, ttl: int = DOCUMENT_STORE_TTL,
+                 db_path: Optional[str] = DOCUMENT_STORE_DB):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path or None
+        # doc id -> (document, size, last access)
+        self._documents: "OrderedDict[str, tuple]" = OrderedDict()
+        # review id / room_id -> doc id
+        self._keys: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS documents (
+                            doc_id TEXT PRIMARY KEY,
+                            data BLOB NOT NULL,
+                            accessed_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS document_keys (
+                            key TEXT PRIMARY KEY,
+                            doc_id TEXT NOT NULL
+                        )
+                    ''')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Document store DB unavailable ({e}) - using memory tier only")
+            self.db_path = None
+
+    def put(self, keys: Iterable[Optional[str]], document: Dict[str, Any]) -> None:
+        """Store a document under every non-empty key (e.g. review id and room_id)."""
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        doc_id = str(uuid.uuid4())
+        now = time.time()
+        if self.db_path:
+            self._write(doc_id, keys, document, now)
+        with self._lock:
+            for key in keys:
+                self._keys[key] = doc_id
+            self._remember(doc_id, document, now)
+            self._purge_expired(now)
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The document stored under a key, or None if unknown or expired."""
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            doc_id = self._keys.get(key)
+            entry = self._documents.get(doc_id) if doc_id else None
+            if entry is not None:
+                document, size, accessed_at = entry
+                if now - accessed_at <= self.ttl:
+                    self._documents[doc_id] = (document, size, now)
+                    self._documents.move_to_end(doc_id)
+                    return document
+                self._drop(doc_id)
+        if not self.db_path:
+            return None
+        loaded = self._load(key, now)
+        if loaded is None:
+            return None
+        doc_id, document = loaded
+        with self._lock:
+            self._keys[key] = doc_id
+            self._remember(doc_id, document, now)
+        return document
+
+    def sentence_context(self, key: Optional[str], index: int) -> Optional[Dict[str, Optional[str]]]:
+        """
+        A sentence and its neighbours by sentence index.
+
+        Returns:
+            {"sentence", "previous_sentence", "next_sentence"}, or None when the
+            document or index is unknown
+        """
+        document = self.get(key)
+        if document is None:
+            return None
+        sentences: List[str] = document['sentences']
+        if not 0 <= index < len(sentences):
+            return None
+        return {
+            "sentence": sentences[index],
+            "previous_sentence": sentences[index - 1] if index > 0 else None,
+            "next_sentence": sentences[index + 1] if index < len(sentences) - 1 else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_documents": len(self._documents),
+            "memory_bytes": self._bytes,
+            "persistent": bool(self.db_path),
+        }
+
+    # Callers hold self._lock for the helpers below
+
+    def _remember(self, doc_id: str, document: Dict[str, Any], now: float) -> None:
+        size = document_size(document)
+        if size > self.max_bytes:
+            return
+        if doc_id in self._documents:
+            self._bytes -= self._documents[doc_id][1]
+        self._documents[doc_id] = (document, size, now)
+        self._documents.move_to_end(doc_id)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            evicted, _ = next(iter(self._documents.items()))
+            self._drop(evicted)
+
+    def _drop(self, doc_id: str) -> None:
+        entry = self._documents.pop(doc_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _purge_expired(self, now: float) -> None:
+        for doc_id in [doc_id for doc_id, entry in self._documents.items() if now - entry[2] > self.ttl]:
+            self._drop(doc_id)
+        # Keys of documents no longer in memory are looked up in SQLite again
+        live = set(self._documents)
+        self._keys = {key: doc_id for key, doc_id in self._keys.items() if doc_id in live}
+
+    def _write(self, doc_id: str, keys: List[str], document: Dict[str, Any], now: float) -> None:
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('INSERT INTO documents (doc_id, data, accessed_at) VALUES (?, ?, ?)',
+                                 (doc_id, sqlite3.Binary(json.dumps(document).encode('utf-8')), now))
+                    conn.executemany('INSERT OR REPLACE INTO document_keys (key, doc_id) VALUES (?, ?)',
+                                     [(key, doc_id) for key in keys])
+                    conn.execute('DELETE FROM documents WHERE accessed_at < ?', (now - self.ttl,))
+                    conn.execute('DELETE FROM document_keys WHERE doc_id NOT IN (SELECT doc_id FROM documents)')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist document: {e}")
+
+    def _load(self, key: str, now: float):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        'SELECT d.doc_id, d.data FROM document_keys k JOIN documents d ON d.doc_id = k.doc_id '
+                        'WHERE k.key = ? AND d.accessed_at >= ?', (key, now - self.ttl)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    conn.execute('UPDATE documents SET accessed_at = ? WHERE doc_id = ?', (now, row[0]))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read document store: {e}")
+            return None
+        return row[0], json.loads(bytes(row[1]).decode('utf-8'))
+
+
+_document_store = None
+
+
+def get_document_store() -> SessionDocumentStore:
+    global _document_store
+    if _document_store is None:
+        _document_store = SessionDocumentStore()
+    return _document_store
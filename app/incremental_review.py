@@ -0,0 +1,429 @@
+"""
+Incremental re-review of a revised document.
+
+A completed /upload review is kept as a snapshot (per-sentence text,
+feedback and block layout plus the structural insights) under a review id.
+When a revision of the document is uploaded against that id, the old and
+new sentence lists are aligned by content hash, and replaced runs are
+paired up by edit similarity. Only inserted or modified sentences and
+their immediate neighbours go back through the rules; every other
+sentence keeps its previous feedback. The structural analysis only
+re-runs for blocks whose sentences changed.
+
+The result is a delta: issues added, removed and unchanged relative to
+the previous review.
+
+Snapshots are kept in an in-process LRU and written through to an optional
+SQLite file, so a revision can be reviewed by any worker process, and after
+a restart, until the snapshot expires.
+"""
+
+import difflib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from .analysis_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+# Review snapshots kept in memory for incremental re-review (oldest are evicted)
+REVIEW_STORE_SIZE = int(os.environ.get('REVIEW_STORE_SIZE', 100))
+# Seconds a snapshot stays in the SQLite tier after it was last stored or read
+REVIEW_STORE_TTL = int(os.environ.get('REVIEW_STORE_TTL', 7 * 24 * 3600))
+# SQLite file shared by all workers (empty disables it)
+REVIEW_STORE_DB = os.environ.get(
+    'REVIEW_STORE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'review_store.db')
+)
+# Minimum similarity (0-1) for a replaced sentence to count as modified
+# rather than removed + inserted
+REVISION_MATCH_RATIO = float(os.environ.get('REVISION_MATCH_RATIO', 0.6))
+# Old sentences (following the last paired one) a replaced sentence is compared with
+REVISION_MATCH_WINDOW = int(os.environ.get('REVISION_MATCH_WINDOW', 50))
+
+UNCHANGED = "unchanged"
+MODIFIED = "modified"
+INSERTED = "inserted"
+REMOVED = "removed"
+
+
+class AlignedSentence(NamedTuple):
+    """One step of the alignment; old_index or new_index is None for removed/inserted sentences."""
+    old_index: Optional[int]
+    new_index: Optional[int]
+    status: str
+
+
+class SentenceAlignment:
+    """
+    Alignment of a previous review's sentences with a revision's sentences.
+
+    Args:
+        steps: Aligned pairs in document order
+        new_count: Number of sentences in the revision
+    """
+
+    def __init__(self, steps: List[AlignedSentence], new_count: int):
+        self.steps = steps
+        self.new_count = new_count
+        # New sentence index -> previous sentence index (None for inserted)
+        self.old_for_new: List[Optional[int]] = [None] * new_count
+        for step in steps:
+            if step.new_index is not None:
+                self.old_for_new[step.new_index] = step.old_index
+
+    def counts(self) -> Dict[str, int]:
+        counts = {UNCHANGED: 0, MODIFIED: 0, INSERTED: 0, REMOVED: 0}
+        for step in self.steps:
+            counts[step.status] += 1
+        return counts
+
+    def changed_indices(self) -> Set[int]:
+        """New indices of inserted or modified sentences."""
+        return {step.new_index for step in self.steps if step.status in (MODIFIED, INSERTED)}
+
+    def affected_indices(self, radius: int = 1) -> Set[int]:
+        """
+        New indices that need re-analysis: changed sentences, their neighbours
+        within ``radius``, and the sentences either side of a removal.
+        """
+        affected = set()
+        for position, step in enumerate(self.steps):
+            if step.status == UNCHANGED:
+                continue
+            if step.new_index is not None:
+                affected.update(index for index in range(step.new_index - radius, step.new_index + radius + 1)
+                                if 0 <= index < self.new_count)
+            else:
+                # A removed sentence changes the context of whatever now
+                # borders the gap it left
+                for anchor in (self._nearest_new_index(position, -1), self._nearest_new_index(position, 1)):
+                    if anchor is not None:
+                        affected.add(anchor)
+        return affected
+
+    def _nearest_new_index(self, position: int, direction: int) -> Optional[int]:
+        position += direction
+        while 0 <= position < len(self.steps):
+            if self.steps[position].new_index is not None:
+                return self.steps[position].new_index
+            position += direction
+        return None
+
+
+def sentence_similarity(a: str, b: str) -> float:
+    """Normalized edit similarity of two sentences (1.0 = identical)."""
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def align_sentences(old_texts: List[str], new_texts: List[str],
+                    match_ratio: float = REVISION_MATCH_RATIO,
+                    window: int = REVISION_MATCH_WINDOW) -> SentenceAlignment:
+    """
+    Align two sentence lists.
+
+    Identical sentences are matched by content hash (a diff over the hash
+    sequences). Inside each replaced run, sentences are paired in order
+    with the most similar of the next ``window`` remaining old sentences
+    if their similarity reaches ``match_ratio``; the rest are inserted or
+    removed.
+    """
+    old_hashes = [text_hash(text) for text in old_texts]
+    new_hashes = [text_hash(text) for text in new_texts]
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+
+    steps: List[AlignedSentence] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            steps.extend(AlignedSentence(i1 + k, j1 + k, UNCHANGED) for k in range(i2 - i1))
+        elif tag == 'delete':
+            steps.extend(AlignedSentence(i, None, REMOVED) for i in range(i1, i2))
+        elif tag == 'insert':
+            steps.extend(AlignedSentence(None, j, INSERTED) for j in range(j1, j2))
+        else:
+            steps.extend(_pair_replaced(old_texts, new_texts, i1, i2, j1, j2, match_ratio, window))
+    return SentenceAlignment(steps, len(new_texts))
+
+
+def _pair_replaced(old_texts, new_texts, i1, i2, j1, j2, match_ratio, window) -> List[AlignedSentence]:
+    """
+    Pair a replaced run of old sentences [i1, i2) with new sentences [j1, j2), keeping order.
+
+    Each new sentence is compared with at most ``window`` old sentences, and
+    the full similarity is only computed for old sentences whose cheap upper
+    bounds (length, then character counts) can still beat the best so far.
+    """
+    steps = []
+    next_old = i1
+    matcher = difflib.SequenceMatcher(None, autojunk=False)
+    for j in range(j1, j2):
+        best_index, best_ratio = None, match_ratio
+        # The new sentence is seq2, whose analysis SequenceMatcher caches
+        matcher.set_seq2(new_texts[j])
+        for i in range(next_old, min(i2, next_old + max(1, window))):
+            matcher.set_seq1(old_texts[i])
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_index, best_ratio = i, ratio
+        if best_index is None:
+            steps.append(AlignedSentence(None, j, INSERTED))
+            continue
+        steps.extend(AlignedSentence(i, None, REMOVED) for i in range(next_old, best_index))
+        steps.append(AlignedSentence(best_index, j, MODIFIED))
+        next_old = best_index + 1
+    steps.extend(AlignedSentence(i, None, REMOVED) for i in range(next_old, i2))
+    return steps
+
+
+def reusable_blocks(alignment: SentenceAlignment, affected: Set[int],
+                    old_sentences: List[Dict[str, Any]], new_sentences: List[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Blocks whose structural insights can be carried over from the previous review.
+
+    A new block is reusable when every one of its sentences is unaffected
+    and they are exactly the sentences of a single previous block with the
+    same tag.
+
+    Returns:
+        Dict of new block index -> previous block index
+    """
+    old_block_sizes: Dict[int, int] = {}
+    for sentence in old_sentences:
+        b_idx = sentence.get('block_index', 0)
+        old_block_sizes[b_idx] = old_block_sizes.get(b_idx, 0) + 1
+
+    candidates: Dict[int, Optional[int]] = {}
+    new_block_sizes: Dict[int, int] = {}
+    for index, sentence in enumerate(new_sentences):
+        b_idx = sentence.get('block_index', 0)
+        new_block_sizes[b_idx] = new_block_sizes.get(b_idx, 0) + 1
+        old_index = alignment.old_for_new[index]
+        if index in affected or old_index is None:
+            candidates[b_idx] = None
+            continue
+        old_sentence = old_sentences[old_index]
+        old_block = old_sentence.get('block_index', 0)
+        if old_sentence.get('tag_name') != sentence.get('tag_name'):
+            candidates[b_idx] = None
+        elif b_idx not in candidates:
+            candidates[b_idx] = old_block
+        elif candidates[b_idx] != old_block:
+            candidates[b_idx] = None
+
+    return {
+        b_idx: old_block for b_idx, old_block in candidates.items()
+        if old_block is not None and old_block_sizes.get(old_block) == new_block_sizes[b_idx]
+    }
+
+
+def issue_key(issue: Dict[str, Any]) -> tuple:
+    """Identity of a sentence issue within its sentence (same normalization as the upload dedup)."""
+    message = str(issue.get('message', '')).strip().rstrip('.').lower()
+    return message, issue.get('start', 0), issue.get('end', 0)
+
+
+def insight_key(insight: Dict[str, Any]) -> tuple:
+    return insight.get('type'), insight.get('target'), insight.get('message')
+
+
+def diff_sentence_issues(alignment: SentenceAlignment, old_sentences: List[Dict[str, Any]],
+                         new_sentences: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Issue delta between two reviews.
+
+    Issues of aligned sentences are compared by message and offsets; issues
+    of removed sentences are removed and issues of inserted sentences added.
+
+    Returns:
+        {"added": [...], "removed": [...], "unchanged": count}
+    """
+    added, removed = [], []
+    unchanged = 0
+    for step in alignment.steps:
+        old_feedback = old_sentences[step.old_index].get('feedback', []) if step.old_index is not None else []
+        new_feedback = new_sentences[step.new_index].get('feedback', []) if step.new_index is not None else []
+        old_keys = {issue_key(issue) for issue in old_feedback}
+        new_keys = {issue_key(issue) for issue in new_feedback}
+        added.extend(issue for issue in new_feedback if issue_key(issue) not in old_keys)
+        removed.extend(issue for issue in old_feedback if issue_key(issue) not in new_keys)
+        unchanged += sum(1 for issue in new_feedback if issue_key(issue) in old_keys)
+    return {"added": added, "removed": removed, "unchanged": unchanged}
+
+
+def diff_insights(old_insights: List[Dict[str, Any]], new_insights: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Structural insight delta, compared by type, target and message."""
+    old_keys = {insight_key(insight) for insight in old_insights}
+    new_keys = {insight_key(insight) for insight in new_insights}
+    return {
+        "added": [insight for insight in new_insights if insight_key(insight) not in old_keys],
+        "removed": [insight for insight in old_insights if insight_key(insight) not in new_keys],
+        "unchanged": sum(1 for insight in new_insights if insight_key(insight) in old_keys),
+    }
+
+
+class ReviewSnapshotStore:
+    """
+    Completed reviews keyed by review id: an in-process LRU, written through
+    to an optional SQLite file shared by all workers.
+
+    A snapshot is a dict with ``sentences`` (text, block_index, tag_name,
+    feedback, quality_score, analysis_skipped per sentence),
+    ``structural_insights``, ``ruleset_version`` and ``filename``.
+
+    Args:
+        max_entries: Snapshots kept in memory before the oldest is evicted
+        ttl: Seconds before an unused snapshot expires from SQLite
+        db_path: SQLite file for the shared tier (None/empty disables it)
+    """
+
+    def __init__(self, max_entries: int = REVIEW_STORE_SIZE, ttl: int = REVIEW_STORE_TTL,
+                 db_path: Optional[str] = REVIEW_STORE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS review_snapshots (
+                            review_id TEXT PRIMARY KEY,
+                            data BLOB NOT NULL,
+                            accessed_at REAL NOT NULL
+                        )
+                    ''')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Review snapshot DB unavailable ({e}) - using memory tier only")
+            self.db_path = None
+
+    def save(self, snapshot: Dict[str, Any]) -> str:
+        """Store a snapshot and return its new review id."""
+        review_id = str(uuid.uuid4())
+        self.put(review_id, snapshot)
+        return review_id
+
+    def put(self, review_id: str, snapshot: Dict[str, Any]) -> None:
+        """Store a snapshot under an existing review id (e.g. one made in a job worker)."""
+        if self.db_path:
+            self._write(review_id, snapshot, time.time())
+        with self._lock:
+            self._remember(review_id, snapshot)
+
+    def get(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """The snapshot of a review, or None if unknown or expired."""
+        with self._lock:
+            snapshot = self._snapshots.get(review_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(review_id)
+                return snapshot
+        if not self.db_path:
+            return None
+        snapshot = self._load(review_id, time.time())
+        if snapshot is not None:
+            with self._lock:
+                self._remember(review_id, snapshot)
+        return snapshot
+
+    def pop(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a snapshot from both tiers and return it."""
+        with self._lock:
+            snapshot = self._snapshots.pop(review_id, None)
+        if self.db_path:
+            stored = self._delete(review_id, time.time())
+            if snapshot is None:
+                snapshot = stored
+        return snapshot
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def _remember(self, review_id: str, snapshot: Dict[str, Any]) -> None:
+        # Caller holds self._lock
+        self._snapshots[review_id] = snapshot
+        self._snapshots.move_to_end(review_id)
+        while len(self._snapshots) > max(self.max_entries, 1):
+            self._snapshots.popitem(last=False)
+
+    def _write(self, review_id: str, snapshot: Dict[str, Any], now: float) -> None:
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO review_snapshots (review_id, data, accessed_at) VALUES (?, ?, ?)',
+                        (review_id, sqlite3.Binary(json.dumps(snapshot).encode('utf-8')), now)
+                    )
+                    conn.execute('DELETE FROM review_snapshots WHERE accessed_at < ?', (now - self.ttl,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist review snapshot: {e}")
+
+    def _load(self, review_id: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        'SELECT data FROM review_snapshots WHERE review_id = ? AND accessed_at >= ?',
+                        (review_id, now - self.ttl)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    conn.execute('UPDATE review_snapshots SET accessed_at = ? WHERE review_id = ?',
+                                 (now, review_id))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read review snapshot store: {e}")
+            return None
+        return json.loads(bytes(row[0]).decode('utf-8'))
+
+    def _delete(self, review_id: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        'SELECT data FROM review_snapshots WHERE review_id = ? AND accessed_at >= ?',
+                        (review_id, now - self.ttl)
+                    ).fetchone()
+                    conn.execute('DELETE FROM review_snapshots WHERE review_id = ?', (review_id,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not remove review snapshot: {e}")
+            return None
+        return json.loads(bytes(row[0]).decode('utf-8')) if row is not None else None
+
+
+_review_store = None
+
+
+def get_review_store() -> ReviewSnapshotStore:
+    global _review_store
+    if _review_store is None:
+        _review_store = ReviewSnapshotStore()
+    return _review_store
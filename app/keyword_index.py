@@ -0,0 +1,471 @@
+"""
+BM25 Keyword Index
+Inverted-index BM25 search, the keyword leg of AdvancedRetriever.
+
+Chunks are added and deleted incrementally. Each add() writes its chunks
+as a new immutable segment; a delete is a tombstone until the segments
+are merged. Segments are merged by size tier (as in log-structured
+merge trees): once BM25_MERGE_FACTOR segments share a tier they become
+one segment of the next tier, so every chunk is rewritten only a
+logarithmic number of times however often chunks are added. Segments
+live on disk and are opened with mmap, so a restart only reads the term
+dictionaries and documents - the postings are paged in as queries touch
+them - and the index is searchable at once.
+
+Segment file layout (native byte order, recorded in the manifest):
+
+    MAGIC | header length (uint64) | header JSON | padding to 8 bytes | postings
+
+The header holds the documents (chunk id, length, content, metadata) and
+the term dictionary (term -> [offset, document frequency]); a term's
+postings are ``df`` uint32 local document numbers followed by ``df``
+uint32 term frequencies. manifest.json lists the segments, their
+tombstones and the byte order, and is replaced atomically.
+
+Scores are Okapi BM25. Document count and average length cover the live
+documents; document frequencies include tombstoned documents until the
+next merge, as in other segment-based engines. Only documents that
+contain a query term are scored, and the top k are taken with a heap.
+"""
+
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+import uuid
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = float(os.environ.get('BM25_K1', 1.2))
+BM25_B = float(os.environ.get('BM25_B', 0.75))
+# Segments of the same size tier that are merged together
+BM25_MERGE_FACTOR = int(os.environ.get('BM25_MERGE_FACTOR', 8))
+
+MAGIC = b'BM25SEG1'
+MANIFEST = 'manifest.json'
+SEGMENT_SUFFIX = '.seg'
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['_-][a-z0-9]+)*")
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without English stop words."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class IndexedDocument(NamedTuple):
+    chunk_id: str
+    length: int
+    content: str
+    metadata: Dict[str, Any]
+
+
+class KeywordHit(NamedTuple):
+    chunk_id: str
+    score: float
+    content: str
+    metadata: Dict[str, Any]
+
+
+class Segment:
+    """
+    An immutable batch of documents with its term dictionary and postings.
+
+    ``postings`` is a uint32 sequence: an array for a segment built in
+    memory, a memoryview over the mmapped file for one opened from disk.
+    """
+
+    def __init__(self, name: str, documents: List[IndexedDocument], terms: Dict[str, List[int]], postings,
+                 deleted: Iterable[int] = (), mapped=None):
+        self.name = name
+        self.documents = documents
+        self.terms = terms
+        self.postings = postings
+        self.deleted = set(deleted)
+        self.live_length = sum(document.length for local, document in enumerate(documents)
+                               if local not in self.deleted)
+        self._mapped = mapped
+
+    @classmethod
+    def build(cls, name: str, documents: List[IndexedDocument], tokens: List[List[str]]) -> 'Segment':
+        """Invert tokenized documents into a segment."""
+        inverted: Dict[str, Tuple[array, array]] = {}
+        for local, document_tokens in enumerate(tokens):
+            for term, count in Counter(document_tokens).items():
+                entry = inverted.get(term)
+                if entry is None:
+                    entry = inverted[term] = (array('I'), array('I'))
+                entry[0].append(local)
+                entry[1].append(count)
+        terms = {}
+        postings = array('I')
+        for term in sorted(inverted):
+            locals_, counts = inverted[term]
+            terms[term] = [len(postings), len(locals_)]
+            postings += locals_
+            postings += counts
+        return cls(name, documents, terms, postings)
+
+    @classmethod
+    def open(cls, path: str, name: str, deleted: Iterable[int] = ()) -> 'Segment':
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a keyword index segment")
+        header_end = len(MAGIC) + 8
+        header_length = int.from_bytes(mapped[len(MAGIC):header_end], 'little')
+        header = json.loads(mapped[header_end:header_end + header_length].decode('utf-8'))
+        start = _aligned(header_end + header_length)
+        postings = memoryview(mapped)[start:].cast('I')
+        documents = [IndexedDocument(*document) for document in header['documents']]
+        return cls(name, documents, header['terms'], postings, deleted, mapped)
+
+    def write(self, path: str) -> None:
+        header = json.dumps({
+            'documents': [list(document) for document in self.documents],
+            'terms': self.terms,
+        }, separators=(',', ':')).encode('utf-8')
+        header_end = len(MAGIC) + 8 + len(header)
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            f.write(b'\0' * (_aligned(header_end) - header_end))
+            f.write(self.postings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def term_postings(self, term: str):
+        """(local document numbers, term frequencies) of a term, or None."""
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, count = entry
+        return self.postings[offset:offset + count], self.postings[offset + count:offset + 2 * count]
+
+    def delete(self, local: int) -> None:
+        if local not in self.deleted:
+            self.deleted.add(local)
+            self.live_length -= self.documents[local].length
+
+    def live(self) -> Iterable[Tuple[int, IndexedDocument]]:
+        return ((local, document) for local, document in enumerate(self.documents) if local not in self.deleted)
+
+    def close(self) -> None:
+        if self._mapped is not None:
+            try:
+                self.postings.release()
+                self._mapped.close()
+            except BufferError:
+                # Postings of a running search still point into the map; it closes when they go
+                pass
+            self._mapped = None
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class BM25Index:
+    """
+    Incremental BM25 index over retrieval chunks.
+
+    Args:
+        path: Directory holding the manifest and segment files (None keeps
+              the index in memory)
+        k1, b: BM25 parameters
+        merge_factor: Number of same-tier segments merged into one
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = BM25_K1, b: float = BM25_B,
+                 merge_factor: int = BM25_MERGE_FACTOR):
+        self.path = path or None
+        self.k1 = k1
+        self.b = b
+        self.merge_factor = max(2, merge_factor)
+        # Serializes writers; searches read an immutable snapshot of the segment list
+        self._lock = threading.Lock()
+        self._segments: Tuple[Segment, ...] = ()
+        self._locations: Dict[str, Tuple[Segment, int]] = {}
+        self._document_count = 0
+        self._total_length = 0
+        if self.path:
+            self._load()
+
+    # ── Persistence ──────────────────────────────────────────────────────
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST)
+
+    def _load(self) -> None:
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read keyword index manifest in {self.path}: {e}")
+            return
+        if manifest.get('byteorder') != sys.byteorder:
+            logger.warning(f"Keyword index in {self.path} was written with another byte order - it must be rebuilt")
+            return
+        segments = []
+        for entry in manifest.get('segments', []):
+            try:
+                segments.append(Segment.open(os.path.join(self.path, entry['name'] + SEGMENT_SUFFIX),
+                                             entry['name'], entry.get('deleted', ())))
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable keyword index segment {entry.get('name')}: {e}")
+        self._install(tuple(segments))
+        # Segments written by an add that did not get to update the manifest
+        listed = {entry['name'] + SEGMENT_SUFFIX for entry in manifest.get('segments', [])}
+        for filename in os.listdir(self.path):
+            if filename.endswith(SEGMENT_SUFFIX) and filename not in listed:
+                try:
+                    os.remove(os.path.join(self.path, filename))
+                except OSError:
+                    pass
+        logger.info(f"Keyword index: {self._document_count} chunks in {len(segments)} segments loaded from {self.path}")
+
+    def _write_manifest(self, segments: Tuple[Segment, ...]) -> None:
+        manifest = {
+            'byteorder': sys.byteorder,
+            'segments': [{'name': segment.name, 'deleted': sorted(segment.deleted)} for segment in segments],
+        }
+        temporary = self._manifest_path() + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._manifest_path())
+
+    def _new_segment(self, documents: List[IndexedDocument], tokens: List[List[str]]) -> Segment:
+        segment = Segment.build(uuid.uuid4().hex, documents, tokens)
+        if not self.path:
+            return segment
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, segment.name + SEGMENT_SUFFIX)
+        segment.write(path)
+        return Segment.open(path, segment.name)
+
+    def _install(self, segments: Tuple[Segment, ...]) -> None:
+        """Make ``segments`` the searchable state (caller holds the lock or is __init__)."""
+        previous = self._segments
+        for segment in previous:
+            if segment not in segments:
+                for document in segment.documents:
+                    location = self._locations.get(document.chunk_id)
+                    if location is not None and location[0] is segment:
+                        del self._locations[document.chunk_id]
+        for segment in segments:
+            if segment not in previous:
+                for local, document in segment.live():
+                    self._locations[document.chunk_id] = (segment, local)
+        self._segments = segments
+        self._document_count = sum(len(segment.documents) - len(segment.deleted) for segment in segments)
+        self._total_length = sum(segment.live_length for segment in segments)
+
+    def _commit(self, segments: Tuple[Segment, ...], obsolete: Iterable[Segment] = ()) -> None:
+        if self.path:
+            self._write_manifest(segments)
+        self._install(segments)
+        for segment in obsolete:
+            # Open searches keep their mmap until they finish; the file goes now
+            if self.path:
+                try:
+                    os.remove(os.path.join(self.path, segment.name + SEGMENT_SUFFIX))
+                except OSError as e:
+                    logger.warning(f"Could not remove merged keyword index segment {segment.name}: {e}")
+
+    # ── Writes ───────────────────────────────────────────────────────────
+
+    def add(self, chunks: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        Add or replace chunks given as (chunk_id, content, metadata).
+
+        A chunk already indexed with the same content is skipped.
+
+        Returns:
+            Number of chunks written
+        """
+        with self._lock:
+            batch: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for chunk_id, content, metadata in chunks:
+                location = self._locations.get(chunk_id)
+                if location is not None and location[0].documents[location[1]].content == content:
+                    continue
+                batch[chunk_id] = (content, dict(metadata or {}))
+            if not batch:
+                return 0
+
+            documents, tokens = [], []
+            for chunk_id, (content, metadata) in batch.items():
+                document_tokens = tokenize(content)
+                documents.append(IndexedDocument(chunk_id, len(document_tokens), content, metadata))
+                tokens.append(document_tokens)
+            new_segment = self._new_segment(documents, tokens)
+            # Older versions of the chunks are tombstoned once the new segment is written
+            replaced = self._tombstone(batch)
+            segments = tuple(segment for segment in self._segments if len(segment.deleted) < len(segment.documents))
+            segments += (new_segment,)
+            segments, merged = self._merge_tiers(segments)
+            obsolete = [segment for segment in dict.fromkeys(self._segments + tuple(merged)) if segment not in segments]
+            self._commit(segments, obsolete)
+            if replaced:
+                logger.info(f"Keyword index: replaced {replaced} changed chunks")
+            return len(documents)
+
+    def delete(self, chunk_ids: Iterable[str]) -> int:
+        """Tombstone chunks by id. Returns the number deleted."""
+        with self._lock:
+            deleted = self._tombstone(chunk_ids)
+            if deleted:
+                segments = tuple(segment for segment in self._segments
+                                 if len(segment.deleted) < len(segment.documents))
+                self._commit(segments, [segment for segment in self._segments if segment not in segments])
+            return deleted
+
+    def clear(self) -> None:
+        """Drop every chunk, and with a path the segment files and the manifest."""
+        with self._lock:
+            segments = self._segments
+            self._install(())
+            if not self.path:
+                return
+            # As with merged segments, open searches keep their mmap until they finish
+            for filename in (MANIFEST, *(segment.name + SEGMENT_SUFFIX for segment in segments)):
+                try:
+                    os.remove(os.path.join(self.path, filename))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove keyword index file {filename}: {e}")
+            logger.info(f"Keyword index in {self.path} cleared")
+
+    def _tombstone(self, chunk_ids: Iterable[str]) -> int:
+        count = 0
+        for chunk_id in chunk_ids:
+            location = self._locations.pop(chunk_id, None)
+            if location is not None:
+                segment, local = location
+                segment.delete(local)
+                count += 1
+        return count
+
+    def _tier(self, segment: Segment) -> int:
+        size, tier = len(segment.documents) - len(segment.deleted), 0
+        while size >= self.merge_factor:
+            size //= self.merge_factor
+            tier += 1
+        return tier
+
+    def _merge_tiers(self, segments: Tuple[Segment, ...]) -> Tuple[Tuple[Segment, ...], List[Segment]]:
+        """Merge full size tiers, smallest first. Returns the new segments and the merged-away ones."""
+        merged_away = []
+        while True:
+            tiers: Dict[int, List[Segment]] = defaultdict(list)
+            for segment in segments:
+                tiers[self._tier(segment)].append(segment)
+            full = [tier for tier, members in tiers.items() if len(members) >= self.merge_factor]
+            if not full:
+                return segments, merged_away
+            group = tiers[min(full)]
+            segments = tuple(segment for segment in segments if segment not in group) + (self._merged(group),)
+            merged_away.extend(group)
+
+    def _merged(self, segments: Iterable[Segment]) -> Segment:
+        documents = [document for segment in segments for _, document in segment.live()]
+        return self._new_segment(documents, [tokenize(document.content) for document in documents])
+
+    def optimize(self) -> None:
+        """Merge all segments into one and drop the tombstoned documents."""
+        with self._lock:
+            if len(self._segments) > 1 or any(segment.deleted for segment in self._segments):
+                self._commit((self._merged(self._segments),), self._segments)
+
+    # ── Search ───────────────────────────────────────────────────────────
+
+    def search(self, query: str, k: int = 5,
+               accept: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[KeywordHit]:
+        """
+        Top ``k`` chunks for a query by BM25 score.
+
+        Args:
+            query: Free text
+            k: Number of hits
+            accept: Optional predicate on a chunk's metadata; rejected chunks are skipped
+        """
+        segments = self._segments
+        document_count = self._document_count
+        terms = set(tokenize(query))
+        if not terms or not document_count or k <= 0:
+            return []
+        average_length = self._total_length / document_count or 1.0
+        k1, b = self.k1, self.b
+
+        scores: Dict[Tuple[int, int], float] = defaultdict(float)
+        for term in terms:
+            matches = [(position, postings) for position, segment in enumerate(segments)
+                       for postings in (segment.term_postings(term),) if postings is not None]
+            frequency = sum(len(locals_) for _, (locals_, _) in matches)
+            if not frequency:
+                continue
+            idf = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+            for position, (locals_, counts) in matches:
+                segment = segments[position]
+                documents, deleted = segment.documents, segment.deleted
+                for local, count in zip(locals_, counts):
+                    if local in deleted:
+                        continue
+                    norm = k1 * (1 - b + b * documents[local].length / average_length)
+                    scores[position, local] += idf * count * (k1 + 1) / (count + norm)
+
+        candidates = scores.items()
+        if accept is not None:
+            candidates = (item for item in candidates
+                          if accept(segments[item[0][0]].documents[item[0][1]].metadata))
+        top = heapq.nlargest(k, candidates, key=lambda item: item[1])
+        hits = []
+        for (position, local), score in top:
+            document = segments[position].documents[local]
+            hits.append(KeywordHit(document.chunk_id, score, document.content, document.metadata))
+        return hits
+
+    def __len__(self) -> int:
+        return self._document_count
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._locations
+
+    def stats(self) -> Dict[str, int]:
+        segments = self._segments
+        return {
+            'documents': self._document_count,
+            'segments': len(segments),
+            'terms': len(set().union(*(segment.terms for segment in segments))) if segments else 0,
+            'deleted': sum(len(segment.deleted) for segment in segments),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._install(())
@@ -0,0 +1,287 @@
+"""
+Parallel sentence analysis for document uploads.
+
+Splits a document's sentences into contiguous shards and runs the rule
+pass for each shard in a worker process. Every job carries its own
+previous/next sentence, so context-aware rules (passive voice anaphora
+resolution) see the same neighbours at shard boundaries as in a serial
+run. Results are yielded back in document order as shards finish, so
+callers can stream them.
+
+Small documents, or a worker count of 1, are analyzed serially in the
+request process, reusing the document's shared NLP context. With a
+SentenceAnalysisCache, only sentences missing from the cache are analyzed.
+"""
+
+import logging
+import os
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from core.worker_pool import new_process_pool
+
+from .analysis_cache import headings_hash
+from .performance_monitor import MetricsShard, get_performance_monitor
+from .rules.nlp_context import DocumentContext
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes (1 = always serial)
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+# Documents with fewer analyzable sentences than this are analyzed serially
+ANALYSIS_PARALLEL_MIN_SENTENCES = int(os.environ.get('ANALYSIS_PARALLEL_MIN_SENTENCES', 200))
+# Shards per worker; more shards give smoother progress and load balancing
+SHARDS_PER_WORKER = 4
+
+
+class SentenceJob(NamedTuple):
+    """One sentence to analyze, with the neighbours its rules should see."""
+    index: int
+    text: str
+    previous_sentence: Optional[str]
+    next_sentence: Optional[str]
+
+
+# analyze_sentence() result: (feedback, readability_scores, quality_score)
+AnalysisResult = Tuple[list, dict, Optional[float]]
+ProgressCallback = Callable[[int, int], None]
+
+
+def make_shards(jobs: List[SentenceJob], shard_count: int) -> List[List[SentenceJob]]:
+    """Split jobs into at most ``shard_count`` contiguous, nearly equal shards."""
+    if not jobs:
+        return []
+    shard_count = max(1, min(shard_count, len(jobs)))
+    size, remainder = divmod(len(jobs), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < remainder else 0)
+        shards.append(jobs[start:end])
+        start = end
+    return shards
+
+
+def analyze_shard(jobs: List[SentenceJob], analyze_fn, rules,
+                  headings=()) -> Tuple[List[Tuple[int, AnalysisResult]], MetricsShard]:
+    """
+    Analyze one shard. Runs inside a worker process.
+
+    The shard's sentences are parsed in one batch into a local
+    DocumentContext; the neighbours of each job come from the job itself,
+    not from the shard, so boundary sentences keep their real context.
+    A previous sentence that is not the shard's preceding job (the first
+    job, or one after a cached gap) is parsed in the same batch, so
+    previous_doc is always the Doc of the job's real previous sentence.
+
+    Returns the results and the rule timings the worker recorded, for the
+    request process to merge into its performance monitor.
+    """
+    texts = [job.text for job in jobs]
+    previous_positions = []
+    for position, job in enumerate(jobs):
+        if job.previous_sentence is None:
+            previous_positions.append(None)
+        elif position > 0 and jobs[position - 1].index == job.index - 1 \
+                and jobs[position - 1].text == job.previous_sentence:
+            previous_positions.append(position - 1)
+        else:
+            previous_positions.append(len(texts))
+            texts.append(job.previous_sentence)
+    document = DocumentContext(texts, headings=headings).parse()
+
+    results = []
+    for position, job in enumerate(jobs):
+        context = document.sentence(position)
+        # Shard-local positions never leak into the context: index is the
+        # document-wide one and the previous Doc is assigned explicitly
+        context.index = job.index
+        context.previous_sentence = job.previous_sentence
+        context.next_sentence = job.next_sentence
+        previous_position = previous_positions[position]
+        context.previous_doc = document.sentence(previous_position).doc if previous_position is not None else None
+        results.append((job.index, analyze_fn(
+            job.text,
+            rules,
+            previous_sentence=job.previous_sentence,
+            next_sentence=job.next_sentence,
+            context=context
+        )))
+    return results, get_performance_monitor().drain()
+
+
+class SentenceAnalysisExecutor:
+    """
+    Runs analyze_sentence() over a document, serially or across processes.
+
+    Args:
+        analyze_fn: The per-sentence analysis function (app.analyze_sentence)
+        rules: Rule functions passed through to analyze_fn
+        max_workers: Worker processes (default ANALYSIS_WORKERS)
+        min_parallel_sentences: Serial below this size (default ANALYSIS_PARALLEL_MIN_SENTENCES)
+        cache: Optional SentenceAnalysisCache; cached sentences skip the rules
+    """
+
+    # Worker pool shared by all executors in this process
+    _pool = None
+    _pool_workers = 0
+
+    def __init__(self, analyze_fn, rules, max_workers: Optional[int] = None,
+                 min_parallel_sentences: Optional[int] = None, cache=None):
+        self.analyze_fn = analyze_fn
+        self.cache = cache
+        self.rules = rules
+        self.max_workers = max(1, max_workers or ANALYSIS_WORKERS)
+        self.min_parallel_sentences = (ANALYSIS_PARALLEL_MIN_SENTENCES
+                                       if min_parallel_sentences is None else min_parallel_sentences)
+
+    def should_parallelize(self, job_count: int) -> bool:
+        return self.max_workers > 1 and job_count >= self.min_parallel_sentences
+
+    def run(self, jobs: List[SentenceJob], document_context: Optional[DocumentContext] = None,
+            progress_callback: Optional[ProgressCallback] = None) -> Dict[int, AnalysisResult]:
+        """
+        Analyze all jobs.
+
+        Args:
+            jobs: Sentences to analyze, in document order
+            document_context: Shared NLP context, reused by the serial path
+            progress_callback: Called as (completed, total) while analysis progresses
+
+        Returns:
+            Dict mapping sentence index to its analyze_sentence() result
+        """
+        return dict(self.iter_results(jobs, document_context, progress_callback))
+
+    def iter_results(self, jobs: List[SentenceJob], document_context: Optional[DocumentContext] = None,
+                     progress_callback: Optional[ProgressCallback] = None) -> Iterator[Tuple[int, AnalysisResult]]:
+        """
+        Analyze all jobs, yielding (index, result) pairs in document order
+        as soon as each result and all results before it are available.
+
+        Takes the same arguments as run(). With a cache, only the sentences
+        missing from it are analyzed (and counted for progress).
+        """
+        if self.cache is None:
+            yield from self._iter_analyzed(jobs, document_context, progress_callback)
+            return
+
+        heading_hash = headings_hash(document_context.headings if document_context is not None else ())
+        keys = {job.index: self.cache.key(job.text, job.previous_sentence, job.next_sentence, heading_hash)
+                for job in jobs}
+        cached = self.cache.get_many(keys.values())
+        misses = [job for job in jobs if keys[job.index] not in cached]
+        if jobs:
+            logger.info(f"Sentence analysis cache: {len(jobs) - len(misses)}/{len(jobs)} sentences cached")
+
+        analyzed = self._iter_analyzed(misses, document_context, progress_callback)
+        try:
+            for job in jobs:
+                key = keys[job.index]
+                if key in cached:
+                    yield job.index, cached[key]
+                    continue
+                index, result = next(analyzed)
+                # Store before yielding: callers mutate the feedback they receive
+                self.cache.put(key, result)
+                yield index, result
+        finally:
+            self.cache.flush()
+
+    def _iter_analyzed(self, jobs, document_context, progress_callback) -> Iterator[Tuple[int, AnalysisResult]]:
+        completed = set()
+        if self.should_parallelize(len(jobs)):
+            try:
+                for index, result in self._iter_parallel(jobs, document_context, progress_callback):
+                    completed.add(index)
+                    yield index, result
+                return
+            except (BrokenProcessPool, CancelledError, OSError, RuntimeError) as e:
+                logger.warning(f"Parallel sentence analysis failed ({e}) - falling back to serial analysis")
+                jobs = [job for job in jobs if job.index not in completed]
+        yield from self._iter_serial(jobs, document_context, progress_callback)
+
+    def _iter_serial(self, jobs, document_context, progress_callback) -> Iterator[Tuple[int, AnalysisResult]]:
+        if document_context is not None:
+            # Parse the sentences to analyze in one batched nlp.pipe pass
+            document_context.parse(indices=[job.index for job in jobs])
+        total = len(jobs)
+        for done, job in enumerate(jobs):
+            if progress_callback:
+                progress_callback(done, total)
+            context = document_context.sentence(job.index, job.text) if document_context is not None else None
+            yield job.index, self.analyze_fn(
+                job.text,
+                self.rules,
+                previous_sentence=job.previous_sentence,
+                next_sentence=job.next_sentence,
+                context=context
+            )
+
+    def _iter_parallel(self, jobs, document_context, progress_callback) -> Iterator[Tuple[int, AnalysisResult]]:
+        headings = tuple(document_context.headings) if document_context is not None else ()
+        shards = make_shards(jobs, self.max_workers * SHARDS_PER_WORKER)
+        logger.info(f"Analyzing {len(jobs)} sentences in {len(shards)} shards across {self.max_workers} workers")
+
+        # Each shard's future and the pool it was submitted to
+        submitted = [self._submit(shard, headings) for shard in shards]
+        total = len(jobs)
+        done = 0
+        if progress_callback:
+            progress_callback(done, total)
+        # Shards are collected in submission order, so results come out in
+        # document order while later shards keep running in the pool
+        monitor = get_performance_monitor()
+        for shard, (future, pool) in zip(shards, submitted):
+            try:
+                try:
+                    shard_results, metrics = future.result()
+                except CancelledError:
+                    # Cancelled from outside this executor: submit it once more; if
+                    # that is cancelled too, the rest is analyzed serially
+                    logger.warning(f"Analysis shard of {len(shard)} sentences was cancelled - resubmitting it")
+                    future, pool = self._submit(shard, headings)
+                    shard_results, metrics = future.result()
+            except (BrokenProcessPool, OSError, RuntimeError):
+                # Every shard on the broken pool fails the same way; only the first replaces it
+                self._reset_pool(pool)
+                raise
+            monitor.merge(metrics)
+            done += len(shard_results)
+            if progress_callback:
+                progress_callback(done, total)
+            yield from shard_results
+
+    def _submit(self, shard, headings):
+        pool = self._get_pool(self.max_workers)
+        try:
+            future = pool.submit(analyze_shard, shard, self.analyze_fn, self.rules, headings)
+        except (BrokenProcessPool, RuntimeError):
+            # Broken, or shut down by another executor that replaced it
+            self._reset_pool(pool)
+            pool = self._get_pool(self.max_workers)
+            future = pool.submit(analyze_shard, shard, self.analyze_fn, self.rules, headings)
+        return future, pool
+
+    @classmethod
+    def _get_pool(cls, workers: int):
+        if cls._pool is None or cls._pool_workers != workers:
+            cls._reset_pool()
+            cls._pool = new_process_pool(workers)
+            cls._pool_workers = workers
+        return cls._pool
+
+    @classmethod
+    def _reset_pool(cls, broken=None):
+        """
+        Drop the shared pool; with ``broken``, only if that pool is still the
+        shared one. Shards already submitted to it (by other requests too)
+        still finish.
+        """
+        if broken is not None and cls._pool is not broken:
+            return
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False)
+        cls._pool = None
+        cls._pool_workers = 0
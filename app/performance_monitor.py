@@ -0,0 +1,500 @@
+"""
+Performance Monitor
+Per-rule and per-stage timings behind /performance_dashboard and /metrics.
+
+analyze_sentence() and run_document_rules() time every rule call (wall
+time, issues reported, exceptions), and every upload records how long its
+stages took (parse, gate, extract, rules, structural, serialize).
+Hybrid knowledge base searches record the latency of each retrieval leg.
+Latencies go into fixed-bucket histograms, so percentiles come from the
+bucket counts without keeping samples.
+
+Counters are kept per thread: a thread only writes its own shard, so
+recording takes no lock, and a snapshot sums the shards. Analysis worker
+processes drain their counters after each shard and the request process
+merges them (see parallel_analysis.analyze_shard).
+
+User ratings of AI suggestions (/suggestion_feedback) are stored in a
+small SQLite table.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Record rule and stage timings (0 disables)
+PERFORMANCE_MONITOR = os.environ.get('PERFORMANCE_MONITOR', '1') != '0'
+# SQLite file for suggestion feedback (empty keeps feedback in memory)
+SUGGESTION_FEEDBACK_DB = os.environ.get(
+    'SUGGESTION_FEEDBACK_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suggestion_feedback.db')
+)
+
+# Upper bounds (seconds) of the latency histogram buckets; one more bucket is unbounded
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+PERCENTILES = (50, 90, 99)
+
+# Upload stages, in pipeline order
+STAGE_PARSE = 'parse'
+STAGE_GATE = 'gate'
+STAGE_EXTRACT = 'extract'
+STAGE_RULES = 'rules'
+STAGE_STRUCTURAL = 'structural'
+STAGE_SERIALIZE = 'serialize'
+STAGES = (STAGE_PARSE, STAGE_GATE, STAGE_EXTRACT, STAGE_RULES, STAGE_STRUCTURAL, STAGE_SERIALIZE)
+
+# Prefix of the /metrics series
+METRIC_PREFIX = 'docscanner'
+# Feedback rows kept when there is no feedback database
+MEMORY_FEEDBACK_LIMIT = 10000
+
+
+class Histogram:
+    """Latency histogram over LATENCY_BUCKETS."""
+
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'Histogram') -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, percent: float) -> float:
+        """Estimated latency (seconds) below which ``percent`` % of the observations fall."""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = percent / 100 * count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                upper = min(LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max, self.max)
+                # Interpolate inside the bucket
+                return lower + max(0.0, upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> dict:
+        count = self.count
+        summary = {
+            "count": count,
+            "total_seconds": round(self.total, 6),
+            "mean_ms": round(self.total / count * 1000, 3) if count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(self.percentile(percent) * 1000, 3)
+        return summary
+
+
+class RuleStats:
+    """Counters of one rule: calls, calls that reported issues, issues, exceptions and latency."""
+
+    __slots__ = ('calls', 'hits', 'issues', 'errors', 'latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.issues = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+    def merge(self, other: 'RuleStats') -> None:
+        self.calls += other.calls
+        self.hits += other.hits
+        self.issues += other.issues
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+
+
+class MetricsShard:
+    """The counters one thread (or one drained worker) has recorded."""
+
+    __slots__ = ('rules', 'stages', 'retrieval', 'uploads')
+
+    def __init__(self):
+        self.rules: Dict[str, RuleStats] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self.retrieval: Dict[str, Histogram] = {}
+        self.uploads = 0
+
+    def rule(self, rule_id: str) -> RuleStats:
+        stats = self.rules.get(rule_id)
+        if stats is None:
+            stats = self.rules[rule_id] = RuleStats()
+        return stats
+
+    def stage(self, name: str) -> Histogram:
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram()
+        return histogram
+
+    def retrieval_leg(self, leg: str) -> Histogram:
+        histogram = self.retrieval.get(leg)
+        if histogram is None:
+            histogram = self.retrieval[leg] = Histogram()
+        return histogram
+
+    def merge(self, other: 'MetricsShard') -> None:
+        for rule_id, stats in list(other.rules.items()):
+            self.rule(rule_id).merge(stats)
+        for name, histogram in list(other.stages.items()):
+            self.stage(name).merge(histogram)
+        for leg, histogram in list(other.retrieval.items()):
+            self.retrieval_leg(leg).merge(histogram)
+        self.uploads += other.uploads
+
+
+class UploadTimer:
+    """
+    Stage timings of one upload.
+
+    A stage may be entered several times (the rules stage is timed while
+    results stream out); finish() records each stage's total once.
+    """
+
+    def __init__(self, monitor: 'PerformanceMonitor'):
+        self.monitor = monitor
+        self.seconds: Dict[str, float] = {}
+        self._mark = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """Add the time since the previous lap (or since the timer was created) to ``name``."""
+        now = time.perf_counter()
+        self.seconds[name] = self.seconds.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def timed(self, name: str, iterable: Iterable) -> Iterator:
+        """Iterate ``iterable``, counting only the time spent producing its items."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def finish(self) -> None:
+        self.monitor.record_upload(self.seconds)
+
+
+class PerformanceMonitor:
+    """
+    Rule and upload stage metrics of this process, plus suggestion feedback.
+
+    Args:
+        enabled: Record timings (default PERFORMANCE_MONITOR)
+        feedback_db: SQLite file for suggestion feedback (None/empty keeps it in memory)
+    """
+
+    def __init__(self, enabled: bool = PERFORMANCE_MONITOR, feedback_db: Optional[str] = SUGGESTION_FEEDBACK_DB):
+        self.enabled = enabled
+        self.feedback_db = feedback_db or None
+        self._memory_feedback = deque(maxlen=MEMORY_FEEDBACK_LIMIT)
+        self.reset()
+        if self.feedback_db:
+            self._init_database()
+
+    def reset(self) -> None:
+        """Drop all recorded timings (a forked worker starts from zero)."""
+        # Guards the shard list and the feedback fallback, never a recording
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[tuple] = []
+        self._retired = MetricsShard()
+        self.started_at = time.time()
+
+    def _shard(self) -> MetricsShard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = MetricsShard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    # ── Recording ────────────────────────────────────────────────────────
+
+    def record_rule(self, rule_id: str, seconds: float, issues: int = 0) -> None:
+        """One call of a rule: its wall time and the number of issues it reported."""
+        if not self.enabled:
+            return
+        stats = self._shard().rule(rule_id)
+        stats.calls += 1
+        stats.latency.observe(seconds)
+        if issues:
+            stats.hits += 1
+            stats.issues += issues
+
+    def record_error(self, rule_id: str) -> None:
+        """A rule call raised an exception."""
+        if self.enabled:
+            self._shard().rule(rule_id).errors += 1
+
+    def upload_timer(self) -> UploadTimer:
+        return UploadTimer(self)
+
+    def record_upload(self, seconds: Dict[str, float]) -> None:
+        """Stage timings of one finished upload."""
+        if not self.enabled:
+            return
+        shard = self._shard()
+        shard.uploads += 1
+        for name, elapsed in seconds.items():
+            shard.stage(name).observe(elapsed)
+
+    def record_retrieval(self, leg: str, seconds: float) -> None:
+        """Wall time of one knowledge base search leg (embedding, keyword or the whole hybrid search)."""
+        if self.enabled:
+            self._shard().retrieval_leg(leg).observe(seconds)
+
+    def drain(self) -> MetricsShard:
+        """
+        Take everything recorded so far and start from zero.
+
+        Used by analysis worker processes, whose only recording thread is
+        the one draining.
+        """
+        snapshot = self.snapshot()
+        self.reset()
+        return snapshot
+
+    def merge(self, shard: Optional[MetricsShard]) -> None:
+        """Add counters drained from a worker process to this thread's shard."""
+        if self.enabled and shard is not None:
+            self._shard().merge(shard)
+
+    # ── Reporting ────────────────────────────────────────────────────────
+
+    def snapshot(self) -> MetricsShard:
+        """Sum of all shards. Shards of finished threads are folded into one."""
+        total = MetricsShard()
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._retired.merge(shard)
+            self._shards = alive
+            total.merge(self._retired)
+            for _, shard in alive:
+                total.merge(shard)
+        return total
+
+    def dashboard(self) -> dict:
+        """The /performance_dashboard payload. Rules are sorted by total time, slowest first."""
+        snapshot = self.snapshot()
+        rule_seconds = sum(stats.latency.total for stats in snapshot.rules.values())
+        rules = []
+        for rule_id, stats in sorted(snapshot.rules.items(), key=lambda item: -item[1].latency.total):
+            summary = stats.latency.summary()
+            summary.pop("count")
+            rules.append(dict(
+                rule=rule_id,
+                calls=stats.calls,
+                issues=stats.issues,
+                errors=stats.errors,
+                # Share of calls that reported at least one issue
+                hit_rate=round(stats.hits / stats.calls, 4) if stats.calls else 0.0,
+                time_share=round(stats.latency.total / rule_seconds, 4) if rule_seconds else 0.0,
+                **summary
+            ))
+        stage_names = list(STAGES) + sorted(set(snapshot.stages) - set(STAGES))
+        return {
+            "enabled": self.enabled,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "uploads": snapshot.uploads,
+            "rules": rules,
+            "stages": {name: snapshot.stages[name].summary() for name in stage_names if name in snapshot.stages},
+            "retrieval": {leg: histogram.summary() for leg, histogram in sorted(snapshot.retrieval.items())},
+            "feedback": self.feedback_summary(),
+        }
+
+    def prometheus_text(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def series(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+                lines.append(f"{METRIC_PREFIX}_{name}{suffix}{{{label_text}}} {value}"
+                             if label_text else f"{METRIC_PREFIX}_{name}{suffix} {value}")
+
+        rules = sorted(snapshot.rules.items())
+        series("rule_calls_total", "counter", "Rule check calls.",
+               [("", [("rule", rule_id)], stats.calls) for rule_id, stats in rules])
+        series("rule_hits_total", "counter", "Rule check calls that reported issues.",
+               [("", [("rule", rule_id)], stats.hits) for rule_id, stats in rules])
+        series("rule_issues_total", "counter", "Issues reported by rules.",
+               [("", [("rule", rule_id)], stats.issues) for rule_id, stats in rules])
+        series("rule_errors_total", "counter", "Rule check calls that raised an exception.",
+               [("", [("rule", rule_id)], stats.errors) for rule_id, stats in rules])
+        series("rule_seconds", "histogram", "Wall time of one rule check call.",
+               [sample for rule_id, stats in rules for sample in _histogram_samples([("rule", rule_id)], stats.latency)])
+        series("upload_stage_seconds", "histogram", "Wall time of one upload stage.",
+               [sample for name, histogram in sorted(snapshot.stages.items())
+                for sample in _histogram_samples([("stage", name)], histogram)])
+        series("retrieval_seconds", "histogram", "Wall time of one knowledge base search leg.",
+               [sample for leg, histogram in sorted(snapshot.retrieval.items())
+                for sample in _histogram_samples([("leg", leg)], histogram)])
+        series("uploads_total", "counter", "Uploads reviewed.", [("", [], snapshot.uploads)])
+        return "\n".join(lines) + "\n"
+
+    # ── Suggestion feedback ──────────────────────────────────────────────
+
+    def _connect(self):
+        conn = sqlite3.connect(self.feedback_db, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS suggestion_feedback (
+                            suggestion_id TEXT NOT NULL,
+                            rating INTEGER,
+                            feedback TEXT,
+                            was_helpful INTEGER,
+                            was_implemented INTEGER,
+                            created_at REAL NOT NULL
+                        )
+                    ''')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Suggestion feedback DB unavailable ({e}) - keeping feedback in memory")
+            self.feedback_db = None
+
+    def record_feedback(self, suggestion_id: str, rating: Optional[int] = None, feedback: Optional[str] = None,
+                        was_helpful: Optional[bool] = None, was_implemented: Optional[bool] = None) -> None:
+        row = (
+            suggestion_id,
+            int(rating) if rating is not None else None,
+            feedback,
+            int(bool(was_helpful)) if was_helpful is not None else None,
+            int(bool(was_implemented)) if was_implemented is not None else None,
+            time.time()
+        )
+        if self.feedback_db:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('INSERT INTO suggestion_feedback VALUES (?, ?, ?, ?, ?, ?)', row)
+            finally:
+                conn.close()
+        else:
+            with self._lock:
+                self._memory_feedback.append(row)
+
+    def feedback_summary(self) -> dict:
+        query = ('SELECT COUNT(*), AVG(rating), AVG(was_helpful), AVG(was_implemented) '
+                 'FROM suggestion_feedback')
+        if self.feedback_db:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        count, rating, helpful, implemented = conn.execute(query).fetchone()
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read suggestion feedback: {e}")
+                count, rating, helpful, implemented = 0, None, None, None
+        else:
+            with self._lock:
+                rows = list(self._memory_feedback)
+            count = len(rows)
+            rating, helpful, implemented = (_mean(row[column] for row in rows) for column in (1, 3, 4))
+        return {
+            "count": count,
+            "average_rating": round(rating, 2) if rating is not None else None,
+            "helpful_rate": round(helpful, 4) if helpful is not None else None,
+            "implemented_rate": round(implemented, 4) if implemented is not None else None,
+        }
+
+
+def _histogram_samples(labels, histogram: Histogram):
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        yield "_bucket", labels + [("le", repr(bound))], cumulative
+    yield "_bucket", labels + [("le", "+Inf")], cumulative + histogram.counts[-1]
+    yield "_sum", labels, repr(histogram.total)
+    yield "_count", labels, histogram.count
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _mean(values) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+_performance_monitor: Optional[PerformanceMonitor] = None
+
+
+def get_performance_monitor() -> PerformanceMonitor:
+    """Lazily created process-wide performance monitor."""
+    global _performance_monitor
+    if _performance_monitor is None:
+        _performance_monitor = PerformanceMonitor()
+        if hasattr(os, 'register_at_fork'):
+            # A forked worker must not report the parent's counters again
+            os.register_at_fork(after_in_child=_performance_monitor.reset)
+    return _performance_monitor
+
+
+def record_user_feedback(suggestion_id: str, rating: Optional[int] = None, feedback: Optional[str] = None,
+                         was_helpful: Optional[bool] = None, was_implemented: Optional[bool] = None) -> None:
+    """Store a user's rating of an AI suggestion."""
+    get_performance_monitor().record_feedback(suggestion_id, rating, feedback, was_helpful, was_implemented)
+
+
+def get_performance_dashboard() -> dict:
+    return get_performance_monitor().dashboard()
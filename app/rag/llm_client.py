@@ -0,0 +1,286 @@
+"""
+llm_client.py
+=============
+HTTP client for the local Ollama server used by the sentence reviewer.
+
+- Keep-alive connections are pooled per process (standard library
+  http.client, so no extra dependency); a batch review reuses a handful
+  of connections instead of opening one per sentence.
+- The model to use is discovered once from /api/tags and cached.
+- Every generate call has a deadline (LLM_REQUEST_TIMEOUT). Timeouts,
+  dropped connections and 429/5xx answers are retried with exponential
+  backoff while the deadline allows. A server that refuses connections
+  is skipped for OLLAMA_RETRY_AFTER seconds, so a batch without Ollama
+  falls through to the next backend immediately.
+- map_bounded() fans calls out over a bounded number of threads
+  (LLM_CONCURRENCY); Ollama serves several requests in parallel
+  (OLLAMA_NUM_PARALLEL on the server side).
+"""
+
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+# Model override; discovered from the installed models when unset
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL") or None
+# Preferred models, in order, when discovering
+OLLAMA_MODELS = ["phi3:mini", "phi3", "llama3", "mistral", "gemma"]
+# Seconds a discovered model is trusted before /api/tags is asked again
+OLLAMA_MODEL_TTL = float(os.environ.get("OLLAMA_MODEL_TTL", "300"))
+# Seconds an unreachable server is skipped
+OLLAMA_RETRY_AFTER = float(os.environ.get("OLLAMA_RETRY_AFTER", "30"))
+
+# Sentences evaluated at once (also the connection pool size)
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+# Deadline of one generate call, retries included (seconds)
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "60"))
+# Retries after the first attempt, and the first backoff delay (doubled each retry)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", "0.5"))
+
+_TAGS_TIMEOUT = 3.0
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Errors of a kept-alive connection the server has meanwhile closed
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, created on demand."""
+
+    def __init__(self, host: str, port: int, size: int = LLM_CONCURRENCY, https: bool = False):
+        self.host = host
+        self.port = port
+        self.https = https
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max(1, size))
+
+    def get(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """A connection with the given socket timeout, and whether it was reused."""
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = connection_class(self.host, self.port)
+            reused = False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def put(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ---------------------------------------------------------------------------
+# Ollama client
+# ---------------------------------------------------------------------------
+
+class OllamaClient:
+    """Pooled, deadline-bounded client of an Ollama server."""
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        model: Optional[str] = OLLAMA_MODEL,
+        pool_size: int = LLM_CONCURRENCY,
+        timeout: float = LLM_REQUEST_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff: float = LLM_RETRY_BACKOFF,
+    ):
+        parts = urlsplit(base_url)
+        https = parts.scheme == "https"
+        self.base_path = parts.path.rstrip("/")
+        self.pool = ConnectionPool(parts.hostname or "localhost", parts.port or (443 if https else 80),
+                                   pool_size, https)
+        self.fixed_model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._model: Optional[str] = None
+        self._model_expires = 0.0
+        self._unavailable_until = 0.0
+
+    # -- transport ----------------------------------------------------------
+
+    def _request(self, method: str, path: str, payload: Optional[dict], timeout: float) -> Tuple[int, Any]:
+        """One request on a pooled connection; a stale kept-alive connection is replaced once."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        while True:
+            conn, reused = self.pool.get(timeout)
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self.pool.put(conn)
+            try:
+                return response.status, json.loads(data) if data else None
+            except ValueError:
+                return response.status, None
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, exc: Exception) -> None:
+        self._unavailable_until = time.monotonic() + OLLAMA_RETRY_AFTER
+        logger.debug(f"[LLMClient] Ollama unreachable, skipped for {OLLAMA_RETRY_AFTER:.0f}s: {exc}")
+
+    # -- model discovery ----------------------------------------------------
+
+    def model(self) -> str:
+        """The model to generate with: the override, else the best installed candidate (cached)."""
+        if self.fixed_model:
+            return self.fixed_model
+        if self._model is not None and time.monotonic() < self._model_expires:
+            return self._model
+        with self._lock:
+            if self._model is None or time.monotonic() >= self._model_expires:
+                self._model = self._discover_model()
+                self._model_expires = time.monotonic() + OLLAMA_MODEL_TTL
+            return self._model
+
+    def _discover_model(self) -> str:
+        try:
+            status, data = self._request("GET", "/api/tags", None, _TAGS_TIMEOUT)
+            if status == 200 and data:
+                installed = [m.get("name", "") for m in data.get("models", [])]
+                for candidate in OLLAMA_MODELS:
+                    if any(candidate in name for name in installed):
+                        logger.info(f"[LLMClient] Using Ollama model {candidate}")
+                        return candidate
+        except ConnectionRefusedError as exc:
+            self._mark_unavailable(exc)
+        except Exception as exc:
+            logger.debug(f"[LLMClient] Ollama model discovery failed: {exc}")
+        return OLLAMA_MODELS[0]
+
+    # -- generation ---------------------------------------------------------
+
+    def generate(self, prompt: str, options: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Generate a completion; None if the server is unavailable, keeps
+        failing, or the deadline passes.
+        """
+        if not self.available():
+            return None
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        model = self.model()
+        if not self.available():
+            return None
+        payload = {"model": model, "prompt": prompt, "stream": False, "options": options or {}}
+
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                status, data = self._request("POST", "/api/generate", payload, remaining)
+                if status == 200:
+                    text = ((data or {}).get("response") or "").strip()
+                    if text:
+                        logger.info(f"[LLMClient] Ollama ({model}) response OK")
+                        return text
+                    return None
+                if status not in _RETRY_STATUSES:
+                    logger.warning(f"[LLMClient] Ollama HTTP {status}")
+                    return None
+                raise _RetryableStatus(status)
+            except ConnectionRefusedError as exc:
+                self._mark_unavailable(exc)
+                return None
+            except (OSError, http.client.HTTPException, _RetryableStatus) as exc:
+                # Timeouts are OSErrors too
+                logger.debug(f"[LLMClient] Ollama attempt {attempt + 1} failed: {exc}")
+            if attempt < self.max_retries:
+                pause = min(delay, deadline - time.monotonic())
+                if pause <= 0:
+                    break
+                time.sleep(pause)
+                delay *= 2
+        logger.warning(f"[LLMClient] Ollama gave no response for model {model}")
+        return None
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+# ---------------------------------------------------------------------------
+# Fan-out
+# ---------------------------------------------------------------------------
+
+def map_bounded(func: Callable[[T], R], items: Iterable[T], concurrency: int = LLM_CONCURRENCY) -> List[R]:
+    """func over items on at most ``concurrency`` threads; results in item order."""
+    items = list(items)
+    workers = max(1, min(concurrency, len(items)))
+    if workers == 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as executor:
+        return list(executor.map(func, items))
+
+
+# ---------------------------------------------------------------------------
+# Module-level singleton
+# ---------------------------------------------------------------------------
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Return the process-wide Ollama client (lazy init)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
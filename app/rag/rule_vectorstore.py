@@ -10,12 +10,17 @@ Each record = one style rule, embedded as its description + examples.
 When a sentence triggers a flag, we query this store to retrieve
 the most relevant rules. The LLM then evaluates the sentence specifically
 against those rules — giving structured, rule-grounded feedback.
+
+In the JSON-only mode, ingest_rules() compiles every CATEGORY_KEYWORDS
+entry into one Aho-Corasick automaton and indexes the rules by category.
+Retrieval is one pass over the lowercased sentence (which keywords occur,
+as substrings) plus a merge of the rules of the categories that matched.
 """
 
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -159,6 +164,76 @@ CATEGORY_KEYWORDS = {
     "consistency":  ["consistent", "verb", "UI action"],
 }
 
+# Score of a rule before any keyword of its category matched, and per matched keyword
+_BASE_SCORE = 0.1
+_KEYWORD_SCORE = 0.2
+
+
+class _KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercased keywords.
+
+    ``categories(text)`` reports, in one pass over the text, how many
+    keywords of each category occur in it (as substrings, like ``in``).
+    """
+
+    def __init__(self, category_keywords: Dict[str, Sequence[str]]):
+        # Keyword -> the category of each list it appears in (a category may list it twice)
+        owners: Dict[str, List[str]] = {}
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                if keyword:
+                    owners.setdefault(keyword.lower(), []).append(category)
+        self.keywords: List[Tuple[str, Tuple[str, ...]]] = [
+            (keyword, tuple(categories)) for keyword, categories in owners.items()]
+
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Tuple[int, ...]] = [()]
+        for keyword_id, (keyword, _) in enumerate(self.keywords):
+            node = 0
+            for char in keyword:
+                if char not in goto[node]:
+                    goto[node][char] = len(goto)
+                    goto.append({})
+                    output.append(())
+                node = goto[node][char]
+            output[node] += (keyword_id,)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] += output[fail[child]]
+        # Fold the failure links into full transition tables (states in breadth-first
+        # order, so a state's failure target is complete before the state itself)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        for node in queue:
+            delta[node] = {**delta[fail[node]], **goto[node]}
+        self._delta, self._output = delta, output
+
+    def found(self, text: str) -> set:
+        """Ids of the keywords occurring in a lowercased text."""
+        delta, output = self._delta, self._output
+        found = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def categories(self, text: str) -> Dict[str, int]:
+        """Number of matched keywords per category."""
+        hits: Dict[str, int] = {}
+        for keyword_id in self.found(text):
+            for category in self.keywords[keyword_id][1]:
+                hits[category] = hits.get(category, 0) + 1
+        return hits
+
 
 class RuleVectorStore:
     """
@@ -200,10 +275,38 @@ class RuleVectorStore:
     def ingest_rules(self, force_reingest: bool = False) -> int:
         # In JSON-only mode, we don't ingest into a vector DB
         rules = self._load_rules_json()
+        self._build_index(rules)
         self._cached_rules = rules
         logger.info(f"[RuleVectorStore] ✅ Loaded {len(rules)} style rules into memory")
         return len(rules)
 
+    def _build_index(self, rules: List[Dict[str, Any]]) -> None:
+        """Keyword automaton, category → rules index and the result fields of every rule."""
+        self._automaton = _KeywordAutomaton(CATEGORY_KEYWORDS)
+        self._rules_by_category: Dict[str, List[int]] = {}
+        self._rule_fields: List[Dict[str, Any]] = []
+        for position, rule in enumerate(rules):
+            rule_id = rule.get("rule_id", "?")
+            category = rule.get("category", "general")
+            self._rules_by_category.setdefault(category, []).append(position)
+            self._rule_fields.append({
+                "rule_id": rule_id,
+                "category": category,
+                "severity": rule.get("severity", "warn"),
+                "message": rule.get("message", ""),
+                "suggestion": rule.get("suggestion", ""),
+                "example_violation": rule.get("example_violation", ""),
+                "example_correction": rule.get("example_correction", ""),
+                "embed_text": f"Rule {rule_id}: {rule.get('message')}",
+            })
+        # Score by number of matched keywords (summed in order, as the scores always were)
+        most = max((len(keywords) for keywords in CATEGORY_KEYWORDS.values()), default=0)
+        score = _BASE_SCORE
+        self._scores = [score]
+        for _ in range(most):
+            score += _KEYWORD_SCORE
+            self._scores.append(score)
+
     def _load_rules_json(self) -> List[Dict[str, Any]]:
         """Load rules from rules.json."""
         if not os.path.exists(self.rules_json_path):
@@ -235,43 +338,71 @@ class RuleVectorStore:
         if not sentence or not sentence.strip():
             return []
 
-        out = []
-        s_lower = sentence.lower()
-        
-        for rule in getattr(self, '_cached_rules', []):
-            if category_filter and rule.get("category") != category_filter:
+        hits = self._automaton.categories(sentence.lower())
+        return self._select(hits, top_k, category_filter, severity_filter)
+
+    def retrieve_rules_batch(
+        self,
+        sentences: Iterable[str],
+        top_k: int = 5,
+        categories: Optional[Sequence[Iterable[str]]] = None,
+        severity_filter: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Candidate rules for a list of sentences, one keyword pass per sentence.
+
+        Args:
+            sentences:        Sentences to retrieve rules for.
+            top_k:            Rules per query.
+            categories:       Optional category hints per sentence. For each
+                              hint the top_k rules of that category are merged
+                              with the overall top_k (by rule id).
+            severity_filter:  Optional filter by severity.
+
+        Returns:
+            One list of rule dicts per sentence, in the order of ``sentences``.
+        """
+        if not hasattr(self, '_cached_rules') or not self._cached_rules:
+            self.ingest_rules()
+
+        results = []
+        for i, sentence in enumerate(sentences):
+            if not sentence or not sentence.strip():
+                results.append([])
                 continue
-            if severity_filter and rule.get("severity") != severity_filter:
+            hits = self._automaton.categories(sentence.lower())
+            merged: Dict[str, Dict[str, Any]] = {}
+            for category in (categories[i] if categories is not None else ()):
+                for rule in self._select(hits, top_k, category, severity_filter):
+                    merged.setdefault(rule["rule_id"], rule)
+            for rule in self._select(hits, top_k, None, severity_filter):
+                merged.setdefault(rule["rule_id"], rule)
+            results.append(list(merged.values()))
+        return results
+
+    def _select(
+        self,
+        hits: Dict[str, int],
+        top_k: int,
+        category_filter: Optional[str],
+        severity_filter: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Top rules of the categories with keyword hits, best score first, then file order."""
+        if category_filter:
+            hits = {category_filter: hits[category_filter]} if category_filter in hits else {}
+        scored = []
+        for category, count in hits.items():
+            score = min(1.0, self._scores[count])
+            for position in self._rules_by_category.get(category, ()):
+                scored.append((-score, position))
+        scored.sort()
+
+        out = []
+        for negative_score, position in scored:
+            fields = self._rule_fields[position]
+            if severity_filter and fields["severity"] != severity_filter:
                 continue
-                
-            rule_id = rule.get("rule_id", "?")
-            category = rule.get("category", "general")
-            
-            # Simple keyword matching score
-            score = 0.1 # Base score
-            
-            # Match keywords
-            keywords = CATEGORY_KEYWORDS.get(category, [])
-            for kw in keywords:
-                if kw.lower() in s_lower:
-                    score += 0.2
-            
-            # If we matched some keywords or it's a general match, include it
-            if score > 0.1:
-                out.append({
-                    "rule_id": rule_id,
-                    "category": category,
-                    "severity": rule.get("severity", "warn"),
-                    "message": rule.get("message", ""),
-                    "suggestion": rule.get("suggestion", ""),
-                    "example_violation": rule.get("example_violation", ""),
-                    "example_correction": rule.get("example_correction", ""),
-                    "embed_text": f"Rule {rule_id}: {rule.get('message')}",
-                    "score": min(1.0, score),
-                })
-        
-        # Sort by score descending and take top_k
-        out.sort(key=lambda x: x["score"], reverse=True)
+            out.append({**fields, "score": -negative_score})
         return out[:top_k]
 
     def _build_where_clause(
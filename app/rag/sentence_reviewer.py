@@ -144,36 +144,32 @@ def retrieve_and_rerank(
     Returns:
         List of rule dicts sorted by relevance.
     """
+    [candidates] = retrieve_candidates([sentence], [categories], top_k_retrieve)
+    return rerank(sentence, candidates, top_k_final)
+
+
+def retrieve_candidates(
+    sentences: List[str],
+    categories: List[List[str]],
+    top_k_retrieve: int = 10,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Candidate rules for several sentences in one batch.
+
+    For each sentence, the top_k_retrieve rules of every hinted category are
+    merged with the top_k_retrieve rules overall, so cross-category rules
+    are not missed.
+    """
     from app.rag.rule_vectorstore import get_rule_vectorstore
 
     store = get_rule_vectorstore()
     if not store.is_ready():
-        return []
-
-    # If we have category hints, do one targeted query per category and merge
-    all_rules: Dict[str, Dict[str, Any]] = {}
-
-    if categories:
-        for cat in categories:
-            rules = store.retrieve_rules(sentence, top_k=top_k_retrieve, category_filter=cat)
-            for r in rules:
-                rid = r["rule_id"]
-                # Prefer higher score if same rule appears via multiple category queries
-                if rid not in all_rules or r["score"] > all_rules[rid]["score"]:
-                    all_rules[rid] = r
-        # Also do an uncategorized query so we don't miss cross-category rules
-        uncategorized = store.retrieve_rules(sentence, top_k=top_k_retrieve)
-        for r in uncategorized:
-            rid = r["rule_id"]
-            if rid not in all_rules or r["score"] > all_rules[rid]["score"]:
-                all_rules[rid] = r
-    else:
-        rules = store.retrieve_rules(sentence, top_k=top_k_retrieve)
-        for r in rules:
-            all_rules[r["rule_id"]] = r
+        return [[] for _ in sentences]
+    return store.retrieve_rules_batch(sentences, top_k=top_k_retrieve, categories=categories)
 
-    candidates = list(all_rules.values())
 
+def rerank(sentence: str, candidates: List[Dict[str, Any]], top_k_final: int = 3) -> List[Dict[str, Any]]:
+    """Order candidate rules with the CrossEncoder (or by retrieval score) and keep top_k_final."""
     if not candidates:
         return []
 
@@ -200,51 +196,18 @@ def retrieve_and_rerank(
 # LLM backends  (privacy-first: Ollama local → Gemini cloud → none)
 # ---------------------------------------------------------------------------
 
-_OLLAMA_URL = "http://localhost:11434/api/generate"
-_OLLAMA_MODELS = ["phi3:mini", "phi3", "llama3", "mistral", "gemma"]
+_OLLAMA_OPTIONS = {"temperature": 0.1, "num_predict": 300, "num_ctx": 1500}
 
 
 def _call_ollama(prompt: str) -> Optional[str]:
     """
     Call local Ollama LLM. No data leaves the machine.
-    Tries common models in order until one responds.
+    Uses the pooled client (cached model discovery, deadline, retries).
     """
+    from app.rag.llm_client import get_ollama_client
+
     try:
-        import requests
-        # Pick the model to use — respect env var override
-        model = os.environ.get("OLLAMA_MODEL") or None
-
-        if model is None:
-            # Auto-detect which model is installed
-            try:
-                tags_resp = requests.get("http://localhost:11434/api/tags", timeout=3)
-                if tags_resp.status_code == 200:
-                    installed = [m["name"] for m in tags_resp.json().get("models", [])]
-                    for candidate in _OLLAMA_MODELS:
-                        if any(candidate in inst for inst in installed):
-                            model = candidate
-                            break
-            except Exception:
-                pass
-            model = model or _OLLAMA_MODELS[0]  # fallback to first candidate
-
-        response = requests.post(
-            _OLLAMA_URL,
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.1, "num_predict": 300, "num_ctx": 1500},
-            },
-            timeout=60,
-        )
-        if response.status_code == 200:
-            text = response.json().get("response", "").strip()
-            if text:
-                logger.info(f"[SentenceReviewer] Ollama ({model}) response OK")
-                return text
-        logger.warning(f"[SentenceReviewer] Ollama HTTP {response.status_code}")
-        return None
+        return get_ollama_client().generate(prompt, _OLLAMA_OPTIONS)
     except Exception as exc:
         logger.debug(f"[SentenceReviewer] Ollama unavailable: {exc}")
         return None
@@ -469,13 +432,28 @@ def review_sentence(
 
     # Step 1: Classify
     classifications = classify_sentence(sentence)
-    categories = list({c["category"] for c in classifications})
-    hints = [c["hint"] for c in classifications]
+    categories = _categories(classifications)
     logger.debug(f"[SentenceReviewer] Classified '{sentence[:50]}' → {categories}")
 
     # Step 2: Retrieve + rerank
     rules = retrieve_and_rerank(sentence, categories, top_k_retrieve, top_k_final)
 
+    return _evaluate(sentence, classifications, categories, rules, use_llm)
+
+
+def _categories(classifications: List[Dict[str, str]]) -> List[str]:
+    return list({c["category"] for c in classifications})
+
+
+def _evaluate(
+    sentence: str,
+    classifications: List[Dict[str, str]],
+    categories: List[str],
+    rules: List[Dict[str, Any]],
+    use_llm: bool,
+) -> Dict[str, Any]:
+    """Step 3 of the pipeline: judge a classified sentence against its retrieved rules."""
+    hints = [c["hint"] for c in classifications]
     base = {
         "sentence": sentence,
         "classified_categories": categories,
@@ -550,23 +528,45 @@ def review_document_sentences(
     sentences: List[str],
     use_llm: bool = True,
     skip_short: int = 8,
+    top_k_retrieve: int = 10,
+    top_k_final: int = 3,
 ) -> List[Dict[str, Any]]:
     """
     Review a list of sentences extracted from a document.
 
+    Rules for all sentences are retrieved in one batch; the sentences are
+    then evaluated on up to LLM_CONCURRENCY threads (see llm_client).
+
     Args:
-        sentences:   List of sentence strings.
-        use_llm:     Whether to call Gemini for each sentence.
-        skip_short:  Skip sentences with fewer words than this.
+        sentences:       List of sentence strings.
+        use_llm:         Whether to call Gemini for each sentence.
+        skip_short:      Skip sentences with fewer words than this.
+        top_k_retrieve:  Candidates fetched from vector store per sentence.
+        top_k_final:     Rules sent to LLM after reranking.
 
     Returns:
         List of feedback dicts, one per (non-skipped) sentence.
     """
-    results = []
-    for sent in sentences:
-        words = sent.strip().split()
-        if len(words) < skip_short:
-            continue
-        feedback = review_sentence(sent, use_llm=use_llm)
-        results.append(feedback)
-    return results
+    kept = [sent.strip() for sent in sentences if len(sent.strip().split()) >= skip_short]
+    classifications = [classify_sentence(sent) for sent in kept]
+    categories = [_categories(classified) for classified in classifications]
+    candidates = retrieve_candidates(kept, categories, top_k_retrieve)
+
+    from app.rag.llm_client import LLM_CONCURRENCY, map_bounded
+
+    jobs = []
+    for sent, classified, cats, rules in zip(kept, classifications, categories, candidates):
+        if sent:
+            jobs.append((sent, classified, cats, rerank(sent, rules, top_k_final)))
+        else:
+            # Only with skip_short <= 0
+            jobs.append((sent, None, None, None))
+
+    def evaluate(job):
+        sent, classified, cats, rules = job
+        if not sent:
+            return review_sentence(sent, use_llm=use_llm)
+        return _evaluate(sent, classified, cats, rules, use_llm)
+
+    # Without the LLM there is no I/O to overlap
+    return map_bounded(evaluate, jobs, LLM_CONCURRENCY if use_llm else 1)
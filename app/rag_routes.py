@@ -17,6 +17,7 @@ RAG_AVAILABLE = False
 DocumentLoader = None
 TextChunker = None
 AdvancedRetriever = None
+get_retriever = None
 get_rag_evaluator = None
 sentence_transformers = None
 chromadb = None
@@ -212,7 +213,7 @@ def assess_reviewer_knowledge_health(stats):
 
 def init_rag_modules():
     """Initialize RAG modules only when needed"""
-    global RAG_AVAILABLE, DocumentLoader, TextChunker, AdvancedRetriever, get_rag_evaluator
+    global RAG_AVAILABLE, DocumentLoader, TextChunker, AdvancedRetriever, get_retriever, get_rag_evaluator
     global sentence_transformers, chromadb, quick_load_folder, get_supported_formats
     global chunk_documents, get_chunking_statistics, retrieve_for_writing_feedback, log_retrieval_for_evaluation
     
@@ -229,7 +230,7 @@ def init_rag_modules():
         # Import our modules
         from .data_ingestion import DocumentLoader, quick_load_folder, get_supported_formats
         from .chunking_strategies import TextChunker, chunk_documents, get_chunking_statistics
-        from .advanced_retrieval import AdvancedRetriever, retrieve_for_writing_feedback
+        from .advanced_retrieval import AdvancedRetriever, get_retriever, retrieve_for_writing_feedback
         from .rag_evaluation import get_rag_evaluator, log_retrieval_for_evaluation
         
         RAG_AVAILABLE = True
@@ -256,6 +257,7 @@ else:
     DocumentLoader = None
     TextChunker = None
     AdvancedRetriever = None
+    get_retriever = None
     get_rag_evaluator = None
     quick_load_folder = None
     get_supported_formats = None
@@ -291,7 +293,7 @@ def init_rag_system():
         return False
     
     try:
-        retriever = AdvancedRetriever()
+        retriever = get_retriever()
         evaluator = get_rag_evaluator()
         RAG_AVAILABLE = True
         logger.info("✅ RAG system initialized successfully")
@@ -335,7 +337,7 @@ def knowledge_base_dashboard():
         global retriever, evaluator
         if retriever is None:
             try:
-                retriever = AdvancedRetriever()
+                retriever = get_retriever()
                 logger.info("✅ Retriever initialized successfully")
             except Exception as e:
                 logger.warning(f"Failed to initialize retriever: {e}")
@@ -933,8 +935,6 @@ def export_metrics():
 @rag.route('/clear_knowledge_base', methods=['POST'])
 def clear_knowledge_base():
     """Clear the entire knowledge base."""
-    global retriever
-    
     if not RAG_AVAILABLE or not retriever:
         return jsonify({"error": "RAG system not available"}), 503
     
@@ -944,8 +944,8 @@ def clear_knowledge_base():
         if not confirmation:
             return jsonify({"error": "Confirmation required"}), 400
         
-        # Reinitialize retriever to clear data
-        retriever = AdvancedRetriever()
+        # Empties the shared retriever in place, so every user of it sees the cleared data
+        retriever.clear()
         
         return jsonify({
             "success": True,
@@ -989,6 +989,8 @@ def get_rag_enhanced_suggestion(feedback_text: str, sentence_context: str = "",
         if results:
             # Use the best result to enhance the suggestion
             best_result = results[0]
+            # Hybrid results are ordered by fused rank; judge the match on the per-leg scores
+            match_score = best_result.metadata.get('weighted_score', best_result.relevance_score)
             
             # Simple enhancement: use retrieved content to inform suggestion
             enhanced_answer = f"Based on style guide: {best_result.content[:200]}... "
@@ -1005,7 +1007,7 @@ def get_rag_enhanced_suggestion(feedback_text: str, sentence_context: str = "",
             return {
                 "suggestion": suggestion,
                 "ai_answer": enhanced_answer,
-                "confidence": "high" if best_result.relevance_score > 0.7 else "medium",
+                "confidence": "high" if match_score > 0.7 else "medium",
                 "method": "rag_enhanced",
                 "sources": [
                     {
@@ -0,0 +1,480 @@
+"""
+Background job queue for document reviews.
+
+Submitting a review stores the uploaded file in a local SQLite queue and
+returns a job id straight away, so long reviews (large PDFs) are no longer
+bound by the request timeout and do not tie up a request worker. A
+dispatcher thread in the web process claims queued jobs and runs the review
+pipeline in a pool of worker processes.
+
+- Concurrency is bounded by REVIEW_JOB_WORKERS across every process sharing
+  the queue database; submissions beyond REVIEW_JOB_QUEUE_DEPTH queued or
+  running jobs are rejected with QueueFull.
+- Workers write progress into the job row; the dispatcher relays it to the
+  ProgressTracker (SocketIO room) of the job's room_id.
+- Queued jobs are cancelled immediately; running jobs stop at their next
+  progress update.
+- Finished jobs keep their result JSON for REVIEW_JOB_RESULT_TTL seconds.
+
+No external broker is needed.
+"""
+
+import concurrent.futures
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from core.worker_pool import new_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Review jobs running at once (worker processes)
+REVIEW_JOB_WORKERS = int(os.environ.get('REVIEW_JOB_WORKERS', 2))
+# Maximum queued + running jobs; further submissions are rejected
+REVIEW_JOB_QUEUE_DEPTH = int(os.environ.get('REVIEW_JOB_QUEUE_DEPTH', 20))
+# Seconds a finished job's result is kept
+REVIEW_JOB_RESULT_TTL = int(os.environ.get('REVIEW_JOB_RESULT_TTL', 3600))
+# SQLite file holding the queue
+REVIEW_JOBS_DB = os.environ.get(
+    'REVIEW_JOBS_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'review_jobs.db')
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue depth limit is reached."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+@contextmanager
+def _connect(db_path: str, immediate: bool = False):
+    """
+    Connection used for one transaction: committed (or rolled back) and then
+    closed, so no handle outlives the block or leaks into forked workers.
+    """
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+
+
+class JobProgressReporter:
+    """
+    ProgressTracker stand-in used inside a worker process.
+
+    Records the job's stage/percentage/message in its queue row (only when
+    they change) and raises JobCancelled once the job has been cancelled.
+    """
+
+    # Seconds between cancellation checks while progress is unchanged
+    CHECK_INTERVAL = 0.5
+
+    def __init__(self, db_path: str, job_id: str):
+        self.db_path = db_path
+        self.job_id = job_id
+        self._last = None
+        self._checked_at = 0.0
+
+    def update_stage(self, room_id: str, stage_index: int, message: Optional[str] = None):
+        self._record(stage_index, None, message)
+
+    def update_progress(self, room_id: str, percentage: int, message: str, stage_name: Optional[str] = None):
+        self._record(None, percentage, message)
+
+    def add_substep(self, room_id: str, substep_message: str):
+        self._record(None, None, substep_message)
+
+    def complete_session(self, room_id: str, success: bool = True, final_message: str = "Processing completed!"):
+        """Completion is reported by the dispatcher once the job's result is stored."""
+
+    def fail_session(self, room_id: str, error_message: str):
+        """Failures are reported by the dispatcher once the job is marked failed."""
+
+    def _record(self, stage: Optional[int], percentage: Optional[int], message: Optional[str]):
+        state = (stage, percentage)
+        now = time.monotonic()
+        if state == self._last and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        with _connect(self.db_path, immediate=True) as conn:
+            row = conn.execute('SELECT cancel_requested FROM review_jobs WHERE id = ?', (self.job_id,)).fetchone()
+            if row is None or row['cancel_requested']:
+                raise JobCancelled(self.job_id)
+            if state == self._last:
+                return
+            conn.execute(
+                'UPDATE review_jobs SET stage = COALESCE(?, stage), percentage = COALESCE(?, percentage), '
+                'message = COALESCE(?, message), progress_seq = progress_seq + 1 WHERE id = ?',
+                (stage, percentage, message, self.job_id)
+            )
+        self._last = state
+
+
+def init_job_worker():
+    """Jobs are the unit of parallelism: each worker reviews its document serially."""
+    from core import pdf_extraction
+    from . import parallel_analysis
+    parallel_analysis.ANALYSIS_WORKERS = 1
+    pdf_extraction.PDF_WORKERS = 1
+
+
+def run_review_job(db_path: str, job_id: str, pipeline: Callable):
+    """
+    Run one claimed job. Executes inside a worker process.
+
+    ``pipeline(filename, data, room_id, progress_tracker)`` returns
+    ``(result, error, snapshot)``; the result (or error) is written to the
+    job row and ``snapshot`` is handed back to the dispatching process.
+    """
+    with _connect(db_path) as conn:
+        row = conn.execute('SELECT filename, room_id, payload FROM review_jobs WHERE id = ?', (job_id,)).fetchone()
+    if row is None:
+        return None
+
+    reporter = JobProgressReporter(db_path, job_id)
+    status, result, error, snapshot = FAILED, None, None, None
+    try:
+        result, error, snapshot = pipeline(row['filename'], row['payload'], row['room_id'], reporter)
+        status = DONE if error is None else FAILED
+    except JobCancelled:
+        status = CANCELLED
+    except Exception as e:
+        logger.error(f"Review job {job_id} failed: {e}", exc_info=True)
+        error = str(e)
+
+    with _connect(db_path, immediate=True) as conn:
+        if conn.execute('SELECT cancel_requested FROM review_jobs WHERE id = ?', (job_id,)).fetchone()['cancel_requested']:
+            status, result, error, snapshot = CANCELLED, None, "Job was cancelled", None
+        conn.execute(
+            'UPDATE review_jobs SET status = ?, result = ?, error = ?, payload = NULL, finished_at = ?, '
+            'percentage = CASE WHEN ? = ? THEN 100 ELSE percentage END WHERE id = ?',
+            (status, json.dumps(result, default=str) if result is not None else None, error,
+             time.time(), status, DONE, job_id)
+        )
+    return snapshot
+
+
+class ReviewJobQueue:
+    """
+    SQLite-backed review queue with a process pool of workers.
+
+    Args:
+        pipeline: Picklable review function, see run_review_job()
+        db_path: Queue database (default REVIEW_JOBS_DB)
+        max_workers: Jobs running at once (default REVIEW_JOB_WORKERS)
+        max_depth: Queued + running jobs accepted (default REVIEW_JOB_QUEUE_DEPTH)
+        result_ttl: Seconds finished jobs are kept (default REVIEW_JOB_RESULT_TTL)
+        progress_tracker: Callable returning the ProgressTracker to relay progress to
+        on_snapshot: Called in this process as (review_id, snapshot) for finished reviews
+    """
+
+    # Seconds between dispatcher passes when nothing wakes it up
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, pipeline: Callable, db_path: str = REVIEW_JOBS_DB, max_workers: int = REVIEW_JOB_WORKERS,
+                 max_depth: int = REVIEW_JOB_QUEUE_DEPTH, result_ttl: int = REVIEW_JOB_RESULT_TTL,
+                 progress_tracker: Optional[Callable] = None, on_snapshot: Optional[Callable] = None):
+        self.pipeline = pipeline
+        self.db_path = db_path
+        self.max_workers = max(1, max_workers)
+        self.max_depth = max(1, max_depth)
+        self.result_ttl = result_ttl
+        self.progress_tracker = progress_tracker
+        self.on_snapshot = on_snapshot
+        self._pool = None
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        # job id -> (progress_seq, stage) last forwarded to the ProgressTracker
+        self._relayed: Dict[str, tuple] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._init_database()
+
+    def _init_database(self):
+        with _connect(self.db_path, immediate=True) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS review_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    room_id TEXT,
+                    payload BLOB,
+                    result TEXT,
+                    error TEXT,
+                    stage INTEGER,
+                    percentage INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    progress_seq INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    owner_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS review_jobs_status ON review_jobs (status, created_at)')
+        self._requeue_orphans()
+
+    def _requeue_orphans(self):
+        """Put back jobs left running by a process that no longer exists."""
+        with _connect(self.db_path, immediate=True) as conn:
+            rows = conn.execute('SELECT id, owner_pid FROM review_jobs WHERE status = ?', (RUNNING,)).fetchall()
+            for row in rows:
+                if row['owner_pid'] and not _process_alive(row['owner_pid']):
+                    logger.warning(f"Re-queueing review job {row['id']} orphaned by process {row['owner_pid']}")
+                    conn.execute(
+                        'UPDATE review_jobs SET status = ?, owner_pid = NULL, started_at = NULL WHERE id = ? AND status = ?',
+                        (QUEUED, row['id'], RUNNING)
+                    )
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def submit(self, filename: str, data: bytes, room_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a review of an uploaded file.
+
+        Raises:
+            QueueFull: When max_depth jobs are already queued or running
+        """
+        job_id = str(uuid.uuid4())
+        room_id = room_id or job_id
+        with _connect(self.db_path, immediate=True) as conn:
+            depth = conn.execute('SELECT COUNT(*) FROM review_jobs WHERE status IN (?, ?)',
+                                 (QUEUED, RUNNING)).fetchone()[0]
+            if depth >= self.max_depth:
+                raise QueueFull(f"Review queue is full ({depth} jobs pending)")
+            conn.execute(
+                'INSERT INTO review_jobs (id, status, filename, room_id, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, filename, room_id, sqlite3.Binary(data), time.time())
+            )
+
+        logger.info(f"Queued review job {job_id} for {filename} (room {room_id})")
+        self._ensure_dispatcher()
+        self._wake.set()
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job state and progress, or None for an unknown (or expired) job."""
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT id, status, filename, room_id, error, stage, percentage, message, progress_seq, created_at, '
+                'started_at, finished_at FROM review_jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            info = dict(row)
+            info["job_id"] = info.pop("id")
+            if row['status'] == QUEUED:
+                info["queue_position"] = conn.execute(
+                    'SELECT COUNT(*) FROM review_jobs WHERE status = ? AND created_at <= ?',
+                    (QUEUED, row['created_at'])
+                ).fetchone()[0]
+        return info
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The review result of a finished job, or None if it has none (yet)."""
+        with _connect(self.db_path) as conn:
+            row = conn.execute('SELECT result FROM review_jobs WHERE id = ? AND status = ?',
+                               (job_id, DONE)).fetchone()
+        return json.loads(row['result']) if row and row['result'] else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job. Queued jobs are cancelled at once; running jobs are
+        flagged and stop at their next progress update.
+        """
+        with _connect(self.db_path, immediate=True) as conn:
+            conn.execute(
+                'UPDATE review_jobs SET status = ?, payload = NULL, finished_at = ?, cancel_requested = 1 '
+                'WHERE id = ? AND status = ?', (CANCELLED, time.time(), job_id, QUEUED)
+            )
+            conn.execute('UPDATE review_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?',
+                         (job_id, RUNNING))
+        self._wake.set()
+        return self.status(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with _connect(self.db_path) as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS count FROM review_jobs GROUP BY status').fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+    # ── Dispatcher ───────────────────────────────────────────────────────────
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch_loop, name='review-job-dispatcher', daemon=True)
+                self._thread.start()
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop dispatching and shut the worker pool down. Queued jobs stay
+        queued; with ``wait``, running jobs finish first.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
+
+    def _dispatch_loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.POLL_INTERVAL)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self._start_queued_jobs()
+                self._relay_progress()
+                self._purge_expired()
+            except Exception as e:
+                logger.error(f"Review job dispatcher error: {e}", exc_info=True)
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Atomically move the oldest queued job to running, if a worker slot is free."""
+        with _connect(self.db_path, immediate=True) as conn:
+            running = conn.execute('SELECT COUNT(*) FROM review_jobs WHERE status = ?', (RUNNING,)).fetchone()[0]
+            if running >= self.max_workers:
+                return None
+            row = conn.execute('SELECT id, room_id FROM review_jobs WHERE status = ? ORDER BY created_at LIMIT 1',
+                               (QUEUED,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE review_jobs SET status = ?, owner_pid = ?, started_at = ? WHERE id = ?',
+                             (RUNNING, os.getpid(), time.time(), row['id']))
+            return row
+
+    def _start_queued_jobs(self):
+        while True:
+            row = self._claim_next()
+            if row is None:
+                return
+            job_id, room_id = row['id'], row['room_id']
+            tracker = self.progress_tracker() if self.progress_tracker else None
+            if tracker and room_id not in tracker.active_sessions:
+                tracker.start_session(room_id)
+            future = self._get_pool().submit(run_review_job, self.db_path, job_id, self.pipeline)
+            self._futures[job_id] = future
+            future.add_done_callback(lambda f, job_id=job_id: self._job_finished(job_id, f))
+            logger.info(f"Started review job {job_id}")
+
+    def _job_finished(self, job_id: str, future: concurrent.futures.Future):
+        self._futures.pop(job_id, None)
+        try:
+            snapshot = future.result()
+        except Exception as e:
+            logger.error(f"Review job {job_id} worker crashed: {e}")
+            with _connect(self.db_path, immediate=True) as conn:
+                conn.execute('UPDATE review_jobs SET status = ?, error = ?, payload = NULL, finished_at = ? '
+                             'WHERE id = ? AND status = ?', (FAILED, str(e), time.time(), job_id, RUNNING))
+            if isinstance(e, BrokenProcessPool):
+                self._reset_pool()
+            snapshot = None
+
+        status = self.status(job_id)
+        if snapshot and self.on_snapshot and status and status["status"] == DONE:
+            review = self.result(job_id) or {}
+            if review.get("review_id"):
+                self.on_snapshot(review["review_id"], snapshot)
+
+        tracker = self.progress_tracker() if self.progress_tracker else None
+        if tracker and status:
+            self._relay(tracker, status)
+            if status["status"] == DONE:
+                tracker.complete_session(status["room_id"], success=True, final_message="Review complete")
+            else:
+                tracker.fail_session(status["room_id"], status.get("error") or status["status"])
+        self._relayed.pop(job_id, None)
+        self._wake.set()
+
+    def _relay_progress(self):
+        """Forward progress recorded by workers to the ProgressTracker rooms."""
+        tracker = self.progress_tracker() if self.progress_tracker else None
+        if not tracker:
+            return
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT id, room_id, stage, percentage, message, progress_seq FROM review_jobs '
+                'WHERE status = ? AND owner_pid = ?', (RUNNING, os.getpid())
+            ).fetchall()
+        for row in rows:
+            self._relay(tracker, dict(row, job_id=row['id']))
+
+    def _relay(self, tracker, job: Dict[str, Any]):
+        job_id = job["job_id"]
+        last_seq, last_stage = self._relayed.get(job_id, (None, None))
+        if job["progress_seq"] == last_seq:
+            return
+        self._relayed[job_id] = (job["progress_seq"], job.get("stage"))
+        if job.get("stage") is not None and job["stage"] != last_stage:
+            tracker.update_stage(job["room_id"], job["stage"], job.get("message"))
+        elif job.get("message"):
+            tracker.update_progress(job["room_id"], job.get("percentage") or 0, job["message"])
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        with _connect(self.db_path, immediate=True) as conn:
+            conn.execute(f'DELETE FROM review_jobs WHERE status IN ({",".join("?" * len(FINISHED_STATUSES))}) '
+                         'AND finished_at < ?', (*FINISHED_STATUSES, cutoff))
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Started from the dispatcher thread, so workers are spawned (core.worker_pool)
+            self._pool = new_process_pool(self.max_workers, initializer=init_job_worker)
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_review_job_queue = None
+
+
+def get_review_job_queue(pipeline: Callable, progress_tracker: Optional[Callable] = None,
+                         on_snapshot: Optional[Callable] = None) -> ReviewJobQueue:
+    """Get the process-wide queue, creating it on first use."""
+    global _review_job_queue
+    if _review_job_queue is None:
+        _review_job_queue = ReviewJobQueue(pipeline, progress_tracker=progress_tracker, on_snapshot=on_snapshot)
+    return _review_job_queue
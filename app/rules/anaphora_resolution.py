@@ -17,13 +17,15 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-def resolve_pronoun_subject(current_sentence: str, previous_sentence: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def resolve_pronoun_subject(current_sentence: str, previous_sentence: Optional[str] = None,
+                            previous_doc=None) -> Optional[Dict[str, Any]]:
     """
     Resolve pronoun subject (like "It") in current sentence by analyzing previous sentence.
     
     Args:
         current_sentence: The sentence containing the pronoun
         previous_sentence: The previous sentence to analyze for the antecedent
+        previous_doc: spaCy Doc of previous_sentence, if it is already parsed
     
     Returns:
         Dictionary with:
@@ -58,7 +60,7 @@ def resolve_pronoun_subject(current_sentence: str, previous_sentence: Optional[s
     
     # Parse previous sentence to find potential antecedents
     try:
-        prev_doc = nlp(previous_sentence)
+        prev_doc = previous_doc if previous_doc is not None else nlp(previous_sentence)
         
         # Strategy 1: Look for the main subject (nsubj) of previous sentence
         subjects = []
@@ -6,9 +6,11 @@ This integrates with the existing rule system as an additional checker.
 import logging
 from .loader import load_rules
 from .matcher import apply_rules, format_violation_for_ui
+from .registry import COST_REGEX, DEFAULT_PROFILE, FAST_PROFILE, register_rule
 
 logger = logging.getLogger(__name__)
 
+@register_rule("atomic_rules", cost=COST_REGEX, profiles=(DEFAULT_PROFILE, FAST_PROFILE))
 def check(content: str):
     """
     Check content against atomic rules.
@@ -1,6 +1,7 @@
 import re
 import spacy
 from bs4 import BeautifulSoup
+from .registry import COST_REGEX, DEFAULT_PROFILE, DOCUMENT, FAST_PROFILE, register_rule
 
 # Import RAG system with fallback
 try:
@@ -27,12 +28,16 @@ def _get_nlp():
         nlp.max_length = 3000000  # Increase max_length to handle large documents
     return nlp
 
-def check(content):
+@register_rule("consistency_rules", scope=DOCUMENT, cost=COST_REGEX, profiles=(DEFAULT_PROFILE, FAST_PROFILE))
+def check(content, context=None):
     suggestions = []
 
     # Extract plain text (strip HTML if present)
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
+    if context is not None:
+        text_content = context.text
+    else:
+        soup = BeautifulSoup(content, "html.parser")
+        text_content = soup.get_text()
 
     # ------------------------------
     # Step numbering consistency
@@ -18,6 +18,9 @@ try:
 except ImportError:
     TITLE_UTILS_AVAILABLE = False
 
+from .nlp_context import get_text_and_doc
+from .registry import COST_NLP, register_rule
+
 # Lazy load spaCy model to avoid Flask startup conflicts
 nlp = None
 
@@ -33,7 +36,8 @@ def _get_nlp():
             nlp = False
     return nlp if nlp is not False else None
 
-def check(content):
+@register_rule("grammar_rules", context=True, cost=COST_NLP)
+def check(content, context=None):
     suggestions = []
     
     # Lazy load spaCy model
@@ -41,10 +45,8 @@ def check(content):
     if nlp is None:
         return suggestions
 
-    # Extract clean text (strip HTML if present)
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
-    doc = nlp(text_content)
+    # Extract clean text (strip HTML if present), reusing the shared parse if given
+    text_content, doc = get_text_and_doc(content, context, nlp)
 
     # ------------------------------
     # Regex-based checks
@@ -58,9 +60,10 @@ def check(content):
     # ------------------------------
     # spaCy-based grammar checks
     # ------------------------------
+    headings = context.heading_index if context is not None else None
     for sent in doc.sents:
         # Skip titles and headings for grammar checks
-        if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content):
+        if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content, headings=headings):
             continue
             
         # Example 1: Subject–verb agreement (singular/plural mismatch)
@@ -17,6 +17,9 @@ try:
 except ImportError:
     TITLE_UTILS_AVAILABLE = False
 
+from .nlp_context import get_text_and_doc
+from .registry import COST_NLP, register_rule
+
 # Load spaCy model lazily to avoid startup issues
 nlp = None
 
@@ -45,21 +48,22 @@ def is_code_or_diagram(text: str) -> bool:
     
     return False
 
-def check(content):
+@register_rule("long_sentence", context=True, cost=COST_NLP)
+def check(content, context=None):
     suggestions = []
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
     
     try:
-        nlp_model = _get_nlp()
-        doc = nlp_model(text_content)
+        text_content, doc = get_text_and_doc(content, context, _get_nlp())
     except Exception as e:
         return []  # Return empty if spaCy fails
+    if doc is None:
+        return []
 
+    headings = context.heading_index if context is not None else None
     # Flag long sentences (>25 words) - exclude titles and markdown tables
     for sent in doc.sents:
         # Skip if this appears to be a title or heading
-        if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content):
+        if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content, headings=headings):
             continue
         
         # Skip code blocks and diagrams
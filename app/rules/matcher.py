@@ -2,17 +2,237 @@
 Rule Matcher Module
 Applies atomic rules to sentences using regex pattern matching.
 Returns violations with severity-based classification.
+
+Rules are compiled once per ruleset into a RuleMatcher. Every rule pattern
+is analysed for literal text any match of it must contain; one scan of the
+sentence with a trie-shaped regex of all those literals finds which rules
+can possibly match, and only those rules run their own regex. Rules without
+a usable literal always run. The violations are the same, in the same
+order, as running every rule on every sentence.
 """
 import re
 import logging
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, FrozenSet, Iterable, Optional
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
 
 logger = logging.getLogger(__name__)
 
+# Compiled matchers kept for the most recently used rulesets
+MATCHER_CACHE_SIZE = 8
+
+_REPEATS = tuple(getattr(sre_constants, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                 if hasattr(sre_constants, name))
+_ATOMIC_GROUP = getattr(sre_constants, 'ATOMIC_GROUP', None)
+
+
+def mask_quoted(sentence: str) -> str:
+    """
+    Replace the characters inside double quotes with spaces, keeping the
+    quotes and the length. An unclosed quote masks the rest of the sentence.
+    """
+    if '"' not in sentence:
+        return sentence
+    parts = sentence.split('"')
+    parts[1::2] = [' ' * len(part) for part in parts[1::2]]
+    return '"'.join(parts)
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Lowercase literals at least one of which every match of ``pattern`` contains.
+
+    Returns None when no such set can be derived (the rule must always run).
+    Only ASCII literal text is used, so case-insensitive matching of the
+    literals agrees with the rule's own IGNORECASE matching.
+    """
+    try:
+        return _required(sre_parse.parse(pattern, re.IGNORECASE))
+    except (re.error, RecursionError, TypeError):
+        return None
+
+
+def _literal_score(literals: FrozenSet[str]):
+    # Longer and fewer literals filter out more sentences
+    return min(len(literal) for literal in literals), -len(literals)
+
+
+def _required(items) -> Optional[FrozenSet[str]]:
+    """Best required-literal set of a parsed (sub)pattern sequence."""
+    best = None
+    run = []
+
+    def consider(candidate):
+        nonlocal best
+        if candidate and (best is None or _literal_score(candidate) > _literal_score(best)):
+            best = candidate
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        if run:
+            consider(frozenset(["".join(run)]))
+            run = []
+        if op is sre_constants.SUBPATTERN:
+            consider(_required(av[-1]))
+        elif op is _ATOMIC_GROUP:
+            consider(_required(av))
+        elif op in _REPEATS and av[0] >= 1:
+            consider(_required(av[2]))
+        elif op is sre_constants.BRANCH:
+            branches = [_required(branch) for branch in av[1]]
+            if all(branches):
+                consider(frozenset().union(*branches))
+    if run:
+        consider(frozenset(["".join(run)]))
+    return best
+
+
+def _trie_pattern(node: dict, markers: List[str]) -> str:
+    """
+    Alternation of a literal trie. A literal ending at a node is marked by an
+    empty group after the node's children, so the longest literal wins.
+    """
+    alternatives = [re.escape(char) + _trie_pattern(child, markers)
+                    for char, child in sorted(node.items()) if char != '']
+    if '' in node:
+        markers.append(node[''])
+        alternatives.append('()')
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+class RuleMatcher:
+    """
+    A ruleset compiled for matching: compiled rule regexes plus the literal
+    prefilter that selects candidate rules in one scan of the sentence.
+
+    Args:
+        rules: Rule dictionaries from the loader
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.rule_count = len(rules)
+        self.compiled = []  # (rule index, rule, compiled regex)
+        self.always = []  # Positions in self.compiled of rules without literals
+        literal_rules: Dict[str, List[int]] = {}
+
+        for index, rule in enumerate(rules):
+            pattern = rule.get("regex", "")
+            if not pattern:
+                continue
+            try:
+                regex = re.compile(pattern, flags=re.IGNORECASE)
+            except re.error as e:
+                logger.error(f"❌ Invalid regex in rule {rule.get('rule_id', 'UNKNOWN')}: {e}")
+                continue
+            position = len(self.compiled)
+            self.compiled.append((index, rule, regex))
+            literals = required_literals(pattern)
+            if literals is None:
+                self.always.append(position)
+                continue
+            for literal in literals:
+                literal_rules.setdefault(literal, []).append(position)
+
+        self.prefilter = None
+        self.marker_rules: List[FrozenSet[int]] = []
+        if literal_rules:
+            trie: dict = {}
+            for literal in literal_rules:
+                node = trie
+                for char in literal:
+                    node = node.setdefault(char, {})
+                node[''] = literal
+            markers: List[str] = []
+            self.prefilter = re.compile('(?=' + _trie_pattern(trie, markers) + ')', flags=re.IGNORECASE)
+            # The literal found at a position also implies its prefixes there
+            for literal in markers:
+                positions = set()
+                for other, other_positions in literal_rules.items():
+                    if literal.startswith(other):
+                        positions.update(other_positions)
+                self.marker_rules.append(frozenset(positions))
+
+        logger.info(f"✅ Compiled {len(self.compiled)} atomic rules "
+                    f"({len(self.compiled) - len(self.always)} behind the literal prefilter)")
+
+    def candidates(self, masked_sentence: str) -> List[int]:
+        """Positions in self.compiled of the rules that may match, in rule order."""
+        positions = set(self.always)
+        if self.prefilter is not None:
+            seen = set()
+            for match in self.prefilter.finditer(masked_sentence):
+                marker = match.lastindex
+                if marker not in seen:
+                    seen.add(marker)
+                    positions.update(self.marker_rules[marker - 1])
+        return sorted(positions)
+
+    def match(self, sentence: str) -> List[Dict[str, Any]]:
+        violations = []
+        masked_sentence = mask_quoted(sentence)
+        for position in self.candidates(masked_sentence):
+            _, rule, regex = self.compiled[position]
+            try:
+                for match in regex.finditer(masked_sentence):
+                    violation = {
+                        "rule_id": rule.get("rule_id", "UNKNOWN"),
+                        "category": rule.get("category", "general"),
+                        "severity": rule.get("severity", "warn"),
+                        "message": rule.get("message", "Style violation detected"),
+                        "suggestion": rule.get("suggestion", ""),
+                        # Use original sentence to extract the actual matched text
+                        "matched_text": sentence[match.start():match.end()],
+                        "match_start": match.start(),
+                        "match_end": match.end()
+                    }
+                    violations.append(violation)
+
+                    # Log error-level violations
+                    if violation["severity"] == "error":
+                        logger.debug(f"🔴 ERROR: {violation['rule_id']} - {violation['message']} | Matched: '{match.group(0)}'")
+            except Exception as e:
+                logger.error(f"❌ Error applying rule {rule.get('rule_id', 'UNKNOWN')}: {e}")
+        return violations
+
+
+_matchers: "OrderedDict[int, RuleMatcher]" = OrderedDict()
+
+
+def get_rule_matcher(rules: List[Dict[str, Any]]) -> RuleMatcher:
+    """
+    The compiled matcher of a ruleset, built on first use.
+
+    Rulesets are told apart by list identity (the loader returns the same
+    list until reload_rules()); a list whose length changed is recompiled.
+    """
+    key = id(rules)
+    matcher = _matchers.get(key)
+    if matcher is None or matcher.rules is not rules or matcher.rule_count != len(rules):
+        matcher = RuleMatcher(rules)
+        _matchers[key] = matcher
+        while len(_matchers) > MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    _matchers.move_to_end(key)
+    return matcher
+
+
 def apply_rules(sentence: str, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Apply all rules to a sentence and return violations.
     
+    Text inside double quotes is masked first, so rules do not trigger on
+    literal UI labels or code strings.
+    
     Args:
         sentence (str): The sentence text to check
         rules (list): List of rule dictionaries from loader
@@ -28,60 +248,9 @@ def apply_rules(sentence: str, rules: List[Dict[str, Any]]) -> List[Dict[str, An
                 "matched_text": str (the actual text that matched)
               }
     """
-    violations = []
-    
     if not sentence or not sentence.strip():
-        return violations
-        
-    # Mask characters inside double quotes with spaces to preserve length
-    # This prevents rules from triggering on literal UI labels or code strings
-    masked_chars = []
-    in_quotes = False
-    for char in sentence:
-        if char == '"':
-            in_quotes = not in_quotes
-            masked_chars.append(char)
-        elif in_quotes:
-            masked_chars.append(' ')
-        else:
-            masked_chars.append(char)
-    masked_sentence = "".join(masked_chars)
-    
-    for rule in rules:
-        try:
-            pattern = rule.get("regex", "")
-            if not pattern:
-                continue
-            
-            # Perform case-insensitive regex search on the MASKED sentence
-            matches = re.finditer(pattern, masked_sentence, flags=re.IGNORECASE)
-            
-            for match in matches:
-                # Use original sentence to extract the actual matched text
-                actual_text = sentence[match.start():match.end()]
-                
-                violation = {
-                    "rule_id": rule.get("rule_id", "UNKNOWN"),
-                    "category": rule.get("category", "general"),
-                    "severity": rule.get("severity", "warn"),
-                    "message": rule.get("message", "Style violation detected"),
-                    "suggestion": rule.get("suggestion", ""),
-                    "matched_text": actual_text,
-                    "match_start": match.start(),
-                    "match_end": match.end()
-                }
-                violations.append(violation)
-                
-                # Log error-level violations
-                if violation["severity"] == "error":
-                    logger.debug(f"🔴 ERROR: {violation['rule_id']} - {violation['message']} | Matched: '{match.group(0)}'")
-        
-        except re.error as e:
-            logger.error(f"❌ Invalid regex in rule {rule.get('rule_id', 'UNKNOWN')}: {e}")
-        except Exception as e:
-            logger.error(f"❌ Error applying rule {rule.get('rule_id', 'UNKNOWN')}: {e}")
-    
-    return violations
+        return []
+    return get_rule_matcher(rules).match(sentence)
 
 def format_violation_for_ui(violation: Dict[str, Any], sentence: str) -> Dict[str, Any]:
     """
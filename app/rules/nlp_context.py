@@ -0,0 +1,269 @@
+"""
+Shared NLP Context
+Parses a document once so rules can reuse the same spaCy output.
+
+Rules that accept a ``context`` keyword receive a SentenceContext for the
+sentence being checked. They read ``context.text`` and ``context.doc``
+instead of building their own BeautifulSoup and calling ``nlp(...)``.
+Rules without the keyword keep receiving the raw sentence string.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+from .title_utils import HeadingIndex
+
+logger = logging.getLogger(__name__)
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Batch settings for nlp.pipe() during the pre-analysis stage
+PIPE_BATCH_SIZE = int(os.environ.get('SPACY_BATCH_SIZE', 256))
+PIPE_N_PROCESS = int(os.environ.get('SPACY_N_PROCESS', 1))
+
+# Shared spaCy pipeline, loaded on first use
+_nlp = None
+
+# previous_doc not assigned: look it up in the document
+_UNSET = object()
+
+
+def get_nlp():
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+
+    Returns:
+        The spaCy Language object, or None if spaCy is unavailable
+    """
+    global _nlp
+    if _nlp is None:
+        try:
+            import spacy
+            _nlp = spacy.load("en_core_web_sm")
+            # Increase max_length to handle large documents
+            _nlp.max_length = 3000000
+        except Exception as e:
+            logger.warning(f"spaCy not available for shared NLP context: {e}")
+            _nlp = False
+    return _nlp if _nlp is not False else None
+
+
+def to_plain_text(content: str) -> str:
+    """
+    Strip HTML from content the same way the rules do.
+
+    Plain sentences (no tags or entities) are returned unchanged without
+    building a BeautifulSoup tree.
+    """
+    if not content:
+        return ""
+    if '<' not in content and '&' not in content:
+        return content
+    return BeautifulSoup(content, "html.parser").get_text()
+
+
+def get_text_and_doc(content: str, context: Optional["SentenceContext"] = None, nlp=None):
+    """
+    Resolve the plain text and spaCy Doc a rule should work on.
+
+    Uses the shared context when one is given; otherwise strips HTML from
+    ``content`` and parses it with the rule's own ``nlp``.
+
+    Returns:
+        (text, doc) - doc is None if no pipeline is available
+    """
+    if context is not None:
+        doc = context.doc
+        if doc is None and nlp is not None:
+            doc = nlp(context.text)
+        return context.text, doc
+
+    soup = BeautifulSoup(content, "html.parser")
+    text_content = soup.get_text()
+    doc = nlp(text_content) if nlp is not None else None
+    return text_content, doc
+
+
+class SentenceContext:
+    """
+    Per-sentence view over a DocumentContext.
+
+    The spaCy Doc is parsed lazily and cached, so every rule that asks for
+    ``doc`` gets the same object.
+    """
+
+    def __init__(self, content: str, index: int = 0, document: Optional["DocumentContext"] = None,
+                 previous_sentence: Optional[str] = None, next_sentence: Optional[str] = None,
+                 doc=None):
+        self.content = content
+        self.text = to_plain_text(content)
+        self.index = index
+        self.document = document
+        self.previous_sentence = previous_sentence
+        self.next_sentence = next_sentence
+        self._doc = doc
+        self._previous_doc = _UNSET
+
+    @property
+    def doc(self):
+        """spaCy Doc for ``text`` (None if spaCy is unavailable)."""
+        if self._doc is None:
+            nlp = self.document.nlp if self.document is not None else get_nlp()
+            if nlp is None:
+                return None
+            self._doc = nlp(self.text)
+        return self._doc
+
+    @property
+    def previous_doc(self):
+        """
+        spaCy Doc of the previous sentence in the document (None if unavailable).
+
+        Looked up at ``index - 1`` in the document unless assigned: a context
+        whose document holds only part of the sentences (a worker's shard)
+        must be given the Doc of its real previous sentence.
+        """
+        if self._previous_doc is _UNSET:
+            if self.document is None or self.index == 0:
+                return None
+            self._previous_doc = self.document.sentence(self.index - 1).doc
+        return self._previous_doc
+
+    @previous_doc.setter
+    def previous_doc(self, doc):
+        self._previous_doc = doc
+
+    @property
+    def sents(self) -> list:
+        doc = self.doc
+        return list(doc.sents) if doc is not None else []
+
+    @property
+    def tokens(self) -> list:
+        doc = self.doc
+        return list(doc) if doc is not None else []
+
+    @property
+    def lemmas(self) -> List[str]:
+        return [token.lemma_ for token in self.tokens]
+
+    @property
+    def headings(self) -> frozenset:
+        """Heading texts of the whole document (empty without a document)."""
+        return self.document.headings if self.document is not None else frozenset()
+
+    @property
+    def heading_index(self) -> Optional[HeadingIndex]:
+        """Heading index of the whole document (None without a document)."""
+        return self.document.heading_index if self.document is not None else None
+
+    @property
+    def is_heading(self) -> bool:
+        """True if this sentence is the text of a document heading."""
+        return self.text.strip() in self.headings
+
+
+class DocumentContext:
+    """
+    Parse-once container for a document's sentences.
+
+    Args:
+        sentences: Plain-text sentences in document order
+        headings: Texts of the document's HTML headings
+        nlp: spaCy pipeline to use (defaults to the shared one)
+    """
+
+    def __init__(self, sentences: List[str], headings=None, nlp=None):
+        self.sentences = list(sentences)
+        self.headings = frozenset(headings or ())
+        self.nlp = nlp if nlp is not None else get_nlp()
+        self._docs: Dict[int, object] = {}
+        self._heading_index: Optional[HeadingIndex] = None
+
+    @classmethod
+    def from_html(cls, html_content: str, sentences: List[str], nlp=None) -> "DocumentContext":
+        """Build a context, collecting the heading set from one parse of the HTML."""
+        return cls.from_soup(BeautifulSoup(html_content or "", "html.parser"), sentences, nlp=nlp)
+
+    @classmethod
+    def from_soup(cls, soup, sentences: List[str], nlp=None) -> "DocumentContext":
+        """
+        Build a context from an already-parsed document: a BeautifulSoup tree
+        or the upload's DocumentIR (both provide find_all/get_text).
+        """
+        headings = [h.get_text().strip() for h in soup.find_all(HEADING_TAGS)]
+        return cls(sentences, headings=headings, nlp=nlp)
+
+    @property
+    def heading_index(self) -> HeadingIndex:
+        """Index over ``headings`` for the title checks, built on first use."""
+        if self._heading_index is None:
+            self._heading_index = HeadingIndex(self.headings)
+        return self._heading_index
+
+    def parse(self, batch_size: Optional[int] = None, n_process: Optional[int] = None,
+              indices: Optional[Iterable[int]] = None) -> "DocumentContext":
+        """
+        Parse every sentence now instead of on first access.
+
+        Sentences are streamed through ``nlp.pipe`` so spaCy works on large
+        batches instead of one short string per call. Pipelines without
+        ``pipe`` fall back to one call per sentence.
+
+        Args:
+            batch_size: Texts per spaCy batch (default SPACY_BATCH_SIZE)
+            n_process: Worker processes for nlp.pipe (default SPACY_N_PROCESS)
+            indices: Only parse these sentences (default: all)
+        """
+        if self.nlp is None:
+            return self
+
+        if indices is None:
+            indices = range(len(self.sentences))
+        pending = [index for index in indices if index not in self._docs]
+        if not pending:
+            return self
+        texts = [to_plain_text(self.sentences[index]) for index in pending]
+
+        pipe = getattr(self.nlp, 'pipe', None)
+        if pipe is not None:
+            docs = pipe(texts,
+                        batch_size=batch_size or PIPE_BATCH_SIZE,
+                        n_process=n_process or PIPE_N_PROCESS)
+        else:
+            docs = (self.nlp(text) for text in texts)
+
+        for index, doc in zip(pending, docs):
+            self._docs[index] = doc
+        logger.info(f"Parsed {len(pending)} sentences for shared NLP context")
+        return self
+
+    def sentence(self, index: int, content: Optional[str] = None) -> SentenceContext:
+        """
+        Get the SentenceContext for a sentence.
+
+        Args:
+            index: Sentence position in the document
+            content: Text actually being analyzed, if it differs from the
+                     stored sentence (e.g. after cleanup). A differing text
+                     is parsed on its own instead of reusing the cached Doc.
+        """
+        stored = self.sentences[index]
+        if content is None:
+            content = stored
+        previous_sentence = self.sentences[index - 1] if index > 0 else None
+        next_sentence = self.sentences[index + 1] if index + 1 < len(self.sentences) else None
+
+        ctx = SentenceContext(content, index=index, document=self,
+                              previous_sentence=previous_sentence, next_sentence=next_sentence)
+        if content == stored:
+            if index not in self._docs and self.nlp is not None:
+                self._docs[index] = ctx.doc
+            ctx._doc = self._docs.get(index)
+        return ctx
+
+    def __len__(self):
+        return len(self.sentences)
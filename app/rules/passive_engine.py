@@ -0,0 +1,91 @@
+"""
+Passive Voice Engine
+Sentence-level passive voice detection for the passive voice rule.
+
+A sentence is passive when one of its tokens is a passive auxiliary
+("auxpass") whose verb is not a whitelisted state verb ("is configured",
+"is stored"). Detection works on an already-parsed spaCy Doc, so the
+rule never parses a sentence again. Docs without dependency labels (the
+DummySpacy fallback) are checked with a single precompiled pattern
+instead.
+"""
+
+import re
+from typing import Iterator, NamedTuple, Optional
+
+# Technical state verbs whose passive/state form is appropriate
+STATE_VERBS = frozenset(['abstract', 'integrate', 'store', 'equip', 'locate', 'configure', 'setup', 'set'])
+
+IRREGULAR_PARTICIPLES = (
+    'written', 'taken', 'given', 'shown', 'known', 'thrown', 'drawn', 'driven',
+    'flown', 'grown', 'blown', 'broken', 'chosen', 'frozen', 'spoken', 'stolen',
+    'woken', 'forgotten', 'hidden', 'ridden', 'risen', 'fallen', 'eaten', 'beaten',
+    'seen', 'done', 'gone', 'come', 'become', 'overcome', 'run', 'begun', 'sung',
+    'rung', 'swung', 'hung', 'spun', 'won', 'built', 'bent', 'sent', 'spent',
+    'lent', 'meant', 'kept', 'left', 'felt', 'dealt', 'dreamt', 'learnt', 'burnt',
+    'thought', 'brought', 'caught', 'taught', 'fought', 'bought', 'sought', 'sold',
+    'told', 'held', 'found', 'bound', 'wound', 'lost', 'cost', 'cut', 'put', 'set',
+    'hit', 'let', 'bet', 'shut', 'hurt', 'split', 'quit', 'spread', 'made', 'read'
+)
+
+# Form of "be" followed by a regular ("-ed") or irregular past participle
+PASSIVE_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?:is|are|was|were|being|(?:has|have)\s+been|to\s+be)\s+\w+ed"
+    r"|(?:is|are|was|were|has been|have been|being|to be)\s+(?:" + "|".join(IRREGULAR_PARTICIPLES) + r")"
+    r")\b",
+    re.IGNORECASE
+)
+
+# Reported as the verb of a sentence found by PASSIVE_PATTERN
+PATTERN_MATCH = "regex_match"
+
+
+class PassiveSentence(NamedTuple):
+    """A passive sentence: its spaCy span, stripped text and passive verb (lemma)."""
+    sentence: object
+    text: str
+    verb: str
+
+
+def passive_verb(sentence) -> Optional[str]:
+    """
+    Lemma of the verb that makes a parsed sentence passive, or None.
+
+    Args:
+        sentence: spaCy Span (or Doc) of one sentence
+    """
+    unlabelled = False
+    for token in sentence:
+        dep = getattr(token, 'dep_', '')
+        if dep == "auxpass":
+            verb = token.head.lemma_.lower()
+            if verb not in STATE_VERBS:
+                return verb
+        elif dep == "":
+            unlabelled = True
+    if unlabelled and PASSIVE_PATTERN.search(sentence.text.strip()):
+        return PATTERN_MATCH
+    return None
+
+
+def iter_passive_sentences(doc, skip=None) -> Iterator[PassiveSentence]:
+    """
+    Yield the passive sentences of a parsed Doc, each distinct text once.
+
+    Args:
+        doc: spaCy Doc
+        skip: Optional predicate on the stripped sentence text; sentences
+              it accepts (titles, code) are not checked
+    """
+    seen = set()
+    for sentence in doc.sents:
+        text = sentence.text.strip()
+        if text in seen:
+            continue
+        seen.add(text)
+        if skip is not None and skip(text):
+            continue
+        verb = passive_verb(sentence)
+        if verb is not None:
+            yield PassiveSentence(sentence, text, verb)
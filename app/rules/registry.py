@@ -0,0 +1,187 @@
+"""
+Rule Registry
+Rule metadata and the dispatch plan the analysis runs from.
+
+Each rule module declares its ``check`` once:
+
+    @register_rule("passive_voice", context=True, neighbours=True, cost=COST_NLP)
+    def check(content, previous_sentence=None, next_sentence=None, context=None):
+        ...
+
+- scope: SENTENCE rules run for every analyzed sentence, BLOCK rules once
+  per document block and DOCUMENT rules once per document
+- context: the rule takes the shared SentenceContext (``context=``)
+- neighbours: the rule takes ``previous_sentence``/``next_sentence``
+- cost: rough relative cost of one call (COST_REGEX, COST_NLP)
+- profiles: the rule profiles (RULE_PROFILE) the rule runs in
+
+get_dispatch_plan() imports the rule modules once and builds a DispatchPlan
+for a profile: the rules of each scope, in module order, with the
+arguments to pass already decided. Extra rule modules can be plugged in
+with RULE_PLUGINS; a plugin without @register_rule is registered from its
+``check`` signature as a sentence rule.
+"""
+
+import importlib
+import inspect
+import logging
+import os
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SENTENCE = 'sentence'
+BLOCK = 'block'
+DOCUMENT = 'document'
+SCOPES = (SENTENCE, BLOCK, DOCUMENT)
+
+# Relative cost of one call
+COST_REGEX = 1  # string and regex checks
+COST_NLP = 5    # walks a spaCy parse
+
+DEFAULT_PROFILE = 'default'
+# Only the cheap string/regex rules
+FAST_PROFILE = 'fast'
+PROFILES = (DEFAULT_PROFILE, FAST_PROFILE)
+
+# Active rule profile
+RULE_PROFILE = os.environ.get('RULE_PROFILE', DEFAULT_PROFILE)
+# Extra rule modules, comma-separated import paths
+RULE_PLUGINS = os.environ.get('RULE_PLUGINS', '')
+
+# Built-in rule modules (under app.rules), in the order their feedback is reported
+RULE_MODULES = (
+    'atomic_rules',
+    'consistency_rules',
+    'grammar_rules',
+    'long_sentence',
+    'passive_voice',
+    'siemens_style_rules',
+    'simple_present_normalization',
+    'style_rules',
+    'terminology_rules',
+    'vague_terms',
+)
+
+
+class RuleSpec(NamedTuple):
+    """Metadata of one rule."""
+    rule_id: str
+    check: Callable
+    scope: str = SENTENCE
+    context: bool = False
+    neighbours: bool = False
+    cost: int = COST_REGEX
+    profiles: Tuple[str, ...] = (DEFAULT_PROFILE,)
+
+
+def register_rule(rule_id: str, scope: str = SENTENCE, context: bool = False, neighbours: bool = False,
+                  cost: int = COST_REGEX, profiles: Iterable[str] = (DEFAULT_PROFILE,)):
+    """Decorator declaring a rule's metadata; the function is returned unchanged."""
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown rule scope '{scope}' for {rule_id}")
+
+    def decorate(check):
+        check.rule_spec = RuleSpec(rule_id, check, scope, context, neighbours, cost, tuple(profiles))
+        return check
+    return decorate
+
+
+def infer_spec(check: Callable, rule_id: Optional[str] = None) -> RuleSpec:
+    """Spec for an undeclared check function, from its signature (read once)."""
+    rule_id = rule_id or check.__module__.rsplit('.', 1)[-1]
+    try:
+        params = inspect.signature(check).parameters
+    except (TypeError, ValueError):
+        params = {}
+    return RuleSpec(
+        rule_id, check,
+        context='context' in params,
+        neighbours='previous_sentence' in params and 'next_sentence' in params
+    )
+
+
+def spec_for(check: Callable) -> RuleSpec:
+    return getattr(check, 'rule_spec', None) or infer_spec(check)
+
+
+class DispatchPlan:
+    """
+    The rules of one profile, split by scope.
+
+    Picklable (it only holds module-level functions), so it is passed to
+    analysis worker processes as is.
+    """
+
+    def __init__(self, specs: Iterable[RuleSpec], profile: str = DEFAULT_PROFILE):
+        self.profile = profile
+        self.specs = [spec for spec in specs if profile in spec.profiles]
+        self.sentence_rules = [spec for spec in self.specs if spec.scope == SENTENCE]
+        self.block_rules = [spec for spec in self.specs if spec.scope == BLOCK]
+        self.document_rules = [spec for spec in self.specs if spec.scope == DOCUMENT]
+
+    @classmethod
+    def for_checks(cls, checks: Iterable[Callable]) -> "DispatchPlan":
+        """
+        Plan for a plain list of check functions: every one runs per
+        sentence, whatever its declared scope or profiles.
+        """
+        checks = tuple(checks)
+        plan = _check_plans.get(checks)
+        if plan is None:
+            specs = [spec_for(check)._replace(scope=SENTENCE, profiles=(DEFAULT_PROFILE,)) for check in checks]
+            plan = _check_plans[checks] = cls(specs)
+        return plan
+
+    @property
+    def checks(self) -> List[Callable]:
+        return [spec.check for spec in self.specs]
+
+    def describe(self) -> str:
+        per_sentence = sum(spec.cost for spec in self.sentence_rules)
+        return (f"profile '{self.profile}': {len(self.sentence_rules)} sentence, {len(self.block_rules)} block, "
+                f"{len(self.document_rules)} document rules (estimated cost {per_sentence} per sentence)")
+
+    def __len__(self):
+        return len(self.specs)
+
+
+_check_plans: Dict[Tuple[Callable, ...], DispatchPlan] = {}
+_specs: Optional[List[RuleSpec]] = None
+_plans: Dict[str, DispatchPlan] = {}
+
+
+def load_specs() -> List[RuleSpec]:
+    """Import the built-in and plugin rule modules once and collect their specs."""
+    global _specs
+    if _specs is None:
+        modules = [f'{__package__}.{name}' for name in RULE_MODULES]
+        modules += [name.strip() for name in RULE_PLUGINS.split(',') if name.strip()]
+        specs = []
+        for module_name in modules:
+            try:
+                module = importlib.import_module(module_name)
+            except Exception as e:
+                logger.error(f"Failed to import rule {module_name}: {e}")
+                continue
+            check = getattr(module, 'check', None)
+            if check is None:
+                logger.warning(f"Rule module {module_name} does not have a `check` function")
+                continue
+            specs.append(spec_for(check))
+        _specs = specs
+        logger.info(f"Rule registry: {len(specs)} rules registered")
+    return _specs
+
+
+def get_dispatch_plan(profile: Optional[str] = None) -> DispatchPlan:
+    """Dispatch plan for a profile (default RULE_PROFILE), built once per profile."""
+    profile = profile or RULE_PROFILE
+    if profile not in PROFILES:
+        logger.warning(f"Unknown rule profile '{profile}' - using '{DEFAULT_PROFILE}'")
+        profile = DEFAULT_PROFILE
+    plan = _plans.get(profile)
+    if plan is None:
+        plan = _plans[profile] = DispatchPlan(load_specs(), profile)
+        logger.info(f"Rule dispatch plan, {plan.describe()}")
+    return plan
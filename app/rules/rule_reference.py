@@ -0,0 +1,206 @@
+"""
+Rule Reference Index
+Finds the rules.json entries behind the issues a user clicks (/ai_suggestion).
+
+An issue usually carries a rule's message verbatim, sometimes with extra
+text around it or only part of it. rules.json is loaded once and indexed:
+
+- a hash index on the normalized rule id and message answers exact hits;
+- a character trigram index over message and suggestion narrows the other
+  issues to the few rules sharing trigrams with them. Among those, the
+  first rule (in file order) whose message or suggestion contains the
+  issue, or is contained in it, wins; failing that, the rule with the
+  highest trigram overlap (Dice coefficient) above
+  RULE_REFERENCE_MIN_SIMILARITY.
+
+Matching ignores case and runs of whitespace. Answers are cached per
+issue. The index is rebuilt when rules.json changes on disk (its
+modification time or size), so edited rules show up without a restart.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RULES_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+
+# Minimum trigram overlap (Dice coefficient, 0-1) of a fuzzy match
+RULE_REFERENCE_MIN_SIMILARITY = float(os.environ.get('RULE_REFERENCE_MIN_SIMILARITY', '0.6'))
+
+# Shown as the source of every reference
+REFERENCE_SOURCE = 'Siemens Style Guide'
+
+NGRAM = 3
+LOOKUP_CACHE_SIZE = 4096
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.casefold().split())
+
+
+def ngrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized text (the text itself if shorter)."""
+    if len(text) < NGRAM:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1))
+
+
+class RuleReference(NamedTuple):
+    rule_id: str
+    content: str
+    score: float  # 1.0 for exact and containment matches, the trigram overlap otherwise
+
+
+def format_reference(rule: dict) -> str:
+    content = f"Rule: {rule.get('message', '')}\nGuidance: {rule.get('suggestion', '')}"
+    if rule.get('example_violation') and rule.get('example_correction'):
+        content += f"\nBad: '{rule.get('example_violation')}'\nGood: '{rule.get('example_correction')}'"
+    return content
+
+
+class RuleReferenceIndex:
+    """Lookup structures of one version of rules.json (never modified after construction)."""
+
+    def __init__(self, rules: List[dict], min_similarity: float = RULE_REFERENCE_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self.references: List[RuleReference] = []
+        self.by_key: Dict[str, int] = {}
+        # Normalized (message, suggestion) and their trigrams, by rule position
+        self.texts: List[Tuple[str, str]] = []
+        self.grams: List[Tuple[FrozenSet[str], FrozenSet[str]]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self._cache: Dict[str, Optional[RuleReference]] = {}
+
+        for position, rule in enumerate(rules):
+            rule_id = rule.get('rule_id', '')
+            message = normalize(rule.get('message', ''))
+            suggestion = normalize(rule.get('suggestion', ''))
+            self.references.append(RuleReference(rule_id, format_reference(rule), 1.0))
+            self.texts.append((message, suggestion))
+            message_grams, suggestion_grams = ngrams(message), ngrams(suggestion)
+            self.grams.append((message_grams, suggestion_grams))
+            for gram in message_grams | suggestion_grams:
+                self.postings.setdefault(gram, []).append(position)
+            # Earlier rules win, as with the file scan
+            for key in (normalize(rule_id), message):
+                if key:
+                    self.by_key.setdefault(key, position)
+
+    def match(self, issue: str) -> Optional[RuleReference]:
+        """The rule an issue refers to, or None."""
+        key = normalize(issue)
+        if not key:
+            return None
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        reference = self._match(key)
+        if len(self._cache) >= LOOKUP_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = reference
+        return reference
+
+    def _match(self, key: str) -> Optional[RuleReference]:
+        position = self.by_key.get(key)
+        if position is not None:
+            return self.references[position]
+
+        issue_grams = ngrams(key)
+        if len(key) < NGRAM:
+            # Too short for a trigram: it can only be contained in a rule text
+            candidates = range(len(self.references))
+        else:
+            hits = Counter(position for gram in issue_grams for position in self.postings.get(gram, ()))
+            candidates = sorted(hits)
+
+        best, best_score = None, self.min_similarity
+        for position in candidates:
+            for text, grams in zip(self.texts[position], self.grams[position]):
+                if text and (key in text or text in key):
+                    return self.references[position]
+                if grams:
+                    score = 2 * len(issue_grams & grams) / (len(issue_grams) + len(grams))
+                    if score >= best_score and (best is None or score > best_score):
+                        best, best_score = position, score
+        if best is None:
+            return None
+        return self.references[best]._replace(score=round(best_score, 3))
+
+    def lookup(self, issues: Iterable[str]) -> List[RuleReference]:
+        """References of several issues, each rule once, in issue order."""
+        references = []
+        seen = set()
+        for issue in issues:
+            reference = self.match(issue)
+            if reference is not None and reference.content not in seen:
+                seen.add(reference.content)
+                references.append(reference)
+        return references
+
+    def __len__(self):
+        return len(self.references)
+
+
+class RuleReferenceService:
+    """The index of a rules file, rebuilt when the file changes."""
+
+    def __init__(self, path: str = RULES_JSON, min_similarity: float = RULE_REFERENCE_MIN_SIMILARITY):
+        self.path = path
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._signature = None
+        self._index = RuleReferenceIndex([], min_similarity)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def index(self) -> RuleReferenceIndex:
+        """The current index, reloading rules.json first if it changed."""
+        signature = self._file_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._reload(signature)
+        return self._index
+
+    def _reload(self, signature) -> None:
+        if signature is None:
+            logger.error(f"Rules file not found: {self.path}")
+            self._index = RuleReferenceIndex([], self.min_similarity)
+            self._signature = None
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except Exception as e:
+            # Keep serving the last good version; retry once the file changes again
+            logger.error(f"Error loading rules for rule references from {self.path}: {e}")
+            self._signature = signature
+            return
+        self._index = RuleReferenceIndex(rules, self.min_similarity)
+        self._signature = signature
+        logger.info(f"Indexed {len(self._index)} rules for rule references from {self.path}")
+
+    def lookup(self, issues: Iterable[str]) -> List[RuleReference]:
+        return self.index().lookup(issues)
+
+
+_service: Optional[RuleReferenceService] = None
+
+
+def get_rule_reference_service() -> RuleReferenceService:
+    """Return the shared rule reference service, creating it on first use."""
+    global _service
+    if _service is None:
+        _service = RuleReferenceService()
+    return _service
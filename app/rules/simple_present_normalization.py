@@ -16,6 +16,8 @@ Key invariants:
 
 import logging
 
+from .registry import COST_NLP, register_rule
+
 logger = logging.getLogger(__name__)
 
 # Try to import spacy but handle gracefully if not available
@@ -38,11 +40,12 @@ FUTURE_MARKERS = {"will", "shall", "going"}
 PRESENT_TAGS = {"VBP", "VBZ"}
 
 
-def is_non_sentential(text: str) -> bool:
+def is_non_sentential(text: str, doc=None) -> bool:
     """
     Detect non-sentential text (titles, headings, fragments, code blocks).
     
     These should NOT be analyzed by sentence-level rules.
+    An already-parsed spaCy ``doc`` of the stripped text is reused if given.
     
     Returns True if text is:
     - A heading or title
@@ -116,7 +119,8 @@ def is_non_sentential(text: str) -> bool:
             return True
         return False
     
-    doc = nlp(text)
+    if doc is None:
+        doc = nlp(text)
     
     # Check if there's any finite verb (excludes participles used as adjectives)
     # VBG = gerund/present participle, VBN = past participle
@@ -228,9 +232,10 @@ def is_metadiscourse(sentence: str) -> bool:
     return False
 
 
-def detect_verb_tense(sentence: str) -> str:
+def detect_verb_tense(sentence: str, doc=None) -> str:
     """
     Detects the main verb tense of a sentence.
+    An already-parsed spaCy ``doc`` of the sentence is reused if given.
     
     Returns: 'past', 'present', 'future', 'mixed', or 'unknown'
     """
@@ -243,7 +248,8 @@ def detect_verb_tense(sentence: str) -> str:
             return "past"
         return "unknown"
     
-    doc = nlp(sentence)
+    if doc is None:
+        doc = nlp(sentence)
     
     has_past = False
     has_present = False
@@ -425,7 +431,8 @@ def validate_simple_present_rewrite(original: str, rewritten: str) -> tuple[bool
 
 
 # Main check function for rule integration
-def check(sentence):
+@register_rule("simple_present_normalization", context=True, cost=COST_NLP)
+def check(sentence, context=None):
     """
     Main entry point for rule checking.
     
@@ -433,6 +440,9 @@ def check(sentence):
     - A string (plain sentence text)
     - A sentence object with .text attribute
     
+    If a SentenceContext is given for the same text, its spaCy parse is
+    reused instead of parsing the sentence again.
+    
     Returns list of issues found in the sentence.
     """
     issues = []
@@ -448,9 +458,14 @@ def check(sentence):
         start_char = getattr(sentence, 'start_char', 0)
         end_char = getattr(sentence, 'end_char', len(sentence_text))
     
+    shared_doc = None
+    if context is not None and context.text == sentence_text:
+        shared_doc = context.doc
+    
     # CRITICAL GATE 1: Check if this is even a sentence
     # Titles, headings, and fragments should NOT be analyzed
-    if is_non_sentential(sentence_text):
+    stripped_doc = shared_doc if shared_doc is not None and sentence_text == sentence_text.strip() else None
+    if is_non_sentential(sentence_text, doc=stripped_doc):
         # Do NOT flag titles/headings - they don't need tense rules
         return issues  # Return empty - no issue to report
     
@@ -466,7 +481,7 @@ def check(sentence):
     # DECISION LOGIC: Classify based on context
     # ============================================================
     
-    tense = detect_verb_tense(sentence_text)
+    tense = detect_verb_tense(sentence_text, doc=shared_doc)
     
     # Only analyze if not already in present tense
     if tense == "present":
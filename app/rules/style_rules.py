@@ -17,6 +17,9 @@ try:
 except ImportError:
     TITLE_UTILS_AVAILABLE = False
 
+from .nlp_context import get_text_and_doc
+from .registry import COST_NLP, register_rule
+
 # Load spaCy model lazily to avoid startup issues
 nlp = None
 
@@ -45,17 +48,15 @@ def is_code_or_diagram(text: str) -> bool:
     
     return False
 
-def check(content):
+@register_rule("style_rules", context=True, cost=COST_NLP)
+def check(content, context=None):
     suggestions = []
 
-    # Extract plain text (remove HTML if present)
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
-    
+    # Extract plain text (remove HTML if present), reusing the shared parse if given
     try:
-        nlp_model = _get_nlp()
-        doc = nlp_model(text_content)
+        text_content, doc = get_text_and_doc(content, context, _get_nlp())
     except Exception as e:
+        text_content = context.text if context is not None else BeautifulSoup(content, "html.parser").get_text()
         doc = None
 
     # ------------------------------
@@ -74,10 +75,11 @@ def check(content):
     # ------------------------------
     # spaCy-based style checks
     # ------------------------------
+    headings = context.heading_index if context is not None else None
     if doc is not None:
         for sent in doc.sents:
             # Skip titles and headings for style checks
-            if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content):
+            if TITLE_UTILS_AVAILABLE and is_title_or_heading(sent.text.strip(), content, headings=headings):
                 continue
             
             # Skip code blocks and diagrams
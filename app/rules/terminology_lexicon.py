@@ -0,0 +1,237 @@
+"""
+Terminology Lexicon
+Phrase lists for the terminology, vague-term and technical style checks.
+
+The phrases live in config/terminology_lexicon.json (or a YAML file, see
+TERMINOLOGY_LEXICON) instead of in the rule modules. Each entry belongs
+to a group - the checker that reports it - and lists the phrases that
+trigger it plus the fields that checker needs for its feedback:
+
+    {"entries": [
+        {"group": "terminology", "phrases": ["USB stick"],
+         "preferred": "USB drive", "lemma": true},
+        {"group": "vague", "phrases": ["stuff"]}
+    ]}
+
+All phrases are compiled once into a token trie. A sentence is tokenized
+once and walked through the trie in a single pass, so the cost of a check
+depends on the sentence length, not on the number of phrases. Matching is
+case-insensitive; entries with ``"lemma": true`` also match inflected
+forms ("shutting down" for "shut down") when a spaCy Doc supplies lemmas.
+A compound token ("his/her", "master/slave-mode") also matches through its
+parts, as a word boundary would: "his", "master/slave", "slave-mode".
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Lexicon file (.json, or .yaml/.yml with PyYAML); relative paths are
+# resolved against the repository root
+TERMINOLOGY_LEXICON = os.environ.get('TERMINOLOGY_LEXICON', 'config/terminology_lexicon.json')
+
+# Dotted abbreviations ("e.g."), words with inner apostrophes, slashes or
+# hyphens ("can't", "master/slave", "e-mail"), and single punctuation marks
+TOKEN_PATTERN = re.compile(r"(?:[^\W_]\.){2,}|\w+(?:['’/-]\w+)*|[^\w\s]")
+# The parts of such a compound token
+PART_PATTERN = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Case-fold a token, treating typographic apostrophes as plain ones."""
+    return text.replace('’', "'").casefold()
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Split text into (token, start, end) triples."""
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+def sub_tokens(token: str, start: int) -> List[Tuple[str, int, int]]:
+    """
+    Every run of consecutive parts of a compound token except the whole
+    token, as (text, start, end) triples relative to the token's text.
+    """
+    parts = [(m.start(), m.end()) for m in PART_PATTERN.finditer(token)]
+    if len(parts) < 2 or parts[-1][1] - parts[0][0] != len(token):
+        return []
+    return [(token[parts[i][0]:parts[j][1]], start + parts[i][0], start + parts[j][1])
+            for i in range(len(parts)) for j in range(i, len(parts)) if (i, j) != (0, len(parts) - 1)]
+
+
+class LexiconEntry(NamedTuple):
+    """One lexicon entry; ``data`` holds the group-specific feedback fields."""
+    index: int
+    group: str
+    phrases: Tuple[str, ...]
+    lemma: bool
+    data: dict
+
+
+class LexiconMatch(NamedTuple):
+    """A phrase found in a text; start/end are character offsets."""
+    entry: LexiconEntry
+    phrase: str
+    start: int
+    end: int
+    text: str
+
+
+class _Node:
+    __slots__ = ('children', 'terminals')
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.terminals: List[Tuple[LexiconEntry, str]] = []
+
+
+class TerminologyLexicon:
+    """
+    Compiled phrase lexicon.
+
+    Args:
+        entries: Entry dicts as stored in the lexicon file
+    """
+
+    def __init__(self, entries: Iterable[dict]):
+        self.entries: List[LexiconEntry] = []
+        self._root = _Node()
+        for raw in entries:
+            group = raw.get('group')
+            phrases = tuple(p for p in raw.get('phrases', ()) if isinstance(p, str) and p.strip())
+            if not group or not phrases:
+                logger.warning(f"Skipping terminology lexicon entry without group or phrases: {raw}")
+                continue
+            data = {key: value for key, value in raw.items() if key not in ('group', 'phrases', 'lemma')}
+            entry = LexiconEntry(len(self.entries), group, phrases, bool(raw.get('lemma', False)), data)
+            self.entries.append(entry)
+            for phrase in phrases:
+                self._add(entry, phrase)
+
+    def _add(self, entry: LexiconEntry, phrase: str):
+        node = self._root
+        for token, _, _ in tokenize(phrase):
+            node = node.children.setdefault(fold(token), _Node())
+        node.terminals.append((entry, phrase))
+
+    def match(self, text: str, doc=None, group: Optional[str] = None) -> List[LexiconMatch]:
+        """
+        Find every lexicon phrase in ``text``, ordered by position.
+
+        Args:
+            text: Plain text to search
+            doc: spaCy Doc or Span of ``text``; supplies lemmas for entries
+                 that allow inflected forms
+            group: Only report entries of this group
+        """
+        lemmas = self._lemmas(text, doc) if doc is not None else {}
+        matches: List[LexiconMatch] = []
+        seen = set()
+        # Partial matches still open: (trie node, first token start, matched via a lemma)
+        active: List[Tuple[_Node, int, bool]] = []
+        for token, start, end in tokenize(text):
+            # (trie node, first token start, via lemma, end) of every match step on this token
+            advanced: List[Tuple[_Node, int, bool, int]] = []
+            for part, part_start, part_end in [(token, start, end)] + sub_tokens(token, start):
+                form = fold(part)
+                lemma = lemmas.get((part_start, part_end))
+                # A part after the first starts a new phrase; it cannot continue one
+                sources = active if part_start == start else []
+                for node, first, via_lemma in sources + [(self._root, part_start, False)]:
+                    child = node.children.get(form)
+                    if child is not None:
+                        advanced.append((child, first, via_lemma, part_end))
+                    if lemma is not None and lemma != form:
+                        child = node.children.get(lemma)
+                        if child is not None:
+                            advanced.append((child, first, True, part_end))
+            for node, first, via_lemma, last in advanced:
+                for entry, phrase in node.terminals:
+                    if (via_lemma and not entry.lemma) or (group is not None and entry.group != group):
+                        continue
+                    key = (entry.index, phrase, first)
+                    if key not in seen:
+                        seen.add(key)
+                        matches.append(LexiconMatch(entry, phrase, first, last, text[first:last]))
+            # Only phrases that reached the end of the token continue with the next one
+            active = [(node, first, via_lemma) for node, first, via_lemma, last in advanced
+                      if last == end and node.children]
+        matches.sort(key=lambda m: (m.start, m.end))
+        return matches
+
+    def first_matches(self, text: str, doc=None, group: Optional[str] = None) -> List[LexiconMatch]:
+        """The first match of each entry found in ``text``, in lexicon order."""
+        first: Dict[int, LexiconMatch] = {}
+        for found in self.match(text, doc=doc, group=group):
+            first.setdefault(found.entry.index, found)
+        return [first[index] for index in sorted(first)]
+
+    @staticmethod
+    def _lemmas(text: str, doc) -> Dict[Tuple[int, int], str]:
+        """Folded lemmas of the spaCy tokens that line up with a lexicon token."""
+        base = getattr(doc, 'start_char', 0)
+        lemmas = {}
+        for token in doc:
+            start = token.idx - base
+            end = start + len(token.text)
+            if token.lemma_ and text[start:end] == token.text:
+                lemmas[(start, end)] = fold(token.lemma_)
+        return lemmas
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def lexicon_path(path: Optional[str] = None) -> str:
+    """Absolute path of a lexicon file (default TERMINOLOGY_LEXICON)."""
+    path = path or TERMINOLOGY_LEXICON
+    if not os.path.isabs(path):
+        path = os.path.join(_ROOT, path)
+    return path
+
+
+def load_lexicon(path: Optional[str] = None) -> TerminologyLexicon:
+    """
+    Load and compile a lexicon file.
+
+    A missing or unreadable file is logged and yields an empty lexicon, so
+    the checks that use it report nothing instead of failing.
+    """
+    path = lexicon_path(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith(('.yaml', '.yml')):
+                import yaml
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+    except ImportError:
+        logger.error(f"PyYAML is not installed - cannot read terminology lexicon {path}")
+        return TerminologyLexicon([])
+    except FileNotFoundError:
+        logger.error(f"Terminology lexicon not found: {path}")
+        return TerminologyLexicon([])
+    except Exception as e:
+        logger.error(f"Error loading terminology lexicon {path}: {e}")
+        return TerminologyLexicon([])
+
+    lexicon = TerminologyLexicon((data or {}).get('entries', []))
+    logger.info(f"Loaded {len(lexicon)} terminology lexicon entries from {path}")
+    return lexicon
+
+
+_lexicon: Optional[TerminologyLexicon] = None
+
+
+def get_terminology_lexicon() -> TerminologyLexicon:
+    """Return the shared lexicon, loading it on first use."""
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = load_lexicon()
+    return _lexicon
@@ -1,4 +1,3 @@
-import re
 import spacy
 from bs4 import BeautifulSoup
 
@@ -17,6 +16,10 @@ try:
 except ImportError:
     TITLE_UTILS_AVAILABLE = False
 
+from .nlp_context import get_text_and_doc
+from .terminology_lexicon import get_terminology_lexicon
+from .registry import COST_NLP, register_rule
+
 # Load spaCy model lazily to avoid startup issues
 nlp = None
 
@@ -27,42 +30,39 @@ def _get_nlp():
         nlp.max_length = 3000000  # Increase max length to 3MB
     return nlp
 
-# Example terminology dictionary (customize for your manuals)
-TERMINOLOGY = {
-    "shut down": "power off",
-    "USB stick": "USB drive"
-}
 
-def check(content):
+@register_rule("terminology_rules", context=True, cost=COST_NLP)
+def check(content, context=None):
     suggestions = []
 
-    # Extract plain text (strip HTML if present)
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
-    
+    # Extract plain text (strip HTML if present), reusing the shared parse if given
     try:
-        nlp_model = _get_nlp()
-        doc = nlp_model(text_content)
+        text_content, doc = get_text_and_doc(content, context, _get_nlp())
     except Exception as e:
         # Fall back to basic processing if spaCy fails
+        text_content = context.text if context is not None else BeautifulSoup(content, "html.parser").get_text()
         doc = None
 
     # ------------------------------
-    # Regex-based terminology checks
+    # Lexicon terminology checks (config/terminology_lexicon.json)
     # ------------------------------
-    for wrong, preferred in TERMINOLOGY.items():
-        pattern = re.compile(rf"\b{wrong}\b", re.IGNORECASE)
-        if pattern.search(text_content):
-            suggestions.append(f"Use '{preferred}' instead of '{wrong}'.")
+    for found in get_terminology_lexicon().first_matches(text_content, doc=doc, group='terminology'):
+        suggestions.append(f"Use '{found.entry.data.get('preferred')}' instead of '{found.phrase}'.")
 
     # ------------------------------
     # spaCy-based terminology checks
     # ------------------------------
     if doc is not None:
+        headings = context.heading_index if context is not None else None
+        title_sentences = {}
         for token in doc:
-            # Skip if token is in a title or heading
-            if TITLE_UTILS_AVAILABLE and is_title_or_heading(token.sent.text.strip(), content):
-                continue
+            # Skip if token is in a title or heading (checked once per sentence)
+            if TITLE_UTILS_AVAILABLE:
+                sentence_text = token.sent.text.strip()
+                if sentence_text not in title_sentences:
+                    title_sentences[sentence_text] = is_title_or_heading(sentence_text, content, headings=headings)
+                if title_sentences[sentence_text]:
+                    continue
                 
             # Example: flagging ambiguous abbreviations
             if token.text.upper() in ["GUI", "API", "DB"]:
@@ -4,15 +4,171 @@ Helper functions to identify titles and headings in content
 """
 
 import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
 from bs4 import BeautifulSoup
 
-def is_title_or_heading(text, original_html=None):
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Heading indexes kept for recently checked HTML contents
+HEADING_INDEX_CACHE_SIZE = 32
+
+
+def normalize_heading(text):
+    """Strip and collapse whitespace so headings compare equal however they were laid out."""
+    return " ".join(text.split())
+
+
+class HeadingIndex:
+    """
+    Lookup structure over a document's heading texts.
+
+    Built once per document; every check then costs time proportional to
+    the text being checked instead of to the document:
+    - ``is_heading``: the text is a heading (set of normalized texts)
+    - ``in_heading``: the text is part of a heading (suffix automaton over
+      all headings)
+    - ``contains_heading``: a heading occurs inside the text (Aho-Corasick
+      automaton over all headings)
+
+    Args:
+        headings: Heading texts; empty ones are ignored
+    """
+
+    # Never part of a normalized text; separates headings in the suffix automaton
+    _SEPARATOR = "\x00"
+
+    def __init__(self, headings: Iterable[str]):
+        self.headings = frozenset(h for h in (normalize_heading(h) for h in headings) if h)
+        self._longest = max((len(h) for h in self.headings), default=0)
+        self._build_suffix_automaton()
+        self._build_aho_corasick()
+
+    def _build_suffix_automaton(self):
+        transitions: List[Dict[str, int]] = [{}]
+        link, length = [-1], [0]
+        last = 0
+        for char in self._SEPARATOR.join(sorted(self.headings)):
+            state = len(transitions)
+            transitions.append({})
+            link.append(0)
+            length.append(length[last] + 1)
+            current = last
+            while current != -1 and char not in transitions[current]:
+                transitions[current][char] = state
+                current = link[current]
+            if current != -1:
+                target = transitions[current][char]
+                if length[current] + 1 == length[target]:
+                    link[state] = target
+                else:
+                    clone = len(transitions)
+                    transitions.append(dict(transitions[target]))
+                    link.append(link[target])
+                    length.append(length[current] + 1)
+                    while current != -1 and transitions[current].get(char) == target:
+                        transitions[current][char] = clone
+                        current = link[current]
+                    link[target] = link[state] = clone
+            last = state
+        self._substrings = transitions
+
+    def _build_aho_corasick(self):
+        goto: List[Dict[str, int]] = [{}]
+        output = [False]
+        for heading in self.headings:
+            node = 0
+            for char in heading:
+                if char not in goto[node]:
+                    goto[node][char] = len(goto)
+                    goto.append({})
+                    output.append(False)
+                node = goto[node][char]
+            output[node] = True
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = output[child] or output[fail[child]]
+        self._goto, self._fail, self._output = goto, fail, output
+
+    def is_heading(self, text: str) -> bool:
+        return normalize_heading(text) in self.headings
+
+    def in_heading(self, text: str) -> bool:
+        text = normalize_heading(text)
+        if not text or len(text) > self._longest or self._SEPARATOR in text:
+            return False
+        state = 0
+        for char in text:
+            state = self._substrings[state].get(char)
+            if state is None:
+                return False
+        return True
+
+    def contains_heading(self, text: str) -> bool:
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in normalize_heading(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def matches(self, text: str) -> bool:
+        """The text is a heading, part of one, or contains one."""
+        return self.is_heading(text) or self.in_heading(text) or self.contains_heading(text)
+
+    def __len__(self):
+        return len(self.headings)
+
+
+EMPTY_HEADING_INDEX = HeadingIndex(())
+
+_heading_indexes: "OrderedDict[str, HeadingIndex]" = OrderedDict()
+
+
+def get_heading_index(html_content):
+    """
+    Heading index of an HTML content, built once per content.
+
+    Rules call the title check for every sentence or token of the same
+    content, so the index of the last few contents is kept. Content
+    without markup has no headings and is never parsed.
+    """
+    if not html_content or '<' not in html_content:
+        return EMPTY_HEADING_INDEX
+    index = _heading_indexes.get(html_content)
+    if index is not None:
+        _heading_indexes.move_to_end(html_content)
+        return index
+    soup = BeautifulSoup(html_content, "html.parser")
+    index = HeadingIndex(heading.get_text() for heading in soup.find_all(HEADING_TAGS))
+    _heading_indexes[html_content] = index
+    if len(_heading_indexes) > HEADING_INDEX_CACHE_SIZE:
+        _heading_indexes.popitem(last=False)
+    return index
+
+
+def is_title_or_heading(text, original_html=None, headings: Optional[HeadingIndex] = None):
     """
     Determine if a given text is likely a title or heading.
     
     Args:
         text (str): The text to check
         original_html (str): Original HTML content for context
+        headings (HeadingIndex): Document heading index (e.g. from the
+            shared rule context). When given, the text only counts as a
+            heading if it is one of these headings or part of one, and
+            ``original_html`` is not parsed.
     
     Returns:
         bool: True if text appears to be a title/heading
@@ -23,16 +179,14 @@ def is_title_or_heading(text, original_html=None):
     text = text.strip()
     
     # Check if it's in HTML heading tags
-    if original_html:
-        soup = BeautifulSoup(original_html, "html.parser")
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        for heading in headings:
-            heading_text = heading.get_text().strip()
-            if heading_text == text:
-                return True
-            # Also check if the text is part of a heading (in case of processing differences)
-            if text in heading_text or heading_text in text:
-                return True
+    if headings is not None:
+        if headings.is_heading(text) or headings.in_heading(text):
+            return True
+    elif original_html:
+        # Also matches if the text is part of a heading or a heading is part
+        # of the text (in case of processing differences)
+        if get_heading_index(original_html).matches(text):
+            return True
     
     # Check for markdown heading patterns
     if re.match(r'^#+\s+.+$', text):
@@ -71,7 +225,7 @@ def is_title_or_heading(text, original_html=None):
     first_line = text.split('\n')[0].strip()
     if first_line != text:  # Multi-line text
         # Check if first line looks like a title
-        if is_title_or_heading(first_line, original_html):
+        if is_title_or_heading(first_line, original_html, headings):
             return True
         
         # Check if the beginning of the text (even without number) matches title patterns
@@ -94,7 +248,7 @@ def extract_titles_from_html(html_content):
     titles = []
     
     # Extract HTML headings
-    headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    headings = soup.find_all(HEADING_TAGS)
     for heading in headings:
         titles.append(heading.get_text().strip())
     
@@ -17,6 +17,9 @@ try:
 except ImportError:
     TITLE_UTILS_AVAILABLE = False
 
+from .terminology_lexicon import get_terminology_lexicon
+from .registry import COST_NLP, register_rule
+
 try:
     nlp = spacy.load("en_core_web_sm")
     # Increase max_length to handle large documents (2MB limit)
@@ -27,13 +30,17 @@ except Exception as e:
     SPACY_AVAILABLE = False
     print(f"Warning: spaCy model not available: {e}")
 
-def check(content):
+@register_rule("vague_terms", context=True, cost=COST_NLP)
+def check(content, context=None):
     if not SPACY_AVAILABLE or nlp is None:
         return []
         
     suggestions = []
-    soup = BeautifulSoup(content, "html.parser")
-    text_content = soup.get_text()
+    if context is not None:
+        text_content = context.text
+    else:
+        soup = BeautifulSoup(content, "html.parser")
+        text_content = soup.get_text()
     
     # Handle very large texts by chunking them
     MAX_CHUNK_SIZE = 500000  # 500KB chunks to be safe
@@ -54,7 +61,9 @@ def check(content):
     else:
         # Process normally for smaller texts
         try:
-            doc = nlp(text_content)
+            doc = context.doc if context is not None else None
+            if doc is None:
+                doc = nlp(text_content)
             suggestions.extend(_process_vague_terms_chunk(doc, 0))
         except Exception as e:
             print(f"Warning: Error processing text in vague_terms: {e}")
@@ -65,23 +74,24 @@ def check(content):
 def _process_vague_terms_chunk(doc, offset=0):
     """Process a spaCy doc for vague terms and return suggestions with position offset."""
     chunk_suggestions = []
-    vague_terms = {"some", "several", "stuff", "things"}
-    
-    for token in doc:
-        # Skip if token is in a title or heading (for full content check)
+    lexicon = get_terminology_lexicon()
+
+    for sent in doc.sents:
+        # Skip if the sentence is a title or heading (for full content check)
         if TITLE_UTILS_AVAILABLE and offset == 0:
             # Only do title check for first chunk to avoid issues
             try:
-                if is_title_or_heading(token.sent.text.strip(), ""):
+                if is_title_or_heading(sent.text.strip(), ""):
                     continue
             except:
                 pass  # Skip title check if it fails
-            
-        if token.text.lower() in vague_terms:
+
+        # Vague terms are the lexicon's "vague" group
+        for found in lexicon.match(sent.text, doc=sent, group='vague'):
             # Create suggestion with adjusted position if needed
-            suggestion = f"Avoid vague term '{token.text}' in sentence: '{token.sent.text}'"
+            suggestion = f"Avoid vague term '{found.text}' in sentence: '{sent.text}'"
             if offset > 0:
-                suggestion += f" (at position ~{offset + token.idx})"
+                suggestion += f" (at position ~{offset + sent.start_char + found.start})"
             chunk_suggestions.append(suggestion)
-    
+
     return chunk_suggestions
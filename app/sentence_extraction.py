@@ -0,0 +1,228 @@
+"""
+Sentence extraction from parsed document HTML.
+
+Reads the text blocks of the document's DocumentIR (core/document_ir.py) and
+builds, for every block, an offset map between its plain text and its inner
+HTML source. Sentences are split on the plain text and their ``html_fragment``
+is sliced out of the block HTML by offset, so inline markup (<strong>, <code>,
+<a>, ...) is preserved without re-parsing the block or pattern-matching words
+against it.
+"""
+
+import html
+import re
+from typing import List, Optional, Tuple, Union
+
+from core.document_ir import DocumentIR
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+# Markup tokens in serialized HTML; everything between them is text
+MARKUP_TOKEN = re.compile(r'<!--.*?-->|<![^>]*>|<\?[^>]*>|<[^>]*>', re.DOTALL)
+ENTITY = re.compile(r'&(?:#\d+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);')
+
+
+class ExtractedSentence:
+    """
+    A sentence of a text block.
+
+    Attributes:
+        text: Plain sentence text (what the rules analyze)
+        html_fragment: The sentence's slice of the block HTML, inline tags kept
+        block_index: Index of the block the sentence belongs to
+        tag_name: Tag of that block (p, h1, li, ...)
+        start_char, end_char: Offsets within the sentence text itself
+        block_start, block_end: Offsets of the sentence within the block's plain text
+        source: Source file of the block in a combined (zip) upload, else None
+    """
+
+    def __init__(self, text, html_fragment, block_index, tag_name, block_start=0, block_end=None, source=None):
+        self.text = text.strip()
+        self.html_fragment = html_fragment
+        self.block_index = block_index
+        self.tag_name = tag_name
+        self.start_char = 0
+        self.end_char = len(text)
+        self.block_start = block_start
+        self.block_end = block_start + len(text) if block_end is None else block_end
+        self.source = source
+
+    def __repr__(self):
+        return f"ExtractedSentence({self.text!r}, block_index={self.block_index}, tag_name={self.tag_name!r})"
+
+
+class BlockOffsetMap:
+    """
+    Maps offsets in a block's plain text to offsets in its inner HTML.
+
+    The plain text is the block's get_text(separator=' '): its text nodes
+    joined by single spaces. ``starts[i]``/``ends[i]`` give the HTML span that
+    produced plain character ``i`` (a separator space maps to the empty span
+    at the end of the preceding text node).
+    """
+
+    def __init__(self, inner_html: str, text: str, starts: List[int], ends: List[int],
+                 markup: List[Tuple[int, int]]):
+        self.inner_html = inner_html
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        # (start, end) of every tag/comment in inner_html, in order
+        self.markup = markup
+
+    @classmethod
+    def build(cls, inner_html: str, text: str) -> Optional['BlockOffsetMap']:
+        """
+        Build the map from a block's serialized inner HTML and plain text.
+
+        Returns None when the HTML text runs do not reproduce the plain text
+        (e.g. raw '<' inside script content), in which case callers fall back
+        to plain-text fragments.
+        """
+        starts: List[int] = []
+        ends: List[int] = []
+        markup: List[Tuple[int, int]] = []
+        pieces: List[str] = []
+        cursor = 0
+        for match in MARKUP_TOKEN.finditer(inner_html):
+            if match.start() > cursor:
+                cls._map_run(inner_html, cursor, match.start(), pieces, starts, ends)
+            markup.append((match.start(), match.end()))
+            cursor = match.end()
+        if cursor < len(inner_html):
+            cls._map_run(inner_html, cursor, len(inner_html), pieces, starts, ends)
+        if ''.join(pieces) != text:
+            return None
+        return cls(inner_html, text, starts, ends, markup)
+
+    @staticmethod
+    def _map_run(source: str, start: int, end: int, pieces: List[str], starts: List[int], ends: List[int]):
+        """Append the plain characters of one text run, with their HTML offsets."""
+        if pieces:
+            # get_text(separator=' ') puts a space between text nodes
+            pieces.append(' ')
+            starts.append(ends[-1])
+            ends.append(ends[-1])
+        position = start
+        while position < end:
+            entity = ENTITY.match(source, position, end) if source[position] == '&' else None
+            if entity:
+                decoded = html.unescape(entity.group(0))
+                for _ in decoded:
+                    starts.append(position)
+                    ends.append(entity.end())
+                pieces.append(decoded)
+                position = entity.end()
+            else:
+                starts.append(position)
+                ends.append(position + 1)
+                pieces.append(source[position])
+                position += 1
+
+    def fragment(self, start: int, end: int) -> str:
+        """
+        HTML for plain text ``[start, end)``.
+
+        Opening tags directly before the span and closing tags directly after
+        it are included, so a sentence wrapped in or starting with inline
+        markup keeps it (``<strong>Note:</strong> ...``).
+        """
+        html_start = self.starts[start]
+        html_end = self.ends[end - 1]
+        index = self._markup_ending_at(html_start)
+        while index is not None and not self._is_closing(index):
+            html_start = self.markup[index][0]
+            index = self._markup_ending_at(html_start)
+        index = self._markup_starting_at(html_end)
+        while index is not None and self._is_closing(index):
+            html_end = self.markup[index][1]
+            index = self._markup_starting_at(html_end)
+        return self.inner_html[html_start:html_end].strip()
+
+    def _is_closing(self, index: int) -> bool:
+        start, _ = self.markup[index]
+        return self.inner_html.startswith('</', start)
+
+    def _markup_ending_at(self, offset: int) -> Optional[int]:
+        index = self._bisect(offset, 1)
+        return index if index is not None and self.markup[index][1] == offset else None
+
+    def _markup_starting_at(self, offset: int) -> Optional[int]:
+        index = self._bisect(offset, 0)
+        return index if index is not None and self.markup[index][0] == offset else None
+
+    def _bisect(self, offset: int, field: int) -> Optional[int]:
+        low, high = 0, len(self.markup)
+        while low < high:
+            middle = (low + high) // 2
+            if self.markup[middle][field] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self.markup) else None
+
+
+def split_sentence_spans(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Split block text into sentences with their offsets.
+
+    Same segmentation as the regex split on sentence-ending punctuation; a
+    fragment ending with ':' is joined with the next one ("Label: content").
+
+    Returns:
+        (sentence text, start, end) tuples, offsets into ``text``
+    """
+    fragments = []
+    position = 0
+    boundaries = [match.span() for match in SENTENCE_BOUNDARY.finditer(text)]
+    boundaries.append((len(text), len(text)))
+    for boundary_start, boundary_end in boundaries:
+        raw = text[position:boundary_start]
+        stripped = raw.strip()
+        if stripped:
+            start = position + len(raw) - len(raw.lstrip())
+            fragments.append((stripped, start, start + len(stripped)))
+        position = boundary_end
+
+    merged = []
+    i = 0
+    while i < len(fragments):
+        current, start, end = fragments[i]
+        while i + 1 < len(fragments) and current.endswith(':'):
+            following, _, end = fragments[i + 1]
+            current = f"{current} {following}"
+            i += 1
+        merged.append((current, start, end))
+        i += 1
+    return merged
+
+
+def extract_sentences(document: Union[str, DocumentIR]) -> List[ExtractedSentence]:
+    """
+    Extract sentences from a document while preserving the HTML structure.
+
+    Accepts the DocumentIR of a parsed upload (or an HTML string, parsed
+    here). Returns a list of ExtractedSentence objects carrying both the
+    plain text and the HTML fragment of every sentence.
+    """
+    if not isinstance(document, DocumentIR):
+        document = DocumentIR.from_html(document)
+    sentences = []
+
+    for block in document.blocks:
+        spans = split_sentence_spans(block.text)
+        if not spans:
+            continue
+        offset_map = BlockOffsetMap.build(block.html, block.text) if len(spans) > 1 else None
+
+        for sent_text, start, end in spans:
+            if len(spans) == 1:
+                # The sentence is the whole block
+                html_fragment = block.html
+            elif offset_map is not None:
+                html_fragment = offset_map.fragment(start, end)
+            else:
+                html_fragment = sent_text
+            sentences.append(ExtractedSentence(sent_text, html_fragment, block.index, block.tag, start, end,
+                                               block.source))
+
+    return sentences
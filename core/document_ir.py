@@ -0,0 +1,314 @@
+"""
+Document IR - block-level intermediate representation of a parsed document.
+
+Every upload format is converted to HTML by the parsers. That HTML is parsed
+into a DOM exactly once, here, and the result is kept as a compact IR that
+the review gate, sentence extraction, the shared NLP context and the exporters
+read directly instead of re-parsing the HTML string each time:
+
+- ``blocks``: the text blocks sentences are extracted from, in document
+  order, each with its plain text, inner HTML, inline spans and source position
+- ``find_all(names)``: lightweight element records (tag name + text range)
+  for the structural checks that count or read tags (headings, lists, tables)
+- ``text`` / ``plain_text``: the document text, as get_text() and
+  get_text(separator="\\n") would return it
+- ``parts``: the source files of a combined upload (a zip archive), one per
+  outermost element carrying PART_ATTRIBUTE; ``part_documents()`` gives each
+  file its own IR so it can be reviewed on its own
+
+The HTML string itself is only kept for display.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Elements that can hold a sentence block
+CANDIDATE_TAGS = frozenset(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th', 'span', 'blockquote'])
+# A candidate containing one of these is skipped in favour of the inner block
+BLOCK_TAGS = frozenset(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th'])
+# String types get_text() returns (comments, scripts and styles are skipped)
+TEXT_TYPES = (NavigableString, CData)
+# Attribute naming the source file of an element's content (set by parse_zip)
+PART_ATTRIBUTE = 'data-source'
+
+
+class InlineSpan:
+    """Inline markup (<strong>, <code>, <a>, ...) inside a block, as offsets into the block text."""
+
+    __slots__ = ('tag', 'start', 'end')
+
+    def __init__(self, tag: str, start: int, end: int):
+        self.tag = tag
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"InlineSpan({self.tag!r}, {self.start}, {self.end})"
+
+
+class Block:
+    """
+    A text block (leaf paragraph, heading, list item, cell, ...).
+
+    Attributes:
+        index: Position among the document's blocks (the sentences' block_index)
+        tag: Tag name (p, h1, li, ...)
+        text: Block text with text nodes joined by single spaces
+        html: Inner HTML of the block, for display fragments
+        spans: Inline elements inside the block
+        source_line, source_pos: Where the block's start tag is in the parsed HTML
+        source: Name of the part (source file) the block belongs to, if any
+    """
+
+    __slots__ = ('index', 'tag', 'text', 'html', 'spans', 'source_line', 'source_pos', 'source')
+
+    def __init__(self, index: int, tag: str, text: str, html: str, spans: List[InlineSpan],
+                 source_line: Optional[int] = None, source_pos: Optional[int] = None,
+                 source: Optional[str] = None):
+        self.index = index
+        self.tag = tag
+        self.text = text
+        self.html = html
+        self.spans = spans
+        self.source_line = source_line
+        self.source_pos = source_pos
+        self.source = source
+
+    def __repr__(self):
+        return f"Block({self.index}, {self.tag!r}, {self.text[:40]!r})"
+
+
+class Element:
+    """
+    Any element of the parsed document, reduced to its tag name and text range.
+
+    get_text() returns the same string as BeautifulSoup's Tag.get_text()
+    (except inside <script>/<style>, whose text is not document text).
+    """
+
+    __slots__ = ('name', 'start', 'end', 'order', '_document')
+
+    def __init__(self, name: str, start: int, end: int, order: int, document: 'DocumentIR'):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.order = order
+        self._document = document
+
+    def get_text(self) -> str:
+        return self._document.text[self.start:self.end]
+
+    def __repr__(self):
+        return f"Element({self.name!r}, {self.get_text()[:40]!r})"
+
+
+class DocumentPart:
+    """
+    One source file of a combined document.
+
+    Attributes:
+        name: Value of the part element's PART_ATTRIBUTE
+        start, end: Text range of the part in the document text
+        first_block, end_block: Range of the part's blocks in DocumentIR.blocks
+    """
+
+    __slots__ = ('name', 'start', 'end', 'first_block', 'end_block',
+                 'order', 'end_order', 'first_string', 'end_string')
+
+    def __init__(self, name: str, start: int, order: int, first_string: int):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.first_block = 0
+        self.end_block = 0
+        # Preorder range of the part's elements and its range of text nodes
+        self.order = order
+        self.end_order = order
+        self.first_string = first_string
+        self.end_string = first_string
+
+    def __repr__(self):
+        return f"DocumentPart({self.name!r}, blocks {self.first_block}-{self.end_block})"
+
+
+class DocumentIR:
+    """
+    Parsed document: blocks, element index and text.
+
+    Build with ``DocumentIR.from_html(html)``; see the module docstring.
+    """
+
+    __slots__ = ('html', 'blocks', 'text', 'parts', '_strings', '_elements')
+
+    def __init__(self, html: str, blocks: List[Block], strings: List[str],
+                 elements: Dict[str, List[Element]], parts: Optional[List[DocumentPart]] = None):
+        self.html = html
+        self.blocks = blocks
+        self.text = ''.join(strings)
+        self.parts = parts or []
+        self._strings = strings
+        self._elements = elements
+
+    @property
+    def plain_text(self) -> str:
+        """Document text with one line per text node (get_text(separator="\\n"))."""
+        return self.get_text("\n")
+
+    def find_all(self, names: Union[str, Iterable[str]]) -> List[Element]:
+        """Elements with any of the given tag names, in document order."""
+        if isinstance(names, str):
+            return list(self._elements.get(names, []))
+        found = [element for name in set(names) for element in self._elements.get(name, [])]
+        found.sort(key=lambda element: element.order)
+        return found
+
+    def get_text(self, separator: str = "") -> str:
+        return self.text if separator == "" else separator.join(self._strings)
+
+    def part_documents(self) -> List[Tuple[DocumentPart, 'DocumentIR']]:
+        """
+        An IR per part, for checks that must see one source file at a time.
+
+        A part's IR shares the blocks (with their document-wide indices) and
+        text of the combined document; its html is empty. Content outside
+        every part (the archive's own heading) is not in any of them.
+        """
+        documents = [
+            (part, DocumentIR("", self.blocks[part.first_block:part.end_block],
+                              self._strings[part.first_string:part.end_string], {}))
+            for part in self.parts
+        ]
+        part_orders = [part.order for part in self.parts]
+        for name, elements in self._elements.items():
+            for element in elements:
+                position = bisect_right(part_orders, element.order) - 1
+                if position < 0:
+                    continue
+                part, document = documents[position]
+                if element.order < part.end_order and element.order != part.order:
+                    document._elements.setdefault(name, []).append(Element(
+                        name, element.start - part.start, element.end - part.start, element.order, document
+                    ))
+        return documents
+
+    @classmethod
+    def from_html(cls, html_content: str) -> 'DocumentIR':
+        """Parse HTML once and build the IR."""
+        return cls.from_soup(BeautifulSoup(html_content or "", "html.parser"), html_content or "")
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup, html_content: str = "") -> 'DocumentIR':
+        """
+        Build the IR from an already-parsed document in one depth-first walk.
+
+        Block selection matches the sentence extractor's rule: a candidate tag
+        is a block when it has text and no block-level descendant (the
+        has-block flag is propagated from children to parents on the way up).
+        """
+        document = cls(html_content, [], [], {})
+        strings: List[str] = []
+        text_length = 0
+        elements: Dict[str, List[Element]] = {}
+        # Inline (non-block) tags as [preorder, tag, first string, end string]
+        inline: List[list] = []
+        # Blocks as (preorder, end preorder, node, first string, end string)
+        candidates = []
+        has_block = {id(soup): False}
+        order = 0
+        parts: List[DocumentPart] = []
+        open_part = None
+
+        # Stack entries: (node, child iterator, state needed when leaving the node)
+        stack = [(soup, iter(soup.contents), None)]
+        while stack:
+            node, children, state = stack[-1]
+            child = next(children, None)
+            if child is not None:
+                if isinstance(child, Tag):
+                    preorder = order
+                    order += 1
+                    element = Element(child.name, text_length, text_length, preorder, document)
+                    elements.setdefault(child.name, []).append(element)
+                    has_block[id(child)] = False
+                    record = None
+                    if child.name not in BLOCK_TAGS:
+                        record = [preorder, child.name, len(strings), len(strings)]
+                        inline.append(record)
+                    if open_part is None and child.get(PART_ATTRIBUTE) is not None:
+                        open_part = DocumentPart(child[PART_ATTRIBUTE], text_length, preorder, len(strings))
+                        parts.append(open_part)
+                    stack.append((child, iter(child.contents), (element, len(strings), record)))
+                elif type(child) in TEXT_TYPES:
+                    strings.append(str(child))
+                    text_length += len(child)
+                continue
+
+            stack.pop()
+            if state is None:
+                continue
+            element, first_string, record = state
+            element.end = text_length
+            if record is not None:
+                record[3] = len(strings)
+            if open_part is not None and open_part.order == element.order:
+                open_part.end, open_part.end_order, open_part.end_string = text_length, order, len(strings)
+                open_part = None
+            if node.name in BLOCK_TAGS or has_block[id(node)]:
+                has_block[id(node.parent)] = True
+            if node.name in CANDIDATE_TAGS and not has_block[id(node)]:
+                if ''.join(strings[first_string:]).strip():
+                    candidates.append((element.order, order, node, first_string, len(strings)))
+            del has_block[id(node)]
+
+        document.text = ''.join(strings)
+        document._strings = strings
+        document._elements = elements
+        document.parts = parts
+        candidates.sort(key=lambda candidate: candidate[0])
+        inline_orders = [record[0] for record in inline]
+        document.blocks = [
+            cls._build_block(index, node, strings, first_string, end_string,
+                             inline[bisect_right(inline_orders, preorder):bisect_left(inline_orders, end_order)])
+            for index, (preorder, end_order, node, first_string, end_string) in enumerate(candidates)
+        ]
+        if parts:
+            cls._assign_parts(parts, document.blocks, [candidate[0] for candidate in candidates])
+        return document
+
+    @staticmethod
+    def _assign_parts(parts: List[DocumentPart], blocks: List[Block], block_orders: List[int]) -> None:
+        """Give every part its block range and every block inside a part its source."""
+        for part in parts:
+            part.first_block = bisect_left(block_orders, part.order)
+            part.end_block = bisect_left(block_orders, part.end_order)
+            for block in blocks[part.first_block:part.end_block]:
+                block.source = part.name
+
+    @staticmethod
+    def _build_block(index: int, node: Tag, strings: List[str], first_string: int, end_string: int,
+                     inline: List[list]) -> Block:
+        """A block from its string range and the inline tags nested in it."""
+        offsets = []
+        position = 0
+        for string in strings[first_string:end_string]:
+            offsets.append(position)
+            position += len(string) + 1
+        # Strings are joined with one space: the end of string i is offsets[i + 1] - 1
+        offsets.append(position)
+        text = ' '.join(strings[first_string:end_string])
+
+        spans = [
+            InlineSpan(tag, offsets[span_first - first_string], offsets[span_end - first_string] - 1)
+            for _, tag, span_first, span_end in inline if span_end > span_first
+        ]
+        return Block(
+            index=index,
+            tag=node.name,
+            text=text,
+            html=node.decode_contents(),
+            spans=spans,
+            source_line=getattr(node, 'sourceline', None),
+            source_pos=getattr(node, 'sourcepos', None),
+        )
@@ -27,12 +27,13 @@ Flow:
 Only if these pass do we proceed to sentence-level analysis.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Tuple, Union
 import re
 import logging
 
+from core.document_ir import DocumentIR
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,10 +55,11 @@ class DocumentReviewResult:
     issues: List[DocumentIssue]
     flagged_sections: List[str]  # Sections that need deep analysis
     analysis_scope: str  # "full", "targeted", "minimal"
+    parts: List[Tuple[str, "DocumentReviewResult"]] = field(default_factory=list)  # Per-file reviews of a collection
     
     def to_ui(self):
         """Convert to UI-friendly format."""
-        return {
+        ui = {
             "blocking": self.blocking,
             "document_type": self.document_type,
             "issues": [
@@ -73,6 +75,9 @@ class DocumentReviewResult:
             "analysis_scope": self.analysis_scope,
             "guidance": self._get_guidance()
         }
+        if self.parts:
+            ui["files"] = [dict(part.to_ui(), name=name) for name, part in self.parts]
+        return ui
     
     def _get_guidance(self):
         """Provide reviewer-style guidance based on issues."""
@@ -84,7 +89,7 @@ class DocumentReviewResult:
             return "Document structure looks clear. I'll review for clarity and precision."
 
 
-def run_document_review_gate(html_content: str, filename: str = "") -> DocumentReviewResult:
+def run_document_review_gate(document: Union[str, DocumentIR], filename: str = "") -> DocumentReviewResult:
     """
     Primary document review gate.
     
@@ -94,21 +99,28 @@ def run_document_review_gate(html_content: str, filename: str = "") -> DocumentR
     3. Is the structure fundamentally sound?
     4. Where will users get confused?
     
+    A document made of several source files (the parts of a zip upload)
+    gets each file reviewed on its own; see review_document_parts().
+    
     Args:
-        html_content: Parsed HTML content
+        document: DocumentIR of the parsed upload (or its HTML content)
         filename: Original filename (helps with context)
     
     Returns:
         DocumentReviewResult with blocking flag and issues
     """
+    if not isinstance(document, DocumentIR):
+        document = DocumentIR.from_html(document)
+    if document.parts:
+        return review_document_parts(document, filename)
+
     issues = []
-    soup = BeautifulSoup(html_content, "html.parser")
-    text_content = soup.get_text()
+    text_content = document.text
     
     logger.info(f"🚧 Document Review Gate: Analyzing {filename}")
     
     # Question 1: Is the document goal clear?
-    if not has_clear_goal(soup, text_content):
+    if not has_clear_goal(document, text_content):
         issues.append(DocumentIssue(
             id="DOC_GOAL_UNCLEAR",
             severity="blocking",
@@ -117,19 +129,19 @@ def run_document_review_gate(html_content: str, filename: str = "") -> DocumentR
         ))
     
     # Question 2: What type of document is this?
-    doc_type = detect_document_type(soup, text_content)
+    doc_type = detect_document_type(document, text_content)
     logger.info(f"📋 Detected document type: {doc_type}")
     
     # Question 3: Type-specific structural checks
     if doc_type == "procedure":
-        procedure_issues = check_procedure_structure(soup, text_content)
+        procedure_issues = check_procedure_structure(document, text_content)
         issues.extend(procedure_issues)
     elif doc_type == "concept":
-        concept_issues = check_concept_structure(soup, text_content)
+        concept_issues = check_concept_structure(document, text_content)
         issues.extend(concept_issues)
     
     # Question 4: Identify confusion zones
-    flagged_sections = identify_confusion_zones(soup, text_content)
+    flagged_sections = identify_confusion_zones(document, text_content)
     
     # Determine analysis scope
     analysis_scope = determine_analysis_scope(issues, flagged_sections)
@@ -153,7 +165,40 @@ def run_document_review_gate(html_content: str, filename: str = "") -> DocumentR
     return result
 
 
-def has_clear_goal(soup: BeautifulSoup, text: str) -> bool:
+# Analysis scopes from least to most thorough
+ANALYSIS_SCOPES = ("minimal", "targeted", "full")
+
+
+def review_document_parts(document: DocumentIR, filename: str = "") -> DocumentReviewResult:
+    """
+    Review every part (source file) of a combined document separately.
+
+    A collection is only blocking when every file is; issues and flagged
+    sections name the file they come from, and the collection is analyzed
+    as thoroughly as its most demanding file.
+    """
+    reviews = [
+        (part.name, run_document_review_gate(part_document, part.name))
+        for part, part_document in document.part_documents()
+    ]
+    logger.info(f"🚧 Document Review Gate: Reviewed {len(reviews)} files of {filename} separately")
+
+    issues = [
+        replace(issue, section=f"{name}: {issue.section}" if issue.section else name)
+        for name, review in reviews for issue in review.issues
+    ]
+    document_types = {review.document_type for _, review in reviews}
+    return DocumentReviewResult(
+        blocking=all(review.blocking for _, review in reviews),
+        document_type=document_types.pop() if len(document_types) == 1 else "collection",
+        issues=issues,
+        flagged_sections=[f"{name}: {section}" for name, review in reviews for section in review.flagged_sections],
+        analysis_scope=max((review.analysis_scope for _, review in reviews), key=ANALYSIS_SCOPES.index),
+        parts=reviews
+    )
+
+
+def has_clear_goal(document: DocumentIR, text: str) -> bool:
     """
     Check if document goal is clear.
     
@@ -163,7 +208,7 @@ def has_clear_goal(soup: BeautifulSoup, text: str) -> bool:
     - Not just a wall of text
     """
     # Check for title/heading
-    headings = soup.find_all(['h1', 'h2'])
+    headings = document.find_all(['h1', 'h2'])
     if not headings or len(headings[0].get_text().strip()) < 3:
         return False
     
@@ -181,7 +226,7 @@ def has_clear_goal(soup: BeautifulSoup, text: str) -> bool:
         return True
     
     # Check if it's just a title followed by a wall of text (bad)
-    paragraphs = soup.find_all('p')
+    paragraphs = document.find_all('p')
     if len(paragraphs) > 0:
         first_para_words = len(paragraphs[0].get_text().split())
         # If first paragraph is very long with no clear intro, goal is unclear
@@ -191,7 +236,7 @@ def has_clear_goal(soup: BeautifulSoup, text: str) -> bool:
     return True
 
 
-def detect_document_type(soup: BeautifulSoup, text: str) -> str:
+def detect_document_type(document: DocumentIR, text: str) -> str:
     """
     Detect document type: procedure, concept, or reference.
     
@@ -206,7 +251,7 @@ def detect_document_type(soup: BeautifulSoup, text: str) -> str:
     procedure_indicators = 0
     
     # Check for numbered lists (strong indicator)
-    if soup.find_all('ol') or re.search(r'^\d+\.', text, re.MULTILINE):
+    if document.find_all('ol') or re.search(r'^\d+\.', text, re.MULTILINE):
         procedure_indicators += 3
     
     # Check for imperative verbs at start of sentences
@@ -232,10 +277,10 @@ def detect_document_type(soup: BeautifulSoup, text: str) -> str:
     # Reference indicators
     reference_indicators = 0
     
-    if soup.find_all('table'):
+    if document.find_all('table'):
         reference_indicators += 2
     
-    if len(soup.find_all(['ul', 'li'])) > len(soup.find_all('p')):
+    if len(document.find_all(['ul', 'li'])) > len(document.find_all('p')):
         reference_indicators += 1
     
     # Determine type
@@ -249,7 +294,7 @@ def detect_document_type(soup: BeautifulSoup, text: str) -> str:
         return "unknown"
 
 
-def check_procedure_structure(soup: BeautifulSoup, text: str) -> List[DocumentIssue]:
+def check_procedure_structure(document: DocumentIR, text: str) -> List[DocumentIssue]:
     """
     Check procedure-specific structure.
     
@@ -284,7 +329,7 @@ def check_procedure_structure(soup: BeautifulSoup, text: str) -> List[DocumentIs
         ))
     
     # Check for step structure
-    numbered_lists = soup.find_all('ol')
+    numbered_lists = document.find_all('ol')
     if not numbered_lists:
         issues.append(DocumentIssue(
             id="NO_NUMBERED_STEPS",
@@ -296,7 +341,7 @@ def check_procedure_structure(soup: BeautifulSoup, text: str) -> List[DocumentIs
     return issues
 
 
-def check_concept_structure(soup: BeautifulSoup, text: str) -> List[DocumentIssue]:
+def check_concept_structure(document: DocumentIR, text: str) -> List[DocumentIssue]:
     """
     Check concept document structure.
     
@@ -338,7 +383,7 @@ def check_concept_structure(soup: BeautifulSoup, text: str) -> List[DocumentIssu
     return issues
 
 
-def identify_confusion_zones(soup: BeautifulSoup, text: str) -> List[str]:
+def identify_confusion_zones(document: DocumentIR, text: str) -> List[str]:
     """
     Identify sections where users are likely to get confused.
     
@@ -351,7 +396,7 @@ def identify_confusion_zones(soup: BeautifulSoup, text: str) -> List[str]:
     confusion_zones = []
     
     # Check each paragraph
-    paragraphs = soup.find_all('p')
+    paragraphs = document.find_all('p')
     for i, para in enumerate(paragraphs):
         para_text = para.get_text()
         word_count = len(para_text.split())
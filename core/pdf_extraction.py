@@ -0,0 +1,416 @@
+"""
+PDF text extraction engine shared by uploads, knowledge-base ingestion and
+the FastAPI parser.
+
+``page.extract_text()`` dominates PDF ingest time, so pages are extracted in
+contiguous ranges across a process pool and merged back in page order.
+Extracted text is cached under (file hash, page number, extractor version):
+re-uploading the same PDF skips extraction entirely, and a full hit does
+not even open the file.
+
+Two cache tiers, like the sentence analysis cache:
+- an in-process LRU of page texts
+- a SQLite file shared by all worker processes on the host
+
+Every page result carries its extraction time, so slow pages show up in the
+logs and callers can report per-page timing.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.worker_pool import new_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for page extraction (1 = always serial)
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', os.cpu_count() or 1))
+# PDFs with fewer uncached pages than this are extracted serially
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 16))
+# Page texts kept in the in-process LRU tier (0 disables it)
+PDF_PAGE_CACHE_SIZE = int(os.environ.get('PDF_PAGE_CACHE_SIZE', 5000))
+# SQLite file for the shared tier (empty disables it)
+PDF_PAGE_CACHE_DB = os.environ.get(
+    'PDF_PAGE_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'pdf_page_cache.db')
+)
+# Page ranges per worker; more ranges balance uneven pages better
+RANGES_PER_WORKER = 4
+# Pages slower than this (seconds) are logged individually
+SLOW_PAGE_SECONDS = 2.0
+
+
+class PageText(NamedTuple):
+    """Text of one page (page_number is 1-based) and how long extraction took."""
+    page_number: int
+    text: str
+    seconds: float
+    cached: bool
+
+
+def extractor_version() -> str:
+    """Cache namespace: extracted text depends on the PDF library version."""
+    import PyPDF2
+    return f"PyPDF2-{getattr(PyPDF2, '__version__', 'unknown')}"
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_count(path: str) -> int:
+    import PyPDF2
+    with open(path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """
+    Extract pages ``start``..``end - 1`` (0-based). Runs inside a worker process.
+
+    Returns:
+        (page index, text, seconds) for every page in the range
+    """
+    import PyPDF2
+
+    results = []
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for index in range(start, end):
+            began = time.perf_counter()
+            try:
+                text = reader.pages[index].extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Could not extract text from page {index + 1} of {path}: {e}")
+                text = ""
+            results.append((index, text, time.perf_counter() - began))
+    return results
+
+
+def make_ranges(indices: List[int], range_count: int) -> List[Tuple[int, int]]:
+    """
+    Split sorted page indices into at most ``range_count`` (start, end) ranges.
+
+    Runs of consecutive pages are split into nearly equal pieces; gaps
+    (cached pages) always end a range.
+    """
+    if not indices:
+        return []
+    runs = []
+    start = previous = indices[0]
+    for index in indices[1:]:
+        if index != previous + 1:
+            runs.append((start, previous + 1))
+            start = index
+        previous = index
+    runs.append((start, previous + 1))
+
+    target = max(1, -(-len(indices) // max(1, range_count)))
+    ranges = []
+    for run_start, run_end in runs:
+        for piece_start in range(run_start, run_end, target):
+            ranges.append((piece_start, min(piece_start + target, run_end)))
+    return ranges
+
+
+class PdfPageCache:
+    """
+    Two-tier (LRU + SQLite) store of extracted page text.
+
+    Args:
+        max_entries: Pages in the in-process LRU tier (0 disables it)
+        db_path: SQLite file for the shared tier (None/empty disables it)
+        version: Extractor version (default extractor_version())
+    """
+
+    def __init__(self, max_entries: int = PDF_PAGE_CACHE_SIZE, db_path: Optional[str] = PDF_PAGE_CACHE_DB,
+                 version: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.version = version or extractor_version()
+        self._memory: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._page_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.db_path:
+            self._init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        """Create the tables and drop pages extracted by other library versions."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS pdf_pages (
+                            file_hash TEXT NOT NULL,
+                            page INTEGER NOT NULL,
+                            version TEXT NOT NULL,
+                            text TEXT NOT NULL,
+                            seconds REAL NOT NULL,
+                            PRIMARY KEY (file_hash, page)
+                        )
+                    ''')
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS pdf_files (
+                            file_hash TEXT PRIMARY KEY,
+                            page_count INTEGER NOT NULL,
+                            created_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('DELETE FROM pdf_pages WHERE version != ?', (self.version,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"PDF page cache DB unavailable ({e}) - using memory tier only")
+            self.db_path = None
+
+    def page_count(self, digest: str) -> Optional[int]:
+        """Page count recorded for a file, if it was extracted before."""
+        with self._lock:
+            if digest in self._page_counts:
+                return self._page_counts[digest]
+        if not self.db_path:
+            return None
+        row = self._query('SELECT page_count FROM pdf_files WHERE file_hash = ?', (digest,))
+        count = row[0][0] if row else None
+        if count is not None:
+            with self._lock:
+                self._page_counts[digest] = count
+        return count
+
+    def get_many(self, digest: str, pages: Iterable[int]) -> Dict[int, str]:
+        """Cached text of the given 0-based pages of a file."""
+        found = {}
+        missing = []
+        with self._lock:
+            for page in pages:
+                text = self._memory.get((digest, page))
+                if text is not None:
+                    self._memory.move_to_end((digest, page))
+                    found[page] = text
+                else:
+                    missing.append(page)
+        if missing and self.db_path:
+            rows = self._query('SELECT page, text FROM pdf_pages WHERE file_hash = ? AND version = ?',
+                               (digest, self.version))
+            wanted = set(missing)
+            for page, text in rows:
+                if page in wanted:
+                    found[page] = text
+                    self._remember(digest, page, text)
+        return found
+
+    def put_many(self, digest: str, count: int, pages: List[Tuple[int, str, float]]) -> None:
+        """Store freshly extracted (page, text, seconds) results and the file's page count."""
+        with self._lock:
+            self._page_counts[digest] = count
+        for page, text, _ in pages:
+            self._remember(digest, page, text)
+        if not self.db_path:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO pdf_pages (file_hash, page, version, text, seconds) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        [(digest, page, self.version, text, seconds) for page, text, seconds in pages]
+                    )
+                    conn.execute('INSERT OR REPLACE INTO pdf_files (file_hash, page_count, created_at) '
+                                 'VALUES (?, ?, ?)', (digest, count, time.time()))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write PDF page cache: {e}")
+
+    def _remember(self, digest: str, page: int, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[(digest, page)] = text
+            self._memory.move_to_end((digest, page))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _query(self, sql: str, params: tuple) -> list:
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read PDF page cache: {e}")
+            return []
+
+
+class PdfExtractor:
+    """
+    Extracts the text of every page of a PDF, in parallel for large files.
+
+    Args:
+        max_workers: Worker processes (default PDF_WORKERS)
+        min_parallel_pages: Serial below this many uncached pages (default PDF_PARALLEL_MIN_PAGES)
+        cache: Optional PdfPageCache; cached pages are not extracted again
+    """
+
+    # Worker pool shared by all extractors in this process
+    _pool = None
+    _pool_workers = 0
+
+    def __init__(self, max_workers: Optional[int] = None, min_parallel_pages: Optional[int] = None,
+                 cache: Optional[PdfPageCache] = None):
+        self.max_workers = max(1, max_workers or PDF_WORKERS)
+        self.min_parallel_pages = PDF_PARALLEL_MIN_PAGES if min_parallel_pages is None else min_parallel_pages
+        self.cache = cache
+
+    def should_parallelize(self, page_total: int) -> bool:
+        return self.max_workers > 1 and page_total >= self.min_parallel_pages
+
+    def extract(self, source) -> List[PageText]:
+        """
+        Text of every page, in page order.
+
+        Args:
+            source: Path to a PDF, its bytes, or a binary file-like object
+                (spooled to a temporary file so workers can open it)
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return self.extract_path(os.fspath(source))
+        data = source if isinstance(source, (bytes, bytearray)) else source.read()
+        handle, path = tempfile.mkstemp(suffix='.pdf')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(data)
+            return self.extract_path(path)
+        finally:
+            os.remove(path)
+
+    def extract_path(self, path: str) -> List[PageText]:
+        began = time.perf_counter()
+        digest = file_hash(path) if self.cache is not None else None
+        count = self.cache.page_count(digest) if digest else None
+        if count is None:
+            count = page_count(path)
+        cached = self.cache.get_many(digest, range(count)) if digest else {}
+        missing = [page for page in range(count) if page not in cached]
+
+        extracted = self._extract_pages(path, missing)
+        if digest and extracted:
+            self.cache.put_many(digest, count, extracted)
+
+        results = {page: PageText(page + 1, text, 0.0, True) for page, text in cached.items()}
+        for page, text, seconds in extracted:
+            results[page] = PageText(page + 1, text, seconds, False)
+            if seconds >= SLOW_PAGE_SECONDS:
+                logger.info(f"Slow PDF page {page + 1} of {os.path.basename(path)}: {seconds:.2f}s")
+        pages = [results[page] for page in range(count)]
+        logger.info(
+            f"Extracted {count} PDF pages ({len(cached)} cached) in {time.perf_counter() - began:.2f}s"
+            f" - extraction time {sum(p.seconds for p in pages):.2f}s"
+        )
+        return pages
+
+    def _extract_pages(self, path: str, pages: List[int]) -> List[Tuple[int, str, float]]:
+        if not pages:
+            return []
+        if self.should_parallelize(len(pages)):
+            try:
+                return self._extract_parallel(path, pages)
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                logger.warning(f"Parallel PDF extraction failed ({e}) - falling back to serial extraction")
+        results = []
+        for start, end in make_ranges(pages, 1):
+            results.extend(extract_page_range(path, start, end))
+        return results
+
+    def _extract_parallel(self, path: str, pages: List[int]) -> List[Tuple[int, str, float]]:
+        ranges = make_ranges(pages, self.max_workers * RANGES_PER_WORKER)
+        logger.info(f"Extracting {len(pages)} PDF pages in {len(ranges)} ranges across {self.max_workers} workers")
+        # Each range's future and the pool it was submitted to
+        submitted = [self._submit(path, start, end) for start, end in ranges]
+        results = []
+        # Ranges are collected in submission order, which is page order
+        for (start, end), (future, pool) in zip(ranges, submitted):
+            try:
+                results.extend(future.result())
+            except CancelledError:
+                # Cancelled from outside this extractor: extract the range here
+                logger.warning(f"PDF pages {start + 1}-{end} were cancelled - extracting them serially")
+                results.extend(extract_page_range(path, start, end))
+            except (BrokenProcessPool, OSError, RuntimeError):
+                # Every range on the broken pool fails the same way; only the first replaces it
+                self._reset_pool(pool)
+                raise
+        return results
+
+    def _submit(self, path: str, start: int, end: int):
+        pool = self._get_pool(self.max_workers)
+        try:
+            future = pool.submit(extract_page_range, path, start, end)
+        except (BrokenProcessPool, RuntimeError):
+            # Broken, or shut down by another extractor that replaced it
+            self._reset_pool(pool)
+            pool = self._get_pool(self.max_workers)
+            future = pool.submit(extract_page_range, path, start, end)
+        return future, pool
+
+    @classmethod
+    def _get_pool(cls, workers: int):
+        if cls._pool is None or cls._pool_workers != workers:
+            cls._reset_pool()
+            cls._pool = new_process_pool(workers)
+            cls._pool_workers = workers
+        return cls._pool
+
+    @classmethod
+    def _reset_pool(cls, broken=None):
+        """
+        Drop the shared pool; with ``broken``, only if that pool is still the
+        shared one. Ranges already submitted to it (by other requests too)
+        still finish.
+        """
+        if broken is not None and cls._pool is not broken:
+            return
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False)
+        cls._pool = None
+        cls._pool_workers = 0
+
+
+_pdf_extractor = None
+
+
+def get_pdf_extractor() -> PdfExtractor:
+    """Get the shared extractor (with the page cache unless both tiers are disabled)."""
+    global _pdf_extractor
+    if _pdf_extractor is None:
+        cache = None
+        if PDF_PAGE_CACHE_SIZE > 0 or PDF_PAGE_CACHE_DB:
+            cache = PdfPageCache()
+        _pdf_extractor = PdfExtractor(cache=cache)
+    return _pdf_extractor
+
+
+def extract_pdf_pages(source) -> List[PageText]:
+    """Text of every page of a PDF (path, bytes or file-like), in page order."""
+    return get_pdf_extractor().extract(source)
@@ -1,23 +1,23 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
-def analyze_document_structure(sentence_data: List[Dict[str, Any]], document_type: str = "general") -> List[Dict[str, Any]]:
-    """
-    Analyzes the document structure by grouping sentences into blocks (paragraphs/sections).
-    Identifies high-level issues like flow inconsistencies, run-on sections, and structural gaps.
-    """
-    if not sentence_data:
-        return []
+# Insight targets that name the block by index (re-labelled when a block moves)
+BLOCK_TARGETS = {
+    "structural": "Paragraph {idx}",
+    "meaning_clarity": "Block {idx}",
+}
 
-    # 1. Group sentences into blocks
+def group_blocks(sentence_data: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Group sentences into blocks (paragraphs/sections) keyed by block_index."""
     blocks = {}
     for sent in sentence_data:
         b_idx = sent.get('block_index', 0)
         if b_idx not in blocks:
             blocks[b_idx] = {
                 "tag": sent.get('tag_name', 'p'),
+                "source": sent.get('source'),
                 "sentences": [],
                 "issues": 0,
                 "text": ""
@@ -25,46 +25,49 @@ def analyze_document_structure(sentence_data: List[Dict[str, Any]], document_typ
         blocks[b_idx]["sentences"].append(sent)
         blocks[b_idx]["issues"] += len(sent.get('feedback', []))
         blocks[b_idx]["text"] += " " + sent.get('sentence', '')
+    return blocks
 
+def analyze_block(idx: int, block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Insights for one paragraph or section."""
     insights = []
+    sent_count = len(block["sentences"])
+    issue_density = block["issues"] / sent_count if sent_count > 0 else 0
+    tag = block["tag"]
 
-    # 2. Analyze individual paragraphs (Blocks)
-    for idx, block in blocks.items():
-        sent_count = len(block["sentences"])
-        issue_density = block["issues"] / sent_count if sent_count > 0 else 0
-        tag = block["tag"]
+    # Run-on paragraph detection
+    if tag == 'p' and sent_count > 6:
+        insights.append({
+            "type": "structural",
+            "severity": "medium",
+            "target": BLOCK_TARGETS["structural"].format(idx=idx),
+            "message": f"This paragraph is quite long ({sent_count} sentences). Consider breaking it up to improve readability.",
+            "block_index": idx
+        })
 
-        # Run-on paragraph detection
-        if tag == 'p' and sent_count > 6:
-            insights.append({
-                "type": "structural",
-                "severity": "medium",
-                "target": f"Paragraph {idx}",
-                "message": f"This paragraph is quite long ({sent_count} sentences). Consider breaking it up to improve readability.",
-                "block_index": idx
-            })
+    # Section Header Analysis
+    if tag.startswith('h') and block["issues"] > 0:
+        insights.append({
+            "type": "block_meaning",
+            "severity": "high",
+            "target": f"Section Header: {block['text'][:50]}...",
+            "message": "Found issues in a major section header. Critical for document navigation and first impressions.",
+            "block_index": idx
+        })
 
-        # Section Header Analysis
-        if tag.startswith('h') and block["issues"] > 0:
-            insights.append({
-                "type": "block_meaning",
-                "severity": "high",
-                "target": f"Section Header: {block['text'][:50]}...",
-                "message": "Found issues in a major section header. Critical for document navigation and first impressions.",
-                "block_index": idx
-            })
-
-        # High Issue Density
-        if issue_density > 1.5:
-             insights.append({
-                "type": "meaning_clarity",
-                "severity": "high",
-                "target": f"Block {idx}",
-                "message": "This section has a high concentration of writing issues. The core meaning may be difficult for the reader to follow.",
-                "block_index": idx
-            })
+    # High Issue Density
+    if issue_density > 1.5:
+         insights.append({
+            "type": "meaning_clarity",
+            "severity": "high",
+            "target": BLOCK_TARGETS["meaning_clarity"].format(idx=idx),
+            "message": "This section has a high concentration of writing issues. The core meaning may be difficult for the reader to follow.",
+            "block_index": idx
+        })
+    return insights
 
-    # 3. Analyze Global Flow (Chapters/Sections)
+def analyze_global_flow(blocks: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Document-wide insights (Chapters/Sections)."""
+    insights = []
     # Detect tone shifts or missing summaries
     if len(blocks) > 5:
         headers = [b for b in blocks.values() if b["tag"].startswith('h')]
@@ -74,6 +77,86 @@ def analyze_document_structure(sentence_data: List[Dict[str, Any]], document_typ
                 "severity": "medium",
                 "message": "The document lacks a clear heading structure. Adding headers would help organize different meaning chapters."
             })
+    return insights
+
+def analyze_document_flow(blocks: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Global flow insights, per source file when the document combines several (zip uploads)."""
+    sources: Dict[Optional[str], Dict[int, Dict[str, Any]]] = {}
+    for idx, block in blocks.items():
+        sources.setdefault(block["source"], {})[idx] = block
+
+    insights = []
+    for source, source_blocks in sources.items():
+        for insight in analyze_global_flow(source_blocks):
+            if source is not None:
+                insight["source"] = source
+            insights.append(insight)
+    return insights
+
+def analyze_document_structure(sentence_data: List[Dict[str, Any]], document_type: str = "general") -> List[Dict[str, Any]]:
+    """
+    Analyzes the document structure by grouping sentences into blocks (paragraphs/sections).
+    Identifies high-level issues like flow inconsistencies, run-on sections, and structural gaps.
+    """
+    if not sentence_data:
+        return []
+
+    # 1. Group sentences into blocks
+    blocks = group_blocks(sentence_data)
+
+    insights = []
+
+    # 2. Analyze individual paragraphs (Blocks)
+    for idx, block in blocks.items():
+        insights.extend(analyze_block(idx, block))
+
+    # 3. Analyze Global Flow (Chapters/Sections)
+    insights.extend(analyze_document_flow(blocks))
 
     logger.info(f"🧠 Structural analysis found {len(insights)} holistic insights")
     return insights
+
+def reanalyze_document_structure(sentence_data: List[Dict[str, Any]], previous_insights: List[Dict[str, Any]],
+                                 reused_blocks: Dict[int, int], document_type: str = "general") -> List[Dict[str, Any]]:
+    """
+    Structural analysis of a revised document that only re-analyzes affected blocks.
+
+    Args:
+        sentence_data: Sentences of the revised document
+        previous_insights: Insights of the previous revision
+        reused_blocks: New block index -> previous block index, for blocks whose
+                       sentences and feedback are unchanged
+        document_type: Document type from the review gate
+
+    Returns:
+        The same insights analyze_document_structure() would produce
+    """
+    if not sentence_data:
+        return []
+
+    blocks = group_blocks(sentence_data)
+    previous_by_block: Dict[int, List[Dict[str, Any]]] = {}
+    for insight in previous_insights:
+        if "block_index" in insight:
+            previous_by_block.setdefault(insight["block_index"], []).append(insight)
+
+    insights = []
+    reanalyzed = 0
+    for idx, block in blocks.items():
+        if idx in reused_blocks:
+            insights.extend(relabel_insight(insight, idx) for insight in previous_by_block.get(reused_blocks[idx], []))
+        else:
+            insights.extend(analyze_block(idx, block))
+            reanalyzed += 1
+
+    insights.extend(analyze_document_flow(blocks))
+
+    logger.info(f"🧠 Structural analysis re-ran {reanalyzed}/{len(blocks)} blocks, {len(insights)} holistic insights")
+    return insights
+
+def relabel_insight(insight: Dict[str, Any], idx: int) -> Dict[str, Any]:
+    """Copy a block insight to the block's new index."""
+    insight = dict(insight, block_index=idx)
+    if insight.get("type") in BLOCK_TARGETS:
+        insight["target"] = BLOCK_TARGETS[insight["type"]].format(idx=idx)
+    return insight
@@ -0,0 +1,26 @@
+"""
+Worker process pools.
+
+Every process pool in the app (sentence analysis shards, ZIP members, PDF
+page ranges, review jobs, batch reviews) is created here, so they all
+start their workers the same way: spawned, never forked. Pools are
+created lazily from request or dispatcher threads that may hold locks
+(SQLite, logging, the spaCy model); a forked child inherits those locks
+in whatever state they were in and can deadlock. Spawned workers start
+from a clean interpreter and import what they need.
+"""
+
+import concurrent.futures
+import multiprocessing
+from typing import Callable, Optional
+
+WORKER_START_METHOD = 'spawn'
+
+
+def new_process_pool(max_workers: int,
+                     initializer: Optional[Callable[[], None]] = None) -> concurrent.futures.ProcessPoolExecutor:
+    """A ProcessPoolExecutor whose workers use WORKER_START_METHOD."""
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+        initializer=initializer
+    )
@@ -11,7 +11,6 @@ from pathlib import Path
 import logging
 
 # Document parsing libraries
-import PyPDF2
 from docx import Document as DocxDocument
 from bs4 import BeautifulSoup
 import nltk
@@ -90,20 +89,19 @@ class DocumentParser:
             raise
     
     def _parse_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Parse PDF file using PyPDF2."""
+        """Parse PDF file using the shared page-parallel, page-cached engine."""
+        from core.pdf_extraction import extract_pdf_pages
+
         pages = []
         text_parts = []
         
-        with open(file_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            
-            for page_num, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                pages.append({
-                    'page_number': page_num + 1,
-                    'text': page_text
-                })
-                text_parts.append(page_text)
+        for page in extract_pdf_pages(str(file_path)):
+            pages.append({
+                'page_number': page.page_number,
+                'text': page.text,
+                'extraction_seconds': round(page.seconds, 4)
+            })
+            text_parts.append(page.text)
         
         full_text = '\n\n'.join(text_parts)
         
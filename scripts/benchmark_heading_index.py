@@ -0,0 +1,81 @@
+"""
+Benchmark the heading index behind is_title_or_heading (app/rules/title_utils.py).
+
+The rules ask whether a sentence is a title once per sentence or token of
+the content they check. The old check parsed the whole HTML with
+BeautifulSoup and scanned every heading on each call; the index is built
+once per document and answers each call in time proportional to the
+sentence. Both are timed on synthetic heading-heavy documents.
+
+Usage:
+    python scripts/benchmark_heading_index.py [--calls N] [--repeat N]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from app.rules.title_utils import HEADING_TAGS, HeadingIndex, get_heading_index
+
+
+def synthetic_document(sections):
+    """Sections of a heading and one short paragraph each."""
+    return "".join(
+        f"<h2>Section {i}: Configure node {i} of the cluster</h2>"
+        f"<p>The installer writes the configuration file for node {i}.</p>"
+        for i in range(sections)
+    )
+
+
+def heading_loop(text, html_content):
+    """The heading part of is_title_or_heading before the index."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for heading in soup.find_all(HEADING_TAGS):
+        heading_text = heading.get_text().strip()
+        if heading_text == text or text in heading_text or heading_text in text:
+            return True
+    return False
+
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the title check heading index")
+    parser.add_argument('--calls', type=int, default=200, help='Title checks per document (one per token)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    sentence = "The installer writes the configuration file for node 7."
+    print(f"{'headings':>9} {'html KB':>8} {'loop ms/call':>13} {'build ms':>9} {'index us/call':>14} {'speedup':>8}")
+    for sections in (10, 100, 1000, 5000):
+        html_content = synthetic_document(sections)
+        calls = max(1, args.calls // max(1, sections // 100))
+        loop = best_of(args.repeat, lambda: [heading_loop(sentence, html_content) for _ in range(calls)]) / calls
+
+        build = best_of(args.repeat, lambda: HeadingIndex(
+            h.get_text() for h in BeautifulSoup(html_content, "html.parser").find_all(HEADING_TAGS)))
+        index = get_heading_index(html_content)
+        lookup = best_of(args.repeat, lambda: [index.matches(sentence) for _ in range(args.calls)]) / args.calls
+        assert index.matches(sentence) == heading_loop(sentence, html_content)
+
+        # A rule calling the check for `args.calls` tokens: N parses vs one build + N lookups
+        speedup = (loop * args.calls) / (build + lookup * args.calls)
+        print(f"{sections:>9} {len(html_content) / 1024:>8.1f} {loop * 1000:>13.2f} {build * 1000:>9.1f} "
+              f"{lookup * 1e6:>14.1f} {speedup:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
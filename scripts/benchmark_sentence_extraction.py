@@ -0,0 +1,97 @@
+"""
+Benchmark sentence extraction (app/sentence_extraction.py).
+
+Times extract_sentences on the sample documents in the repository (parsed the
+same way /upload parses them) and on synthetic documents of growing size and
+nesting depth, to check that extraction time grows linearly with the input.
+
+Usage:
+    python scripts/benchmark_sentence_extraction.py [--repeat N] [files ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.app import parse_md, parse_txt
+from app.sentence_extraction import extract_sentences
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_DOCUMENTS = [
+    'demo_document.txt',
+    'tests/golden_document.txt',
+    'README.md',
+    'ARCHITECTURE_DIAGRAM.md',
+    'UPLOAD_HERE.html',
+    'field-test-readme.html',
+    'field-test-status.html',
+    'field-test-recent-docs.html',
+    'batch_report.html',
+    'comparison_report.html',
+]
+
+
+def load_html(path):
+    """Read a sample document and convert it to HTML like parse_file does."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith('.md'):
+        return parse_md(content)
+    if path.endswith('.txt'):
+        return parse_txt(content)
+    return content.decode('utf-8', errors='replace')
+
+
+def synthetic_document(sections, depth):
+    """Sections of nested divs, each with a heading, a list and inline-marked paragraphs."""
+    parts = []
+    for i in range(sections):
+        body = (
+            f"<h2>Section {i}</h2>"
+            f"<p>The <strong>configuration file</strong> was written by the installer. "
+            f"Click <code>Save</code> to keep section {i}. It is very simply done!</p>"
+            f"<ul><li>Note: the <em>first</em> item.</li><li>Second item.</li></ul>"
+        )
+        parts.append("<div>" * depth + body + "</div>" * depth)
+    return "".join(parts)
+
+
+def time_extraction(html_content, repeat):
+    best = None
+    sentences = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sentences = extract_sentences(html_content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(sentences)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark HTML sentence extraction")
+    parser.add_argument('files', nargs='*', help='Documents to time (default: repository samples)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per document (best is reported)')
+    args = parser.parse_args()
+
+    documents = [(path, load_html(path)) for path in args.files] if args.files else [
+        (name, load_html(os.path.join(REPO_ROOT, name)))
+        for name in SAMPLE_DOCUMENTS if os.path.exists(os.path.join(REPO_ROOT, name))
+    ]
+    for sections, depth in [(100, 1), (400, 1), (1600, 1), (400, 20), (400, 80)]:
+        documents.append((f"synthetic {sections} sections, depth {depth}", synthetic_document(sections, depth)))
+
+    print(f"{'document':45} {'bytes':>9} {'sentences':>10} {'ms':>9} {'us/KB':>8}")
+    print("-" * 85)
+    for name, html_content in documents:
+        elapsed, count = time_extraction(html_content, args.repeat)
+        size = len(html_content.encode('utf-8'))
+        per_kb = elapsed * 1e6 / max(size / 1024, 1e-9)
+        print(f"{name[:45]:45} {size:9d} {count:10d} {elapsed * 1000:9.2f} {per_kb:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
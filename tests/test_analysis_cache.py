@@ -0,0 +1,130 @@
+"""
+Tests for the content-addressed sentence analysis cache.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analysis_cache import SentenceAnalysisCache, headings_hash, ruleset_version, sentence_key
+from app.parallel_analysis import SentenceAnalysisExecutor, SentenceJob
+from app.rules.nlp_context import DocumentContext
+
+
+RESULT = ([{"text": "was written", "start": 4, "end": 15, "message": "Passive voice"}], {"flesch": 60.0}, 80.0)
+
+
+def test_key_depends_on_text_neighbours_and_version():
+    base = sentence_key("The file was written.", "Intro.", "Outro.", "v1")
+    assert base == sentence_key("The file was written.", "Intro.", "Outro.", "v1")
+    assert base != sentence_key("The file was written!", "Intro.", "Outro.", "v1")
+    assert base != sentence_key("The file was written.", "Other.", "Outro.", "v1")
+    assert base != sentence_key("The file was written.", "Intro.", None, "v1")
+    assert base != sentence_key("The file was written.", "Intro.", "Outro.", "v2")
+    assert base == sentence_key("The file was written.", "Intro.", "Outro.", "v1", headings_hash([]))
+    with_heading = sentence_key("The file was written.", "Intro.", "Outro.", "v1", headings_hash(["Intro."]))
+    assert base != with_heading
+    assert with_heading == sentence_key("The file was written.", "Intro.", "Outro.", "v1",
+                                        headings_hash({"Intro.", "Intro."}))
+    assert headings_hash(["A", "B"]) == headings_hash(["B", "A"]) != headings_hash(["AB"])
+    assert len(ruleset_version()) == 16
+
+
+
+def test_lexicon_edits_change_the_ruleset_version(tmp_path, monkeypatch):
+    from app.rules import terminology_lexicon
+    path = tmp_path / "lexicon.json"
+    path.write_text('{"entries": [{"group": "vague", "phrases": ["stuff"]}]}', encoding="utf-8")
+    monkeypatch.setattr(terminology_lexicon, "TERMINOLOGY_LEXICON", str(path))
+    try:
+        before = ruleset_version(refresh=True)
+        assert ruleset_version(refresh=True) == before
+        path.write_text('{"entries": [{"group": "vague", "phrases": ["stuff", "things"]}]}', encoding="utf-8")
+        assert ruleset_version(refresh=True) != before
+    finally:
+        monkeypatch.undo()
+        ruleset_version(refresh=True)
+
+def test_lookups_return_independent_copies():
+    cache = SentenceAnalysisCache(max_entries=10, db_path=None, version="v1")
+    cache.put("k", RESULT)
+    first = cache.get("k")
+    first[0][0]["sentence_index"] = 3
+    assert cache.get("k") == (RESULT[0], RESULT[1], RESULT[2])
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_tier_evicts_oldest_entry():
+    cache = SentenceAnalysisCache(max_entries=2, db_path=None, version="v1")
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    cache.get("a")
+    cache.put("c", RESULT)
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_sqlite_tier_is_shared_and_versioned(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    writer = SentenceAnalysisCache(max_entries=0, db_path=db_path, version="v1")
+    writer.put("k", RESULT)
+    assert writer.get("k") is not None  # Pending writes are visible before flush
+    writer.flush()
+
+    reader = SentenceAnalysisCache(max_entries=10, db_path=db_path, version="v1")
+    assert reader.get("k")[2] == 80.0
+
+    # A new ruleset version drops the old entries
+    SentenceAnalysisCache(max_entries=0, db_path=db_path, version="v2")
+    assert SentenceAnalysisCache(max_entries=0, db_path=db_path, version="v1").get("k") is None
+
+
+def test_executor_only_analyzes_uncached_sentences():
+    calls = []
+
+    def analyze(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+        calls.append(sentence)
+        return [{"message": sentence}], {}, 50.0
+
+    texts = ["One.", "Two.", "Three."]
+    jobs = [SentenceJob(i, t, texts[i - 1] if i else None, texts[i + 1] if i < 2 else None)
+            for i, t in enumerate(texts)]
+    cache = SentenceAnalysisCache(max_entries=100, db_path=None, version="v1")
+    executor = SentenceAnalysisExecutor(analyze, [], max_workers=1, cache=cache)
+
+    first = executor.run(jobs)
+    assert calls == texts
+
+    # Edit the last sentence: it and its neighbour are re-analyzed
+    edited = jobs[:1] + [jobs[1]._replace(next_sentence="Four."), SentenceJob(2, "Four.", "Two.", None)]
+    second = executor.run(edited)
+    assert calls == texts + ["Two.", "Four."]
+    assert list(second) == [0, 1, 2]
+    assert second[0] == first[0]
+    assert second[2][0] == [{"message": "Four."}]
+
+
+def test_changed_headings_invalidate_cached_sentences():
+    calls = []
+
+    def analyze(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+        calls.append(sentence)
+        return [{"message": sentence}], {}, 50.0
+
+    texts = ["Setup", "Click Save."]
+    jobs = [SentenceJob(0, texts[0], None, texts[1]), SentenceJob(1, texts[1], texts[0], None)]
+    cache = SentenceAnalysisCache(max_entries=100, db_path=None, version="v1")
+    executor = SentenceAnalysisExecutor(analyze, [], max_workers=1, cache=cache)
+
+    executor.run(jobs, DocumentContext(texts))
+    executor.run(jobs, DocumentContext(texts))
+    assert calls == texts
+
+    # Same sentences, but "Setup" is now a heading: every sentence is re-analyzed
+    executor.run(jobs, DocumentContext(texts, headings=["Setup"]))
+    assert calls == texts + texts
+    executor.run(jobs, DocumentContext(texts, headings=["Setup"]))
+    assert calls == texts + texts
@@ -0,0 +1,142 @@
+"""
+Tests for the parallel zip batch review behind /upload_batch.
+"""
+
+import sys
+import os
+import concurrent.futures
+import io
+import threading
+import time
+import zipfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batch_review import BatchReviewer
+
+
+def echo_pipeline(filename, data, room_id, progress_tracker):
+    """Stand-in for review_upload_job: returns the member contents as its only sentence."""
+    progress_tracker.update_stage(room_id, 1, "Parsing...")
+    if data == b"fail":
+        return None, "Could not parse", None
+    if data == b"crash":
+        os._exit(1)
+    if data.startswith(b"slow"):
+        for _ in range(100):
+            progress_tracker.update_progress(room_id, 50, "Analyzing...")
+            time.sleep(0.02)
+    payload = {"sentences": [{"sentence": data.decode(), "feedback": []}], "room_id": room_id,
+               "review_id": "r-" + filename}
+    return payload, None, {"pid": os.getpid()}
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer)
+
+
+def review_all(reviewer, archive, room_id="room"):
+    members, skipped = reviewer.plan(archive)
+    return {result.filename: result for result in reviewer.review(archive, members, room_id)}, skipped
+
+
+def test_members_are_reviewed_in_parallel_without_extraction():
+    archive = make_zip({
+        "docs/a.txt": b"Alpha.", "docs/b.md": b"Beta.", "c.adoc": b"Gamma.", "d.txt": b"fail",
+        "image.png": b"\x89PNG", "__MACOSX/docs/._a.txt": b"junk",
+    })
+    snapshots = {}
+    reviewer = BatchReviewer(echo_pipeline, max_workers=2, on_snapshot=snapshots.__setitem__)
+    try:
+        results, skipped = review_all(reviewer, archive)
+    finally:
+        BatchReviewer._reset_pool()
+
+    assert sorted(results) == ["c.adoc", "d.txt", "docs/a.txt", "docs/b.md"]
+    assert skipped == ["image.png", "__MACOSX/docs/._a.txt"]
+    assert results["docs/a.txt"].payload["sentences"][0]["sentence"] == "Alpha."
+    assert results["docs/a.txt"].payload["room_id"] == "room/docs/a.txt"
+    assert results["d.txt"].error == "Could not parse"
+    assert sorted(snapshots) == ["r-c.adoc", "r-docs/a.txt", "r-docs/b.md"]
+    assert all(snapshot["pid"] != os.getpid() for snapshot in snapshots.values())
+
+
+def test_size_and_count_budgets():
+    archive = make_zip({"a.txt": b"x" * 10, "big.txt": b"x" * 50, "b.txt": b"x" * 10, "c.txt": b"x" * 10,
+                        "d.txt": b"x" * 10})
+    reviewer = BatchReviewer(echo_pipeline, max_workers=1, max_files=4, max_file_bytes=40, max_total_bytes=25)
+    results, _ = review_all(reviewer, archive)
+
+    assert results["a.txt"].error is None and results["b.txt"].error is None
+    assert "larger than 40 bytes" in results["big.txt"].error
+    assert "Batch size limit" in results["c.txt"].error
+    assert "file limit" in results["d.txt"].error
+
+
+def test_file_time_budget_stops_a_review():
+    archive = make_zip({"slow.txt": b"slow", "fast.txt": b"Fast."})
+    reviewer = BatchReviewer(echo_pipeline, max_workers=1, file_timeout=0.2)
+    results, _ = review_all(reviewer, archive)
+
+    assert "time budget" in results["slow.txt"].error
+    assert results["slow.txt"].seconds < 1.5
+    assert results["fast.txt"].error is None
+
+
+def test_worker_crash_fails_only_the_reviews_on_the_broken_pool():
+    members = {"crash.txt": b"crash"}
+    members.update((f"{i}.txt", b"slow" if i < 3 else f"Doc {i}.".encode()) for i in range(8))
+    reviewer = BatchReviewer(echo_pipeline, max_workers=2)
+    try:
+        results, _ = review_all(reviewer, make_zip(members))
+        assert BatchReviewer._pool is not None
+    finally:
+        BatchReviewer._reset_pool()
+
+    assert sorted(results) == sorted(members)
+    assert results["crash.txt"].error == "Review worker crashed"
+    # Reviews submitted after the crash run on a single replacement pool
+    assert results["7.txt"].error is None and results["7.txt"].payload["sentences"][0]["sentence"] == "Doc 7."
+
+
+def test_pool_replaced_by_another_batch_keeps_running_reviews():
+    members = {f"{i}.txt": b"slow" for i in range(4)}
+    members.update({"late.txt": b"Late."})
+    reviewer = BatchReviewer(echo_pipeline, max_workers=2, total_timeout=30)
+    # Another batch replaces the shared pool while these reviews run
+    timer = threading.Timer(0.5, BatchReviewer._reset_pool)
+    timer.start()
+    try:
+        results, _ = review_all(reviewer, make_zip(members))
+    finally:
+        timer.cancel()
+        BatchReviewer._reset_pool()
+
+    assert sorted(results) == sorted(members)
+    assert all(result.error is None for result in results.values())
+
+
+class CancellingPool:
+    """A pool whose reviews are all cancelled before they run."""
+
+    def submit(self, *args):
+        future = concurrent.futures.Future()
+        future.cancel()
+        future.set_running_or_notify_cancel()
+        return future
+
+
+def test_cancelled_review_is_a_failed_file():
+    archive = make_zip({"a.txt": b"Alpha.", "b.txt": b"Beta."})
+    reviewer = BatchReviewer(echo_pipeline, max_workers=2)
+    members, _ = reviewer.plan(archive)
+    inputs = reviewer._iter_inputs(archive, members, "room", time.time() + 10)
+    results = list(reviewer._review_parallel(CancellingPool(), inputs, time.time() + 10))
+    assert sorted((result.filename, result.error) for result in results) == [
+        ("a.txt", "Review was cancelled"), ("b.txt", "Review was cancelled")]
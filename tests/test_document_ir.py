@@ -0,0 +1,86 @@
+"""
+Tests for the block-level document IR shared by the upload pipeline.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from core.document_ir import DocumentIR
+from core.document_review_gate import run_document_review_gate
+
+HTML = (
+    "<h1>Install the agent</h1><p>This guide shows how to <strong>install</strong> it.</p>"
+    "<ol><li>Download the <code>agent</code> package.</li><li><p>Run the installer.</p></li></ol>"
+    "<table><tr><td>Port</td><td>8080</td></tr></table><!-- note --><div><span>Done.</span></div>"
+)
+
+
+def test_only_innermost_blocks_are_selected():
+    html = (
+        "<div><h1>Title</h1><div><p>First para.</p><ul><li>Item one.</li></ul></div>"
+        "<div>Leaf div text.</div><p></p></div>"
+    )
+    document = DocumentIR.from_html(html)
+    assert [(block.index, block.tag, block.text) for block in document.blocks] == [
+        (0, "h1", "Title"), (1, "p", "First para."), (2, "li", "Item one."), (3, "div", "Leaf div text.")
+    ]
+
+
+def test_blocks_carry_inline_spans_and_html():
+    block = DocumentIR.from_html(HTML).blocks[1]
+    assert block.tag == "p"
+    assert block.text == "This guide shows how to  install  it."
+    assert [(span.tag, block.text[span.start:span.end]) for span in block.spans] == [("strong", "install")]
+    assert block.html == "This guide shows how to <strong>install</strong> it."
+    assert block.source_line == 1
+
+
+def test_element_index_matches_beautifulsoup():
+    soup = BeautifulSoup(HTML, "html.parser")
+    document = DocumentIR.from_html(HTML)
+
+    assert document.text == soup.get_text()
+    assert document.plain_text == soup.get_text(separator="\n")
+    for names in ("p", "ol", "table", ["h1", "h2"], ["ul", "li"], ["h1", "h2", "h3", "p", "li"]):
+        assert [e.get_text() for e in document.find_all(names)] == [e.get_text() for e in soup.find_all(names)]
+        assert [e.name for e in document.find_all(names)] == [e.name for e in soup.find_all(names)]
+
+
+def test_review_gate_accepts_ir_or_html():
+    from_ir = run_document_review_gate(DocumentIR.from_html(HTML), "guide.html")
+    from_html = run_document_review_gate(HTML, "guide.html")
+    assert from_ir.to_ui() == from_html.to_ui()
+    assert from_ir.document_type == "procedure"
+
+
+
+def test_parts_split_a_combined_document_per_source_file():
+    combined = (
+        "<h2>Contents of ZIP file:</h2>"
+        f'<section data-source="guide.md"><h3>guide.md</h3>{HTML}</section>'
+        '<section data-source="notes.txt"><h3>notes.txt</h3><p>Some notes.</p><p>More notes.</p></section>'
+    )
+    document = DocumentIR.from_html(combined)
+    assert [part.name for part in document.parts] == ["guide.md", "notes.txt"]
+    assert [block.source for block in document.blocks[:2]] == [None, "guide.md"]
+    assert document.blocks[-1].source == "notes.txt"
+
+    (guide, guide_document), (notes, notes_document) = document.part_documents()
+    standalone = DocumentIR.from_html("<h3>guide.md</h3>" + HTML)
+    assert guide_document.text == standalone.text
+    assert [element.get_text() for element in guide_document.find_all(["h1", "h3", "li", "td"])] == [
+        element.get_text() for element in standalone.find_all(["h1", "h3", "li", "td"])
+    ]
+    assert [block.text for block in notes_document.blocks] == ["notes.txt", "Some notes.", "More notes."]
+    assert notes_document.blocks[0].index == notes.first_block
+
+    review = run_document_review_gate(document, "docs.zip")
+    assert [name for name, _ in review.parts] == ["guide.md", "notes.txt"]
+    assert review.parts[0][1].to_ui() == run_document_review_gate(standalone, "guide.md").to_ui()
+    assert all(issue.section.split(":")[0] in ("guide.md", "notes.txt") for issue in review.issues)
+    assert [part["name"] for part in review.to_ui()["files"]] == ["guide.md", "notes.txt"]
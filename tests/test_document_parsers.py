@@ -0,0 +1,151 @@
+"""
+Tests for the streaming upload parsers (txt/adoc/docx/zip).
+"""
+
+import sys
+import os
+import concurrent.futures
+import io
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app import document_parsers
+from app.document_parsers import (ZipMemberTooLarge, ZipParser, iter_decoded, iter_paragraphs, parse_docx,
+                                  parse_txt, read_zip_member)
+from core.document_ir import DocumentIR
+
+
+@pytest.mark.parametrize("text", [
+    "", "one", "one\n\ntwo", "a\n\n\nb", "a\n\n\n\nb\n\n", "\n\nlead", "é\n\nü\n\n\n", "x\ny\n\nz",
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+def test_streamed_paragraphs_match_split(monkeypatch, text, chunk_size):
+    monkeypatch.setattr(document_parsers, "PARSE_CHUNK_SIZE", chunk_size)
+    chunks = iter_decoded(io.BytesIO(text.encode("utf-8")))
+    assert list(iter_paragraphs(chunks)) == text.split("\n\n")
+
+
+def test_parse_txt_accepts_bytes_and_streams():
+    content = "First paragraph.\n\nSecond \xff paragraph.".encode("latin-1")
+    expected = "".join(f"<p>{p}</p>" for p in content.decode("utf-8", errors="replace").split("\n\n"))
+    assert parse_txt(content) == expected
+    assert parse_txt(io.BytesIO(content)) == expected
+
+
+def test_docx_styles_map_to_headings_lists_and_tables():
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    document.add_heading("Install guide", 0)
+    document.add_heading("Before you begin", 2)
+    document.add_paragraph("Back up <config> & logs.")
+    document.add_paragraph("Stop the service.", style="List Number")
+    document.add_paragraph("Run the installer.", style="List Number")
+    document.add_paragraph("Optional step.", style="List Bullet")
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Port"
+    table.cell(0, 1).text = "8080"
+    document.add_paragraph("Done.")
+    stream = io.BytesIO()
+    document.save(stream)
+    stream.seek(0)
+
+    assert parse_docx(stream) == (
+        "<h1>Install guide</h1><h2>Before you begin</h2>"
+        "<p>Back up &lt;config&gt; &amp; logs.</p>"
+        "<ol><li>Stop the service.</li><li>Run the installer.</li></ol>"
+        "<ul><li>Optional step.</li></ul>"
+        "<table><tr><td>Port</td><td>8080</td></tr></table>"
+        "<p>Done.</p>"
+    )
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parse_zip_emits_one_section_per_member(max_workers):
+    archive = make_zip({"b.txt": "Beta one.\n\nBeta two.", "docs/a.md": "# Alpha\n\nText.", "image.png": "x"})
+    parser = ZipParser(max_workers=max_workers, min_parallel_bytes=0)
+    try:
+        html_content = parser.parse(archive)
+    finally:
+        ZipParser._reset_pool()
+
+    document = DocumentIR.from_html(html_content)
+    assert [part.name for part in document.parts] == ["b.txt", "docs/a.md"]
+    assert [(block.source, block.text) for block in document.blocks if block.tag != "h3"] == [
+        (None, "Contents of ZIP file:"), (None, "Found 2 supported document(s) in ZIP file:"),
+        ("b.txt", "Beta one."), ("b.txt", "Beta two."), ("docs/a.md", "Alpha"), ("docs/a.md", "Text."),
+    ]
+
+
+
+class FailingPool:
+    """A shared pool stand-in whose members are all cancelled, or all fail with ``error``."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.shut_down = False
+
+    def submit(self, *args):
+        future = concurrent.futures.Future()
+        if self.error is None:
+            future.cancel()
+            future.set_running_or_notify_cancel()
+        else:
+            future.set_exception(self.error)
+        return future
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_failed_zip_workers_fall_back_without_disturbing_other_pools(monkeypatch):
+    members = {"a.txt": "Alpha.", "b.txt": "Beta.", "c.txt": "Gamma."}
+    expected = ZipParser(max_workers=1).parse(make_zip(members))
+    parser = ZipParser(max_workers=2, min_parallel_bytes=0)
+    monkeypatch.setattr(ZipParser, "_pool_workers", 2)
+
+    # Members cancelled by another upload are parsed here; the pool stays
+    cancelling = FailingPool()
+    monkeypatch.setattr(ZipParser, "_pool", cancelling)
+    assert parser.parse(make_zip(members)) == expected
+    assert ZipParser._pool is cancelling and not cancelling.shut_down
+
+    # A stale broken pool does not reset the shared one
+    ZipParser._reset_pool(FailingPool(BrokenProcessPool("crashed")))
+    assert ZipParser._pool is cancelling
+
+    # A broken shared pool is replaced once; its members are parsed here
+    broken = FailingPool(BrokenProcessPool("crashed"))
+    monkeypatch.setattr(ZipParser, "_pool", broken)
+    assert parser.parse(make_zip(members)) == expected
+    assert broken.shut_down and ZipParser._pool is None
+
+def test_parse_zip_limits_decompressed_size():
+    archive = make_zip({"bomb.txt": "a" * 100000, "small.txt": "Small.", "next.txt": "Next."})
+    html_content = ZipParser(max_workers=1, max_member_bytes=50000, max_total_bytes=8).parse(archive)
+    sections = {part.name: DocumentIR.from_html(html_content).text[part.start:part.end]
+                for part in DocumentIR.from_html(html_content).parts}
+    assert "exceeds the ZIP size limits" in sections["bomb.txt"]
+    assert "Small." in sections["small.txt"]
+    assert "exceeds the ZIP size limits" in sections["next.txt"]
+
+
+def test_read_zip_member_enforces_its_limit():
+    archive = zipfile.ZipFile(make_zip({"a.txt": "a" * 1000}))
+    info = archive.getinfo("a.txt")
+    assert read_zip_member(archive, info, 1000) == b"a" * 1000
+    with pytest.raises(ZipMemberTooLarge):
+        read_zip_member(archive, info, 999)
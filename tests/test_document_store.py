@@ -0,0 +1,73 @@
+"""
+Tests for the session-scoped document store used by /ai_suggestion.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.document_store import SessionDocumentStore
+
+
+def make_document(name, count=3):
+    sentences = [f"{name} sentence {i}." for i in range(count)]
+    return {"filename": f"{name}.md", "plain_text": " ".join(sentences), "sentences": sentences}
+
+
+def test_documents_are_isolated_per_session():
+    store = SessionDocumentStore(db_path=None)
+    store.put(["review-a", "room-a"], make_document("alpha"))
+    store.put(["review-b", "room-b"], make_document("beta"))
+
+    assert store.get("room-a")["filename"] == "alpha.md"
+    assert store.get("review-b")["filename"] == "beta.md"
+    assert store.get("unknown") is None
+    assert store.get(None) is None
+
+
+def test_sentence_context_returns_neighbours():
+    store = SessionDocumentStore(db_path=None)
+    store.put(["review-a"], make_document("alpha"))
+
+    assert store.sentence_context("review-a", 1) == {
+        "sentence": "alpha sentence 1.",
+        "previous_sentence": "alpha sentence 0.",
+        "next_sentence": "alpha sentence 2.",
+    }
+    assert store.sentence_context("review-a", 0)["previous_sentence"] is None
+    assert store.sentence_context("review-a", 2)["next_sentence"] is None
+    assert store.sentence_context("review-a", 3) is None
+
+
+def test_memory_budget_evicts_least_recently_used():
+    size = len(" ".join(make_document("alpha")["sentences"])) * 2
+    store = SessionDocumentStore(max_bytes=size * 2, db_path=None)
+    store.put(["a"], make_document("alpha"))
+    store.put(["b"], make_document("bravo"))
+    store.get("a")
+    store.put(["c"], make_document("gamma"))
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+    assert store.stats()["memory_bytes"] <= size * 2
+
+
+def test_expired_documents_are_dropped():
+    store = SessionDocumentStore(ttl=-1, db_path=None)
+    store.put(["a"], make_document("alpha"))
+    assert store.get("a") is None
+
+
+def test_sqlite_tier_is_shared_and_survives_eviction(tmp_path):
+    db_path = str(tmp_path / "documents.db")
+    writer = SessionDocumentStore(max_bytes=0, db_path=db_path)
+    writer.put(["review-a", "room-a"], make_document("alpha"))
+
+    # Another worker process sees the same document
+    reader = SessionDocumentStore(db_path=db_path)
+    assert reader.sentence_context("room-a", 1)["sentence"] == "alpha sentence 1."
+    assert writer.get("review-a")["filename"] == "alpha.md"
+    assert reader.stats()["memory_documents"] == 1
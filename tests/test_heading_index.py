@@ -0,0 +1,67 @@
+"""
+Tests for the heading index behind the title checks (app/rules/title_utils.py).
+"""
+
+import sys
+import os
+import random
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rules import title_utils
+from app.rules.nlp_context import DocumentContext
+from app.rules.title_utils import HeadingIndex, get_heading_index, is_title_or_heading
+
+
+def reference_matches(text, headings):
+    """The heading loop is_title_or_heading used to run for every call."""
+    text = text.strip()
+    return any(heading == text or text in heading or heading in text for heading in headings)
+
+
+def test_index_matches_the_heading_loop():
+    rng = random.Random(7)
+    words = ["alpha", "beta", "gamma", "setup", "guide", "the", "a", "of"]
+    headings = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(40)]
+    index = HeadingIndex(headings)
+    texts = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 6))) for _ in range(500)]
+    texts += ["lph", "a gamm", "zeta", "guide of the", "x" * 200]
+    for text in texts:
+        assert index.matches(text) == reference_matches(text, headings), text
+
+
+def test_each_lookup():
+    index = HeadingIndex(["Getting Started", "  Install   the server ", ""])
+    assert len(index) == 2
+    assert index.is_heading("Install the server") and not index.is_heading("Install")
+    assert index.in_heading("the serv") and not index.in_heading("Started Install")
+    assert index.contains_heading("Read Getting Started first.") and not index.contains_heading("Getting started")
+    assert not HeadingIndex([]).matches("anything")
+
+
+def test_html_index_is_built_once(monkeypatch):
+    html = "<h1>Overview</h1><p>Body text.</p><h2>Set up the server</h2>"
+    index = get_heading_index(html)
+    assert get_heading_index(html) is index
+    assert get_heading_index("plain text, no markup") is title_utils.EMPTY_HEADING_INDEX
+
+    def fail(*args, **kwargs):
+        raise AssertionError("content was parsed again")
+
+    monkeypatch.setattr(title_utils, "BeautifulSoup", fail)
+    for _ in range(3):
+        assert is_title_or_heading("Read Overview and then continue.", html)
+        assert not is_title_or_heading("This is a regular sentence.", html)
+
+
+def test_document_headings_from_the_shared_context():
+    html = "<h1>Overview</h1><p>See the Overview page for more.</p><h2>Configuration of the system</h2>"
+    context = DocumentContext.from_html(html, ["See the Overview page for more.", "Configuration of the system"],
+                                       nlp=lambda text: None)
+    index = context.sentence(0).heading_index
+    assert index is context.heading_index is context.sentence(1).heading_index
+    # A document heading (or part of one) is a title; a sentence mentioning one is not
+    assert is_title_or_heading("the system", headings=index)
+    assert not is_title_or_heading("See the Overview page for more.", headings=index)
+    assert is_title_or_heading("See the Overview page for more.", html)
@@ -0,0 +1,86 @@
+"""
+Tests for the shared retrievers and fused hybrid search (app/advanced_retrieval.py).
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.advanced_retrieval import RRF_K, RetrievalResult, RetrieverManager, create_retriever, get_retriever
+from app.performance_monitor import get_performance_monitor
+
+
+def result(chunk_id, score, method, content="Shared boilerplate."):
+    return RetrievalResult(chunk_id=chunk_id, content=content, relevance_score=score,
+                           retrieval_method=method, source_doc_id="guide", metadata={})
+
+
+def make_retriever(tmp_path, embedding, keyword, delay=0.0):
+    retriever = RetrieverManager().get(str(tmp_path))
+
+    def leg(results):
+        def retrieve(query, n_results, source_filter=None):
+            time.sleep(delay)
+            return [result(*item) for item in results][:n_results]
+        return retrieve
+
+    # Stand-in for the Chroma collection, so the embedding leg runs
+    retriever.collection = object()
+    retriever.retrieve_embedding = leg([(chunk_id, score, "embedding") for chunk_id, score in embedding])
+    retriever.retrieve_keyword = leg([(chunk_id, score, "keyword") for chunk_id, score in keyword])
+    return retriever
+
+
+def test_rank_fusion_is_keyed_by_chunk_id(tmp_path):
+    # Every chunk has the same text: merging by content would collapse them
+    retriever = make_retriever(tmp_path, embedding=[("a", 0.9), ("b", 0.8), ("c", 0.7)],
+                               keyword=[("b", 12.0), ("c", 6.0)])
+    results = retriever.retrieve_hybrid("boilerplate", n_results=3, embedding_weight=0.5, keyword_weight=0.5)
+    assert [r.chunk_id for r in results] == ["b", "c", "a"]
+
+    b, c, a = results
+    assert b.relevance_score == (0.5 / (RRF_K + 2) + 0.5 / (RRF_K + 1)) * (RRF_K + 1)
+    assert (c.metadata["embedding_rank"], c.metadata["keyword_rank"]) == (3, 2)
+    assert (a.metadata["keyword_rank"], a.metadata["keyword_score"]) == (None, 0)
+    assert (b.metadata["keyword_score"], c.metadata["keyword_score"]) == (1.0, 0.5)
+    # The weighted per-leg score keeps the 0-1 scale thresholds are written for
+    assert abs(b.metadata["weighted_score"] - 0.9) < 1e-9 and abs(a.metadata["weighted_score"] - 0.45) < 1e-9
+    assert all(r.retrieval_method == "hybrid" for r in results)
+
+
+def test_chunk_first_in_both_legs_scores_one(tmp_path):
+    retriever = make_retriever(tmp_path, embedding=[("a", 0.9)], keyword=[("a", 3.0), ("b", 1.0)])
+    best = retriever.retrieve_hybrid("query", n_results=1)[0]
+    assert best.chunk_id == "a"
+    assert abs(best.relevance_score - 1.0) < 1e-9
+
+
+def test_legs_run_concurrently_and_report_latency(tmp_path):
+    retriever = make_retriever(tmp_path, embedding=[("a", 0.9)], keyword=[("b", 2.0)], delay=0.2)
+    before = get_performance_monitor().snapshot().retrieval.get("embedding")
+    before = before.count if before else 0
+
+    started = time.perf_counter()
+    results = retriever.retrieve_hybrid("query", n_results=2)
+    assert time.perf_counter() - started < 0.35
+
+    latency = results[0].metadata["retrieval_latency_ms"]
+    assert set(latency) == {"embedding", "keyword", "hybrid"}
+    assert latency["embedding"] >= 200 and latency["keyword"] >= 200
+    assert latency["hybrid"] < latency["embedding"] + latency["keyword"]
+    assert get_performance_monitor().snapshot().retrieval["embedding"].count == before + 1
+    assert "retrieval" in get_performance_monitor().dashboard()
+
+
+def test_retrievers_are_shared(tmp_path):
+    manager = RetrieverManager()
+    first = manager.get(str(tmp_path))
+    assert manager.get(str(tmp_path) + "/.") is first
+    manager.reset()
+    assert manager.get(str(tmp_path)) is not first
+
+    path = str(tmp_path / "shared")
+    assert create_retriever(path) is get_retriever(path)
@@ -0,0 +1,175 @@
+"""
+Tests for incremental re-review of document revisions (/upload_revision).
+"""
+
+import sys
+import os
+import io
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.incremental_review import (INSERTED, MODIFIED, REMOVED, UNCHANGED, ReviewSnapshotStore,
+                                    align_sentences, diff_sentence_issues, reusable_blocks)
+from core.structural_analyzer import analyze_document_structure, reanalyze_document_structure
+
+
+def make_sentences(texts, blocks, feedback=None):
+    feedback = feedback or [[] for _ in texts]
+    return [
+        {"sentence": text, "block_index": block, "tag_name": "p", "feedback": issues}
+        for text, block, issues in zip(texts, blocks, feedback)
+    ]
+
+
+def test_alignment_classifies_edits():
+    old = ["Intro.", "The file was written by me.", "Middle.", "Obsolete remark here.", "Tail."]
+    new = ["Intro.", "The file was written by us.", "Middle.", "Something entirely unrelated!", "Tail."]
+    alignment = align_sentences(old, new)
+
+    assert [step.status for step in alignment.steps] == [
+        UNCHANGED, MODIFIED, UNCHANGED, INSERTED, REMOVED, UNCHANGED
+    ]
+    assert alignment.old_for_new == [0, 1, 2, None, 4]
+    assert alignment.changed_indices() == {1, 3}
+    assert alignment.affected_indices() == {0, 1, 2, 3, 4}
+
+
+def test_removal_only_affects_sentences_bordering_the_gap():
+    old = [f"Sentence {i}." for i in range(10)]
+    new = old[:4] + old[5:]
+    alignment = align_sentences(old, new)
+
+    assert alignment.counts()[REMOVED] == 1
+    assert alignment.affected_indices() == {3, 4}
+
+
+def test_structural_reanalysis_matches_full_analysis():
+    long_paragraph = [f"Long paragraph sentence {i}." for i in range(8)]
+    old_texts = ["Heading one"] + long_paragraph + ["Bridge.", "Short paragraph.", "Closing words."]
+    new_texts = ["Heading one"] + long_paragraph + ["Bridge.", "Short paragraph, now edited.", "Closing words."]
+    blocks = [0] + [1] * 8 + [2, 3, 4]
+    old = make_sentences(old_texts, blocks)
+    new = make_sentences(new_texts, blocks)
+    new[10]["feedback"] = [{"message": "Wordy"}, {"message": "Vague"}]
+
+    alignment = align_sentences(old_texts, new_texts)
+    affected = alignment.affected_indices()
+    reused = reusable_blocks(alignment, affected, old, new)
+
+    # The long paragraph and heading are untouched; the edited block and its
+    # neighbours' blocks are re-analyzed
+    assert reused == {0: 0, 1: 1}
+    previous = analyze_document_structure(old)
+    assert reanalyze_document_structure(new, previous, reused) == analyze_document_structure(new)
+
+
+def test_issue_delta():
+    old_texts = ["Alpha sentence.", "Beta sentence.", "Removed one entirely."]
+    new_texts = ["Alpha sentence.", "Beta sentence!", "Gamma is brand new text."]
+    old = make_sentences(old_texts, [0, 0, 0], [
+        [{"message": "Passive voice", "start": 0, "end": 5}],
+        [{"message": "Vague term"}],
+        [{"message": "Too long"}],
+    ])
+    new = make_sentences(new_texts, [0, 0, 0], [
+        [{"message": "Passive voice.", "start": 0, "end": 5}],
+        [],
+        [{"message": "Jargon"}],
+    ])
+    delta = diff_sentence_issues(align_sentences(old_texts, new_texts), old, new)
+
+    assert [issue["message"] for issue in delta["added"]] == ["Jargon"]
+    assert sorted(issue["message"] for issue in delta["removed"]) == ["Too long", "Vague term"]
+    assert delta["unchanged"] == 1
+
+
+def test_snapshot_store_evicts_oldest():
+    store = ReviewSnapshotStore(max_entries=2, db_path=None)
+    first = store.save({"sentences": []})
+    second = store.save({"sentences": []})
+    store.get(first)
+    third = store.save({"sentences": []})
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.get(third) is not None
+
+
+def test_snapshot_store_persists_across_processes(tmp_path):
+    path = str(tmp_path / "reviews.db")
+    store = ReviewSnapshotStore(max_entries=1, db_path=path)
+    first = store.save({"sentences": [{"sentence": "One."}], "filename": "a.md"})
+    second = store.save({"sentences": [], "filename": "b.md"})
+
+    # Evicted from memory, still in SQLite; another worker sees both
+    assert store.get(first)["filename"] == "a.md"
+    other = ReviewSnapshotStore(db_path=path)
+    assert other.get(second) == {"sentences": [], "filename": "b.md"}
+    assert other.pop(first)["sentences"] == [{"sentence": "One."}]
+    assert store.pop(first) is not None and ReviewSnapshotStore(db_path=path).get(first) is None
+
+    expired = ReviewSnapshotStore(ttl=-1, db_path=path)
+    assert expired.get(second) is None
+
+
+def test_replaced_runs_are_paired_within_the_window():
+    old = [f"Old sentence number {i} talks about topic {i}." for i in range(40)]
+    new = [f"Old sentence number {i} talks about topic {i}!" for i in range(40)]
+    unbounded = align_sentences(old, new, window=len(old))
+    assert [step.status for step in unbounded.steps] == [MODIFIED] * 40
+    assert align_sentences(old, new, window=3).steps == unbounded.steps
+
+    # A match further ahead than the window is not considered
+    old = [f"Removed paragraph {i} with unrelated content." for i in range(5)] + ["The file was written by me."]
+    new = ["The file was written by us."]
+    assert [step.status for step in align_sentences(old, new, window=10).steps] == [REMOVED] * 5 + [MODIFIED]
+    assert [step.status for step in align_sentences(old, new, window=3).steps] == [INSERTED] + [REMOVED] * 6
+
+
+DOCUMENT = (
+    b"# Getting Started\n\n"
+    b"The configuration file was written by the installer. It is very simply done.\n\n"
+    b"You should click the Save button. There are several options.\n"
+)
+REVISION = DOCUMENT.replace(b"There are several options.", b"There are many options.")
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_upload_revision_returns_delta(client):
+    first = client.post('/upload', data={'file': (io.BytesIO(DOCUMENT), 'guide.md')},
+                        content_type='multipart/form-data').get_json()
+    full = client.post('/upload', data={'file': (io.BytesIO(REVISION), 'guide.md')},
+                       content_type='multipart/form-data').get_json()
+
+    response = client.post('/upload_revision',
+                           data={'file': (io.BytesIO(REVISION), 'guide.md'), 'review_id': first['review_id']},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    result = response.get_json()
+
+    assert result['previous_review_id'] == first['review_id']
+    assert result['alignment']['modified'] == 1
+    assert result['alignment']['reanalyzed'] < len(full['sentences'])
+    assert result['report'] == full['report']
+    changed = {entry['sentence_index']: entry for entry in result['sentences']}
+    for entry in full['sentences']:
+        if entry['sentence_index'] in changed:
+            assert changed[entry['sentence_index']] == entry
+
+
+def test_upload_revision_unknown_review(client):
+    response = client.post('/upload_revision',
+                           data={'file': (io.BytesIO(REVISION), 'guide.md'), 'review_id': 'missing'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 404
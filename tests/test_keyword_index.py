@@ -0,0 +1,146 @@
+"""
+Tests for the persisted BM25 keyword index (app/keyword_index.py).
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.keyword_index import BM25Index, tokenize
+
+CHUNKS = [
+    ("c1", "Use active voice in procedures.", {"meta_source_type": "style_guide"}),
+    ("c2", "Passive voice hides the actor. Prefer active voice.", {"meta_source_type": "style_guide"}),
+    ("c3", "The installer writes the configuration file.", {"meta_source_type": "manual"}),
+    ("c4", "Configuration values are stored in the configuration file.", {"meta_source_type": "manual"}),
+]
+
+
+def ids(hits):
+    return [hit.chunk_id for hit in hits]
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize("The user's set-up is in the file") == ["user's", "set-up", "file"]
+
+
+def test_bm25_ranks_by_term_frequency_and_rarity():
+    index = BM25Index()
+    assert index.add(CHUNKS) == 4
+    assert ids(index.search("configuration file", k=2)) == ["c4", "c3"]
+    assert ids(index.search("passive voice", k=1)) == ["c2"]
+    assert index.search("nothing matches", k=3) == []
+    manual_only = index.search("voice configuration", k=5, accept=lambda m: m["meta_source_type"] == "manual")
+    assert ids(manual_only) == ["c4", "c3"]
+
+
+def test_index_is_persisted_and_reopened(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add(CHUNKS[:2])
+    index.add(CHUNKS[2:])
+    expected = index.search("configuration file voice", k=4)
+    index.close()
+
+    reopened = BM25Index(str(tmp_path))
+    assert len(reopened) == 4
+    assert reopened.stats()["segments"] == 2
+    assert reopened.search("configuration file voice", k=4) == expected
+
+
+def test_replace_delete_and_merge(tmp_path):
+    index = BM25Index(str(tmp_path), merge_factor=2)
+    index.add(CHUNKS)
+    # Unchanged chunks are skipped, changed ones replace the old version
+    assert index.add(CHUNKS) == 0
+    assert index.add([("c3", "The installer copies binaries.", {})]) == 1
+    assert "c3" not in ids(index.search("configuration", k=4))
+    assert ids(index.search("binaries", k=4)) == ["c3"]
+
+    assert index.delete(["c1", "missing"]) == 1
+    assert "c1" not in ids(index.search("active voice", k=4))
+
+    # Two single-chunk segments (c3, c5) are merged, and the result with the
+    # first segment, now down to two live chunks
+    index.add([("c5", "Write short sentences.", {})])
+    assert index.stats() == {"documents": 4, "segments": 1, "terms": index.stats()["terms"], "deleted": 0}
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".seg")]) == 1
+
+    reopened = BM25Index(str(tmp_path))
+    assert [chunk_id for chunk_id in ("c1", "c2", "c3", "c4", "c5") if chunk_id in reopened] == \
+        ["c2", "c3", "c4", "c5"]
+
+
+def test_clear_drops_segments_and_manifest(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add(CHUNKS[:2])
+    index.add(CHUNKS[2:])
+    index.clear()
+    assert len(index) == 0 and "c1" not in index
+    assert index.search("configuration file voice", k=4) == []
+    assert os.listdir(tmp_path) == []
+    assert len(BM25Index(str(tmp_path))) == 0
+
+    # Still usable afterwards
+    index.add(CHUNKS[:1])
+    assert ids(BM25Index(str(tmp_path)).search("active voice")) == ["c1"]
+
+
+def test_retriever_keyword_leg_survives_a_restart(tmp_path):
+    from types import SimpleNamespace
+    from app.advanced_retrieval import AdvancedRetriever
+
+    chunks = [SimpleNamespace(id=chunk_id, content=content, source_doc_id="guide", chunk_type="paragraph",
+                              word_count=len(content.split()), start_char=0, end_char=len(content),
+                              metadata={"source_type": metadata["meta_source_type"]})
+              for chunk_id, content, metadata in CHUNKS]
+    AdvancedRetriever(db_path=str(tmp_path)).index_chunks(chunks)
+
+    retriever = AdvancedRetriever(db_path=str(tmp_path))
+    results = retriever.retrieve_keyword("configuration file", n_results=2)
+    assert [(r.chunk_id, r.source_doc_id) for r in results] == [("c4", "guide"), ("c3", "guide")]
+    assert [r.chunk_id for r in retriever.retrieve_keyword("voice", 5, source_filter="manual")] == []
+    if retriever.collection is None:
+        # Keyword leg only: the best hit gets the full keyword weight
+        [best] = retriever.retrieve_hybrid("passive voice", n_results=1)
+        assert best.chunk_id == "c2" and best.metadata["keyword_score"] == 1.0
+
+
+class FakeChromaClient:
+    """Just the collection management the retriever calls."""
+
+    def __init__(self):
+        self.collections = {"docscanner_knowledge": "old"}
+
+    def delete_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(name)
+        del self.collections[name]
+
+    def create_collection(self, name, metadata=None):
+        self.collections[name] = "new"
+        return self.collections[name]
+
+
+def test_clear_knowledge_base_empties_both_indexes(tmp_path, monkeypatch):
+    from app import rag_routes
+    from app.advanced_retrieval import AdvancedRetriever
+    from flask import Flask
+
+    retriever = AdvancedRetriever(db_path=str(tmp_path))
+    retriever.keyword_index.add(CHUNKS)
+    retriever.chroma_client = FakeChromaClient()
+    monkeypatch.setattr(rag_routes, "RAG_AVAILABLE", True)
+    monkeypatch.setattr(rag_routes, "retriever", retriever)
+    app = Flask(__name__)
+    app.register_blueprint(rag_routes.rag)
+
+    with app.test_client() as client:
+        assert client.post("/rag/clear_knowledge_base", json={}).status_code == 400
+        response = client.post("/rag/clear_knowledge_base", json={"confirm": True})
+    assert response.status_code == 200 and response.get_json()["success"]
+    assert retriever.collection == "new" and retriever.chroma_client.collections == {"docscanner_knowledge": "new"}
+    assert len(retriever.keyword_index) == 0
+    assert retriever.retrieve_keyword("configuration file", n_results=2) == []
+    assert len(AdvancedRetriever(db_path=str(tmp_path)).keyword_index) == 0
@@ -0,0 +1,160 @@
+"""
+Tests for the pooled Ollama client (app/rag/llm_client.py) against a local fake Ollama server.
+"""
+
+import sys
+import os
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.rag.llm_client import OllamaClient, map_bounded
+
+
+class FakeOllama:
+    """Serves /api/tags and /api/generate; failures and delays are scripted per test."""
+
+    def __init__(self):
+        self.calls = []
+        self.peers = set()
+        self.statuses = []  # statuses to answer before succeeding
+        self.delay = 0.0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fake.record(self, None)
+                self.reply(200, {"models": [{"name": "llama3:latest"}, {"name": "mistral:7b"}]})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.record(self, payload)
+                with fake.lock:
+                    status = fake.statuses.pop(0) if fake.statuses else 200
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.active -= 1
+                self.reply(status, {"response": f" {payload['model']}: {payload['prompt']} "})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def record(self, handler, payload):
+        with self.lock:
+            self.calls.append((handler.path, payload))
+            self.peers.add(handler.client_address)
+
+    def paths(self):
+        return [path for path, _ in self.calls]
+
+
+@pytest.fixture
+def fake():
+    server = FakeOllama()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def test_connections_are_reused_and_model_discovered_once(fake):
+    client = OllamaClient(fake.url, model=None, pool_size=2)
+    results = [client.generate(f"p{i}", {"temperature": 0.1}) for i in range(10)]
+    assert results == [f"llama3: p{i}" for i in range(10)]
+    assert fake.paths().count("/api/tags") == 1
+    assert fake.calls[1][1]["options"] == {"temperature": 0.1}
+    assert len(fake.peers) == 1
+
+
+def test_retries_with_backoff(fake):
+    fake.statuses = [503, 500]
+    client = OllamaClient(fake.url, model="phi3", max_retries=2, backoff=0.01)
+    assert client.generate("hi") == "phi3: hi"
+    assert fake.paths().count("/api/generate") == 3
+
+    fake.statuses = [503, 503, 503]
+    assert client.generate("hi") is None
+    fake.statuses = [404]
+    assert client.generate("hi") is None
+    assert fake.paths().count("/api/generate") == 7
+
+
+def test_deadline_bounds_a_slow_server(fake):
+    fake.delay = 1.0
+    client = OllamaClient(fake.url, model="phi3", max_retries=3, backoff=0.01)
+    started = time.monotonic()
+    assert client.generate("hi", timeout=0.3) is None
+    assert time.monotonic() - started < 0.8
+
+
+def test_unreachable_server_is_skipped():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = OllamaClient(f"http://127.0.0.1:{port}", model=None, backoff=1.0)
+    started = time.monotonic()
+    assert client.generate("hi") is None
+    assert client.generate("hi") is None
+    assert not client.available()
+    assert time.monotonic() - started < 0.5
+
+
+def test_map_bounded_keeps_order_and_limit():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return i * i
+
+    assert map_bounded(work, range(12), concurrency=3) == [i * i for i in range(12)]
+    assert peak[0] <= 3
+
+
+def test_document_review_fans_out(fake, monkeypatch):
+    from app.rag import llm_client, sentence_reviewer
+    fake.delay = 0.2
+    monkeypatch.setattr(llm_client, "_client", OllamaClient(fake.url, model="phi3", pool_size=4))
+    monkeypatch.setattr(sentence_reviewer, "_get_reranker", lambda: None)
+    monkeypatch.setattr(llm_client, "LLM_CONCURRENCY", 4)
+
+    sentences = [f"You may simply click on the Save button in step {i} now." for i in range(8)]
+    started = time.monotonic()
+    results = sentence_reviewer.review_document_sentences(sentences)
+    elapsed = time.monotonic() - started
+
+    assert [r["sentence"] for r in results] == sentences
+    assert all(r["backend"] == "ollama" for r in results)
+    assert fake.max_active > 1 and len(fake.peers) <= 4
+    assert elapsed < 8 * 0.2
@@ -0,0 +1,129 @@
+"""
+Tests for the shared per-document NLP context.
+
+Rules that accept a ``context`` keyword must produce the same feedback as
+when they parse the sentence themselves, while the document is parsed
+only once.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rules.nlp_context import DocumentContext, SentenceContext, get_nlp, to_plain_text
+from app.rules import grammar_rules, style_rules, terminology_rules, long_sentence
+from app.rules import vague_terms, consistency_rules, passive_voice, simple_present_normalization
+
+
+SENTENCES = [
+    "Getting Started",
+    "The configuration file was written by the installer.",
+    "It is then very carefully copied to several servers.",
+    "Use the GUI to shut down the device and remove the USB stick.",
+    "You should quickly restart the service after some changes are made to the settings, "
+    "because the new values are only read at startup and the old values remain active "
+    "until the process is restarted by the operator or by the watchdog.",
+]
+
+
+class CountingNlp:
+    """Wraps the shared pipeline and counts how often it is called."""
+
+    def __init__(self):
+        self.inner = get_nlp()
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.inner(text)
+
+
+def test_plain_text_matches_html_stripping():
+    assert to_plain_text("Click <b>Save</b> &amp; exit.") == "Click Save & exit."
+    assert to_plain_text("Plain sentence.") == "Plain sentence."
+    assert to_plain_text("") == ""
+
+
+def test_document_is_parsed_once():
+    nlp = CountingNlp()
+    document = DocumentContext(SENTENCES, nlp=nlp).parse()
+    assert nlp.calls == len(SENTENCES)
+
+    for index in range(len(SENTENCES)):
+        ctx = document.sentence(index)
+        assert ctx.doc is document.sentence(index).doc
+    assert nlp.calls == len(SENTENCES)
+
+
+def test_changed_text_is_parsed_separately():
+    nlp = CountingNlp()
+    document = DocumentContext(SENTENCES, nlp=nlp).parse()
+    ctx = document.sentence(1, "A different sentence.")
+    assert ctx.text == "A different sentence."
+    assert ctx.doc.text == "A different sentence."
+    assert nlp.calls == len(SENTENCES) + 1
+
+
+def test_adjacent_sentences_and_headings():
+    html = "<h1>Getting Started</h1><p>The configuration file was written by the installer.</p>"
+    document = DocumentContext.from_html(html, SENTENCES[:2])
+    first = document.sentence(0)
+    second = document.sentence(1)
+
+    assert first.previous_sentence is None
+    assert first.next_sentence == SENTENCES[1]
+    assert second.previous_sentence == SENTENCES[0]
+    assert first.is_heading is True
+    assert second.is_heading is False
+
+
+def test_rules_give_same_feedback_with_context():
+    document = DocumentContext(SENTENCES).parse()
+    rule_modules = [
+        grammar_rules, style_rules, terminology_rules, long_sentence,
+        vague_terms, consistency_rules, simple_present_normalization,
+    ]
+    for index, sentence in enumerate(SENTENCES):
+        ctx = document.sentence(index)
+        for module in rule_modules:
+            assert module.check(sentence, context=ctx) == module.check(sentence), module.__name__
+
+        prev = SENTENCES[index - 1] if index > 0 else None
+        assert passive_voice.check(sentence, previous_sentence=prev, context=ctx) == \
+            passive_voice.check(sentence, previous_sentence=prev)
+
+
+def test_sentence_context_without_document():
+    ctx = SentenceContext("The file <em>was</em> saved.")
+    assert ctx.text == "The file was saved."
+    assert ctx.headings == frozenset()
+    if get_nlp() is not None:
+        assert ctx.doc.text == ctx.text
+
+
+class PipeNlp(CountingNlp):
+    """Pipeline that records nlp.pipe() batches."""
+
+    def __init__(self):
+        super().__init__()
+        self.pipe_calls = []
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        texts = list(texts)
+        self.pipe_calls.append((len(texts), batch_size, n_process))
+        return (self.inner(text) for text in texts)
+
+
+def test_parse_uses_batched_pipe():
+    nlp = PipeNlp()
+    document = DocumentContext(SENTENCES, nlp=nlp).parse(batch_size=32, n_process=2)
+    assert nlp.pipe_calls == [(len(SENTENCES), 32, 2)]
+    assert nlp.calls == 0
+
+    # Cached Docs are reused by rules; a second parse is a no-op
+    document.parse()
+    assert len(nlp.pipe_calls) == 1
+    assert document.sentence(2).doc.text == SENTENCES[2]
+    assert nlp.calls == 0
@@ -0,0 +1,176 @@
+"""
+Tests for sharded, process-parallel sentence analysis.
+"""
+
+import sys
+import os
+import concurrent.futures
+import multiprocessing
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.parallel_analysis import SHARDS_PER_WORKER, SentenceAnalysisExecutor, SentenceJob, make_shards
+
+
+def echo_analyze(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+    """Stand-in for analyze_sentence that reports what it was given."""
+    feedback = [{
+        "message": sentence,
+        "previous": previous_sentence,
+        "next": next_sentence,
+        "context_text": context.text if context is not None else None,
+        "pid": os.getpid(),
+    }]
+    return feedback, {}, 55.0
+
+
+def make_jobs(count):
+    texts = [f"Sentence number {i}." for i in range(count)]
+    return [
+        SentenceJob(i, texts[i], texts[i - 1] if i > 0 else None, texts[i + 1] if i < count - 1 else None)
+        for i in range(count)
+    ]
+
+
+def test_make_shards_is_contiguous_and_complete():
+    jobs = make_jobs(10)
+    shards = make_shards(jobs, 3)
+    assert [len(shard) for shard in shards] == [4, 3, 3]
+    assert [job for shard in shards for job in shard] == jobs
+    assert make_shards(jobs[:2], 8) == [[jobs[0]], [jobs[1]]]
+    assert make_shards([], 4) == []
+
+
+def test_small_documents_run_serially():
+    executor = SentenceAnalysisExecutor(echo_analyze, [], max_workers=4, min_parallel_sentences=50)
+    jobs = make_jobs(5)
+    assert executor.should_parallelize(len(jobs)) is False
+    results = executor.run(jobs)
+    assert {item[0][0]["pid"] for item in results.values()} == {os.getpid()}
+
+
+def test_parallel_results_keep_order_and_boundary_context():
+    jobs = make_jobs(40)
+    progress = []
+    executor = SentenceAnalysisExecutor(echo_analyze, [], max_workers=2, min_parallel_sentences=1)
+    results = executor.run(jobs, progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert list(results.keys()) == [job.index for job in jobs]
+    assert os.getpid() not in {results[job.index][0][0]["pid"] for job in jobs}
+    for job in jobs:
+        feedback = results[job.index][0][0]
+        assert feedback["message"] == job.text
+        assert feedback["context_text"] == job.text
+        # Neighbours survive shard boundaries
+        assert feedback["previous"] == job.previous_sentence
+        assert feedback["next"] == job.next_sentence
+
+    assert progress[0] == (0, 40)
+    assert progress[-1] == (40, 40)
+    assert all(a[0] <= b[0] for a, b in zip(progress, progress[1:]))
+
+
+def passive_analyze(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+    """The passive voice rule, plus the previous Doc its anaphora resolution would use."""
+    from app.rules import passive_voice
+    previous_doc = context.previous_doc if context is not None else None
+    feedback = passive_voice.check(sentence, previous_sentence=previous_sentence,
+                                   next_sentence=next_sentence, context=context)
+    return [{"previous_doc": previous_doc.text if previous_doc is not None else None,
+             "feedback": feedback}], {}, None
+
+
+def test_parallel_passive_voice_matches_serial():
+    from app.rules.nlp_context import DocumentContext
+    texts = [
+        "The configuration file is stored on the server.",
+        "It was created by the installer.",
+        "The service was restarted by the administrator.",
+        "This was done to apply the changes.",
+        "Open the settings page.",
+        "The values are validated by the system.",
+        "They were checked twice.",
+        "The report was generated automatically.",
+    ] * 2
+    all_jobs = [SentenceJob(i, texts[i], texts[i - 1] if i > 0 else None, texts[i + 1] if i + 1 < len(texts) else None)
+                for i in range(len(texts))]
+    # Every third sentence missing, as when the others come from the analysis cache
+    for jobs in (all_jobs, [job for job in all_jobs if job.index % 3]):
+        serial = SentenceAnalysisExecutor(passive_analyze, [], max_workers=1).run(jobs, DocumentContext(texts))
+        parallel = SentenceAnalysisExecutor(passive_analyze, [], max_workers=3, min_parallel_sentences=1).run(
+            jobs, DocumentContext(texts))
+        assert parallel == serial
+        for job in jobs:
+            assert parallel[job.index][0][0]["previous_doc"] == job.previous_sentence
+
+
+def crash_analyze(sentence, rules, previous_sentence=None, next_sentence=None, context=None):
+    """echo_analyze, except that a worker process handed "Crash." dies."""
+    if sentence == "Crash." and multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return echo_analyze(sentence, rules, previous_sentence, next_sentence, context)
+
+
+def messages(results):
+    return [results[index][0][0]["message"] for index in sorted(results)]
+
+
+def test_broken_pool_does_not_fail_other_executors():
+    crashing_jobs = make_jobs(20)
+    crashing_jobs[5] = crashing_jobs[5]._replace(text="Crash.")
+    jobs = make_jobs(40)
+    crashing = SentenceAnalysisExecutor(crash_analyze, [], max_workers=2, min_parallel_sentences=1)
+    other = SentenceAnalysisExecutor(echo_analyze, [], max_workers=2, min_parallel_sentences=1)
+    broken = SentenceAnalysisExecutor._get_pool(2)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as threads:
+            crashed = threads.submit(crashing.run, crashing_jobs)
+            results = threads.submit(other.run, jobs)
+            assert messages(crashed.result()) == [job.text for job in crashing_jobs]
+            assert messages(results.result()) == [job.text for job in jobs]
+        assert SentenceAnalysisExecutor._pool is not broken
+
+        # A late failure on the broken pool leaves its replacement alone
+        replacement = SentenceAnalysisExecutor._get_pool(2)
+        SentenceAnalysisExecutor._reset_pool(broken)
+        assert SentenceAnalysisExecutor._pool is replacement
+        results = other.run(jobs)
+        assert os.getpid() not in {results[job.index][0][0]["pid"] for job in jobs}
+    finally:
+        SentenceAnalysisExecutor._reset_pool()
+
+
+class CancellingPool:
+    """A pool that cancels the first ``cancel`` submissions and runs the others inline."""
+
+    def __init__(self, cancel):
+        self.cancel = cancel
+        self.submitted = 0
+
+    def submit(self, fn, shard, analyze_fn, rules, headings):
+        self.submitted += 1
+        future = concurrent.futures.Future()
+        if self.submitted <= self.cancel:
+            future.cancel()
+            future.set_running_or_notify_cancel()
+        else:
+            future.set_result(([(job.index, analyze_fn(job.text, rules, job.previous_sentence, job.next_sentence))
+                                for job in shard], None))
+        return future
+
+
+def test_cancelled_shards_are_resubmitted_or_analyzed_serially(monkeypatch):
+    jobs = make_jobs(8)
+    executor = SentenceAnalysisExecutor(echo_analyze, [], max_workers=2, min_parallel_sentences=1)
+    monkeypatch.setattr(SentenceAnalysisExecutor, "_pool_workers", 2)
+
+    # The first shard is cancelled once: it runs again on the pool
+    pool = CancellingPool(cancel=1)
+    monkeypatch.setattr(SentenceAnalysisExecutor, "_pool", pool)
+    assert messages(executor.run(jobs)) == [job.text for job in jobs]
+    assert pool.submitted == len(make_shards(jobs, 2 * SHARDS_PER_WORKER)) + 1
+
+    # Cancelled again: the document is analyzed serially
+    monkeypatch.setattr(SentenceAnalysisExecutor, "_pool", CancellingPool(cancel=100))
+    assert messages(executor.run(jobs)) == [job.text for job in jobs]
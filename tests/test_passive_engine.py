@@ -0,0 +1,78 @@
+"""
+Tests for the sentence-level passive voice engine (app/rules/passive_engine.py).
+"""
+
+import sys
+import os
+import re
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.rules.passive_engine import (IRREGULAR_PARTICIPLES, PASSIVE_PATTERN, PATTERN_MATCH,
+                                      iter_passive_sentences, passive_verb)
+
+SENTENCES = [
+    "The file was written by the installer.",
+    "The report is being generated now.",
+    "It has been sent to the server.",
+    "Values have been kept.",
+    "The results were spread across nodes.",
+    "The module is to be installed first.",
+    "He runs fast.",
+    "The list is red.",
+    "Click Save when the form is complete.",
+    "The value is settled.",
+    "The job was run twice.",
+    "The key is setting up.",
+    "Has been read.",
+    "IS BUILT",
+]
+
+
+def reference_is_passive(text):
+    """The pattern list the passive voice rule used to build for every token."""
+    regular = [
+        r'\bis\s+\w+ed\b', r'\bare\s+\w+ed\b', r'\bwas\s+\w+ed\b', r'\bwere\s+\w+ed\b',
+        r'\bhas\s+been\s+\w+ed\b', r'\bhave\s+been\s+\w+ed\b', r'\bbeing\s+\w+ed\b', r'\bto\s+be\s+\w+ed\b'
+    ]
+    irregular = [fr'\b(is|are|was|were|has been|have been|being|to be)\s+{p}\b' for p in IRREGULAR_PARTICIPLES]
+    return any(re.search(pattern, text, re.IGNORECASE) for pattern in regular + irregular)
+
+
+@pytest.mark.parametrize("text", SENTENCES)
+def test_pattern_matches_the_pattern_list(text):
+    assert bool(PASSIVE_PATTERN.search(text)) == reference_is_passive(text)
+
+
+class Sentence(list):
+    """Sentence span stand-in: tokens with dependency labels (empty = unparsed) and head lemmas."""
+
+    def __init__(self, text, labels=None):
+        labels = labels or [("", "")] * len(text.split())
+        super().__init__(SimpleNamespace(text=word, dep_=dep, head=SimpleNamespace(lemma_=head))
+                         for word, (dep, head) in zip(text.split(), labels))
+        self.text = text
+
+
+def test_dependency_labels_decide_for_parsed_sentences():
+    passive = Sentence("The file was written.", [("det", "file"), ("nsubjpass", "write"),
+                                                 ("auxpass", "write"), ("ROOT", "write")])
+    state = Sentence("It is configured.", [("nsubjpass", "configure"), ("auxpass", "Configure"),
+                                           ("ROOT", "configure")])
+    # A parsed sentence is never second-guessed by the pattern
+    active = Sentence("It was opened.", [("nsubj", "open"), ("aux", "open"), ("ROOT", "open")])
+    assert passive_verb(passive) == "write"
+    assert passive_verb(state) is None
+    assert passive_verb(active) is None
+    assert passive_verb(Sentence("It was opened.")) == PATTERN_MATCH
+
+
+def test_each_sentence_is_decided_once():
+    doc = SimpleNamespace(sents=[Sentence("It was sent."), Sentence("Click Save."), Sentence(" It was sent. "),
+                                 Sentence("Title was written")])
+    found = list(iter_passive_sentences(doc, skip=lambda text: text.startswith("Title")))
+    assert [(p.text, p.verb) for p in found] == [("It was sent.", PATTERN_MATCH)]
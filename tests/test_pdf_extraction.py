@@ -0,0 +1,136 @@
+"""
+Tests for the page-parallel PDF extraction engine and its per-page cache.
+"""
+
+import sys
+import os
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from core import pdf_extraction
+from core.pdf_extraction import PdfExtractor, PdfPageCache, make_ranges
+
+
+def write_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    page_count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(page_count)), page_count)).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+    return path
+
+
+def test_make_ranges_splits_runs_and_stops_at_gaps():
+    assert make_ranges([], 4) == []
+    assert make_ranges(list(range(8)), 4) == [(0, 2), (2, 4), (4, 6), (6, 8)]
+    assert make_ranges([0, 1, 2, 5, 6], 1) == [(0, 3), (5, 7)]
+
+
+def test_serial_extraction_returns_pages_in_order(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", ["First page", "Second page", "Third page"])
+    pages = PdfExtractor(max_workers=1).extract(str(path))
+    assert [page.page_number for page in pages] == [1, 2, 3]
+    assert [page.text.strip() for page in pages] == ["First page", "Second page", "Third page"]
+    assert not any(page.cached for page in pages)
+
+
+def test_parallel_extraction_matches_serial(tmp_path):
+    texts = [f"Page number {i}" for i in range(12)]
+    path = write_pdf(tmp_path / "doc.pdf", texts)
+    serial = PdfExtractor(max_workers=1).extract(str(path))
+    try:
+        parallel = PdfExtractor(max_workers=2, min_parallel_pages=1).extract(str(path))
+    finally:
+        PdfExtractor._reset_pool()
+    assert [(p.page_number, p.text) for p in parallel] == [(p.page_number, p.text) for p in serial]
+
+
+def test_cache_hit_skips_extraction(tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "doc.pdf", ["Alpha", "Beta"])
+    cache = PdfPageCache(max_entries=0, db_path=str(tmp_path / "pages.db"))
+    first = PdfExtractor(max_workers=1, cache=cache).extract(str(path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached PDF was opened")
+
+    monkeypatch.setattr(pdf_extraction, "extract_page_range", fail)
+    monkeypatch.setattr(pdf_extraction, "page_count", fail)
+    # A fresh cache object reads the SQLite tier written by the first run
+    second = PdfExtractor(max_workers=1, cache=PdfPageCache(max_entries=0, db_path=str(tmp_path / "pages.db")))
+    with open(path, "rb") as f:
+        pages = second.extract(f.read())
+    assert [p.text for p in pages] == [p.text for p in first]
+    assert all(p.cached for p in pages)
+
+
+class FailingPool:
+    """A shared pool stand-in whose ranges are all cancelled, or all fail with ``error``."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.shut_down = False
+
+    def submit(self, *args):
+        future = concurrent.futures.Future()
+        if self.error is None:
+            future.cancel()
+            future.set_running_or_notify_cancel()
+        else:
+            future.set_exception(self.error)
+        return future
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_failed_ranges_fall_back_without_disturbing_other_pools(tmp_path, monkeypatch):
+    texts = [f"Page number {i}" for i in range(6)]
+    path = write_pdf(tmp_path / "doc.pdf", texts)
+    serial = [(p.page_number, p.text) for p in PdfExtractor(max_workers=1).extract(str(path))]
+    extractor = PdfExtractor(max_workers=2, min_parallel_pages=1)
+    monkeypatch.setattr(PdfExtractor, "_pool_workers", 2)
+
+    # Ranges cancelled by someone else are extracted here; the pool stays
+    cancelling = FailingPool()
+    monkeypatch.setattr(PdfExtractor, "_pool", cancelling)
+    assert [(p.page_number, p.text) for p in extractor.extract(str(path))] == serial
+    assert PdfExtractor._pool is cancelling and not cancelling.shut_down
+
+    # A stale broken pool does not reset the shared one
+    PdfExtractor._reset_pool(FailingPool(BrokenProcessPool("crashed")))
+    assert PdfExtractor._pool is cancelling
+
+    # A broken shared pool is replaced once, and the pages are extracted serially
+    broken = FailingPool(BrokenProcessPool("crashed"))
+    monkeypatch.setattr(PdfExtractor, "_pool", broken)
+    assert [(p.page_number, p.text) for p in extractor.extract(str(path))] == serial
+    assert broken.shut_down and PdfExtractor._pool is None
@@ -0,0 +1,105 @@
+"""
+Tests for the per-rule and upload stage instrumentation (app/performance_monitor.py).
+"""
+
+import sys
+import os
+import pickle
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.performance_monitor import (LATENCY_BUCKETS, STAGE_PARSE, STAGE_RULES, Histogram,
+                                     PerformanceMonitor)
+
+
+def make_monitor():
+    return PerformanceMonitor(enabled=True, feedback_db=None)
+
+
+def test_histogram_percentiles_stay_in_their_bucket():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.0003)
+    for _ in range(10):
+        histogram.observe(0.2)
+    assert histogram.count == 100
+    assert 0.00025 <= histogram.percentile(50) <= 0.0005
+    assert 0.1 <= histogram.percentile(99) <= 0.2
+    assert histogram.percentile(100) == 0.2
+
+
+def test_threads_record_into_their_own_shards():
+    monitor = make_monitor()
+
+    def work():
+        for _ in range(1000):
+            monitor.record_rule("passive_voice", 0.001, issues=1)
+            monitor.record_rule("long_sentence", 0.0001)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    monitor.record_error("long_sentence")
+
+    rules = {row["rule"]: row for row in monitor.dashboard()["rules"]}
+    assert list(rules) == ["passive_voice", "long_sentence"]  # slowest first
+    assert rules["passive_voice"]["calls"] == 4000
+    assert rules["passive_voice"]["issues"] == 4000
+    assert rules["passive_voice"]["hit_rate"] == 1.0
+    assert rules["long_sentence"]["hit_rate"] == 0.0
+    assert rules["long_sentence"]["errors"] == 1
+    # Shards of the finished threads were folded together
+    assert len(monitor._shards) == 1
+
+
+def test_worker_metrics_are_drained_and_merged():
+    worker = make_monitor()
+    worker.record_rule("vague_terms", 0.002, issues=2)
+    drained = pickle.loads(pickle.dumps(worker.drain()))
+    assert worker.dashboard()["rules"] == []
+
+    monitor = make_monitor()
+    monitor.merge(drained)
+    monitor.merge(drained)
+    [row] = monitor.dashboard()["rules"]
+    assert (row["rule"], row["calls"], row["issues"]) == ("vague_terms", 2, 4)
+
+
+def test_upload_stages_are_recorded_once_per_upload():
+    monitor = make_monitor()
+    timer = monitor.upload_timer()
+    timer.lap(STAGE_PARSE)
+    for _ in timer.timed(STAGE_RULES, iter([1, 2, 3])):
+        pass
+    with timer.stage(STAGE_RULES):
+        pass
+    timer.finish()
+
+    dashboard = monitor.dashboard()
+    assert dashboard["uploads"] == 1
+    assert list(dashboard["stages"]) == [STAGE_PARSE, STAGE_RULES]
+    assert dashboard["stages"][STAGE_RULES]["count"] == 1
+
+
+def test_prometheus_text():
+    monitor = make_monitor()
+    monitor.record_rule('technical"style', 0.003, issues=1)
+    text = monitor.prometheus_text()
+    assert '# TYPE docscanner_rule_seconds histogram' in text
+    assert 'docscanner_rule_calls_total{rule="technical\\"style"} 1' in text
+    assert f'docscanner_rule_seconds_bucket{{rule="technical\\"style",le="+Inf"}} 1' in text
+    assert len([line for line in text.splitlines() if line.startswith('docscanner_rule_seconds_bucket')]) \
+        == len(LATENCY_BUCKETS) + 1
+
+
+def test_suggestion_feedback(tmp_path):
+    for monitor in (make_monitor(), PerformanceMonitor(feedback_db=str(tmp_path / "feedback.db"))):
+        monitor.record_feedback("s1", rating=4, was_helpful=True)
+        monitor.record_feedback("s2", rating=2, was_helpful=False, was_implemented=True)
+        assert monitor.feedback_summary() == {
+            "count": 2, "average_rating": 3.0, "helpful_rate": 0.5, "implemented_rate": 1.0
+        }
@@ -0,0 +1,145 @@
+"""
+Tests for the SQLite-backed background review job queue.
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.review_jobs import CANCELLED, DONE, FAILED, QueueFull, ReviewJobQueue
+
+
+def echo_pipeline(filename, data, room_id, progress_tracker):
+    """Stand-in for review_upload_job: reports progress, returns the file contents."""
+    progress_tracker.update_stage(room_id, 1, "Parsing...")
+    if data == b"fail":
+        return None, "Could not parse", None
+    for step in range(int(data) if data.isdigit() else 0):
+        progress_tracker.update_progress(room_id, 30 + step, f"Step {step}")
+        time.sleep(0.05)
+    return {"filename": filename, "review_id": "r-" + filename}, None, {"sentences": [filename]}
+
+
+def worker_settings_pipeline(filename, data, room_id, progress_tracker):
+    """Reports the analysis and PDF pool sizes a job would use."""
+    from app import parallel_analysis
+    from core import pdf_extraction
+    settings = {"analysis_workers": parallel_analysis.ANALYSIS_WORKERS, "pdf_workers": pdf_extraction.PDF_WORKERS}
+    return settings, None, None
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.active_sessions = {}
+        self.calls = []
+
+    def start_session(self, room_id):
+        self.active_sessions[room_id] = {}
+        self.calls.append(("start", room_id))
+
+    def update_stage(self, room_id, stage_index, message=None):
+        self.calls.append(("stage", room_id, stage_index))
+
+    def update_progress(self, room_id, percentage, message, stage_name=None):
+        self.calls.append(("progress", room_id, percentage))
+
+    def complete_session(self, room_id, success=True, final_message=""):
+        self.active_sessions.pop(room_id, None)
+        self.calls.append(("complete", room_id))
+
+    def fail_session(self, room_id, error_message):
+        self.active_sessions.pop(room_id, None)
+        self.calls.append(("fail", room_id))
+
+
+def wait_for(queue, job_id, statuses=(DONE, FAILED, CANCELLED), timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {queue.status(job_id)['status']}")
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        queue = ReviewJobQueue(echo_pipeline, db_path=str(tmp_path / "jobs.db"), **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_job_runs_and_result_is_fetched_by_id(make_queue):
+    tracker = RecordingTracker()
+    snapshots = {}
+    queue = make_queue(max_workers=1, progress_tracker=lambda: tracker, on_snapshot=snapshots.__setitem__)
+
+    job = queue.submit("guide.md", b"2", room_id="room-1")
+    assert job["status"] == "queued"
+    assert queue.result(job["job_id"]) is None
+
+    assert wait_for(queue, job["job_id"])["status"] == DONE
+    assert queue.result(job["job_id"]) == {"filename": "guide.md", "review_id": "r-guide.md"}
+
+    deadline = time.time() + 5
+    while ("complete", "room-1") not in tracker.calls and time.time() < deadline:
+        time.sleep(0.05)
+    assert tracker.calls[0] == ("start", "room-1")
+    assert ("complete", "room-1") in tracker.calls
+    assert snapshots == {"r-guide.md": {"sentences": ["guide.md"]}}
+
+
+def test_pipeline_error_marks_job_failed(make_queue):
+    queue = make_queue(max_workers=1)
+    job = queue.submit("broken.pdf", b"fail")
+    finished = wait_for(queue, job["job_id"])
+    assert finished["status"] == FAILED
+    assert finished["error"] == "Could not parse"
+    assert finished["room_id"] == job["job_id"]
+
+
+def test_queue_depth_limit(make_queue):
+    queue = make_queue(max_workers=1, max_depth=2)
+    queue.submit("a.md", b"20")
+    queue.submit("b.md", b"20")
+    with pytest.raises(QueueFull):
+        queue.submit("c.md", b"1")
+
+
+def test_cancel_queued_and_running_jobs(make_queue):
+    queue = make_queue(max_workers=1)
+    running = queue.submit("long.md", b"200")
+    queued = queue.submit("next.md", b"1")
+
+    assert queue.cancel(queued["job_id"])["status"] == CANCELLED
+    wait_for(queue, running["job_id"], statuses=("running",))
+    queue.cancel(running["job_id"])
+
+    assert wait_for(queue, running["job_id"])["status"] == CANCELLED
+    assert queue.result(running["job_id"]) is None
+    assert queue.cancel("missing") is None
+
+
+def test_job_workers_review_serially(tmp_path, monkeypatch):
+    # Inherited by the spawned job workers
+    monkeypatch.setenv("ANALYSIS_WORKERS", "4")
+    monkeypatch.setenv("PDF_WORKERS", "4")
+    queue = ReviewJobQueue(worker_settings_pipeline, db_path=str(tmp_path / "jobs.db"), max_workers=1)
+    try:
+        job = queue.submit("guide.md", b"", room_id="room-1")
+        assert wait_for(queue, job["job_id"])["status"] == DONE
+        assert queue.result(job["job_id"]) == {"analysis_workers": 1, "pdf_workers": 1}
+    finally:
+        queue.shutdown()
@@ -0,0 +1,101 @@
+"""
+Tests for the compiled atomic rule matcher (app/rules/matcher.py).
+"""
+
+import sys
+import os
+import re
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.rules.loader import load_rules
+from app.rules.matcher import apply_rules, get_rule_matcher, mask_quoted, required_literals
+
+SENTENCES = [
+    "Click the Save button to continue.",
+    "You may simply set up the server, then log in.",
+    'Select "Back up my files" and then click OK.',
+    'He said "I could',
+    "NOTICE: Do not unplug the device!",
+    "WARNING dialog appears. Then, select the row.",
+    "To open the file, click Open.",
+    "Configure the alpha, beta and gamma nodes.",
+    "Steps:\n 1. Install",
+    "The table uses colspan etc. for layout.",
+    "SET UP THE SERVER, WOULDN'T YOU?",
+    "",
+    "   ",
+]
+
+
+def reference_apply_rules(sentence, rules):
+    """Every rule on every sentence, one re.finditer at a time."""
+    if not sentence or not sentence.strip():
+        return []
+    masked, in_quotes = [], False
+    for char in sentence:
+        if char == '"':
+            in_quotes = not in_quotes
+            masked.append(char)
+        else:
+            masked.append(' ' if in_quotes else char)
+    masked = "".join(masked)
+    violations = []
+    for rule in rules:
+        if not rule.get("regex"):
+            continue
+        for match in re.finditer(rule["regex"], masked, flags=re.IGNORECASE):
+            violations.append({
+                "rule_id": rule.get("rule_id", "UNKNOWN"),
+                "category": rule.get("category", "general"),
+                "severity": rule.get("severity", "warn"),
+                "message": rule.get("message", "Style violation detected"),
+                "suggestion": rule.get("suggestion", ""),
+                "matched_text": sentence[match.start():match.end()],
+                "match_start": match.start(),
+                "match_end": match.end()
+            })
+    return violations
+
+
+@pytest.mark.parametrize("sentence", SENTENCES)
+def test_matches_running_every_rule(sentence):
+    rules = load_rules()
+    assert apply_rules(sentence, rules) == reference_apply_rules(sentence, rules)
+
+
+def test_mask_quoted_keeps_quotes_and_length():
+    assert mask_quoted('Click "Save as" now') == 'Click "       " now'
+    assert mask_quoted('a "b" c "d') == 'a " " c " '
+    assert mask_quoted("no quotes") == "no quotes"
+
+
+def test_required_literals():
+    assert required_literals(r"\bgoing to\b|\bshall\b") == {"going to", "shall"}
+    assert required_literals(r"\b(?:click|tap)\s+on\s+") == {"click", "tap"}
+    assert required_literals(r"NOTICE.*[!]") == {"notice"}
+    # No literal every match must contain: the rule always runs
+    assert required_literals(r"\w+\s\d+") is None
+    assert required_literals(r"foo|\d+") is None
+
+
+def test_prefixes_of_a_longer_literal_are_found():
+    rules = [
+        {"rule_id": "LONG", "regex": r"\bset up\b"},
+        {"rule_id": "SHORT", "regex": r"set"},
+        {"rule_id": "ANY", "regex": r"\d+"},
+    ]
+    violations = apply_rules("Set up 2 servers", rules)
+    assert [v["rule_id"] for v in violations] == ["LONG", "SHORT", "ANY"]
+
+
+def test_matcher_is_compiled_once_per_ruleset():
+    rules = [{"rule_id": "A", "regex": r"\bvery\b"}]
+    matcher = get_rule_matcher(rules)
+    assert get_rule_matcher(rules) is matcher
+    rules.append({"rule_id": "B", "regex": r"\bjust\b"})
+    assert get_rule_matcher(rules) is not matcher
+    assert [v["rule_id"] for v in apply_rules("just very", rules)] == ["A", "B"]
@@ -0,0 +1,93 @@
+"""
+Tests for the rule reference index behind /ai_suggestion (app/rules/rule_reference.py).
+"""
+
+import sys
+import os
+import json
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.rules.rule_reference import RuleReferenceIndex, RuleReferenceService, format_reference
+
+RULES = [
+    {"rule_id": "TENSE_001", "message": "Future tense (going to/shall) is discouraged in procedures.",
+     "suggestion": "Rewrite in simple present.", "example_violation": "It shall start.",
+     "example_correction": "It starts."},
+    {"rule_id": "UI_001", "message": "Do not use articles or 'button' with UI labels.",
+     "suggestion": "Use: Click <LABEL>."},
+    {"rule_id": "PASSIVE_001", "message": "Avoid passive voice in instructions.",
+     "suggestion": "Name the actor and use active voice."},
+]
+
+
+def ids(references):
+    return [reference.rule_id for reference in references]
+
+
+def test_exact_message_and_rule_id():
+    index = RuleReferenceIndex(RULES)
+    [reference] = index.lookup(["  do not use ARTICLES or 'button'   with UI labels. "])
+    assert reference.rule_id == "UI_001" and reference.score == 1.0
+    assert reference.content == format_reference(RULES[1])
+    assert "Bad: 'It shall start.'" in index.match("tense_001").content
+
+
+def test_containment_either_way():
+    index = RuleReferenceIndex(RULES)
+    # The issue wraps the message, or quotes part of a message or suggestion
+    assert index.match("Avoid passive voice in instructions. Found: 'was written'").rule_id == "PASSIVE_001"
+    assert index.match("going to/shall").rule_id == "TENSE_001"
+    assert index.match("name the actor").rule_id == "PASSIVE_001"
+
+
+def test_fuzzy_match_and_no_match():
+    index = RuleReferenceIndex(RULES)
+    reference = index.match("Avoid the passive voice in instruction steps.")
+    assert reference.rule_id == "PASSIVE_001" and 0.6 <= reference.score < 1.0
+    assert index.match("Sentence is too long (42 words).") is None
+    assert index.match("   ") is None
+
+
+def test_multi_issue_lookup_deduplicates():
+    index = RuleReferenceIndex(RULES)
+    issues = ["Avoid passive voice in instructions.", "Unknown issue", "UI_001", "passive voice in instructions"]
+    assert ids(index.lookup(issues)) == ["PASSIVE_001", "UI_001"]
+
+
+def test_service_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULES[:1]))
+    service = RuleReferenceService(str(path))
+    assert ids(service.lookup(["Avoid passive voice in instructions."])) == []
+    assert service.index() is service.index()
+
+    path.write_text(json.dumps(RULES))
+    assert ids(service.lookup(["Avoid passive voice in instructions."])) == ["PASSIVE_001"]
+
+    # A broken edit keeps the last good rules
+    path.write_text("[{")
+    assert len(service.index()) == 3
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_ai_suggestion_returns_rule_references(client):
+    from app.rules.loader import load_rules
+    rule = load_rules()[0]
+    response = client.post('/ai_suggestion', json={"feedback": f"{rule['message']} | Unknown issue"})
+    assert response.status_code == 200
+    [source] = response.get_json()["sources"]
+    assert source["rule_id"] == rule["rule_id"]
+    assert source["source"] == f"Siemens Style Guide ({rule['rule_id']})"
+    assert source["content"].startswith(f"Rule: {rule['message']}\nGuidance: {rule['suggestion']}")
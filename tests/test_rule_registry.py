@@ -0,0 +1,112 @@
+"""
+Tests for the rule registry and dispatch plans (app/rules/registry.py).
+"""
+
+import sys
+import os
+import pickle
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rules.registry import (BLOCK, COST_NLP, DEFAULT_PROFILE, DOCUMENT, FAST_PROFILE, RULE_MODULES,
+                                SENTENCE, DispatchPlan, get_dispatch_plan, infer_spec, register_rule)
+from app.app import analyze_sentence, build_aggregated_report, load_rules, run_document_rules
+
+calls = []
+
+
+@register_rule("sentence_rule", context=True, neighbours=True, cost=COST_NLP)
+def sentence_rule(content, previous_sentence=None, next_sentence=None, context=None):
+    calls.append(("sentence", content, previous_sentence, context))
+    return [f"Sentence issue in '{content}'."]
+
+
+@register_rule("block_rule", scope=BLOCK, profiles=(DEFAULT_PROFILE, FAST_PROFILE))
+def block_rule(content):
+    calls.append(("block", content))
+    return [{"text": content, "message": "Block issue."}]
+
+
+@register_rule("document_rule", scope=DOCUMENT)
+def document_rule(content):
+    calls.append(("document", content))
+    return ["Document issue."]
+
+
+def undeclared_rule(content, context=None):
+    return []
+
+
+PLAN = DispatchPlan([sentence_rule.rule_spec, block_rule.rule_spec, document_rule.rule_spec])
+
+
+def test_plan_splits_rules_by_scope():
+    assert [spec.rule_id for spec in PLAN.sentence_rules] == ["sentence_rule"]
+    assert [spec.rule_id for spec in PLAN.block_rules] == ["block_rule"]
+    assert [spec.rule_id for spec in PLAN.document_rules] == ["document_rule"]
+    assert PLAN.checks == [sentence_rule, block_rule, document_rule]
+
+
+def test_profile_filters_rules():
+    fast = DispatchPlan(PLAN.specs, FAST_PROFILE)
+    assert fast.checks == [block_rule]
+
+
+def test_undeclared_check_is_inferred_from_its_signature():
+    spec = infer_spec(undeclared_rule, "undeclared")
+    assert (spec.scope, spec.context, spec.neighbours) == (SENTENCE, True, False)
+
+
+def test_check_list_runs_every_rule_per_sentence():
+    plan = DispatchPlan.for_checks([sentence_rule, document_rule])
+    assert [spec.check for spec in plan.sentence_rules] == [sentence_rule, document_rule]
+    assert DispatchPlan.for_checks([sentence_rule, document_rule]) is plan
+
+
+def test_built_in_plan():
+    plan = get_dispatch_plan()
+    assert len(plan) == len(RULE_MODULES)
+    assert [spec.rule_id for spec in plan.document_rules] == ["consistency_rules"]
+    assert load_rules() == plan.checks
+    fast = get_dispatch_plan(FAST_PROFILE)
+    assert all(spec.cost < COST_NLP for spec in fast.specs)
+    assert get_dispatch_plan("no-such-profile") is get_dispatch_plan(DEFAULT_PROFILE)
+    # Plans go to analysis worker processes
+    assert pickle.loads(pickle.dumps(plan)).checks == plan.checks
+
+
+def test_analyze_sentence_runs_sentence_rules_only(monkeypatch):
+    # Readability scores are not under test (and need NLTK data)
+    import app.app
+    monkeypatch.setattr(app.app, "textstat", SimpleNamespace(
+        flesch_reading_ease=len, gunning_fog=len, smog_index=len, automated_readability_index=len))
+    calls.clear()
+    context = object()
+    feedback, _, _ = analyze_sentence("It works.", PLAN, previous_sentence="Before.", context=context)
+    assert calls == [("sentence", "It works.", "Before.", context)]
+    assert [item["message"] for item in feedback] == ["Sentence issue in 'It works.'."]
+
+
+def test_block_and_document_rules_run_once():
+    calls.clear()
+    document = SimpleNamespace(
+        blocks=[SimpleNamespace(index=0, text="First block."), SimpleNamespace(index=1, text="  "),
+                SimpleNamespace(index=2, text="Second block.")],
+        plain_text="First block. Second block."
+    )
+    feedback = run_document_rules(PLAN, document)
+    assert calls == [("block", "First block."), ("block", "Second block."), ("document", "First block. Second block.")]
+    assert [(item["rule"], item.get("block_index")) for item in feedback] == [
+        ("block_rule", 0), ("block_rule", 2), ("document_rule", None)]
+
+
+def test_document_feedback_counts_towards_the_report_totals():
+    sentences = [{"feedback": [{"message": "Sentence issue."}]}, {"feedback": []}, {"feedback": []}, {"feedback": []}]
+    review = SimpleNamespace(analysis_scope="full", document_type="manual")
+    document_feedback = [{"message": "Inconsistent term.", "rule": "consistency_rules"}]
+    report = build_aggregated_report(sentences, "One two three.", review, 4, [], document_feedback)
+    assert report["document_feedback"] == document_feedback
+    assert report["totalIssues"] == 2 and report["avgQualityScore"] == 50
+    assert build_aggregated_report(sentences, "One two three.", review, 4, [], [])["avgQualityScore"] == 75
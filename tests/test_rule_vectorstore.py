@@ -0,0 +1,99 @@
+"""
+Tests for keyword retrieval in the JSON-only rule store (app/rag/rule_vectorstore.py).
+"""
+
+import sys
+import os
+import random
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rag.rule_vectorstore import CATEGORY_KEYWORDS, RuleVectorStore, _KeywordAutomaton
+from app.rag.sentence_reviewer import retrieve_and_rerank, review_document_sentences, review_sentence
+
+SENTENCES = [
+    "You may simply click on the Save button.",
+    "The system shall start automatically and my files will be there.",
+    "Don't utilize the stuff in step 3 of the list.",
+    "THE INSTALLER SHALL SET UP THE SERVICE.",
+    "Nothing to see.",
+    "",
+]
+
+
+def scan(store, sentence, top_k=5, category_filter=None, severity_filter=None):
+    """Every rule against every keyword of its category, by substring."""
+    if not sentence.strip():
+        return []
+    out = []
+    for rule in store._cached_rules:
+        category = rule.get("category", "general")
+        if category_filter and category != category_filter:
+            continue
+        if severity_filter and rule.get("severity") != severity_filter:
+            continue
+        score = 0.1
+        for keyword in CATEGORY_KEYWORDS.get(category, []):
+            if keyword.lower() in sentence.lower():
+                score += 0.2
+        if score > 0.1:
+            out.append((rule["rule_id"], min(1.0, score)))
+    out.sort(key=lambda item: item[1], reverse=True)
+    return out[:top_k]
+
+
+def ids_scores(rules):
+    return [(rule["rule_id"], rule["score"]) for rule in rules]
+
+
+def make_store():
+    store = RuleVectorStore()
+    store.ingest_rules()
+    return store
+
+
+def test_automaton_counts_keywords_per_category():
+    automaton = _KeywordAutomaton({"a": ["he", "she", "hers"], "b": ["her", "he"], "c": ["xyz"]})
+    assert automaton.categories("ushers") == {"a": 3, "b": 2}
+    assert automaton.categories("nothing") == {}
+
+
+def test_retrieval_matches_the_keyword_scan():
+    store = make_store()
+    words = [keyword for keywords in CATEGORY_KEYWORDS.values() for keyword in keywords] + ["Save", "the", "x"]
+    rng = random.Random(7)
+    sentences = SENTENCES + [" ".join(rng.choice(words) for _ in range(rng.randint(1, 10))) for _ in range(300)]
+    for sentence in sentences:
+        for category in (None, "tense", "ui-label", "voice"):
+            for severity in (None, "error"):
+                assert ids_scores(store.retrieve_rules(sentence, 4, category, severity)) == \
+                    scan(store, sentence, 4, category, severity)
+
+
+def test_batch_merges_category_hints():
+    store = make_store()
+    hints = [["tense", "ui-label"], [], ["clarity"], ["tense"], [], []]
+    batch = store.retrieve_rules_batch(SENTENCES, top_k=2, categories=hints)
+    assert len(batch) == len(SENTENCES) and batch[-1] == []
+    for sentence, categories, rules in zip(SENTENCES, hints, batch):
+        expected = {}
+        for category in categories + [None]:
+            for rule in store.retrieve_rules(sentence, 2, category):
+                expected.setdefault(rule["rule_id"], rule)
+        assert rules == list(expected.values())
+    # Results are copies: a reranker may annotate them
+    batch[0][0]["rerank_score"] = 1.0
+    assert "rerank_score" not in store.retrieve_rules(SENTENCES[0], 2)[0]
+
+
+def test_document_review_uses_batch_retrieval(monkeypatch):
+    from app.rag import sentence_reviewer
+    monkeypatch.setattr(sentence_reviewer, "_get_reranker", lambda: None)
+    sentences = SENTENCES + ["   To set up the unit you should simply press the Start button now."]
+    expected = [review_sentence(sentence, use_llm=False) for sentence in sentences
+                if len(sentence.split()) >= 8]
+    assert review_document_sentences(sentences, use_llm=False) == expected
+    assert expected and expected[0]["retrieved_rules"] == \
+        [rule["rule_id"] for rule in retrieve_and_rerank(SENTENCES[0], sentence_reviewer._categories(
+            sentence_reviewer.classify_sentence(SENTENCES[0])))]
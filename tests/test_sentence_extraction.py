@@ -0,0 +1,59 @@
+"""
+Tests for HTML sentence extraction and html_fragment offset mapping.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from app.sentence_extraction import BlockOffsetMap, extract_sentences, split_sentence_spans
+
+
+def test_sentences_keep_block_info_and_order():
+    sentences = extract_sentences("<h2>Setup</h2><p>Install it. Then run it!</p><li>Done?</li>")
+    assert [(s.text, s.block_index, s.tag_name) for s in sentences] == [
+        ("Setup", 0, "h2"), ("Install it.", 1, "p"), ("Then run it!", 1, "p"), ("Done?", 2, "li")
+    ]
+    first, second = sentences[1], sentences[2]
+    assert "Install it. Then run it!"[first.block_start:first.block_end] == "Install it."
+    assert "Install it. Then run it!"[second.block_start:second.block_end] == "Then run it!"
+
+
+def test_label_fragments_are_merged():
+    spans = split_sentence_spans("Note: Back up first. Then continue.")
+    assert [text for text, _, _ in spans] == ["Note: Back up first.", "Then continue."]
+    assert spans[0][1:] == (0, 20)
+
+
+def test_single_sentence_block_returns_inner_html():
+    sentences = extract_sentences("<p>Click <strong>Save</strong> to continue.</p>")
+    assert sentences[0].text == "Click  Save  to continue."
+    assert sentences[0].html_fragment == "Click <strong>Save</strong> to continue."
+
+
+def test_fragments_are_sliced_with_inline_markup():
+    html = (
+        "<p><strong>Note:</strong> the file is <em>read-only</em>. "
+        "Use <code>chmod</code> to change it. Ask &amp; wait.</p>"
+    )
+    fragments = [s.html_fragment for s in extract_sentences(html)]
+    assert fragments == [
+        "<strong>Note:</strong> the file is <em>read-only</em>.",
+        "Use <code>chmod</code> to change it.",
+        "Ask &amp; wait.",
+    ]
+
+
+def test_offset_map_handles_entities_and_separators():
+    inner = "a &lt;b&gt; <i>c</i>"
+    text = BeautifulSoup(f"<p>{inner}</p>", "html.parser").p.get_text(separator=' ')
+    offset_map = BlockOffsetMap.build(inner, text)
+    assert offset_map is not None
+    start = text.index("<b>")
+    assert inner[offset_map.starts[start]:offset_map.ends[start + 2]] == "&lt;b&gt;"
+    assert offset_map.fragment(text.index("c"), len(text)) == "<i>c</i>"
+    assert BlockOffsetMap.build(inner, "different text") is None
@@ -0,0 +1,132 @@
+"""
+Tests for the terminology lexicon (app/rules/terminology_lexicon.py) and
+the checks that read their phrases from it.
+"""
+
+import sys
+import os
+import json
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rules import siemens_style_rules, vague_terms
+from app.rules.terminology_lexicon import TerminologyLexicon, get_terminology_lexicon, load_lexicon, tokenize
+
+ENTRIES = [
+    {"group": "terminology", "phrases": ["shut down"], "preferred": "power off", "lemma": True},
+    {"group": "terminology", "phrases": ["USB stick", "USB key"], "preferred": "USB drive"},
+    {"group": "style", "phrases": ["it is important", "it is"], "message": "Weak"},
+    {"group": "style", "phrases": ["e.g.", "can't"]},
+    {"group": "vague", "phrases": ["stuff"]},
+]
+
+
+class FakeSpan(list):
+    """spaCy Span stand-in: whitespace tokens with doc-relative idx and a lemma_."""
+
+    def __init__(self, text, lemmas, start_char=0):
+        position = 0
+        for word, lemma in zip(text.split(), lemmas):
+            position = text.index(word, position)
+            self.append(SimpleNamespace(text=word, idx=start_char + position, lemma_=lemma))
+            position += len(word)
+        self.text = text
+        self.start_char = start_char
+
+
+def test_tokenize_keeps_abbreviations_and_contractions():
+    assert [t for t, _, _ in tokenize("Don't use e.g. or master/slave, e-mail!")] == [
+        "Don't", "use", "e.g.", "or", "master/slave", ",", "e-mail", "!"]
+
+
+def test_match_is_case_insensitive_and_ordered():
+    lexicon = TerminologyLexicon(ENTRIES)
+    found = lexicon.match("Stuff: It is important to shut down the usb KEY, e.g. now.")
+    assert [(m.phrase, m.text) for m in found] == [
+        ("stuff", "Stuff"), ("it is", "It is"), ("it is important", "It is important"),
+        ("shut down", "shut down"), ("USB key", "usb KEY"), ("e.g.", "e.g.")]
+    assert [m.phrase for m in lexicon.match("It is fine.", group="style")] == ["it is"]
+    assert [m.phrase for m in lexicon.match("I can’t shutdown it")] == ["can't"]
+
+
+def test_compound_tokens_match_through_their_parts():
+    lexicon = TerminologyLexicon(ENTRIES + [{"group": "style", "phrases": ["master/slave", "his", "could"]}])
+    assert [m.text for m in lexicon.match("Ask his/her team.")] == ["his"]
+    assert [m.text for m in lexicon.match("Use master/slave-mode.")] == ["master/slave"]
+    assert [(m.text, m.start, m.end) for m in lexicon.match("It could-be stuff-like.")] == [
+        ("could", 3, 8), ("stuff", 12, 17)]
+    assert [(m.phrase, m.text) for m in lexicon.match("It is important-ish.")] == [
+        ("it is", "It is"), ("it is important", "It is important")]
+    # A part after the first only starts a phrase, and a separator is not a space
+    assert [m.phrase for m in lexicon.match("it is-important")] == ["it is"]
+    assert lexicon.match("USB-stick") == []
+
+
+def test_lemmas_only_apply_to_lemma_entries():
+    lexicon = TerminologyLexicon(ENTRIES)
+    text = "Shutting down USB sticks"
+    doc = FakeSpan(text, ["shut", "down", "usb", "stick"])
+    assert lexicon.match(text) == []
+    assert [m.text for m in lexicon.match(text, doc=doc)] == ["Shutting down"]
+
+    # Offsets of a sentence inside a larger Doc
+    sentence = FakeSpan("They shut stuff down.", ["they", "shut", "stuff", "down."], start_char=40)
+    assert [(m.phrase, m.start, m.end) for m in lexicon.match(sentence.text, doc=sentence)] == [("stuff", 10, 15)]
+
+
+def test_first_matches_reports_each_entry_once_in_lexicon_order():
+    lexicon = TerminologyLexicon(ENTRIES)
+    found = lexicon.first_matches("can't stuff, USB key and USB stick, e.g.", group=None)
+    assert [(m.entry.index, m.phrase) for m in found] == [(1, "USB key"), (3, "can't"), (4, "stuff")]
+
+
+def test_invalid_entries_are_skipped():
+    lexicon = TerminologyLexicon([{"phrases": ["x"]}, {"group": "g", "phrases": []}, {"group": "g", "phrases": ["ok"]}])
+    assert len(lexicon) == 1 and lexicon.entries[0].index == 0
+
+
+def test_load_lexicon_json_and_missing_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps({"entries": ENTRIES}), encoding="utf-8")
+    assert len(load_lexicon(str(path))) == len(ENTRIES)
+    assert len(load_lexicon(str(tmp_path / "missing.json"))) == 0
+
+
+def test_shipped_lexicon_drives_technical_style_check():
+    assert len(get_terminology_lexicon()) > 0
+    issues = siemens_style_rules.check("There are options, e.g. this one, and you should simply pick one.")
+    assert [issue["message"] for issue in issues] == [
+        "Technical Style: Avoid Latin abbreviations (e.g., i.e.)",
+        "Technical Style: Avoid 'simply' or 'it's very easy'",
+        "Technical Style: Avoid 'should' — it is ambiguous",
+        "Technical Style: Avoid weak expressions 'there is' / 'there are'",
+    ]
+    assert all(issue["rule"] == "technical_style" and issue["reviewer_rationale"] for issue in issues)
+    assert siemens_style_rules.check("Click Save.") == []
+
+
+def test_vague_terms_report_each_occurrence_per_sentence():
+    text = "Fix some things. Then stuff."
+    first = FakeSpan("Fix some things.", ["fix", "some", "thing", "."])
+    second = FakeSpan("Then stuff.", ["then", "stuff."], start_char=17)
+    doc = SimpleNamespace(sents=[first, second], text=text)
+    suggestions = vague_terms._process_vague_terms_chunk(doc, 0)
+    assert suggestions == [
+        "Avoid vague term 'some' in sentence: 'Fix some things.'",
+        "Avoid vague term 'things' in sentence: 'Fix some things.'",
+        "Avoid vague term 'stuff' in sentence: 'Then stuff.'",
+    ]
+
+
+def test_shipped_lexicon_flags_compound_words():
+    def messages(sentence):
+        return [issue["message"] for issue in siemens_style_rules.check(sentence)]
+
+    assert messages("Ask his/her manager.") == ["Technical Style: Use gender-neutral language"]
+    assert messages("Notify him/her.") == ["Technical Style: Use gender-neutral language"]
+    assert messages("The salesman's report is ready.") == ["Technical Style: Use gender-neutral language"]
+    assert messages("Enable master/slave-mode.") == ["Technical Style: Avoid 'master/slave'"]
+    assert messages("This could-be a problem.") == ["Technical Style: Avoid 'could' — it is ambiguous"]
+    assert messages("It is important-ish.") == ["Technical Style: Avoid weak expression 'it is [adjective]'"]
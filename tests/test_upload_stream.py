@@ -0,0 +1,78 @@
+"""
+Tests for streaming /upload results (?stream=ndjson and ?stream=sse).
+"""
+
+import sys
+import os
+import io
+import json
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app import create_app
+
+
+DOCUMENT = (
+    b"# Getting Started\n\n"
+    b"The configuration file was written by the installer. It is very simply done.\n\n"
+    b"You should click the Save button. There are several options.\n"
+)
+
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def upload(client, query=""):
+    return client.post('/upload' + query,
+                       data={'file': (io.BytesIO(DOCUMENT), 'guide.md')},
+                       content_type='multipart/form-data')
+
+
+def test_ndjson_stream_matches_regular_upload(client):
+    regular = upload(client).get_json()
+    response = upload(client, '?stream=ndjson')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert events[0]['event'] == 'document_review'
+    assert events[0]['content'] == regular['content']
+    assert events[0]['document_review'] == regular['document_review']
+    assert events[0]['total_sentences'] == len(regular['sentences'])
+
+    sentences = [event['sentence'] for event in events[1:-1]]
+    assert all(event['event'] == 'sentence' for event in events[1:-1])
+    assert sentences == regular['sentences']
+
+    assert events[-1]['event'] == 'report'
+    assert events[-1]['report'] == regular['report']
+    assert events[-1]['structural_insights'] == regular['report']['structural_insights']
+
+
+def test_sse_stream_uses_event_names(client):
+    response = upload(client, '?stream=sse')
+
+    assert response.mimetype == 'text/event-stream'
+    messages = [m for m in response.get_data(as_text=True).split('\n\n') if m]
+    names = [m.split('\n')[0] for m in messages]
+    assert names[0] == 'event: document_review'
+    assert names[-1] == 'event: report'
+    assert set(names[1:-1]) == {'event: sentence'}
+    assert json.loads(messages[-1].split('\n', 1)[1][len('data: '):])['event'] == 'report'
+
+
+def test_stream_errors_before_first_event_keep_status(client):
+    response = client.post('/upload?stream=ndjson',
+                           data={'file': (io.BytesIO(b"   \n"), 'empty.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()